@@ -3,18 +3,22 @@ Command-line interface for AWS Auto Inventory.
 """
 import os
 import sys
+import sqlite3
 import argparse
 import logging
-from typing import List, Optional
+import contextlib
+from typing import TYPE_CHECKING, List, Optional, TextIO
 
-import boto3
-
-from .config.loader import ConfigLoader
-from .config.validator import ConfigValidator
-from .core.scan_engine import ScanEngine
-from .output.processor import OutputProcessor
+from .output.sqlite import DATABASE_FILE
 from .utils.logging import setup_logging
 
+# boto3, pydantic and the scan engines are imported when a command first needs
+# them, so --help, argument errors and the query subcommand start quickly
+if TYPE_CHECKING:
+    from .config.models import Config
+    from .core.journal import ScanJournal
+    from .core.scan_engine import ScanEngine
+
 
 def check_aws_credentials(profile_name: Optional[str] = None) -> bool:
     """
@@ -26,6 +30,8 @@ def check_aws_credentials(profile_name: Optional[str] = None) -> bool:
     Returns:
         True if credentials are valid, False otherwise.
     """
+    import boto3
+    
     try:
         session = boto3.Session(profile_name=profile_name)
         sts = session.client("sts")
@@ -37,6 +43,54 @@ def check_aws_credentials(profile_name: Optional[str] = None) -> bool:
         return False
 
 
+def stream_results(
+    scan_engine: "ScanEngine", 
+    config: "Config", 
+    stream_output: str, 
+    logger: logging.Logger,
+    results_stream: Optional[TextIO] = None,
+    journal: Optional["ScanJournal"] = None,
+    compression: Optional[str] = None
+) -> int:
+    """
+    Scan and write each service result as NDJSON as soon as it completes.
+    
+    Args:
+        scan_engine: Scan engine to run.
+        config: Configuration to use for scanning.
+        stream_output: File to stream results to, or '-' for standard output.
+        logger: Logger.
+        results_stream: Stream to use when stream_output is '-'. Defaults to standard output.
+        journal: Checkpoint journal of the run.
+        compression: Compression of the stream output file, 'gzip' or 'zstd'.
+        
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    from .output.ndjson import NDJSONWriter
+    
+    logger.info("Starting streaming scan")
+    
+    if stream_output == "-" and results_stream is not None:
+        writer = NDJSONWriter(results_stream)
+    else:
+        writer = NDJSONWriter.open(stream_output, compression)
+    
+    try:
+        with writer:
+            for service_result in scan_engine.iter_results(config, journal):
+                writer.write(service_result)
+    except Exception as e:
+        logger.error(f"Error during scan: {e}")
+        print(f"Error during scan: {e}")
+        return 1
+    
+    logger.info(f"Streamed {writer.count} results")
+    print(f"Scan completed successfully. Streamed {writer.count} results")
+    
+    return 0
+
+
 def parse_args() -> argparse.Namespace:
     """
     Parse command-line arguments.
@@ -59,13 +113,50 @@ def parse_args() -> argparse.Namespace:
     )
     
     parser.add_argument(
-        "-f", "--format", choices=["json", "excel", "both"], default="json",
-        help="Output format (default: json)"
+        "-f", "--format", choices=["json", "excel", "both", "parquet", "sqlite"], default="json",
+        help="Output format. parquet writes a Hive-partitioned dataset and requires "
+             "pyarrow; sqlite writes an inventory.db index for the query subcommand "
+             "(default: json)"
+    )
+    
+    parser.add_argument(
+        "--stream", choices=["ndjson"], default=None,
+        help="Write each service result as soon as it completes instead of "
+             "building the output files at the end"
+    )
+    
+    parser.add_argument(
+        "--stream-output", default="-",
+        help="File to stream results to, or '-' for standard output (default: -)"
+    )
+    
+    parser.add_argument(
+        "--stream-compression", choices=["gzip", "zstd"], default=None,
+        help="Compress the --stream-output file as it is written. zstd requires "
+             "the zstandard package (default: no compression)"
+    )
+    
+    parser.add_argument(
+        "--engine", choices=["threads", "asyncio"], default="threads",
+        help="Scan engine: a pool of worker threads, or a single asyncio event loop "
+             "(requires aiobotocore) (default: threads)"
+    )
+    
+    parser.add_argument(
+        "--max-workers", type=int, default=None,
+        help="Maximum number of API calls to run concurrently across all accounts and regions "
+             "(default: 64 for threads, 256 for asyncio)"
+    )
+    
+    parser.add_argument(
+        "--max-accounts", type=int, default=None,
+        help="Maximum number of accounts to scan concurrently in organization scans; "
+             "roles are assumed this many at a time (default: no cap, 8 role assumptions at a time)"
     )
     
     parser.add_argument(
         "--max-regions", type=int, default=None,
-        help="Maximum number of regions to scan concurrently"
+        help="Maximum number of regions per account to scan at full service concurrency"
     )
     
     parser.add_argument(
@@ -83,6 +174,31 @@ def parse_args() -> argparse.Namespace:
         help="Base delay in seconds between retries (default: 2)"
     )
     
+    parser.add_argument(
+        "--availability-index", default=None,
+        help="Path to a service availability index built with "
+             "'python -m aws_auto_inventory.core.availability' (default: read from the installed botocore)"
+    )
+    
+    parser.add_argument(
+        "--no-availability-check", action="store_true",
+        help="Scan every sheet in every region, even where the service has no endpoint"
+    )
+    
+    parser.add_argument(
+        "--memory-budget", type=int, default=None, metavar="MB",
+        help="Keep at most MB megabytes of completed results in memory while building "
+             "json or both output; older results are compressed and spilled to a temporary "
+             "file in the output directory (default: keep every result in memory)"
+    )
+    
+    parser.add_argument(
+        "--resume", default=None, metavar="RUN_DIR",
+        help="Resume an interrupted scan whose output directory is RUN_DIR. Tasks listed in "
+             "its journal.jsonl are not scanned again; their results, kept in its results.bin, "
+             "are reused"
+    )
+    
     parser.add_argument(
         "--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         default="INFO", help="Logging level (default: INFO)"
@@ -90,12 +206,118 @@ def parse_args() -> argparse.Namespace:
     
     parser.add_argument(
         "--validate-only", action="store_true",
-        help="Validate configuration and exit without scanning"
+        help="Validate configuration against the botocore service models and exit without "
+             "scanning. Makes no network calls; profiles are looked up in the local AWS configuration"
     )
     
     return parser.parse_args()
 
 
+def parse_query_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the arguments of the query subcommand.
+    
+    Args:
+        argv: Arguments after the subcommand name. Defaults to the command line.
+        
+    Returns:
+        Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="aws-auto-inventory query",
+        description="Query the inventory index written by --format sqlite"
+    )
+    
+    parser.add_argument(
+        "-d", "--database", default=os.path.join("output", DATABASE_FILE),
+        help=f"Path to the inventory database (default: output/{DATABASE_FILE})"
+    )
+    
+    parser.add_argument("--id", help="Resource ID, such as i-0abc or a bucket name")
+    parser.add_argument("--arn", help="Resource ARN")
+    parser.add_argument("--inventory", help="Inventory name")
+    parser.add_argument("--account", help="Account ID")
+    parser.add_argument("--region", help="Region")
+    parser.add_argument("--service", help="Service name, such as ec2")
+    parser.add_argument("--function", help="API function name, such as describe_instances")
+    
+    parser.add_argument(
+        "--sql",
+        help="SQL statement to run instead of the filters, for example to query the JSON "
+             "body with json_extract(body, '$.Field'). The database is opened read-only"
+    )
+    
+    parser.add_argument(
+        "--limit", type=int, default=None,
+        help="Maximum number of resources to return"
+    )
+    
+    parser.add_argument(
+        "--output", choices=["table", "ndjson"], default="table",
+        help="table prints one tab-separated line per resource without its body; "
+             "ndjson prints full rows as JSON lines (default: table)"
+    )
+    
+    return parser.parse_args(argv)
+
+
+def run_query(args: argparse.Namespace, stream: Optional[TextIO] = None) -> int:
+    """
+    Run the query subcommand.
+    
+    Args:
+        args: Parsed query arguments.
+        stream: Stream to print results to. Defaults to standard output.
+        
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    from .output.ndjson import dumps
+    from .output.sqlite import InventoryIndex
+    
+    stream = stream or sys.stdout
+    
+    try:
+        with InventoryIndex(args.database) as index:
+            if args.sql:
+                rows = index.execute(args.sql)
+                columns = None
+            else:
+                rows = index.find(
+                    limit=args.limit,
+                    resource_id=args.id,
+                    arn=args.arn,
+                    inventory=args.inventory,
+                    account_id=args.account,
+                    region=args.region,
+                    service=args.service,
+                    function=args.function
+                )
+                columns = ["account_id", "region", "service", "function", "resource_id", "arn"]
+            
+            count = 0
+            for row in rows:
+                if args.output == "ndjson":
+                    stream.write(dumps(row).decode("utf-8"))
+                else:
+                    if columns is None:
+                        columns = list(row)
+                    if count == 0:
+                        stream.write("\t".join(columns))
+                        stream.write("\n")
+                    stream.write("\t".join("" if row[column] is None else str(row[column]) for column in columns))
+                stream.write("\n")
+                count += 1
+                if args.sql and args.limit is not None and count >= args.limit:
+                    break
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"Error querying inventory: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"{count} resources found", file=sys.stderr)
+    return 0
+
+
 def main() -> int:
     """
     Main entry point for AWS Auto Inventory.
@@ -103,11 +325,42 @@ def main() -> int:
     Returns:
         Exit code (0 for success, non-zero for error).
     """
+    # The query subcommand reads the index of an earlier scan
+    if sys.argv[1:2] == ["query"]:
+        return run_query(parse_query_args(sys.argv[2:]))
+    
     # Parse command-line arguments
     args = parse_args()
     
+    if args.stream and args.stream_output == "-":
+        # Results are streamed to standard output, so status messages go to standard error
+        results_stream = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            return run(args, results_stream)
+    
+    return run(args)
+
+
+def run(args: argparse.Namespace, results_stream: Optional[TextIO] = None) -> int:
+    """
+    Run AWS Auto Inventory with parsed arguments.
+    
+    Args:
+        args: Parsed command-line arguments.
+        results_stream: Stream to write streamed results to when --stream-output is '-'.
+        
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    from .config.loader import ConfigLoader
+    from .config.validator import ConfigValidator
+    from .core.journal import ScanJournal
+    
+    # A resumed scan writes to the directory of the interrupted one
+    output_dir = args.resume or args.output_dir
+    
     # Set up logging
-    log_dir = os.path.join(args.output_dir, "logs")
+    log_dir = os.path.join(output_dir, "logs")
     logger = setup_logging(log_dir, args.log_level)
     
     try:
@@ -123,7 +376,8 @@ def main() -> int:
         
         # Validate configuration
         logger.info("Validating configuration")
-        validator = ConfigValidator()
+        # Credentials are verified with STS before scanning, so validation stays offline
+        validator = ConfigValidator(offline=True)
         validation_errors = validator.validate(config)
         
         if validation_errors:
@@ -152,31 +406,99 @@ def main() -> int:
             formats.append("json")
         if args.format in ["excel", "both"]:
             formats.append("excel")
+        if args.format in ["parquet", "sqlite"]:
+            formats.append(args.format)
         
         # Create scan engine
-        scan_engine = ScanEngine(
-            max_retries=args.max_retries,
-            retry_delay=args.retry_delay,
-            max_workers_regions=args.max_regions,
-            max_workers_services=args.max_services
-        )
-        
-        # Run scan
-        logger.info("Starting scan")
+        from .core.async_engine import AsyncScanEngine
+        from .core.availability import AvailabilityIndex
+        from .core.scan_engine import ScanEngine
+        from .core.stats import STATS_FILE
+        
+        engine_class = AsyncScanEngine if args.engine == "asyncio" else ScanEngine
+        availability = None
+        if args.availability_index and not args.no_availability_check:
+            availability = AvailabilityIndex.load(args.availability_index)
+        
         try:
-            results = scan_engine.scan(config)
-        except Exception as e:
-            logger.error(f"Error during scan: {e}")
-            print(f"Error during scan: {e}")
+            scan_engine = engine_class(
+                max_retries=args.max_retries,
+                retry_delay=args.retry_delay,
+                max_workers_regions=args.max_regions,
+                max_workers_services=args.max_services,
+                max_workers=args.max_workers,
+                max_workers_accounts=args.max_accounts,
+                availability=availability,
+                check_availability=not args.no_availability_check,
+                # Call durations are kept across runs, next to their output
+                stats_path=os.path.join(args.output_dir, STATS_FILE),
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None,
+                spill_dir=output_dir
+            )
+        except ImportError as e:
+            logger.error(f"Error creating scan engine: {e}")
+            print(f"Error creating scan engine: {e}")
             return 1
         
-        # Process output
-        logger.info("Processing output")
-        output_processor = OutputProcessor()
-        output_processor.process(results, args.output_dir, formats)
+        # Completed tasks are journaled as their results land, so an
+        # interrupted scan can be resumed with --resume. Their results are
+        # kept in the run directory until the output has been written.
+        if args.resume:
+            logger.info(f"Resuming scan in {output_dir}")
+        journal = ScanJournal.open(output_dir, resume=bool(args.resume))
+        if len(journal):
+            print(f"Resuming scan: reusing {len(journal)} completed tasks")
+        
+        with journal:
+            if args.stream:
+                exit_code = stream_results(
+                    scan_engine, config, args.stream_output, logger, results_stream, journal,
+                    args.stream_compression
+                )
+                if exit_code == 0:
+                    journal.mark_complete()
+                    journal.discard_results()
+                return exit_code
+            
+            from .output.processor import OutputProcessor, STREAMING_FORMATS
+            output_processor = OutputProcessor()
+            
+            # Excel and Parquet files are written as results arrive; JSON
+            # documents need the whole scan result
+            if all(output_format in STREAMING_FORMATS for output_format in formats):
+                logger.info("Starting scan")
+                try:
+                    output_processor.stream(
+                        scan_engine.iter_results(config, journal), output_dir, formats, config
+                    )
+                except Exception as e:
+                    logger.error(f"Error during scan: {e}")
+                    print(f"Error during scan: {e}")
+                    return 1
+                
+                journal.mark_complete()
+                journal.discard_results()
+            else:
+                # Run scan
+                logger.info("Starting scan")
+                try:
+                    results = scan_engine.scan(config, journal)
+                except Exception as e:
+                    logger.error(f"Error during scan: {e}")
+                    print(f"Error during scan: {e}")
+                    return 1
+                
+                # Process output
+                logger.info("Processing output")
+                output_processor.process(results, output_dir, formats, config)
+                
+                # Only a run whose output was written is complete; otherwise
+                # a rerun resumes from the journal and writes it again
+                journal.mark_complete()
+                journal.discard_results()
         
         logger.info("Scan completed successfully")
-        print(f"Scan completed successfully. Results stored in {args.output_dir}")
+        print(f"Scan completed successfully. Results stored in {output_dir}")
         
         return 0
     
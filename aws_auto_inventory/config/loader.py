@@ -3,7 +3,6 @@ Configuration loader for AWS Auto Inventory.
 """
 import os
 import json
-import yaml
 from typing import Union, Dict, Any
 
 from .models import Config
@@ -35,6 +34,7 @@ class ConfigLoader:
         
         with open(path, 'r') as f:
             if format_type == 'yaml':
+                import yaml
                 config_data = yaml.safe_load(f)
             elif format_type == 'json':
                 config_data = json.load(f)
@@ -110,7 +110,8 @@ class ConfigLoader:
                                 "service": item['service'],
                                 "function": item['function'],
                                 "result_key": item.get('result_key'),
-                                "parameters": item.get('parameters', {})
+                                "parameters": item.get('parameters', {}),
+                                "paginate": item.get('paginate', True)
                             }
                             for item in config_data
                         ]
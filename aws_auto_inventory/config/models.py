@@ -1,7 +1,7 @@
 """
 Configuration models for AWS Auto Inventory.
 """
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Tuple
 from pydantic import BaseModel, Field
 
 
@@ -11,12 +11,31 @@ class ExcelConfig(BaseModel):
     formatting: Dict[str, Any] = Field(default_factory=dict)
 
 
+class RateLimit(BaseModel):
+    """Request quota for a service or service operation."""
+    rate: float
+    burst: Optional[float] = None
+    
+    def as_quota(self) -> Tuple[float, float]:
+        """Convert to a (rate, burst) quota tuple."""
+        return self.rate, self.burst if self.burst is not None else max(self.rate, 1.0)
+
+
 class AWSConfig(BaseModel):
     """AWS configuration."""
     profile: Optional[str] = None
     region: List[str] = Field(default_factory=lambda: ["us-east-1"])
     organization: bool = False
     role_name: str = "OrganizationAccountAccessRole"
+    rate_limits: Dict[str, RateLimit] = Field(default_factory=dict)
+
+
+class FanOut(BaseModel):
+    """IDs from the results of a parent sheet, passed to a dependent sheet's function."""
+    sheet: str
+    ids: str
+    parameter: str
+    batch_size: Optional[int] = None
 
 
 class Sheet(BaseModel):
@@ -26,6 +45,8 @@ class Sheet(BaseModel):
     function: str
     result_key: Optional[str] = None
     parameters: Dict[str, Any] = Field(default_factory=dict)
+    paginate: bool = True
+    fan_out: Optional[FanOut] = None
 
 
 class Inventory(BaseModel):
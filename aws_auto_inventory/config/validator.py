@@ -1,17 +1,85 @@
 """
 Configuration validator for AWS Auto Inventory.
+
+Services, functions and parameters are checked against the service models
+bundled with botocore, so sheets are validated without creating clients or
+calling AWS.
 """
-import boto3
-from typing import List, Optional, Dict, Any
+import threading
+import concurrent.futures
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+
+import botocore.session
+from botocore import xform_name
+from botocore.exceptions import UnknownServiceError
+from botocore.model import ServiceModel, Shape
+from botocore.validate import ParamValidator
 
+from ..core.extraction import compile_jq
 from .models import Config, Inventory, Sheet
 
+# Prefixes of the read-only functions a sheet may call
+READ_ONLY_PREFIXES = ('describe_', 'get_', 'list_')
+
+
+def _placeholder(shape: Shape) -> Any:
+    """
+    Build a value of a parameter shape, standing in for IDs filled in at scan time.
+    """
+    if shape.type_name == 'list':
+        return [_placeholder(shape.member)]
+    if shape.type_name in ('integer', 'long'):
+        return 1
+    return 'id'
+
 
 class ConfigValidator:
     """
     Validates AWS Auto Inventory configurations.
+    
+    Each service model is loaded once, on a thread pool, and shared by all
+    sheets of the service. Sheets are checked for a known service, an
+    existing read-only function, and parameters that match the function's
+    input shape, including its required parameters. Dependent sheets are also
+    checked for an existing parent and fan-out parameter.
+    
+    In offline mode, profiles are looked up in the local AWS configuration
+    instead of being verified with STS, so validation makes no network calls.
     """
     
+    def __init__(
+        self,
+        offline: bool = False,
+        max_workers: Optional[int] = None,
+        session: Optional[botocore.session.Session] = None
+    ):
+        """
+        Initialize configuration validator.
+        
+        Args:
+            offline: Validate without network access.
+            max_workers: Number of threads loading service models. Defaults to
+                         the thread pool default.
+            session: botocore session providing the service models. If None,
+                     a new session is created.
+        """
+        self.offline = offline
+        self.max_workers = max_workers
+        self._session = session
+        self._lock = threading.Lock()
+        # Service model and client method names by service; None for unknown services
+        self._models: Dict[str, Optional[Tuple[ServiceModel, Dict[str, str]]]] = {}
+    
+    @property
+    def session(self) -> botocore.session.Session:
+        """
+        botocore session providing the service models.
+        """
+        with self._lock:
+            if self._session is None:
+                self._session = botocore.session.get_session()
+            return self._session
+    
     def validate(self, config: Config) -> List[str]:
         """
         Validate a configuration.
@@ -29,6 +97,14 @@ class ConfigValidator:
             errors.append("No inventories defined in configuration")
             return errors
         
+        # Load the model of every service up front, in parallel
+        self.load_models(
+            sheet.service
+            for inventory in config.inventories
+            for sheet in inventory.sheets
+            if sheet.service
+        )
+        
         # Validate each inventory
         for inventory in config.inventories:
             inventory_errors = self._validate_inventory(inventory)
@@ -36,6 +112,39 @@ class ConfigValidator:
         
         return errors
     
+    def load_models(self, services: Iterable[str]) -> None:
+        """
+        Load the models of services that are not loaded yet.
+        
+        Args:
+            services: boto3 service names.
+        """
+        missing = [service for service in dict.fromkeys(services) if service not in self._models]
+        if not missing:
+            return
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for service, model in zip(missing, executor.map(self._load_model, missing)):
+                self._models[service] = model
+    
+    def _load_model(self, service: str) -> Optional[Tuple[ServiceModel, Dict[str, str]]]:
+        """
+        Load the model of a service.
+        
+        Args:
+            service: boto3 service name.
+            
+        Returns:
+            Service model and the operation name of each client method, or
+            None if botocore does not know the service.
+        """
+        try:
+            model = self.session.get_service_model(service)
+        except UnknownServiceError:
+            return None
+        
+        return model, {xform_name(operation): operation for operation in model.operation_names}
+    
     def _validate_inventory(self, inventory: Inventory) -> List[str]:
         """
         Validate an inventory configuration.
@@ -58,8 +167,11 @@ class ConfigValidator:
         errors.extend(aws_errors)
         
         # Validate each sheet
+        sheets = {sheet.name: sheet for sheet in inventory.sheets}
         for sheet in inventory.sheets:
             sheet_errors = self._validate_sheet(sheet)
+            if sheet.fan_out is not None:
+                sheet_errors.extend(self._validate_fan_out(sheet, sheets))
             errors.extend([f"Sheet '{sheet.name}': {error}" for error in sheet_errors])
         
         return errors
@@ -81,7 +193,12 @@ class ConfigValidator:
             errors.append("No regions specified")
         
         # Check if profile exists (if specified)
-        if inventory.aws.profile:
+        if inventory.aws.profile and self.offline:
+            if inventory.aws.profile not in self.session.available_profiles:
+                errors.append(f"AWS profile '{inventory.aws.profile}' is not configured")
+        elif inventory.aws.profile:
+            import boto3
+            
             try:
                 session = boto3.Session(profile_name=inventory.aws.profile)
                 # Try to get caller identity to verify credentials
@@ -111,19 +228,82 @@ class ConfigValidator:
         if not sheet.function:
             errors.append("No function specified")
         
-        # Check if service and function exist in boto3
-        try:
-            session = boto3.Session()
-            if sheet.service not in session.get_available_services():
-                errors.append(f"Invalid AWS service: {sheet.service}")
+        if not sheet.service or not sheet.function:
+            return errors
+        
+        # Check if service and function exist in the service model
+        self.load_models([sheet.service])
+        loaded = self._models[sheet.service]
+        if loaded is None:
+            errors.append(f"Invalid AWS service: {sheet.service}")
+            return errors
+        
+        model, operations = loaded
+        operation = operations.get(sheet.function)
+        if operation is None:
+            errors.append(f"Function '{sheet.function}' does not exist for service '{sheet.service}'")
+            return errors
+        
+        if not sheet.function.startswith(READ_ONLY_PREFIXES):
+            errors.append(f"Function '{sheet.function}' is not a read-only operation")
+        
+        # Check parameters the way botocore does before sending a request
+        input_shape = model.operation_model(operation).input_shape
+        parameters = sheet.parameters
+        
+        if sheet.fan_out is not None:
+            members = input_shape.members if input_shape is not None else {}
+            if sheet.fan_out.parameter not in members:
+                errors.append(
+                    f"Fan-out parameter '{sheet.fan_out.parameter}' does not exist for function '{sheet.function}'"
+                )
             else:
-                # Check if function exists
-                client = session.client(sheet.service, region_name='us-east-1')
-                if not hasattr(client, sheet.function):
-                    errors.append(f"Function '{sheet.function}' does not exist for service '{sheet.service}'")
-                elif not sheet.function.startswith(('describe_', 'get_', 'list_')):
-                    errors.append(f"Function '{sheet.function}' is not a read-only operation")
-        except Exception as e:
-            errors.append(f"Error validating service and function: {str(e)}")
-        
-        return errors
\ No newline at end of file
+                parameters = {**parameters, sheet.fan_out.parameter: _placeholder(members[sheet.fan_out.parameter])}
+        
+        if input_shape is None:
+            if sheet.parameters:
+                errors.append(f"Function '{sheet.function}' does not take parameters")
+        else:
+            report = ParamValidator().validate(parameters, input_shape)
+            if report.has_errors():
+                errors.extend(f"Invalid parameters: {error}" for error in report.generate_report().splitlines())
+        
+        return errors
+    
+    def _validate_fan_out(self, sheet: Sheet, sheets: Dict[str, Sheet]) -> List[str]:
+        """
+        Validate the fan-out configuration of a dependent sheet.
+        
+        Args:
+            sheet: Dependent sheet to validate.
+            sheets: Sheets of the inventory, by name.
+            
+        Returns:
+            List of validation errors. Empty list if the fan-out is valid.
+        """
+        errors = []
+        fan_out = sheet.fan_out
+        
+        if fan_out.sheet not in sheets:
+            errors.append(f"Parent sheet '{fan_out.sheet}' does not exist")
+        else:
+            # Sheets in a cycle never run, since none of them is scanned first
+            seen = {sheet.name}
+            parent = sheets[fan_out.sheet]
+            while parent is not None:
+                if parent.name in seen:
+                    errors.append(f"Sheet '{parent.name}' depends on itself through its parent sheets")
+                    break
+                seen.add(parent.name)
+                parent = sheets.get(parent.fan_out.sheet) if parent.fan_out is not None else None
+        
+        if fan_out.ids.startswith('.'):
+            try:
+                compile_jq(fan_out.ids)
+            except ValueError as e:
+                errors.append(f"Invalid fan-out ids filter '{fan_out.ids}': {str(e).splitlines()[0]}")
+        
+        if fan_out.batch_size is not None and fan_out.batch_size < 1:
+            errors.append("Fan-out batch_size must be at least 1")
+        
+        return errors
@@ -0,0 +1,573 @@
+"""
+Async AWS client with retry logic for AWS Auto Inventory.
+
+The async engine depends on aiobotocore, which is an optional dependency
+installed with ``pip install aws-auto-inventory[async]``.
+"""
+import asyncio
+import logging
+import datetime
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import boto3
+import botocore
+
+from .aws_client import AWSClientError, ThrottlingError
+from .client_factory import ClientFactory
+from .extraction import extract_result
+from .pagination import aiter_pages, get_pagination_config, merge_results
+from .rate_limiter import RateLimiter
+from .single_flight import SingleFlight
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def import_aiobotocore() -> Any:
+    """
+    Import the aiobotocore session module.
+
+    Returns:
+        The aiobotocore.session module.
+
+    Raises:
+        ImportError: If aiobotocore is not installed.
+    """
+    try:
+        import aiobotocore.session
+    except ImportError as error:
+        raise ImportError(
+            "The asyncio engine requires aiobotocore. "
+            "Install it with: pip install aws-auto-inventory[async]"
+        ) from error
+
+    return aiobotocore.session
+
+
+# Lifetime assumed for refreshable credentials whose expiry cannot be read.
+# aiobotocore refreshes credentials 15 minutes before they expire, so these
+# are read again from boto3 every five minutes
+FALLBACK_CREDENTIALS_LIFETIME = datetime.timedelta(minutes=20)
+
+
+class _CredentialsProvider:
+    """
+    aiobotocore credential provider that returns credentials resolved elsewhere.
+    """
+
+    METHOD = "aws-auto-inventory"
+
+    def __init__(self, credentials: Any):
+        self.credentials = credentials
+
+    async def load(self) -> Any:
+        return self.credentials
+
+
+async def refreshable_credentials(credentials: Any) -> Any:
+    """
+    Wrap refreshable boto3 credentials for aiobotocore.
+
+    aiobotocore refreshes the wrapper shortly before the credentials expire,
+    by reading the boto3 credentials again in the loop's executor. boto3
+    refreshes those itself, e.g. from SSO, an assumed role or the instance
+    metadata service, so async clients keep working for as long as the
+    thread engine's do. botocore has no public accessor for the expiry of
+    refreshable credentials; if it cannot be read, the wrapper is refreshed
+    every few minutes instead, which boto3 answers from its own cache until
+    its credentials need refreshing.
+
+    Args:
+        credentials: botocore RefreshableCredentials of a boto3 Session.
+
+    Returns:
+        aiobotocore AioRefreshableCredentials.
+    """
+    from aiobotocore.credentials import AioRefreshableCredentials
+
+    async def refresh() -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        frozen = await loop.run_in_executor(None, credentials.get_frozen_credentials)
+        expiry = getattr(credentials, "_expiry_time", None)
+        if not isinstance(expiry, datetime.datetime):
+            expiry = datetime.datetime.now(datetime.timezone.utc) + FALLBACK_CREDENTIALS_LIFETIME
+        return {
+            "access_key": frozen.access_key,
+            "secret_key": frozen.secret_key,
+            "token": frozen.token,
+            "expiry_time": expiry.isoformat(),
+        }
+
+    return AioRefreshableCredentials.create_from_metadata(
+        await refresh(),
+        refresh_using=refresh,
+        method=credentials.method
+    )
+
+
+class AsyncClientFactory:
+    """
+    Cache of aiobotocore clients keyed by credentials, service and region.
+
+    Clients are bound to the event loop they are created on, so a factory must
+    only be used from one loop and closed on that loop when the scan is done.
+    Each credential identity gets its own aiobotocore session, sharing one
+    service model loader, so that refreshable credentials are refreshed for
+    all of its clients.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: Optional[int] = None,
+        endpoint_url: Optional[str] = None
+    ):
+        """
+        Initialize async client factory.
+
+        Args:
+            max_pool_connections: Size of each client's connection pool. If None,
+                                  uses the aiobotocore default.
+            endpoint_url: Endpoint URL for all clients, e.g. a local moto server.
+        """
+        aiobotocore_session = import_aiobotocore()
+
+        self.max_pool_connections = max_pool_connections
+        self.endpoint_url = endpoint_url
+        self._aiobotocore_session = aiobotocore_session
+        self._session = aiobotocore_session.get_session()
+        # Only the credential identity cache of the thread-safe factory is used
+        self._identities = ClientFactory()
+        # Identities resolved off the loop, by session
+        self._resolved = weakref.WeakKeyDictionary()
+        self._sessions: Dict[Hashable, Any] = {}
+        self._clients: Dict[Tuple[Hashable, str, Optional[str]], Any] = {}
+        self._pending: Dict[Tuple[Hashable, str, Optional[str]], asyncio.Future] = {}
+
+    def get_identity(self, session: boto3.Session) -> Hashable:
+        """
+        Get the credential identity clients of a session are cached under.
+
+        Args:
+            session: boto3 Session.
+
+        Returns:
+            Hashable credential identity.
+        """
+        identity = self._resolved.get(session)
+        if identity is None:
+            identity = self._identities.get_identity(session)
+        return identity
+
+    async def resolve_identity(self, session: boto3.Session) -> Hashable:
+        """
+        Get the credential identity of a session without blocking the loop.
+
+        Resolving a session's credentials the first time may read files or
+        call STS or SSO, so it runs in the loop's executor.
+
+        Args:
+            session: boto3 Session.
+
+        Returns:
+            Hashable credential identity.
+        """
+        identity = self._resolved.get(session)
+        if identity is None:
+            loop = asyncio.get_running_loop()
+            identity = await loop.run_in_executor(None, self._identities.get_identity, session)
+            self._resolved[session] = identity
+        return identity
+
+    async def get_client(self, session: boto3.Session, service: str, region: Optional[str] = None) -> Any:
+        """
+        Get a client for a service in a region, creating it on first use.
+
+        Clients use the credentials of the boto3 session, refreshing them
+        when they are refreshable, so sessions from assumed roles, SSO and
+        profiles all work.
+
+        Args:
+            session: boto3 Session providing the credentials.
+            service: AWS service name.
+            region: AWS region.
+
+        Returns:
+            aiobotocore client.
+        """
+        identity = await self.resolve_identity(session)
+        key = (identity, service, region)
+
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        # Concurrent requests for the same client wait for the first one to create it
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._pending[key] = pending
+
+        try:
+            client = await self._create_client(session, identity, service, region)
+        except Exception as error:
+            pending.set_exception(error)
+            # Mark the exception as retrieved when nobody else was waiting
+            pending.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+        self._clients[key] = client
+        pending.set_result(client)
+        return client
+
+    async def evict(self, session: boto3.Session) -> int:
+        """
+        Close the cached clients of a session's credentials, e.g. once its account is scanned.
+
+        Args:
+            session: boto3 Session whose clients to close.
+
+        Returns:
+            Number of clients closed.
+        """
+        identity = self._resolved.pop(session, None)
+        if identity is None:
+            return 0
+
+        keys = [key for key in self._clients if key[0] == identity]
+        for key in keys:
+            await self._close_client(self._clients.pop(key))
+        self._sessions.pop(identity, None)
+
+        logger.debug(f"Closed {len(keys)} cached async clients")
+        return len(keys)
+
+    async def close(self) -> None:
+        """
+        Close all cached clients.
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._sessions.clear()
+
+        for client in clients:
+            await self._close_client(client)
+
+    async def _close_client(self, client: Any) -> None:
+        """
+        Close a client's connections, logging rather than raising failures.
+        """
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as error:
+            logger.debug(f"Failed to close async client: {error}")
+
+    async def _create_client(
+        self,
+        session: boto3.Session,
+        identity: Hashable,
+        service: str,
+        region: Optional[str]
+    ) -> Any:
+        """
+        Create and open a client.
+
+        Args:
+            session: boto3 Session providing the credentials.
+            identity: Credential identity of the session.
+            service: AWS service name.
+            region: AWS region.
+
+        Returns:
+            aiobotocore client.
+        """
+        from aiobotocore.config import AioConfig
+
+        logger.debug(f"Creating async client for service {service} in region {region}")
+
+        config = None
+        if self.max_pool_connections is not None:
+            config = AioConfig(max_pool_connections=self.max_pool_connections)
+
+        aio_session, credential_kwargs = await self._get_session(session, identity)
+
+        return await aio_session.create_client(
+            service,
+            region_name=region or session.region_name,
+            endpoint_url=self.endpoint_url,
+            config=config,
+            **credential_kwargs
+        ).__aenter__()
+
+    async def _get_session(self, session: boto3.Session, identity: Hashable) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Get the aiobotocore session of a credential identity.
+
+        Returns:
+            The aiobotocore session, and the credential arguments of its clients.
+            Static credentials are passed to each client; refreshable ones are
+            provided by the aiobotocore session.
+        """
+        # Resolving credentials may read files or call STS, so keep it off the loop
+        loop = asyncio.get_running_loop()
+        credentials = await loop.run_in_executor(None, session.get_credentials)
+
+        if credentials is None or not hasattr(credentials, "refresh_needed"):
+            credential_kwargs = {}
+            if credentials is not None:
+                frozen = await loop.run_in_executor(None, credentials.get_frozen_credentials)
+                credential_kwargs = {
+                    "aws_access_key_id": frozen.access_key,
+                    "aws_secret_access_key": frozen.secret_key,
+                    "aws_session_token": frozen.token,
+                }
+            return self._session, credential_kwargs
+
+        aio_session = self._sessions.get(identity)
+        if aio_session is None:
+            from aiobotocore.credentials import AioCredentialResolver
+
+            aio_session = self._aiobotocore_session.get_session()
+            # Service models are loaded once for every identity
+            aio_session.register_component("data_loader", self._session.get_component("data_loader"))
+            aio_session.register_component(
+                "credential_provider",
+                AioCredentialResolver([_CredentialsProvider(await refreshable_credentials(credentials))])
+            )
+            self._sessions[identity] = aio_session
+
+        return aio_session, {}
+
+
+class AsyncAWSClient:
+    """
+    Async AWS client with retry logic for API calls.
+    """
+
+    def __init__(
+        self,
+        session: boto3.Session,
+        client_factory: AsyncClientFactory,
+        max_retries: int = 3,
+        retry_delay: int = 2,
+        rate_limiter: Optional[RateLimiter] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        """
+        Initialize async AWS client.
+
+        Args:
+            session: boto3 Session providing the credentials.
+            client_factory: Async client cache.
+            max_retries: Maximum number of retries for API calls.
+            retry_delay: Base delay (in seconds) between retries.
+            rate_limiter: Shared rate limiter. If None, requests are not rate limited.
+            single_flight: Registry of calls made more than once in a scan. If None,
+                           every call is sent.
+        """
+        self.session = session
+        self.client_factory = client_factory
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+
+    async def call_api(
+        self,
+        service: str,
+        function_name: str,
+        region: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        result_key: Optional[str] = None,
+        paginate: bool = True,
+        on_page: Optional[Callable[[Any], None]] = None,
+        call_key: Optional[Tuple[Hashable, Hashable]] = None
+    ) -> Any:
+        """
+        Call AWS API with retry logic.
+
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+            parameters: API parameters.
+            result_key: Key to extract from the response.
+            paginate: Whether to fetch all pages when the operation can be paginated.
+            on_page: Function called with the extracted data of each page as it arrives.
+            call_key: Account and call key from single_flight.call_key. Calls made
+                      more than once in the scan are sent once and share their pages.
+
+        Returns:
+            API response or extracted data if result_key is specified.
+
+        Raises:
+            AWSClientError: If the API call fails after all retries.
+        """
+        results = []
+
+        def add_page(page: Dict[str, Any]) -> None:
+            try:
+                result = extract_result(page, result_key)
+            except Exception as error:
+                logger.error(f"Unexpected error for {service}.{function_name}: {error}")
+                raise AWSClientError(f"Unexpected error: {error}")
+
+            if on_page is not None:
+                on_page(result)
+            results.append(result)
+
+        if self.single_flight is not None and self.single_flight.is_shared(call_key):
+            pages = self.single_flight.apages(
+                call_key,
+                lambda: self.iter_pages(service, function_name, region, parameters, paginate)
+            )
+            try:
+                async for page in pages:
+                    add_page(page)
+            finally:
+                # Let the other callers know at once if this one stops early
+                await pages.aclose()
+        else:
+            async for page in self.iter_pages(service, function_name, region, parameters, paginate):
+                add_page(page)
+
+        return merge_results(results)
+
+    async def iter_pages(
+        self,
+        service: str,
+        function_name: str,
+        region: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        paginate: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Call AWS API with retry logic, yielding raw responses page by page.
+
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+            parameters: API parameters.
+            paginate: Whether to fetch all pages when the operation can be paginated.
+
+        Yields:
+            Raw API responses.
+
+        Raises:
+            AWSClientError: If an API call fails after all retries.
+        """
+        client = await self.client_factory.get_client(self.session, service, region)
+
+        if not hasattr(client, function_name):
+            raise AWSClientError(f"Function {function_name} does not exist for service {service}")
+
+        function_to_call = getattr(client, function_name)
+
+        if self.rate_limiter is not None:
+            function_to_call = self._rate_limited(function_to_call, service, function_name, region)
+
+        async def call(**kwargs):
+            return await self._call_with_retry(service, function_name, function_to_call, kwargs)
+
+        pagination_config = get_pagination_config(client, function_name) if paginate else None
+
+        if pagination_config is None:
+            yield await call(**(parameters or {}))
+        else:
+            async for page in aiter_pages(call, pagination_config, parameters):
+                yield page
+
+    def _rate_limited(
+        self,
+        function_to_call: Callable[..., Awaitable[Dict[str, Any]]],
+        service: str,
+        function_name: str,
+        region: Optional[str]
+    ) -> Callable[..., Awaitable[Dict[str, Any]]]:
+        """
+        Wrap a client method so that every request, including retries, waits for a token.
+
+        Args:
+            function_to_call: Bound client coroutine method.
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+
+        Returns:
+            Rate-limited client coroutine method.
+        """
+        account = self.client_factory.get_identity(self.session)
+
+        async def rate_limited_call(**kwargs):
+            await self.rate_limiter.acquire_async(service, function_name, region, account)
+            return await function_to_call(**kwargs)
+
+        return rate_limited_call
+
+    async def _call_with_retry(
+        self,
+        service: str,
+        function_name: str,
+        function_to_call: Callable[..., Awaitable[Dict[str, Any]]],
+        parameters: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Make a single API request with retry logic.
+
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            function_to_call: Bound client coroutine method.
+            parameters: API parameters.
+
+        Returns:
+            API response.
+
+        Raises:
+            AWSClientError: If the API call fails after all retries.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                return await function_to_call(**(parameters or {}))
+
+            except botocore.exceptions.ClientError as error:
+                error_code = error.response["Error"]["Code"]
+                if error_code in ["Throttling", "RequestLimitExceeded"]:
+                    if attempt < (self.max_retries - 1):
+                        wait_time = self.retry_delay ** attempt
+                        logger.warning(
+                            f"Throttling for {service}.{function_name}, retrying in {wait_time}s "
+                            f"(attempt {attempt + 1}/{self.max_retries})"
+                        )
+                        await asyncio.sleep(wait_time)
+                        continue
+                    else:
+                        raise ThrottlingError(service, function_name)
+                else:
+                    logger.error(f"AWS API error for {service}.{function_name}: {error}")
+                    raise AWSClientError(f"AWS API error: {error}")
+            except botocore.exceptions.BotoCoreError as error:
+                if attempt < (self.max_retries - 1):
+                    wait_time = self.retry_delay ** attempt
+                    logger.warning(
+                        f"BotoCore error for {service}.{function_name}, retrying in {wait_time}s "
+                        f"(attempt {attempt + 1}/{self.max_retries})"
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+                else:
+                    logger.error(f"BotoCore error for {service}.{function_name}: {error}")
+                    raise AWSClientError(f"BotoCore error: {error}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.error(f"Unexpected error for {service}.{function_name}: {error}")
+                raise AWSClientError(f"Unexpected error: {error}")
+
+        # This should not be reached, but just in case
+        raise AWSClientError(f"Failed to call {service}.{function_name} after {self.max_retries} attempts")
@@ -0,0 +1,312 @@
+"""
+Asyncio scanning engine for AWS Auto Inventory.
+"""
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Iterator, Optional, Tuple
+
+import boto3
+
+from .async_client import AsyncAWSClient, AsyncClientFactory, import_aiobotocore
+from .availability import AvailabilityIndex
+from .aws_client import AWSClientError
+from .client_factory import pool_size_for_workers
+from .scan_engine import ScanEngine
+from .scheduler import ScanTask, TaskQueue
+from .service import ServiceResult
+from .stats import CallTimer
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default global number of concurrent API calls for the asyncio engine
+DEFAULT_MAX_IN_FLIGHT = 256
+
+
+class EventLoopExecutor(concurrent.futures.Executor):
+    """
+    Executor that runs coroutine functions on an event loop in a background thread.
+
+    Submitting returns a concurrent.futures.Future, so the executor can be
+    driven by TaskScheduler like a thread pool.
+    """
+
+    def __init__(self):
+        """
+        Initialize event loop executor and start its loop thread.
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="aws-auto-inventory-event-loop", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine function on the event loop.
+
+        Args:
+            fn: Coroutine function.
+            *args: Positional arguments for fn.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            Future of the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), self.loop)
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """
+        Run a coroutine on the event loop and wait for its result.
+
+        Args:
+            coroutine: Coroutine to run.
+
+        Returns:
+            Result of the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Cancel outstanding coroutines and stop the event loop.
+
+        Args:
+            wait: Whether to wait for the loop thread to finish.
+            cancel_futures: Unused; outstanding coroutines are always cancelled.
+        """
+        if self.loop.is_closed() or not self._thread.is_alive():
+            return
+
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+        if wait:
+            self._thread.join()
+
+    def _run_loop(self) -> None:
+        """
+        Run the event loop until it is stopped, then close it.
+        """
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    async def _cancel_tasks(self) -> None:
+        """
+        Cancel all tasks on the loop other than the current one.
+        """
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncScanEngine(ScanEngine):
+    """
+    Scanning engine that runs all API calls on a single asyncio event loop.
+
+    Tasks are planned and capped by the same TaskScheduler as ScanEngine, but
+    each one runs as a coroutine with aiobotocore clients instead of occupying
+    a worker thread, so far more requests can be in flight for the same memory.
+    Requires the optional aiobotocore dependency.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        retry_delay: int = 2,
+        max_workers_regions: Optional[int] = None,
+        max_workers_services: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_workers_per_account: Optional[int] = None,
+        max_workers_accounts: Optional[int] = None,
+        availability: Optional[AvailabilityIndex] = None,
+        check_availability: bool = True,
+        stats_path: Optional[str] = None,
+        memory_budget: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        endpoint_url: Optional[str] = None
+    ):
+        """
+        Initialize asyncio scan engine.
+
+        Args:
+            max_retries: Maximum number of retries for API calls.
+            retry_delay: Base delay (in seconds) between retries.
+            max_workers_regions: Maximum number of regions of an account scanned at full
+                                 service concurrency. Together with max_workers_services,
+                                 caps the concurrent tasks per account.
+            max_workers_services: Maximum number of concurrent tasks in one region of an account.
+            max_workers: Global maximum number of concurrent tasks (default: 256).
+            max_workers_per_account: Maximum number of concurrent tasks in one account.
+                                     Overrides the cap derived from max_workers_regions.
+            max_workers_accounts: Maximum number of accounts scanned at once in organization
+                                  scans, which is also the number of roles assumed concurrently.
+            availability: Service availability index. If None, one is built lazily from
+                          botocore's bundled endpoint data.
+            check_availability: Whether to skip sheets whose service has no endpoint in a region
+                                and make global calls once per account.
+            stats_path: File of call durations from earlier runs, updated when each scan
+                        ends. If None, durations are only kept for the engine's lifetime.
+            memory_budget: Maximum number of bytes of packed results scan() keeps in
+                           memory. Older results are spilled to a temporary file. If
+                           None, results are kept in memory as they are.
+            spill_dir: Directory of the temporary file of spilled results. If None,
+                       the system's temporary directory is used.
+            endpoint_url: Endpoint URL for all clients, e.g. a local moto server.
+
+        Raises:
+            ImportError: If aiobotocore is not installed.
+        """
+        import_aiobotocore()
+
+        super().__init__(
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            max_workers_regions=max_workers_regions,
+            max_workers_services=max_workers_services,
+            max_workers=max_workers or DEFAULT_MAX_IN_FLIGHT,
+            max_workers_per_account=max_workers_per_account,
+            max_workers_accounts=max_workers_accounts,
+            availability=availability,
+            check_availability=check_availability,
+            stats_path=stats_path,
+            memory_budget=memory_budget,
+            spill_dir=spill_dir
+        )
+        self.endpoint_url = endpoint_url
+        # Event loop and client cache of the current run
+        self._loop_clients: Optional[Tuple[EventLoopExecutor, AsyncClientFactory]] = None
+
+    def _release_session(self, session: boto3.Session) -> None:
+        """
+        Close the async clients of an account whose tasks have all completed.
+
+        Args:
+            session: boto3 Session of the account.
+        """
+        super()._release_session(session)
+        if self._loop_clients is not None:
+            executor, client_factory = self._loop_clients
+            executor.submit(client_factory.evict, session)
+
+    def _iter_task_results(
+        self,
+        tasks: Iterator[ScanTask],
+        queue: Optional[TaskQueue] = None
+    ) -> Iterator[Tuple[ScanTask, ServiceResult]]:
+        """
+        Run tasks as coroutines on an event loop, yielding each result as it completes.
+
+        Args:
+            tasks: Scan tasks.
+            queue: Queue of tasks added while the tasks run.
+
+        Yields:
+            Tuples of task and its service result, in completion order.
+        """
+        with EventLoopExecutor() as executor:
+            # aiobotocore clients belong to the loop, so each run has its own cache
+            client_factory = AsyncClientFactory(
+                max_pool_connections=pool_size_for_workers(
+                    self.max_workers_services or self.scheduler.max_workers
+                ),
+                endpoint_url=self.endpoint_url
+            )
+
+            async def scan_task(task: ScanTask) -> ServiceResult:
+                return await self._scan_task_async(task, client_factory)
+
+            self._loop_clients = (executor, client_factory)
+            try:
+                for task, future in self.scheduler.run(tasks, scan_task, executor, queue):
+                    yield task, self._task_result(task, future)
+            finally:
+                self._loop_clients = None
+                executor.run(client_factory.close())
+
+    async def _scan_task_async(self, task: ScanTask, client_factory: AsyncClientFactory) -> ServiceResult:
+        """
+        Scan the sheet of a task.
+
+        Args:
+            task: Scan task.
+            client_factory: Async client cache of the current event loop.
+
+        Returns:
+            Service scan result.
+        """
+        sheet = task.sheet
+        region = task.region
+
+        logger.info(
+            f"Scanning service {sheet.service} with function {sheet.function} in region {region}"
+        )
+
+        aws_client = AsyncAWSClient(
+            task.session,
+            client_factory,
+            self.max_retries,
+            self.retry_delay,
+            self.rate_limiter,
+            self.single_flight
+        )
+        timer = CallTimer(task.on_page)
+
+        try:
+            result = await aws_client.call_api(
+                sheet.service,
+                sheet.function,
+                task.endpoint_region,
+                sheet.parameters if task.parameters is None else task.parameters,
+                sheet.result_key,
+                sheet.paginate,
+                timer.on_page,
+                task.call_key
+            )
+
+            service_result = ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=region,
+                result=result
+            )
+            self._observe_call(task, timer, service_result)
+            return service_result
+
+        except AWSClientError as e:
+            logger.error(
+                f"Error scanning service {sheet.service} with function {sheet.function} in region {region}: {str(e)}"
+            )
+
+            return ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=region,
+                result=None,
+                success=False,
+                error=str(e)
+            )
+
+        except Exception as e:
+            logger.error(
+                f"Unexpected error scanning service {sheet.service} with function {sheet.function} in region {region}: {str(e)}"
+            )
+
+            return ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=region,
+                result=None,
+                success=False,
+                error=f"Unexpected error: {str(e)}"
+            )
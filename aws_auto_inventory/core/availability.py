@@ -0,0 +1,343 @@
+"""
+Service availability index for AWS Auto Inventory.
+
+The index records which regions each service has an endpoint in, taken from
+the endpoint and partition data bundled with botocore, so scans can skip
+(service, region) combinations that would only fail. It is built from the
+installed botocore without any network access and can be saved to a JSON
+file and refreshed offline with::
+
+    python -m aws_auto_inventory.core.availability availability.json
+"""
+import sys
+import json
+import logging
+import argparse
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import botocore
+import botocore.session
+from botocore.exceptions import UnknownServiceError
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Version of the index file format
+INDEX_VERSION = 1
+
+# Region key that results of global calls are stored under
+GLOBAL_REGION = "global"
+
+# Functions of regional services that return the same account-wide data from
+# every region, like the functions of global services
+GLOBAL_FUNCTIONS = {
+    ("s3", "list_buckets"),
+}
+
+
+class AvailabilityIndex:
+    """
+    Index of the regions each AWS service is available in.
+
+    Services are resolved lazily from botocore data unless the index was
+    loaded from a file. Services, regions and partitions that the data does not
+    know about are treated as available, so an outdated index never hides a
+    service; the API call simply runs as it would without the index.
+    """
+
+    def __init__(
+        self,
+        partitions: Optional[Dict[str, List[str]]] = None,
+        services: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+        session: Optional[botocore.session.Session] = None
+    ):
+        """
+        Initialize availability index.
+
+        Args:
+            partitions: Regions of each partition. If None, read from botocore.
+            services: Availability of each service, keyed by boto3 service name.
+                      Each value maps partition names to {"global": bool,
+                      "regions": [...]}, or is None when unknown.
+            session: botocore session to resolve services with. If None and
+                     services is None, a new session is created.
+        """
+        self._lock = threading.Lock()
+        self._session = session
+        self._loaded = services is not None
+
+        if partitions is None or (services is None and session is None):
+            self._session = session or botocore.session.get_session()
+
+        self._endpoints = None
+        self.partitions = partitions if partitions is not None else self._read_partitions()
+        self.services = dict(services or {})
+        self._region_partitions = {
+            region: partition
+            for partition, regions in self.partitions.items()
+            for region in regions
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "AvailabilityIndex":
+        """
+        Load an index saved with save().
+
+        Args:
+            path: Path of the JSON index file.
+
+        Returns:
+            Availability index.
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported availability index version: {data.get('version')}")
+
+        logger.info(
+            f"Loaded availability index for {len(data['services'])} services "
+            f"(botocore {data.get('botocore_version')})"
+        )
+        return cls(partitions=data["partitions"], services=data["services"])
+
+    def save(self, path: str) -> None:
+        """
+        Save the index to a JSON file.
+
+        Args:
+            path: Path of the JSON index file.
+        """
+        with self._lock:
+            services = dict(sorted(self.services.items()))
+
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "botocore_version": botocore.__version__,
+                    "partitions": self.partitions,
+                    "services": services
+                },
+                f,
+                indent=2
+            )
+
+    def build(self, services: Optional[Iterable[str]] = None) -> "AvailabilityIndex":
+        """
+        Resolve services up front.
+
+        Args:
+            services: Service names to resolve. If None, resolves every service
+                      known to botocore.
+
+        Returns:
+            The index itself.
+        """
+        if services is None:
+            services = self._get_session().get_available_services()
+
+        for service in services:
+            self._get_service(service)
+
+        return self
+
+    def is_available(self, service: str, region: Optional[str]) -> bool:
+        """
+        Check whether a service has an endpoint in a region.
+
+        Global services are available from every region of their partition.
+
+        Args:
+            service: AWS service name, as passed to boto3.client.
+            region: AWS region.
+
+        Returns:
+            False if the service is known not to be available in the region,
+            True otherwise.
+        """
+        if region is None:
+            return True
+
+        partition = self._region_partitions.get(region)
+        if partition is None:
+            return True
+
+        availability = self._get_service(service)
+        if availability is None:
+            return True
+
+        partition_availability = availability.get(partition)
+        if partition_availability is None:
+            return False
+
+        return partition_availability["global"] or region in partition_availability["regions"]
+
+    def is_global(self, service: str, partition: str = "aws") -> bool:
+        """
+        Check whether a service has a single global endpoint in a partition.
+
+        Args:
+            service: AWS service name, as passed to boto3.client.
+            partition: AWS partition.
+
+        Returns:
+            True if botocore marks the service as not regionalized in the
+            partition, False otherwise or when the service is unknown.
+        """
+        availability = self._get_service(service) or {}
+        return availability.get(partition, {}).get("global", False)
+
+    def global_region(self, service: str, function: str, regions: Iterable[str]) -> Optional[str]:
+        """
+        Pick the region a global call is sent from.
+
+        Calls of global services, and of the functions in GLOBAL_FUNCTIONS,
+        return the same data from every region of a partition, so a scan makes
+        them once per account instead of once per region.
+
+        Args:
+            service: AWS service name, as passed to boto3.client.
+            function: API function name.
+            regions: Regions being scanned.
+
+        Returns:
+            The first region the call can be sent to with a global result, or
+            None if the call is regional in every region.
+        """
+        for region in regions:
+            partition = self._region_partitions.get(region)
+            if partition is None:
+                continue
+
+            if self.is_global(service, partition):
+                return region
+            if (service, function) in GLOBAL_FUNCTIONS and self.is_available(service, region):
+                return region
+
+        return None
+
+    def _get_service(self, service: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the availability of a service, resolving it from botocore on first use.
+        """
+        with self._lock:
+            if service in self.services or self._loaded:
+                return self.services.get(service)
+
+            availability = self._resolve_service(service)
+            self.services[service] = availability
+            return availability
+
+    def _resolve_service(self, service: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve the availability of a service from botocore data.
+
+        Must be called with the lock held.
+
+        Returns:
+            Availability per partition, or None if botocore has no endpoint
+            data for the service.
+        """
+        session = self._get_session()
+
+        try:
+            service_model = session.get_service_model(service)
+        except UnknownServiceError:
+            return None
+
+        endpoint_prefix = service_model.endpoint_prefix or service
+        availability = {}
+
+        for partition in self._get_endpoints()["partitions"]:
+            service_data = partition["services"].get(endpoint_prefix)
+            if service_data is None:
+                continue
+
+            is_global = not service_data.get("isRegionalized", True)
+            regions = [
+                region for region in service_data.get("endpoints", {})
+                if region in partition["regions"]
+            ]
+            availability[partition["partition"]] = {"global": is_global, "regions": regions}
+
+        # Services without any endpoint data rely on endpoint rules alone
+        return availability or None
+
+    def _read_partitions(self) -> Dict[str, List[str]]:
+        """
+        Read the regions of each partition from botocore data.
+        """
+        return {
+            partition["partition"]: list(partition["regions"])
+            for partition in self._get_endpoints()["partitions"]
+        }
+
+    def _get_endpoints(self) -> Dict[str, Any]:
+        """
+        Load botocore's bundled endpoint data.
+        """
+        if self._endpoints is None:
+            self._endpoints = self._get_session().get_component("data_loader").load_data("endpoints")
+        return self._endpoints
+
+    def _get_session(self) -> botocore.session.Session:
+        """
+        Get the botocore session used to read bundled data.
+        """
+        if self._session is None:
+            self._session = botocore.session.get_session()
+        return self._session
+
+
+def build_skipped_report(skipped: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarize skipped (service, region) combinations.
+
+    Args:
+        skipped: Skipped combinations, each with at least "service" and "region".
+
+    Returns:
+        Report with the total and the skipped regions of each service.
+    """
+    skipped = list(skipped)
+    regions_by_service: Dict[str, List[str]] = {}
+
+    for item in skipped:
+        regions = regions_by_service.setdefault(item["service"], [])
+        if item["region"] not in regions:
+            regions.append(item["region"])
+
+    return {
+        "skipped_count": len(skipped),
+        "services": regions_by_service,
+        "skipped": skipped
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Build an availability index from the installed botocore and save it.
+
+    Args:
+        argv: Command-line arguments.
+
+    Returns:
+        Exit code.
+    """
+    parser = argparse.ArgumentParser(
+        description="Build a service availability index from botocore's bundled endpoint data"
+    )
+    parser.add_argument("output", help="Path of the JSON index file to write")
+    args = parser.parse_args(argv)
+
+    index = AvailabilityIndex().build()
+    index.save(args.output)
+    print(f"Wrote availability index for {len(index.services)} services to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
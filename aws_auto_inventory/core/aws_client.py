@@ -2,13 +2,17 @@
 AWS client with retry logic for AWS Auto Inventory.
 """
 import time
-import json
 import logging
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Callable, Hashable, Iterator, Tuple
 
 import boto3
 import botocore
-import jq
+
+from .client_factory import ClientFactory
+from .extraction import extract_result
+from .pagination import get_pagination_config, iter_pages, merge_results
+from .rate_limiter import RateLimiter
+from .single_flight import SingleFlight
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -28,12 +32,29 @@ class ThrottlingError(AWSClientError):
         super().__init__(f"API throttling for {service}.{function}")
 
 
+def _observe(results: Iterator[Any], on_page: Callable[[Any], None]) -> Iterator[Any]:
+    """
+    Call a function with each page of results before passing it on.
+    """
+    for result in results:
+        on_page(result)
+        yield result
+
+
 class AWSClient:
     """
     AWS client with retry logic for API calls.
     """
     
-    def __init__(self, session: boto3.Session, max_retries: int = 3, retry_delay: int = 2):
+    def __init__(
+        self, 
+        session: boto3.Session, 
+        max_retries: int = 3, 
+        retry_delay: int = 2,
+        client_factory: Optional[ClientFactory] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
         """
         Initialize AWS client.
         
@@ -41,10 +62,17 @@ class AWSClient:
             session: boto3 Session.
             max_retries: Maximum number of retries for API calls.
             retry_delay: Base delay (in seconds) between retries.
+            client_factory: Shared client cache. If None, a new client is created for each call.
+            rate_limiter: Shared rate limiter. If None, requests are not rate limited.
+            single_flight: Registry of calls made more than once in a scan. If None,
+                           every call is sent.
         """
         self.session = session
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.client_factory = client_factory
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
     
     def call_api(
         self, 
@@ -52,7 +80,10 @@ class AWSClient:
         function_name: str, 
         region: Optional[str] = None, 
         parameters: Optional[Dict[str, Any]] = None,
-        result_key: Optional[str] = None
+        result_key: Optional[str] = None,
+        paginate: bool = True,
+        on_page: Optional[Callable[[Any], None]] = None,
+        call_key: Optional[Tuple[Hashable, Hashable]] = None
     ) -> Any:
         """
         Call AWS API with retry logic.
@@ -63,41 +94,180 @@ class AWSClient:
             region: AWS region.
             parameters: API parameters.
             result_key: Key to extract from the response.
-            
+            paginate: Whether to fetch all pages when the operation can be paginated.
+            on_page: Function called with the extracted data of each page as it arrives.
+            call_key: Account and call key from single_flight.call_key. Calls made
+                      more than once in the scan are sent once and share their pages.
+                      
         Returns:
             API response or extracted data if result_key is specified.
             
         Raises:
             AWSClientError: If the API call fails after all retries.
         """
-        client = self.session.client(service, region_name=region)
+        results = self.iter_results(
+            service, function_name, region, parameters, result_key, paginate, call_key
+        )
+        
+        if on_page is not None:
+            results = _observe(results, on_page)
+        
+        return merge_results(results)
+    
+    def iter_results(
+        self, 
+        service: str, 
+        function_name: str, 
+        region: Optional[str] = None, 
+        parameters: Optional[Dict[str, Any]] = None,
+        result_key: Optional[str] = None,
+        paginate: bool = True,
+        call_key: Optional[Tuple[Hashable, Hashable]] = None
+    ) -> Iterator[Any]:
+        """
+        Call AWS API with retry logic, yielding the extracted data page by page.
+        
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+            parameters: API parameters.
+            result_key: Key to extract from each page.
+            paginate: Whether to fetch all pages when the operation can be paginated.
+            call_key: Account and call key. Shared calls are fetched by their
+                      first caller, and the others read its pages as they arrive.
+                      
+        Yields:
+            API response or extracted data if result_key is specified, one item per page.
+            
+        Raises:
+            AWSClientError: If an API call fails after all retries.
+        """
+        if self.single_flight is not None and self.single_flight.is_shared(call_key):
+            pages = self.single_flight.pages(
+                call_key,
+                lambda: self.iter_pages(service, function_name, region, parameters, paginate)
+            )
+        else:
+            pages = self.iter_pages(service, function_name, region, parameters, paginate)
+        
+        for page in pages:
+            try:
+                yield extract_result(page, result_key)
+            except Exception as error:
+                logger.error(f"Unexpected error for {service}.{function_name}: {error}")
+                raise AWSClientError(f"Unexpected error: {error}")
+    
+    def iter_pages(
+        self, 
+        service: str, 
+        function_name: str, 
+        region: Optional[str] = None, 
+        parameters: Optional[Dict[str, Any]] = None,
+        paginate: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Call AWS API with retry logic, yielding raw responses page by page.
+        
+        Operations without a botocore paginator (or with paginate disabled) yield
+        a single response. Each page is retried on its own, so a failure on a
+        late page does not restart pagination from the first page.
+        
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+            parameters: API parameters.
+            paginate: Whether to fetch all pages when the operation can be paginated.
+            
+        Yields:
+            Raw API responses.
+            
+        Raises:
+            AWSClientError: If an API call fails after all retries.
+        """
+        if self.client_factory is not None:
+            client = self.client_factory.get_client(self.session, service, region)
+        else:
+            client = self.session.client(service, region_name=region)
         
         if not hasattr(client, function_name):
             raise AWSClientError(f"Function {function_name} does not exist for service {service}")
         
         function_to_call = getattr(client, function_name)
         
+        if self.rate_limiter is not None:
+            function_to_call = self._rate_limited(function_to_call, service, function_name, region)
+        
+        def call(**kwargs):
+            return self._call_with_retry(service, function_name, function_to_call, kwargs)
+        
+        pagination_config = get_pagination_config(client, function_name) if paginate else None
+        
+        if pagination_config is None:
+            yield call(**(parameters or {}))
+        else:
+            yield from iter_pages(call, pagination_config, parameters)
+    
+    def _rate_limited(
+        self, 
+        function_to_call: Callable[..., Dict[str, Any]], 
+        service: str, 
+        function_name: str, 
+        region: Optional[str]
+    ) -> Callable[..., Dict[str, Any]]:
+        """
+        Wrap a client method so that every request, including retries, waits for a token.
+        
+        Args:
+            function_to_call: Bound client method.
+            service: AWS service name.
+            function_name: API function name.
+            region: AWS region.
+            
+        Returns:
+            Rate-limited client method.
+        """
+        if self.client_factory is not None:
+            account = self.client_factory.get_identity(self.session)
+        else:
+            account = self.session.profile_name
+        
+        def rate_limited_call(**kwargs):
+            self.rate_limiter.acquire(service, function_name, region, account)
+            return function_to_call(**kwargs)
+        
+        return rate_limited_call
+    
+    def _call_with_retry(
+        self, 
+        service: str, 
+        function_name: str, 
+        function_to_call: Callable[..., Dict[str, Any]], 
+        parameters: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Make a single API request with retry logic.
+        
+        Args:
+            service: AWS service name.
+            function_name: API function name.
+            function_to_call: Bound client method.
+            parameters: API parameters.
+            
+        Returns:
+            API response.
+            
+        Raises:
+            AWSClientError: If the API call fails after all retries.
+        """
         for attempt in range(self.max_retries):
             try:
                 if parameters:
-                    response = function_to_call(**parameters)
+                    return function_to_call(**parameters)
                 else:
-                    response = function_to_call()
-                
-                # Process the response
-                if result_key:
-                    if result_key.startswith('.'):
-                        # Use jq for complex queries
-                        return jq.compile(result_key).input_value(json.loads(json.dumps(response, default=str))).all()
-                    else:
-                        # Simple key extraction
-                        return response.get(result_key)
-                else:
-                    # Return full response with metadata removed
-                    if isinstance(response, dict):
-                        response.pop("ResponseMetadata", None)
-                    return response
-                
+                    return function_to_call()
+            
             except botocore.exceptions.ClientError as error:
                 error_code = error.response["Error"]["Code"]
                 if error_code in ["Throttling", "RequestLimitExceeded"]:
@@ -0,0 +1,191 @@
+"""
+Shared boto3 client cache for AWS Auto Inventory.
+"""
+import os
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def pool_size_for_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Get the connection pool size needed by a number of worker threads.
+
+    Args:
+        max_workers: Maximum number of worker threads sharing a client. If None,
+                     uses the default from concurrent.futures.ThreadPoolExecutor.
+
+    Returns:
+        Number of connections to keep in each client's pool.
+    """
+    if max_workers:
+        return max_workers
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class ClientFactory:
+    """
+    Thread-safe cache of boto3 clients keyed by credentials, service and region.
+
+    boto3 clients are thread-safe but boto3 Sessions are not, so each session
+    builds its clients under a lock of its own, and the clients are then shared
+    by all worker threads. Sessions of different accounts build clients
+    concurrently, and cached clients are returned without waiting for a build.
+    """
+
+    def __init__(self, max_pool_connections: Optional[int] = None):
+        """
+        Initialize client factory.
+
+        Args:
+            max_pool_connections: Size of each client's connection pool. If None,
+                                  uses the botocore default.
+        """
+        self.max_pool_connections = max_pool_connections
+        self._clients: Dict[Tuple[Hashable, str, Optional[str]], Any] = {}
+        self._identities = weakref.WeakKeyDictionary()
+        # Guards the caches above; held only briefly, never while a client is built
+        self._lock = threading.Lock()
+        # Serializes the use of each session, which is not thread-safe
+        self._session_locks = weakref.WeakKeyDictionary()
+
+    def get_client(self, session: boto3.Session, service: str, region: Optional[str] = None) -> Any:
+        """
+        Get a client for a service in a region, creating it on first use.
+
+        Args:
+            session: boto3 Session providing the credentials.
+            service: AWS service name.
+            region: AWS region.
+
+        Returns:
+            boto3 client.
+        """
+        with self._lock:
+            identity = self._identities.get(session)
+            client = self._clients.get((identity, service, region)) if identity is not None else None
+        if client is not None:
+            return client
+
+        with self._session_lock(session):
+            identity = self._get_identity(session)
+            key = (identity, service, region)
+            with self._lock:
+                client = self._clients.get(key)
+            if client is not None:
+                return client
+
+            logger.debug(f"Creating client for service {service} in region {region}")
+            client = session.client(service, region_name=region, config=self._get_config())
+
+        with self._lock:
+            # A session evicted while its client was built does not cache it
+            if self._identities.get(session) == identity:
+                client = self._clients.setdefault(key, client)
+
+        return client
+
+    def get_identity(self, session: boto3.Session) -> Hashable:
+        """
+        Get the credential identity clients of a session are cached under.
+
+        Args:
+            session: boto3 Session.
+
+        Returns:
+            Hashable credential identity.
+        """
+        with self._session_lock(session):
+            return self._get_identity(session)
+
+    def evict(self, session: boto3.Session) -> int:
+        """
+        Drop the cached clients of a session's credentials, e.g. once its account is scanned.
+
+        Callers still holding a client can keep using it. Its connections are
+        closed once the last of them lets it go.
+
+        Args:
+            session: boto3 Session whose clients to drop.
+
+        Returns:
+            Number of clients dropped.
+        """
+        with self._lock:
+            identity = self._identities.pop(session, None)
+            if identity is None:
+                return 0
+
+            keys = [key for key in self._clients if key[0] == identity]
+            for key in keys:
+                del self._clients[key]
+
+        logger.debug(f"Dropped {len(keys)} cached clients")
+        return len(keys)
+
+    def clear(self) -> None:
+        """
+        Drop all cached clients.
+        """
+        with self._lock:
+            self._clients.clear()
+            self._identities = weakref.WeakKeyDictionary()
+
+    def _get_identity(self, session: boto3.Session) -> Hashable:
+        """
+        Get the credential identity of a session.
+
+        Sessions with the same profile and access key share clients. Must be
+        called with the session's lock held.
+
+        Args:
+            session: boto3 Session.
+
+        Returns:
+            Hashable credential identity.
+        """
+        with self._lock:
+            identity = self._identities.get(session)
+
+        if identity is None:
+            credentials = session.get_credentials()
+            access_key = credentials.access_key if credentials is not None else None
+            identity = (session.profile_name, access_key)
+            with self._lock:
+                self._identities[session] = identity
+
+        return identity
+
+    def _session_lock(self, session: boto3.Session) -> threading.Lock:
+        """
+        Get the lock serializing the use of a session, creating it on first use.
+
+        Args:
+            session: boto3 Session.
+
+        Returns:
+            Lock of the session.
+        """
+        with self._lock:
+            lock = self._session_locks.get(session)
+            if lock is None:
+                lock = self._session_locks[session] = threading.Lock()
+            return lock
+
+    def _get_config(self) -> Optional[BotocoreConfig]:
+        """
+        Get the botocore configuration for new clients.
+
+        Returns:
+            botocore Config, or None to use the defaults.
+        """
+        if self.max_pool_connections is None:
+            return None
+        return BotocoreConfig(max_pool_connections=self.max_pool_connections)
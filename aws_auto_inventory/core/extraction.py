@@ -0,0 +1,68 @@
+"""
+Result extraction for AWS Auto Inventory.
+"""
+import json
+import functools
+from typing import Any, Optional
+
+import jq
+
+
+@functools.lru_cache(maxsize=None)
+def compile_jq(expression: str) -> Any:
+    """
+    Compile a jq filter, reusing the compiled program for repeated expressions.
+
+    Compiled programs are shared process-wide; each input creates its own jq
+    state, so a program can be used from several threads at once.
+
+    Args:
+        expression: jq filter.
+
+    Returns:
+        Compiled jq program.
+    """
+    return jq.compile(expression)
+
+
+def to_json_text(response: Any) -> str:
+    """
+    Serialize an API response for jq.
+
+    Values that JSON cannot represent, such as datetimes, are converted with
+    str(), matching how results were always rendered for jq filters.
+
+    Args:
+        response: API response.
+
+    Returns:
+        JSON text.
+    """
+    return json.dumps(response, default=str)
+
+
+def extract_result(response: Any, result_key: Optional[str] = None) -> Any:
+    """
+    Extract the configured part of an API response.
+
+    Args:
+        response: API response (or a single page of it).
+        result_key: Plain key to read, or a jq filter when it starts with '.'.
+
+    Returns:
+        The extracted data, or the response with metadata removed if no
+        result_key is specified.
+    """
+    if result_key:
+        if result_key.startswith('.'):
+            # Use jq for complex queries. The response is serialized once and
+            # handed to jq as text rather than parsed back into Python objects.
+            return compile_jq(result_key).input_text(to_json_text(response)).all()
+        else:
+            # Simple key extraction
+            return response.get(result_key)
+
+    # Return full response with metadata removed
+    if isinstance(response, dict):
+        response.pop("ResponseMetadata", None)
+    return response
@@ -0,0 +1,359 @@
+"""
+Dependent sheet fan-out for AWS Auto Inventory.
+
+A dependent sheet calls its function once for every ID found in the results
+of a parent sheet, e.g. get_bucket_encryption for every bucket listed by
+list_buckets. When the function takes the IDs in a list parameter, they are
+sent in batches of up to the largest list the API accepts.
+"""
+import logging
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from botocore import xform_name
+from botocore.exceptions import UnknownServiceError
+
+from ..config.models import Inventory, Sheet
+from .extraction import compile_jq, to_json_text
+from .pagination import _get_model_session
+from .scheduler import ScanTask
+from .service import ServiceResult
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# IDs per call for list parameters whose service model gives no maximum size.
+# Several APIs reject longer lists without modelling the limit.
+DEFAULT_LIST_SIZE = 10
+
+
+def dependent_sheets(inventory: Inventory) -> Dict[Tuple[str, str], List[Sheet]]:
+    """
+    Map each parent sheet of an inventory to the sheets that depend on it.
+
+    Args:
+        inventory: Inventory configuration.
+
+    Returns:
+        Dependent sheets, keyed by inventory name and parent sheet name.
+    """
+    dependents = {}
+
+    for sheet in inventory.sheets:
+        if sheet.fan_out is not None:
+            dependents.setdefault((inventory.name, sheet.fan_out.sheet), []).append(sheet)
+
+    return dependents
+
+
+def extract_ids(result: Any, expression: str) -> List[Any]:
+    """
+    Extract the IDs for dependent calls from a parent sheet's result.
+
+    Args:
+        result: Extracted result of a parent sheet, or of one of its pages.
+        expression: jq filter when it starts with '.', otherwise a key read
+                    from each item of the result.
+
+    Returns:
+        IDs in the order they were found. Lists produced by a filter are
+        flattened and missing values are dropped.
+    """
+    if result is None:
+        return []
+
+    if expression.startswith('.'):
+        values = compile_jq(expression).input_text(to_json_text(result)).all()
+    else:
+        items = result if isinstance(result, list) else [result]
+        values = [item.get(expression) for item in items if isinstance(item, dict)]
+
+    ids = []
+    for value in values:
+        if isinstance(value, list):
+            ids.extend(value)
+        else:
+            ids.append(value)
+
+    return [value for value in ids if value is not None]
+
+
+@functools.lru_cache(maxsize=None)
+def _list_parameter(service: str, function: str, parameter: str) -> Tuple[bool, Optional[int]]:
+    """
+    Look up whether a parameter takes a list, and its maximum size.
+
+    Args:
+        service: AWS service name.
+        function: API function name.
+        parameter: Parameter name.
+
+    Returns:
+        Whether the parameter is a list, and the maximum size from the service
+        model if it has one.
+    """
+    try:
+        service_model = _get_model_session().get_service_model(service)
+    except UnknownServiceError:
+        return False, None
+
+    operations = {xform_name(operation): operation for operation in service_model.operation_names}
+    if function not in operations:
+        return False, None
+
+    input_shape = service_model.operation_model(operations[function]).input_shape
+    shape = input_shape.members.get(parameter) if input_shape is not None else None
+    if shape is None or shape.type_name != 'list':
+        return False, None
+
+    return True, shape.metadata.get('max')
+
+
+def batch_size(sheet: Sheet) -> Optional[int]:
+    """
+    Get the number of IDs sent in each call of a dependent sheet.
+
+    Args:
+        sheet: Dependent sheet.
+
+    Returns:
+        Number of IDs per call for list parameters, or None if the parameter
+        takes a single ID. A configured batch size is capped at the maximum
+        from the service model.
+    """
+    is_list, max_size = _list_parameter(sheet.service, sheet.function, sheet.fan_out.parameter)
+    if not is_list:
+        return None
+
+    size = sheet.fan_out.batch_size or max_size or DEFAULT_LIST_SIZE
+    if max_size:
+        size = min(size, max_size)
+
+    return size
+
+
+def _rows(result: Any) -> List[Any]:
+    """
+    Split the result of one call into rows.
+    """
+    if result is None:
+        return []
+    if isinstance(result, list):
+        return result
+    return [result]
+
+
+def _tag(row: Any, parameter: str, value: Any) -> Dict[str, Any]:
+    """
+    Add the ID a row was fetched for, since single-resource responses rarely include it.
+    """
+    if isinstance(row, dict):
+        return {parameter: value, **row}
+    return {parameter: value, "Value": row}
+
+
+class FanOutTask(ScanTask):
+    """
+    One call of a dependent sheet, for one ID or one batch of IDs.
+    """
+
+    def __init__(self, group: "FanOutGroup", ids: List[Any], **kwargs):
+        """
+        Initialize fan-out task.
+
+        Args:
+            group: Group the call belongs to.
+            ids: IDs passed to the call.
+            **kwargs: ScanTask arguments.
+        """
+        super().__init__(**kwargs)
+        self.group = group
+        self.ids = ids
+
+
+class FanOutGroup:
+    """
+    Calls of one dependent sheet in one region of one account.
+
+    IDs are added as pages of the parent sheet arrive, possibly from a worker
+    thread, and every full batch becomes a task right away. The last partial
+    batch is sent when the parent completes. Once the parent and every call
+    have completed, the calls' results are merged into a single service result
+    for the sheet.
+    """
+
+    def __init__(
+        self,
+        task: ScanTask,
+        batch_size: Optional[int] = None,
+        dependents: Optional[List["FanOutGroup"]] = None,
+        on_page: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Initialize fan-out group.
+
+        Args:
+            task: Task of the dependent sheet, carrying its region and account.
+            batch_size: Number of IDs per call for list parameters, or None if
+                        each call takes a single ID.
+            dependents: Groups of the sheets that depend on this one.
+            on_page: Function called with each page of every call's result.
+        """
+        self.task = task
+        self.batch_size = batch_size
+        self.dependents = dependents or []
+        self.on_page = on_page
+        self.pending = 0
+        self.calls = 0
+        self.parent_done = False
+        self.parent_error: Optional[str] = None
+        self._seen = set()
+        self._buffer: List[Any] = []
+        self._rows: List[Any] = []
+        self._errors: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def sheet(self) -> Sheet:
+        """
+        Dependent sheet of the group.
+        """
+        return self.task.sheet
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the parent and every call of the group have completed.
+        """
+        with self._lock:
+            return self.parent_done and not self.pending
+
+    def add_ids(self, ids: List[Any]) -> List[FanOutTask]:
+        """
+        Add IDs found in a page of the parent sheet.
+
+        IDs seen before are skipped.
+
+        Args:
+            ids: IDs to fetch.
+
+        Returns:
+            Tasks for every batch that is now full.
+        """
+        size = self.batch_size or 1
+
+        with self._lock:
+            for value in ids:
+                key = value if isinstance(value, Hashable) else to_json_text(value)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self._buffer.append(value)
+
+            tasks = []
+            while len(self._buffer) >= size:
+                tasks.append(self._batch_task(self._buffer[:size]))
+                del self._buffer[:size]
+
+            return tasks
+
+    def close(self, error: Optional[str] = None) -> List[FanOutTask]:
+        """
+        Mark the parent sheet as completed.
+
+        Args:
+            error: Error of the parent sheet, if it failed.
+
+        Returns:
+            Task for the last partial batch, unless the parent failed.
+        """
+        with self._lock:
+            self.parent_done = True
+            self.parent_error = error
+
+            tasks = []
+            if self._buffer and error is None:
+                tasks.append(self._batch_task(self._buffer))
+            self._buffer = []
+
+            return tasks
+
+    def complete(self, task: FanOutTask, service_result: ServiceResult) -> None:
+        """
+        Record the result of one call.
+
+        Args:
+            task: Completed call.
+            service_result: Its service result.
+        """
+        with self._lock:
+            self.pending -= 1
+            self.calls += 1
+
+            if not service_result.success:
+                self._errors.append(service_result.error)
+            elif self.batch_size is None:
+                parameter = self.sheet.fan_out.parameter
+                self._rows.extend(_tag(row, parameter, task.ids[0]) for row in _rows(service_result.result))
+            else:
+                self._rows.extend(_rows(service_result.result))
+
+    def result(self) -> ServiceResult:
+        """
+        Build the service result of the sheet from the results of all calls.
+
+        The sheet fails when its parent failed or when every call failed. When
+        only some calls failed, the result keeps the rows of the others and
+        reports the failures in its error.
+
+        Returns:
+            Service result with the rows of every successful call.
+        """
+        sheet = self.sheet
+        task = self.task
+
+        with self._lock:
+            error = None
+            success = True
+
+            if self.parent_error is not None:
+                success = False
+                error = f"Parent sheet '{sheet.fan_out.sheet}' failed: {self.parent_error}"
+            elif self._errors:
+                success = len(self._errors) < self.calls
+                error = f"{len(self._errors)} of {self.calls} calls failed: {self._errors[0]}"
+
+            return ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=task.region,
+                result=self._rows if success else None,
+                success=success,
+                error=error,
+                account_id=task.account_id,
+                account_name=task.account_name,
+                inventory_name=task.inventory_name,
+                sheet_name=sheet.name
+            )
+
+    def _batch_task(self, ids: List[Any]) -> FanOutTask:
+        """
+        Create the task of one batch. Must be called with the lock held.
+        """
+        parameter = self.sheet.fan_out.parameter
+        self.pending += 1
+
+        return FanOutTask(
+            self,
+            ids,
+            region=self.task.region,
+            endpoint_region=self.task.endpoint_region,
+            sheet=self.sheet,
+            session=self.task.session,
+            account_id=self.task.account_id,
+            account_name=self.task.account_name,
+            inventory_name=self.task.inventory_name,
+            parameters={**self.sheet.parameters, parameter: ids if self.batch_size else ids[0]},
+            on_page=self.on_page
+        )
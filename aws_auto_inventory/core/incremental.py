@@ -0,0 +1,269 @@
+"""
+Incremental result output for AWS Auto Inventory.
+
+Each incremental run writes a manifest with a hash of every result. Results
+whose hash matches the previous run's manifest are not written again; the
+manifest points at the file that already holds them instead.
+"""
+import os
+import json
+import hashlib
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Name of the manifest file in each run directory
+MANIFEST_FILE = "manifest.json"
+
+# Version of the manifest file format
+MANIFEST_VERSION = 1
+
+# Keys that change on every request and are removed before hashing, at any depth
+VOLATILE_KEYS = frozenset({"ResponseMetadata"})
+
+# Keys that change on every request and are removed before hashing at the top level only,
+# since resources may have fields of the same name
+TOP_LEVEL_VOLATILE_KEYS = frozenset({"RequestId", "requestId"})
+
+
+def normalize_result(result: Any) -> Any:
+    """
+    Remove volatile fields from a result.
+
+    Args:
+        result: Extracted API result.
+
+    Returns:
+        Result without response metadata and request IDs.
+    """
+    if isinstance(result, dict):
+        result = {key: value for key, value in result.items() if key not in TOP_LEVEL_VOLATILE_KEYS}
+
+    return _drop_volatile_keys(result)
+
+
+def _drop_volatile_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _drop_volatile_keys(item)
+            for key, item in value.items()
+            if key not in VOLATILE_KEYS
+        }
+    if isinstance(value, list):
+        return [_drop_volatile_keys(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def result_digest(result: Any) -> str:
+    """
+    Hash a result after removing volatile fields.
+
+    Args:
+        result: Extracted API result.
+
+    Returns:
+        SHA-256 hex digest of the normalized result in canonical JSON form.
+    """
+    canonical = json.dumps(
+        normalize_result(result),
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_json_default
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultManifest:
+    """
+    Manifest of the results of one run directory.
+
+    Entries are keyed by the result's path relative to the run directory, such
+    as ``us-east-1/ec2-describe_instances.json``. Each entry records the hash of
+    the result, its status compared to the previous run (added, changed or
+    unchanged) and the path of the file that holds the payload, relative to
+    the run directory. Unchanged results point into an earlier run directory.
+    """
+
+    def __init__(self, run_dir: str, previous: Optional["ResultManifest"] = None):
+        """
+        Initialize result manifest.
+
+        Args:
+            run_dir: Directory of the run.
+            previous: Manifest of the previous run to compare results with.
+        """
+        self.run_dir = run_dir
+        self.previous = previous
+        self.results: Dict[str, Dict[str, str]] = {}
+        self.failed: List[str] = []
+
+    @classmethod
+    def load(cls, run_dir: str) -> "ResultManifest":
+        """
+        Load the manifest of a run directory.
+
+        Args:
+            run_dir: Directory of the run.
+
+        Returns:
+            Result manifest.
+        """
+        with open(os.path.join(run_dir, MANIFEST_FILE), "r") as f:
+            data = json.load(f)
+
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+
+        manifest = cls(run_dir)
+        manifest.results = data["results"]
+        manifest.failed = data.get("failed", [])
+        return manifest
+
+    @staticmethod
+    def find_previous_run(output_dir: str, exclude: Optional[str] = None) -> Optional[str]:
+        """
+        Find the most recent run directory with a manifest.
+
+        Run directories are named after their timestamp, so the most recent
+        one sorts last.
+
+        Args:
+            output_dir: Directory containing run directories.
+            exclude: Run directory to ignore, usually the current one.
+
+        Returns:
+            Path of the run directory, or None if there is none.
+        """
+        if not os.path.isdir(output_dir):
+            return None
+
+        excluded = os.path.abspath(exclude) if exclude else None
+
+        for name in sorted(os.listdir(output_dir), reverse=True):
+            run_dir = os.path.join(output_dir, name)
+            if os.path.abspath(run_dir) == excluded:
+                continue
+            if os.path.isfile(os.path.join(run_dir, MANIFEST_FILE)):
+                return run_dir
+
+        return None
+
+    def record(self, key: str, result: Any) -> Optional[str]:
+        """
+        Record a result.
+
+        Args:
+            key: Path of the result relative to the run directory.
+            result: Extracted API result.
+
+        Returns:
+            Path the result must be written to, or None if the previous run
+            already holds an identical result.
+        """
+        digest = result_digest(result)
+        previous_entry = self.previous.results.get(key) if self.previous else None
+
+        if previous_entry is not None and previous_entry["sha256"] == digest:
+            payload_path = os.path.normpath(os.path.join(self.previous.run_dir, previous_entry["path"]))
+            if os.path.isfile(payload_path):
+                self.results[key] = {
+                    "sha256": digest,
+                    "status": "unchanged",
+                    "path": os.path.relpath(payload_path, self.run_dir),
+                }
+                return None
+
+        self.results[key] = {
+            "sha256": digest,
+            "status": "added" if previous_entry is None else "changed",
+            "path": key,
+        }
+        return os.path.join(self.run_dir, key)
+
+    def restore(self, key: str, entry: Dict[str, str]) -> None:
+        """
+        Restore an entry recorded by an interrupted run of the same directory.
+
+        Args:
+            key: Path of the result relative to the run directory.
+            entry: Manifest entry as stored in results.
+        """
+        self.results[key] = dict(entry)
+
+    def record_failure(self, key: str) -> None:
+        """
+        Record a result that could not be retrieved.
+
+        Args:
+            key: Path of the result relative to the run directory.
+        """
+        self.failed.append(key)
+
+    @property
+    def removed(self) -> List[str]:
+        """
+        Results of the previous run that this run neither returned nor failed to retrieve.
+        """
+        if self.previous is None:
+            return []
+
+        failed = set(self.failed)
+        return sorted(
+            key for key in self.previous.results
+            if key not in self.results and key not in failed
+        )
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Count results by status.
+
+        Returns:
+            Number of added, changed, unchanged, removed and failed results.
+        """
+        counts = {"added": 0, "changed": 0, "unchanged": 0}
+        for entry in self.results.values():
+            counts[entry["status"]] += 1
+
+        counts["removed"] = len(self.removed)
+        counts["failed"] = len(self.failed)
+        return counts
+
+    def save(self) -> Dict[str, int]:
+        """
+        Write the manifest to the run directory.
+
+        Returns:
+            Summary of the run, as returned by summary().
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        summary = self.summary()
+
+        with open(os.path.join(self.run_dir, MANIFEST_FILE), "w") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "previous": os.path.relpath(self.previous.run_dir, self.run_dir)
+                    if self.previous else None,
+                    "summary": summary,
+                    "results": dict(sorted(self.results.items())),
+                    "removed": self.removed,
+                    "failed": sorted(self.failed),
+                },
+                f,
+                indent=2
+            )
+
+        logger.info(
+            f"Wrote manifest with {summary['added']} added, {summary['changed']} changed, "
+            f"{summary['unchanged']} unchanged and {summary['removed']} removed results"
+        )
+        return summary
@@ -0,0 +1,293 @@
+"""
+Checkpoint journal for AWS Auto Inventory.
+
+The journal is an append-only file of JSON lines in a run directory. A line
+is written for every task as soon as its result is stored, so a scan that
+dies part-way can be resumed by skipping the tasks the journal already lists.
+"""
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .spill import ResultFile, StoredResult
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Name of the journal file in each run directory
+JOURNAL_FILE = "journal.jsonl"
+
+# Name of the file holding the results of journaled tasks, next to the journal
+RESULTS_FILE = "results.bin"
+
+
+def read_journal(path: str) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """
+    Read a journal file.
+
+    Args:
+        path: Path of the journal file.
+
+    Returns:
+        Tuple of the entries by task key and whether the run finished.
+    """
+    entries = {}
+    complete = False
+
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring incomplete line {number} of journal {path}")
+                continue
+
+            if entry.get("complete"):
+                complete = True
+            else:
+                entries[entry["key"]] = entry
+
+    return entries, complete
+
+
+class ScanJournal:
+    """
+    Append-only journal of completed scan tasks.
+
+    Each entry has a "key" identifying the task plus whatever the caller needs
+    to reuse its stored output. A final {"complete": true} line marks a run
+    that finished. Writes are serialized with a lock and flushed line by line;
+    a line cut short by a crash is ignored when the journal is read back.
+
+    Callers without output of their own to point at can keep results in the
+    journal's results file with record_result(); the entry then only holds
+    the result's offset and size in that file. Results are read back one at
+    a time, when they are used.
+
+    Only entries read from an existing journal are kept in memory; entries
+    recorded by the current run go straight to the file.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Initialize scan journal.
+
+        Args:
+            path: Path of the journal file.
+            resume: Whether to read and append to an existing journal. If False,
+                    any existing journal is replaced.
+        """
+        self.path = path
+        self.results_path = os.path.join(os.path.dirname(path), RESULTS_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.complete = False
+        self._lock = threading.Lock()
+        self._resume = resume
+        self._results: Optional[ResultFile] = None
+
+        if resume and os.path.isfile(path):
+            self._read()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._file.tell() and not self._ends_with_newline():
+            # Start after the partial line left by an interrupted write
+            self._file.write("\n")
+
+    @classmethod
+    def open(cls, run_dir: str, resume: bool = False) -> "ScanJournal":
+        """
+        Open the journal of a run directory.
+
+        Args:
+            run_dir: Directory of the run.
+            resume: Whether to read and append to an existing journal.
+
+        Returns:
+            Scan journal.
+        """
+        return cls(os.path.join(run_dir, JOURNAL_FILE), resume=resume)
+
+    @staticmethod
+    def find_run(output_dir: str) -> Optional[str]:
+        """
+        Find the most recent run directory with a journal.
+
+        Args:
+            output_dir: Directory containing run directories named after their timestamp.
+
+        Returns:
+            Path of the run directory, or None if there is none.
+        """
+        if not os.path.isdir(output_dir):
+            return None
+
+        for name in sorted(os.listdir(output_dir), reverse=True):
+            run_dir = os.path.join(output_dir, name)
+            if os.path.isfile(os.path.join(run_dir, JOURNAL_FILE)):
+                return run_dir
+
+        return None
+
+    @staticmethod
+    def is_run_complete(run_dir: str) -> bool:
+        """
+        Check whether the run in a directory finished.
+
+        Args:
+            run_dir: Directory of the run.
+
+        Returns:
+            True if the run's journal ends with a completion mark.
+        """
+        path = os.path.join(run_dir, JOURNAL_FILE)
+        if not os.path.isfile(path):
+            return False
+
+        return read_journal(path)[1]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the entry of a task completed by an earlier run.
+
+        Args:
+            key: Task key.
+
+        Returns:
+            Journal entry, or None if the task had not completed.
+        """
+        return self.entries.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def record(self, key: str, **entry: Any) -> None:
+        """
+        Record a completed task.
+
+        Args:
+            key: Task key.
+            **entry: Data to store with the task.
+        """
+        entry = dict(entry, key=key)
+        line = json.dumps(entry, default=str)
+
+        with self._lock:
+            self._file.write(line)
+            self._file.write("\n")
+            self._file.flush()
+
+    def record_result(self, key: str, result: Any, **entry: Any) -> StoredResult:
+        """
+        Record a completed task, keeping its result in the results file.
+
+        Args:
+            key: Task key.
+            result: Result of the task.
+            **entry: Data to store with the task.
+
+        Returns:
+            Handle to read the result back.
+        """
+        stored = self._results_file().put(result)
+        self.record(key, result_offset=stored.offset, result_size=stored.size, **entry)
+        return stored
+
+    def get_result(self, entry: Dict[str, Any]) -> Optional[StoredResult]:
+        """
+        Get the result of a task recorded with record_result() by an earlier run.
+
+        Args:
+            entry: Journal entry of the task.
+
+        Returns:
+            Handle to read the result back, or None if the entry has no result.
+        """
+        if "result_offset" not in entry:
+            return None
+
+        return self._results_file().get(entry["result_offset"], entry["result_size"])
+
+    def discard_results(self) -> None:
+        """
+        Remove the results file, e.g. once the run's output has been written.
+
+        Entries that refer to it are scanned again if the run is resumed.
+        """
+        with self._lock:
+            if self._results is not None:
+                self._results.close()
+                self._results = None
+
+        if os.path.isfile(self.results_path):
+            os.remove(self.results_path)
+
+    def mark_complete(self) -> None:
+        """
+        Record that the run finished.
+        """
+        with self._lock:
+            self.complete = True
+            self._file.write(json.dumps({"complete": True}))
+            self._file.write("\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Close the journal file.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+            if self._results is not None:
+                self._results.close()
+                self._results = None
+
+    def __enter__(self) -> "ScanJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read(self) -> None:
+        """
+        Read the entries of an existing journal.
+        """
+        self.entries, self.complete = read_journal(self.path)
+
+        if not os.path.isfile(self.results_path):
+            missing = [key for key, entry in self.entries.items() if "result_offset" in entry]
+            if missing:
+                logger.warning(
+                    f"Results file {self.results_path} is missing; "
+                    f"{len(missing)} journaled tasks will be scanned again"
+                )
+            for key in missing:
+                del self.entries[key]
+
+        logger.info(f"Read {len(self.entries)} completed tasks from journal {self.path}")
+
+    def _results_file(self) -> ResultFile:
+        """
+        Open the results file the first time it is used.
+        """
+        with self._lock:
+            if self._results is None:
+                self._results = ResultFile(self.results_path, resume=self._resume)
+            return self._results
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
@@ -0,0 +1,474 @@
+"""
+Per-call scan metrics for AWS Auto Inventory.
+
+Every API call of a scan is recorded under its (account, region, service,
+function) key: scan calls, requests, pages, retries, throttles, errors,
+request latency, response bytes, resources returned, and time spent waiting
+for the rate limiter. The metrics are written as a JSON run summary and as a
+Prometheus text file for node_exporter's textfile collector, both while the
+scan runs and once it ends.
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import datetime
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Name of the run summary in the run directory
+METRICS_FILE = "metrics.json"
+
+# Name of the Prometheus text file in the run directory
+TEXTFILE = "metrics.prom"
+
+# Version of the run summary format
+METRICS_VERSION = 1
+
+# Seconds between writes while the scan runs
+DEFAULT_INTERVAL = 30.0
+
+# Upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = "aws_auto_inventory"
+
+# Counters of each call: (summary field, Prometheus name, help text)
+COUNTERS = (
+    ("calls", "calls_total", "Scan calls, each covering every page of one API function"),
+    ("requests", "requests_total", "API requests, including failed attempts"),
+    ("pages", "pages_total", "API responses received"),
+    ("retries", "retries_total", "API requests retried"),
+    ("throttles", "throttles_total", "API requests rejected by throttling"),
+    ("errors", "errors_total", "Scan calls that failed"),
+    ("resources", "resources_total", "Resources returned"),
+    ("response_bytes", "response_bytes_total", "Response body bytes"),
+    ("duration_seconds", "call_duration_seconds_total", "Time spent in scan calls, including retries"),
+    ("rate_limit_wait_seconds", "rate_limit_wait_seconds_total", "Time spent waiting for the client-side rate limiter"),
+)
+
+# Unique ID of the botocore event handler recording response sizes
+RESPONSE_SIZE_HANDLER_ID = "aws-auto-inventory-response-size"
+
+CallKey = Tuple[Optional[str], str, str, str]
+
+# Body size of the last response received by each thread, set by the botocore event handler
+_response_sizes = threading.local()
+
+
+def track_response_sizes(client: Any) -> None:
+    """
+    Record the body size of every response of a client.
+
+    botocore calls the handler on the thread that made the request, right
+    before the call returns, so observe_request can pick the size up.
+    Registering a client more than once has no effect.
+
+    Args:
+        client: boto3 client.
+    """
+    client.meta.events.register("after-call", _record_response_size, unique_id=RESPONSE_SIZE_HANDLER_ID)
+
+
+def _record_response_size(http_response: Any = None, model: Any = None, **kwargs: Any) -> None:
+    if http_response is None:
+        return
+    if model is not None and model.has_streaming_output:
+        # Reading the content would consume the stream
+        size = int(http_response.headers.get("content-length") or 0)
+    else:
+        size = len(http_response.content)
+    _response_sizes.last = size
+
+
+def pop_response_size() -> Optional[int]:
+    """
+    Take the size recorded for the last response of the current thread.
+
+    Returns:
+        Body size in bytes, or None if no size was recorded since the last call.
+    """
+    size = getattr(_response_sizes, "last", None)
+    _response_sizes.last = None
+    return size
+
+
+def response_size(response: Any) -> int:
+    """
+    Get the size of an API response from its Content-Length header.
+
+    Used for clients that are not tracked with track_response_sizes.
+
+    Args:
+        response: Parsed boto3 response.
+
+    Returns:
+        Content-Length of the HTTP response, or 0 when it is not known.
+    """
+    try:
+        return int(response["ResponseMetadata"]["HTTPHeaders"]["content-length"])
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def count_resources(result: Any) -> int:
+    """
+    Count the resources of an extracted result.
+
+    Args:
+        result: Extracted API result.
+
+    Returns:
+        Number of items of a list result, 0 for None, 1 otherwise.
+    """
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+class CallMetrics:
+    """
+    Metrics of one (account, region, service, function).
+
+    Updates are made under the lock of the ScanMetrics that created the
+    object, so one call may be recorded from several threads.
+    """
+
+    def __init__(self, lock: threading.Lock):
+        """
+        Initialize call metrics.
+
+        Args:
+            lock: Lock guarding the metrics.
+        """
+        self._lock = lock
+        self.calls = 0
+        self.requests = 0
+        self.pages = 0
+        self.retries = 0
+        self.throttles = 0
+        self.errors = 0
+        self.resources = 0
+        self.response_bytes = 0
+        self.duration = 0.0
+        self.rate_limit_wait = 0.0
+        self.latency_sum = 0.0
+        # Requests per latency bucket, not cumulative; the last one is +Inf
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe_request(self, latency: float, response: Any = None) -> None:
+        """
+        Record an API request.
+
+        Args:
+            latency: Time (in seconds) the request took.
+            response: Parsed response, or None if the request failed.
+        """
+        size = pop_response_size()
+        if size is None:
+            size = response_size(response) if response is not None else 0
+
+        with self._lock:
+            self.requests += 1
+            self.latency_sum += latency
+            self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            if response is not None:
+                self.pages += 1
+                self.response_bytes += size
+
+    def observe_retry(self) -> None:
+        """
+        Record a retried request.
+        """
+        with self._lock:
+            self.retries += 1
+
+    def observe_throttle(self) -> None:
+        """
+        Record a request rejected by throttling.
+        """
+        with self._lock:
+            self.throttles += 1
+
+    def observe_rate_limit_wait(self, seconds: float) -> None:
+        """
+        Record time spent waiting for the rate limiter.
+
+        Args:
+            seconds: Time waited.
+        """
+        with self._lock:
+            self.rate_limit_wait += seconds
+
+    def observe_call(self, duration: float, result: Any = None, failed: bool = False) -> None:
+        """
+        Record a completed scan call.
+
+        Args:
+            duration: Time (in seconds) the call took, including every page and retry.
+            result: Extracted result of the call.
+            failed: Whether the call failed.
+        """
+        with self._lock:
+            self.calls += 1
+            self.duration += duration
+            self.resources += count_resources(result)
+            if failed:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy the metrics. Must be called with the lock held.
+
+        Returns:
+            Counters, and the latency histogram with cumulative bucket counts.
+        """
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.latency_counts):
+            cumulative += count
+            buckets[bound] = cumulative
+
+        return {
+            "calls": self.calls,
+            "requests": self.requests,
+            "pages": self.pages,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "errors": self.errors,
+            "resources": self.resources,
+            "response_bytes": self.response_bytes,
+            "duration_seconds": round(self.duration, 6),
+            "rate_limit_wait_seconds": round(self.rate_limit_wait, 6),
+            "latency": {
+                "count": self.requests,
+                "sum_seconds": round(self.latency_sum, 6),
+                "buckets": buckets,
+            },
+        }
+
+
+class ScanMetrics:
+    """
+    Metrics of a scan, keyed by (account, region, service, function).
+    """
+
+    def __init__(self):
+        """
+        Initialize scan metrics.
+        """
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.calls: Dict[CallKey, CallMetrics] = {}
+
+    def call(self, account_id: Optional[str], region: str, service: str, function: str) -> CallMetrics:
+        """
+        Get the metrics of an API function, creating them on first use.
+
+        Args:
+            account_id: AWS account ID, or None if unknown.
+            region: AWS region.
+            service: AWS service name.
+            function: API function name.
+
+        Returns:
+            Call metrics.
+        """
+        key = (account_id, region, service, function)
+        with self._lock:
+            metrics = self.calls.get(key)
+            if metrics is None:
+                metrics = self.calls[key] = CallMetrics(self._lock)
+            return metrics
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Get the metrics of every call, slowest first.
+
+        Returns:
+            One row per (account, region, service, function).
+        """
+        with self._lock:
+            rows = [
+                {
+                    "account_id": account_id,
+                    "region": region,
+                    "service": service,
+                    "function": function,
+                    **metrics.snapshot(),
+                }
+                for (account_id, region, service, function), metrics in self.calls.items()
+            ]
+        return sorted(rows, key=lambda row: row["duration_seconds"], reverse=True)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Build the run summary.
+
+        Returns:
+            Totals over all calls and the rows of every call, slowest first.
+        """
+        rows = self.rows()
+        totals = {field: sum(row[field] for row in rows) for field, _, _ in COUNTERS}
+        totals["duration_seconds"] = round(totals["duration_seconds"], 6)
+        totals["rate_limit_wait_seconds"] = round(totals["rate_limit_wait_seconds"], 6)
+
+        return {
+            "version": METRICS_VERSION,
+            "started": datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            "elapsed_seconds": round(time.time() - self.started, 3),
+            "latency_buckets": list(LATENCY_BUCKETS),
+            "totals": totals,
+            "calls": rows,
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            Text file contents.
+        """
+        rows = self.rows()
+        lines = []
+
+        def labels(row: Dict[str, Any], **extra: str) -> str:
+            values = {
+                "account": row["account_id"] or "",
+                "region": row["region"],
+                "service": row["service"],
+                "function": row["function"],
+                **extra,
+            }
+            return ",".join(f'{name}="{_escape_label(value)}"' for name, value in values.items())
+
+        for field, name, help_text in COUNTERS:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}.")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            lines.extend(f"{METRIC_PREFIX}_{name}{{{labels(row)}}} {row[field]}" for row in rows)
+
+        name = f"{METRIC_PREFIX}_request_duration_seconds"
+        lines.append(f"# HELP {name} API request latency.")
+        lines.append(f"# TYPE {name} histogram")
+        for row in rows:
+            for bound, count in row["latency"]["buckets"].items():
+                lines.append(f"{name}_bucket{{{labels(row, le=bound)}}} {count}")
+            lines.append(f"{name}_sum{{{labels(row)}}} {row['latency']['sum_seconds']}")
+            lines.append(f"{name}_count{{{labels(row)}}} {row['latency']['count']}")
+
+        name = f"{METRIC_PREFIX}_scan_elapsed_seconds"
+        lines.append(f"# HELP {name} Time since the scan started.")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {round(time.time() - self.started, 3)}")
+
+        name = f"{METRIC_PREFIX}_scan_start_time_seconds"
+        lines.append(f"# HELP {name} Unix time the scan started.")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {round(self.started, 3)}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, summary_path: Optional[str] = None, textfile_path: Optional[str] = None) -> None:
+        """
+        Write the run summary and the Prometheus text file.
+
+        Files are replaced atomically, so readers never see a partial file.
+
+        Args:
+            summary_path: Path of the JSON run summary, or None to skip it.
+            textfile_path: Path of the Prometheus text file, or None to skip it.
+        """
+        if summary_path:
+            _write_atomic(summary_path, json.dumps(self.summary(), indent=2))
+        if textfile_path:
+            _write_atomic(textfile_path, self.to_prometheus())
+
+
+class MetricsWriter:
+    """
+    Writes scan metrics periodically from a background thread, and once more when stopped.
+    """
+
+    def __init__(
+        self,
+        metrics: ScanMetrics,
+        summary_path: Optional[str],
+        textfile_path: Optional[str] = None,
+        interval: float = DEFAULT_INTERVAL
+    ):
+        """
+        Initialize metrics writer.
+
+        Args:
+            metrics: Scan metrics to write.
+            summary_path: Path of the JSON run summary.
+            textfile_path: Path of the Prometheus text file.
+            interval: Seconds between writes while the scan runs. 0 writes only when stopped.
+        """
+        self.metrics = metrics
+        self.summary_path = summary_path
+        self.textfile_path = textfile_path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsWriter":
+        """
+        Start writing periodically.
+
+        Returns:
+            The writer itself.
+        """
+        if self.interval and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and write the final metrics.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._write()
+
+    def __enter__(self) -> "MetricsWriter":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._write()
+
+    def _write(self) -> None:
+        try:
+            self.metrics.write(self.summary_path, self.textfile_path)
+        except OSError as error:
+            # Metrics must never fail the scan
+            logger.warning(f"Could not write metrics: {error}")
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temporary, path)
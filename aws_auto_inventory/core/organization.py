@@ -2,16 +2,27 @@
 Organization scanner for AWS Auto Inventory.
 """
 import logging
-from typing import Dict, Any, List, Optional
+import collections
+import concurrent.futures
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 import boto3
 
 from ..config.models import Inventory
+from .client_factory import ClientFactory
 from .region import RegionScanner, RegionResult
+from .scheduler import ScanTask, TaskScheduler
+from .service import ServiceResult
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Default number of roles assumed concurrently
+DEFAULT_MAX_WORKERS = 8
+
+# Region of the STS endpoint used when the management session has no region
+DEFAULT_STS_REGION = "us-east-1"
+
 
 class AccountResult:
     """
@@ -42,17 +53,21 @@ class AccountResult:
         self.success = success
         self.error = error
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, lazy: bool = False) -> Dict[str, Any]:
         """
         Convert to dictionary.
         
+        Args:
+            lazy: Whether to leave service results as they are, so a writer can
+                  convert them one at a time.
+        
         Returns:
             Dictionary representation of the account result.
         """
         return {
             "account_id": self.account_id,
             "account_name": self.account_name,
-            "regions": [region.to_dict() for region in self.regions],
+            "regions": [region.to_dict(lazy) for region in self.regions],
             "success": self.success,
             "error": self.error
         }
@@ -63,11 +78,27 @@ class OrganizationScanner:
     Scanner for AWS organizations.
     """
     
-    def __init__(self):
+    def __init__(
+        self, 
+        max_workers: Optional[int] = None, 
+        client_factory: Optional[ClientFactory] = None,
+        sts_region: Optional[str] = None
+    ):
         """
         Initialize organization scanner.
+        
+        Args:
+            max_workers: Maximum number of accounts to process concurrently, which is
+                         also the number of roles assumed ahead of the scan (default: 8).
+            client_factory: Shared client cache for STS clients. STS clients are
+                            created through it so that concurrent role assumptions
+                            never share a boto3 Session unguarded.
+            sts_region: Region of the STS endpoint to assume roles through. If None,
+                        uses the management session's region, or us-east-1.
         """
-        pass
+        self.max_workers = max_workers
+        self.client_factory = client_factory or ClientFactory()
+        self.sts_region = sts_region
     
     def get_organization_accounts(self, session: boto3.Session) -> List[Dict[str, str]]:
         """
@@ -122,7 +153,7 @@ class OrganizationScanner:
         """
         logger.info(f"Assuming role {role_name} in account {account_id}")
         
-        sts_client = session.client('sts')
+        sts_client = self._get_sts_client(session)
         role_arn = f'arn:aws:iam::{account_id}:role/{role_name}'
         
         try:
@@ -146,20 +177,71 @@ class OrganizationScanner:
             logger.error(f"Failed to assume role in account {account_id}: {str(e)}")
             return None
     
+    def assume_roles(
+        self, 
+        session: boto3.Session, 
+        accounts: Iterable[Dict[str, str]], 
+        role_name: str
+    ) -> Iterator[Tuple[Dict[str, str], Optional[boto3.Session]]]:
+        """
+        Assume a role in each account, several at a time.
+        
+        Roles are assumed on a pool of max_workers threads, at most max_workers
+        accounts ahead of the caller, so credentials are still fresh when each
+        account is reached.
+        
+        Args:
+            session: boto3 Session for the management account.
+            accounts: Accounts to assume the role in.
+            role_name: Name of the IAM role to assume.
+            
+        Yields:
+            Tuples of account and its assumed session (None if the role assumption
+            failed), in account order.
+        """
+        max_workers = self.max_workers or DEFAULT_MAX_WORKERS
+        pending = collections.deque()
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for account in accounts:
+                pending.append(
+                    (account, executor.submit(self.assume_role, session, account['id'], role_name))
+                )
+                
+                if len(pending) >= max_workers:
+                    ready_account, future = pending.popleft()
+                    yield ready_account, future.result()
+            
+            while pending:
+                ready_account, future = pending.popleft()
+                yield ready_account, future.result()
+    
     def scan_organization(
         self, 
         inventory: Inventory, 
-        region_scanner: RegionScanner
+        region_scanner: RegionScanner,
+        max_workers_regions: Optional[int] = None
     ) -> List[AccountResult]:
         """
         Scan resources across all accounts in an organization.
         
+        Every (account, region, sheet) call runs on the single worker pool of a
+        TaskScheduler, so the number of threads does not grow with the number
+        of accounts or regions. Up to max_workers accounts have calls running
+        at once, each region of an account runs up to region_scanner's
+        max_workers calls at once, and roles are assumed only a few accounts
+        ahead of the scan.
+        
         Args:
             inventory: Inventory configuration.
-            region_scanner: Region scanner to use for scanning regions.
+            region_scanner: Region scanner providing the calls of each region and
+                            making them.
+            max_workers_regions: Maximum number of regions with calls running at
+                                 once in each account. If None, regions are not
+                                 limited.
             
         Returns:
-            List of account scan results.
+            List of account scan results, in account order.
         """
         logger.info("Starting organization scan")
         
@@ -173,55 +255,94 @@ class OrganizationScanner:
             logger.warning("No accounts found in the organization")
             return []
         
-        account_results = []
+        regions = region_scanner.regions(inventory)
+        region_calls = {region: region_scanner.region_calls(inventory, region) for region in regions}
+        errors: Dict[str, str] = {}
         
-        # Scan each account
-        for account in accounts:
-            account_id = account['id']
-            account_name = account['name']
-            
-            logger.info(f"Processing account: {account_name} ({account_id})")
-            
-            # Assume role in the account
-            account_session = self.assume_role(
-                management_session, 
-                account_id, 
-                inventory.aws.role_name
-            )
-            
-            if account_session:
-                # Scan regions in the account
-                region_results = []
+        def plan() -> Iterator[ScanTask]:
+            for account, account_session in self.assume_roles(
+                management_session, accounts, inventory.aws.role_name
+            ):
+                logger.info(f"Processing account: {account['name']} ({account['id']})")
                 
-                for region in inventory.aws.region:
-                    try:
-                        region_result = region_scanner.scan_region(
-                            inventory, 
-                            account_session, 
-                            region
-                        )
-                        region_results.append(region_result)
-                    except Exception as e:
-                        logger.error(f"Error scanning region {region} in account {account_id}: {str(e)}")
+                if account_session is None:
+                    errors[account['id']] = f"Failed to assume role in account {account['id']}"
+                    continue
                 
+                for region in regions:
+                    for sheet, endpoint_region in region_calls[region]:
+                        yield ScanTask(
+                            region=region,
+                            endpoint_region=endpoint_region,
+                            sheet=sheet,
+                            session=account_session,
+                            account_id=account['id'],
+                            account_name=account['name'],
+                            inventory_name=inventory.name
+                        )
+        
+        per_region = region_scanner.max_workers
+        scheduler = TaskScheduler(
+            max_per_region=per_region,
+            max_per_account=max_workers_regions * per_region if max_workers_regions and per_region else None,
+            max_accounts=self.max_workers or DEFAULT_MAX_WORKERS
+        )
+        
+        results: Dict[Tuple[str, str, int], ServiceResult] = {}
+        for task, future in scheduler.run(
+            plan(),
+            lambda task: region_scanner.scan_call(task.sheet, task.session, task.region, task.endpoint_region)
+        ):
+            results[(task.account_id, task.region, id(task.sheet))] = future.result()
+        
+        account_results = []
+        for account in accounts:
+            if account['id'] in errors:
                 account_results.append(
                     AccountResult(
-                        account_id=account_id,
-                        account_name=account_name,
-                        regions=region_results
-                    )
-                )
-            else:
-                account_results.append(
-                    AccountResult(
-                        account_id=account_id,
-                        account_name=account_name,
+                        account_id=account['id'],
+                        account_name=account['name'],
                         regions=[],
                         success=False,
-                        error=f"Failed to assume role in account {account_id}"
+                        error=errors[account['id']]
                     )
                 )
+                continue
+            
+            # Collect results in configuration order
+            account_results.append(
+                AccountResult(
+                    account_id=account['id'],
+                    account_name=account['name'],
+                    regions=[
+                        RegionResult(
+                            region=region,
+                            services=[
+                                results.pop((account['id'], region, id(sheet)))
+                                for sheet, _ in region_calls[region]
+                            ]
+                        )
+                        for region in regions
+                    ]
+                )
+            )
         
         logger.info("Completed organization scan")
         
-        return account_results
\ No newline at end of file
+        return account_results
+    
+    def _get_sts_client(self, session: boto3.Session) -> Any:
+        """
+        Get an STS client on a regional endpoint.
+        
+        Role assumptions go to the STS endpoint of one region instead of the
+        global endpoint, which has lower availability and adds latency.
+        
+        Args:
+            session: boto3 Session for the management account.
+            
+        Returns:
+            boto3 STS client.
+        """
+        region = self.sts_region or session.region_name or DEFAULT_STS_REGION
+        return self.client_factory.get_client(session, 'sts', region)
@@ -0,0 +1,250 @@
+"""
+Pagination helpers for AWS Auto Inventory.
+"""
+import logging
+import functools
+import threading
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Optional
+
+import botocore.session
+import botocore.exceptions
+import jmespath
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Loading paginator models only reads botocore's bundled data files, so a single
+# botocore session is shared for the whole process.
+_model_session = None
+_model_session_lock = threading.Lock()
+
+
+def _get_model_session() -> botocore.session.Session:
+    """
+    Get the botocore session used to load paginator models.
+
+    Returns:
+        Shared botocore Session.
+    """
+    global _model_session
+    with _model_session_lock:
+        if _model_session is None:
+            _model_session = botocore.session.get_session()
+        return _model_session
+
+
+@functools.lru_cache(maxsize=None)
+def _load_paginator_model(service_name: str, api_version: Optional[str]):
+    """
+    Load the paginator model of a service.
+
+    Args:
+        service_name: botocore service name.
+        api_version: API version of the service model.
+
+    Returns:
+        botocore PaginatorModel, or None if the service has no paginators.
+    """
+    try:
+        return _get_model_session().get_paginator_model(service_name, api_version)
+    except botocore.exceptions.DataNotFoundError:
+        return None
+
+
+def get_pagination_config(client: Any, function_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the pagination configuration of a client operation.
+
+    Args:
+        client: boto3 client.
+        function_name: API function name (e.g. describe_instances).
+
+    Returns:
+        Pagination configuration (input_token, output_token, more_results, ...),
+        or None if the operation cannot be paginated.
+    """
+    if not client.can_paginate(function_name):
+        return None
+
+    service_model = client.meta.service_model
+    paginator_model = _load_paginator_model(
+        service_model.service_name, service_model.api_version
+    )
+    if paginator_model is None:
+        return None
+
+    operation_name = client.meta.method_to_api_mapping[function_name]
+    try:
+        return paginator_model.get_paginator(operation_name)
+    except ValueError:
+        return None
+
+
+def _as_list(value: Any) -> List[Any]:
+    """
+    Wrap a scalar pagination setting in a list.
+    """
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+class PageTokens:
+    """
+    Tracks the parameters of the next page of a paginated operation.
+    """
+
+    def __init__(self, pagination_config: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None):
+        """
+        Initialize page tokens.
+
+        Args:
+            pagination_config: Pagination configuration from get_pagination_config.
+            parameters: API parameters for the first page.
+        """
+        self.input_tokens = _as_list(pagination_config["input_token"])
+        self.output_tokens = [
+            jmespath.compile(token) for token in _as_list(pagination_config["output_token"])
+        ]
+        more_results = pagination_config.get("more_results")
+        self.more_results = jmespath.compile(more_results) if more_results else None
+        self.parameters = dict(parameters or {})
+        self.previous_tokens = None
+
+    def advance(self, page: Dict[str, Any]) -> bool:
+        """
+        Update the parameters from a page so they request the next one.
+
+        Args:
+            page: Raw API response of the current page.
+
+        Returns:
+            True if there is a next page, False otherwise.
+        """
+        if self.more_results is not None and not self.more_results.search(page):
+            return False
+
+        next_tokens = [token.search(page) for token in self.output_tokens]
+        if all(token is None or token == "" for token in next_tokens):
+            return False
+
+        if next_tokens == self.previous_tokens:
+            logger.warning(f"The same pagination token was received twice: {next_tokens}")
+            return False
+
+        for name, token in zip(self.input_tokens, next_tokens):
+            if token is None or token == "":
+                self.parameters.pop(name, None)
+            else:
+                self.parameters[name] = token
+
+        self.previous_tokens = next_tokens
+        return True
+
+
+def iter_pages(
+    call: Callable[..., Dict[str, Any]],
+    pagination_config: Dict[str, Any],
+    parameters: Optional[Dict[str, Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the pages of a paginated operation.
+
+    Each page is requested through ``call`` with the pagination token of the
+    previous page, so a retry inside ``call`` only repeats the failed page.
+
+    Args:
+        call: Function making a single API request, called with keyword parameters.
+        pagination_config: Pagination configuration from get_pagination_config.
+        parameters: API parameters for the first page.
+
+    Yields:
+        Raw API responses, one per page.
+    """
+    tokens = PageTokens(pagination_config, parameters)
+
+    while True:
+        page = call(**tokens.parameters)
+        yield page
+
+        if not tokens.advance(page):
+            return
+
+
+async def aiter_pages(
+    call: Callable[..., Awaitable[Dict[str, Any]]],
+    pagination_config: Dict[str, Any],
+    parameters: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over the pages of a paginated operation with an async request function.
+
+    Args:
+        call: Coroutine function making a single API request, called with keyword parameters.
+        pagination_config: Pagination configuration from get_pagination_config.
+        parameters: API parameters for the first page.
+
+    Yields:
+        Raw API responses, one per page.
+    """
+    tokens = PageTokens(pagination_config, parameters)
+
+    while True:
+        page = await call(**tokens.parameters)
+        yield page
+
+        if not tokens.advance(page):
+            return
+
+
+def merge_results(results: Iterable[Any]) -> Any:
+    """
+    Merge per-page results into a single result.
+
+    Lists are concatenated. For dictionaries, list values are concatenated and
+    the remaining values are taken from the last page, which drops stale
+    pagination tokens. A single page is returned unchanged.
+
+    Args:
+        results: Per-page results, consumed one page at a time.
+
+    Returns:
+        Merged result.
+    """
+    merged = None
+    first = True
+
+    for result in results:
+        if first:
+            merged = result
+            first = False
+        else:
+            merged = _merge(merged, result)
+
+    return merged
+
+
+def _merge(merged: Any, result: Any) -> Any:
+    """
+    Merge the result of one page into the accumulated result.
+    """
+    if result is None:
+        return merged
+
+    if merged is None:
+        return result
+
+    if isinstance(merged, list) and isinstance(result, list):
+        merged.extend(result)
+        return merged
+
+    if isinstance(merged, dict) and isinstance(result, dict):
+        combined = {key: value for key, value in merged.items() if isinstance(value, list)}
+        for key, value in result.items():
+            if isinstance(value, list) and isinstance(combined.get(key), list):
+                combined[key].extend(value)
+            else:
+                combined[key] = value
+        return combined
+
+    return result
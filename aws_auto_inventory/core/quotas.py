@@ -0,0 +1,47 @@
+"""
+Default API request quotas for AWS Auto Inventory.
+
+Each entry maps a service name, or a ``service.operation`` pair, to a
+``(rate, burst)`` tuple: the sustained number of requests per second and the
+number of requests that can be made at once after a quiet period. Operation
+entries take precedence over service entries, and ``default`` applies to
+services that are not listed.
+
+The values are deliberately below the published throttling limits, because
+inventory scans share account-level quotas with production workloads.
+"""
+from typing import Dict, Tuple
+
+DEFAULT_QUOTAS: Dict[str, Tuple[float, float]] = {
+    "default": (10.0, 20.0),
+
+    # EC2 non-mutating actions: bucket of 100, refilled at 20 per second
+    "ec2": (10.0, 50.0),
+
+    # Global control planes with low account-wide limits
+    "iam": (5.0, 10.0),
+    "organizations": (2.0, 5.0),
+    "route53": (2.0, 5.0),
+    "cloudfront": (2.0, 5.0),
+
+    # Regional control planes
+    "autoscaling": (5.0, 10.0),
+    "cloudformation": (5.0, 10.0),
+    "cloudtrail": (2.0, 5.0),
+    "cloudtrail.lookup_events": (1.0, 2.0),
+    "cloudwatch": (5.0, 10.0),
+    "cloudwatch.describe_alarms": (4.0, 8.0),
+    "dynamodb": (5.0, 10.0),
+    "ecs": (10.0, 20.0),
+    "elb": (5.0, 10.0),
+    "elbv2": (5.0, 10.0),
+    "kms": (20.0, 40.0),
+    "lambda": (5.0, 10.0),
+    "logs": (3.0, 5.0),
+    "rds": (4.0, 20.0),
+    "s3": (20.0, 50.0),
+    "ssm": (3.0, 5.0),
+    "sns": (10.0, 20.0),
+    "sqs": (10.0, 20.0),
+    "apigateway": (5.0, 10.0),
+}
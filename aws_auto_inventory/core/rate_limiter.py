@@ -0,0 +1,214 @@
+"""
+Client-side rate limiting for AWS Auto Inventory.
+"""
+import time
+import logging
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+from .quotas import DEFAULT_QUOTAS
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Maximum number of tokens the bucket holds.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting until one is available.
+
+        Returns:
+            Time (in seconds) spent waiting.
+        """
+        waited = 0.0
+
+        while True:
+            wait_time = self.try_acquire()
+            if not wait_time:
+                return waited
+
+            time.sleep(wait_time)
+            waited += wait_time
+
+    async def acquire_async(self) -> float:
+        """
+        Take a token, waiting on the event loop until one is available.
+
+        Returns:
+            Time (in seconds) spent waiting.
+        """
+        # Only coroutines need asyncio, and they run with it already loaded
+        import asyncio
+
+        waited = 0.0
+
+        while True:
+            wait_time = self.try_acquire()
+            if not wait_time:
+                return waited
+
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available, without waiting.
+
+        Returns:
+            0 if a token was taken, otherwise the time (in seconds) until one
+            becomes available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            return (1 - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-API rate limiter shared by all scanner threads.
+
+    Requests wait for a token from a bucket keyed by (account, region, service)
+    or, when the quota table has an entry for the operation, by
+    (account, region, service, operation).
+    """
+
+    def __init__(self, quotas: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Initialize rate limiter.
+
+        Args:
+            quotas: Quota overrides applied on top of DEFAULT_QUOTAS, keyed by
+                    service or service.operation. A rate of 0 disables limiting.
+        """
+        self._quotas = dict(DEFAULT_QUOTAS)
+        self._buckets: Dict[Tuple[Hashable, ...], TokenBucket] = {}
+        self._lock = threading.Lock()
+        if quotas:
+            self.update_quotas(quotas)
+
+    def update_quotas(self, quotas: Dict[str, Tuple[float, float]]) -> None:
+        """
+        Replace the quota overrides.
+
+        Buckets are recreated lazily with the new quotas.
+
+        Args:
+            quotas: Quota overrides keyed by service or service.operation.
+        """
+        with self._lock:
+            self._quotas = {**DEFAULT_QUOTAS, **quotas}
+            self._buckets.clear()
+
+    def acquire(
+        self,
+        service: str,
+        operation: str,
+        region: Optional[str] = None,
+        account: Optional[Hashable] = None
+    ) -> float:
+        """
+        Wait until a request to an API operation is allowed.
+
+        Args:
+            service: AWS service name.
+            operation: API function name.
+            region: AWS region.
+            account: Account or credential identity the request is made with.
+
+        Returns:
+            Time (in seconds) spent waiting.
+        """
+        bucket = self._get_bucket(service, operation, region, account)
+        if bucket is None:
+            return 0.0
+
+        waited = bucket.acquire()
+        if waited:
+            logger.debug(f"Rate limited {service}.{operation} in region {region} for {waited:.2f}s")
+        return waited
+
+    async def acquire_async(
+        self,
+        service: str,
+        operation: str,
+        region: Optional[str] = None,
+        account: Optional[Hashable] = None
+    ) -> float:
+        """
+        Wait on the event loop until a request to an API operation is allowed.
+
+        Args:
+            service: AWS service name.
+            operation: API function name.
+            region: AWS region.
+            account: Account or credential identity the request is made with.
+
+        Returns:
+            Time (in seconds) spent waiting.
+        """
+        bucket = self._get_bucket(service, operation, region, account)
+        if bucket is None:
+            return 0.0
+
+        waited = await bucket.acquire_async()
+        if waited:
+            logger.debug(f"Rate limited {service}.{operation} in region {region} for {waited:.2f}s")
+        return waited
+
+    def _get_bucket(
+        self,
+        service: str,
+        operation: str,
+        region: Optional[str],
+        account: Optional[Hashable]
+    ) -> Optional[TokenBucket]:
+        """
+        Get the bucket for a request, creating it on first use.
+
+        Returns:
+            Token bucket, or None if the request is not limited.
+        """
+        operation_key = f"{service}.{operation}"
+
+        with self._lock:
+            if operation_key in self._quotas:
+                key = (account, region, service, operation)
+                rate, burst = self._quotas[operation_key]
+            else:
+                key = (account, region, service)
+                rate, burst = self._quotas.get(service, self._quotas["default"])
+
+            if rate <= 0:
+                return None
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst)
+                self._buckets[key] = bucket
+
+            return bucket
@@ -3,11 +3,15 @@ Region scanner for AWS Auto Inventory.
 """
 import logging
 import concurrent.futures
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import boto3
 
 from ..config.models import Inventory, Sheet
+from .availability import GLOBAL_REGION, AvailabilityIndex
+from .client_factory import ClientFactory, pool_size_for_workers
+from .rate_limiter import RateLimiter
+from .single_flight import SingleFlight
 from .service import ServiceScanner, ServiceResult
 
 # Set up logger
@@ -30,16 +34,20 @@ class RegionResult:
         self.region = region
         self.services = services
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, lazy: bool = False) -> Dict[str, Any]:
         """
         Convert to dictionary.
         
+        Args:
+            lazy: Whether to leave service results as they are, so a writer can
+                  convert them one at a time.
+                  
         Returns:
             Dictionary representation of the region result.
         """
         return {
             "region": self.region,
-            "services": [service.to_dict() for service in self.services]
+            "services": list(self.services) if lazy else [service.to_dict() for service in self.services]
         }
 
 
@@ -52,7 +60,11 @@ class RegionScanner:
         self, 
         max_retries: int = 3, 
         retry_delay: int = 2, 
-        max_workers: Optional[int] = None
+        max_workers: Optional[int] = None,
+        client_factory: Optional[ClientFactory] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        availability: Optional[AvailabilityIndex] = None,
+        single_flight: Optional[SingleFlight] = None
     ):
         """
         Initialize region scanner.
@@ -61,11 +73,59 @@ class RegionScanner:
             max_retries: Maximum number of retries for API calls.
             retry_delay: Base delay (in seconds) between retries.
             max_workers: Maximum number of worker threads for concurrent service scanning.
+            client_factory: Shared client cache. If None, one sized to max_workers is created.
+            rate_limiter: Shared rate limiter. If None, requests are not rate limited.
+            availability: Service availability index. Sheets whose service has no
+                          endpoint in the region are skipped, and global calls are
+                          made once in the global region. If None, every sheet is
+                          scanned in every region.
+            single_flight: Registry of calls made more than once in a scan. If None,
+                           every call is sent.
         """
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.max_workers = max_workers
-        self.service_scanner = ServiceScanner(max_retries, retry_delay)
+        self.client_factory = client_factory or ClientFactory(
+            max_pool_connections=pool_size_for_workers(max_workers)
+        )
+        self.rate_limiter = rate_limiter
+        self.availability = availability
+        self.service_scanner = ServiceScanner(
+            max_retries, retry_delay, self.client_factory, rate_limiter, single_flight
+        )
+    
+    def regions(self, inventory: Inventory) -> List[str]:
+        """
+        List the regions to scan an inventory in.
+        
+        Args:
+            inventory: Inventory configuration.
+            
+        Returns:
+            The global region if any sheet makes a global call, followed by the
+            configured regions.
+        """
+        if any(self.global_region(inventory, sheet) for sheet in inventory.sheets):
+            return [GLOBAL_REGION] + list(inventory.aws.region)
+        
+        return list(inventory.aws.region)
+    
+    def global_region(self, inventory: Inventory, sheet: Sheet) -> Optional[str]:
+        """
+        Get the region a sheet's global call is sent to.
+        
+        Args:
+            inventory: Inventory configuration.
+            sheet: Sheet configuration.
+            
+        Returns:
+            Region to send the call to, or None if the call is regional or
+            there is no availability index.
+        """
+        if self.availability is None:
+            return None
+        
+        return self.availability.global_region(sheet.service, sheet.function, inventory.aws.region)
     
     def scan_region(
         self, 
@@ -76,63 +136,123 @@ class RegionScanner:
         """
         Scan all services in a region.
         
+        Global calls are only made when scanning the global region, which sends
+        each of them to a region of its partition.
+        
         Args:
             inventory: Inventory configuration.
             session: boto3 Session.
-            region: AWS region.
+            region: AWS region, or the global region.
             
         Returns:
             Region scan result.
         """
         logger.info(f"Scanning region {region}")
         
-        services_results = []
+        calls = self.region_calls(inventory, region)
         
         # Use ThreadPoolExecutor for concurrent service scanning
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Create a future for each service
-            future_to_sheet = {
-                executor.submit(
-                    self.service_scanner.scan_service,
-                    sheet,
-                    session,
-                    region
-                ): sheet
-                for sheet in inventory.sheets
-            }
-            
-            # Process completed futures
-            for future in concurrent.futures.as_completed(future_to_sheet):
-                sheet = future_to_sheet[future]
-                try:
-                    service_result = future.result()
-                    services_results.append(service_result)
-                    
-                    if service_result.success:
-                        logger.info(
-                            f"Successfully scanned service {sheet.service} with function {sheet.function} in region {region}"
-                        )
-                    else:
-                        logger.warning(
-                            f"Failed to scan service {sheet.service} with function {sheet.function} in region {region}: {service_result.error}"
-                        )
-                
-                except Exception as e:
-                    logger.error(
-                        f"Error processing service {sheet.service} with function {sheet.function} in region {region}: {str(e)}"
-                    )
-                    
-                    services_results.append(
-                        ServiceResult(
-                            service=sheet.service,
-                            function=sheet.function,
-                            region=region,
-                            result=None,
-                            success=False,
-                            error=f"Error processing service: {str(e)}"
-                        )
-                    )
+            futures = [
+                executor.submit(self.scan_call, sheet, session, region, endpoint_region)
+                for sheet, endpoint_region in calls
+            ]
+            services_results = [future.result() for future in concurrent.futures.as_completed(futures)]
         
         logger.info(f"Completed scanning region {region}")
         
-        return RegionResult(region=region, services=services_results)
\ No newline at end of file
+        return RegionResult(region=region, services=services_results)
+    
+    def region_calls(self, inventory: Inventory, region: str) -> List[Tuple[Sheet, str]]:
+        """
+        List the sheets to scan in a region, with the region each call is sent to.
+        
+        Args:
+            inventory: Inventory configuration.
+            region: AWS region, or the global region.
+            
+        Returns:
+            Tuples of sheet and endpoint region. In the global region these are
+            the global calls, elsewhere the regional calls with an endpoint in
+            the region.
+        """
+        global_regions = [(sheet, self.global_region(inventory, sheet)) for sheet in inventory.sheets]
+        
+        if region == GLOBAL_REGION:
+            calls = [
+                (sheet, endpoint_region) for sheet, endpoint_region in global_regions
+                if endpoint_region is not None
+            ]
+        else:
+            calls = [
+                (sheet, region) for sheet, endpoint_region in global_regions
+                if endpoint_region is None
+            ]
+            
+            if len(calls) < len(inventory.sheets):
+                logger.info(
+                    f"Scanning {len(inventory.sheets) - len(calls)} global services once instead of in region {region}"
+                )
+        
+        if self.availability is not None:
+            available = [
+                (sheet, endpoint_region) for sheet, endpoint_region in calls
+                if self.availability.is_available(sheet.service, endpoint_region)
+            ]
+            
+            if len(available) < len(calls):
+                logger.info(
+                    f"Skipping {len(calls) - len(available)} services without an endpoint in region {region}"
+                )
+            
+            calls = available
+        
+        return calls
+    
+    def scan_call(
+        self, 
+        sheet: Sheet, 
+        session: boto3.Session, 
+        region: str, 
+        endpoint_region: str
+    ) -> ServiceResult:
+        """
+        Scan one sheet in a region.
+        
+        Args:
+            sheet: Sheet configuration.
+            session: boto3 Session.
+            region: AWS region, or the global region, the result belongs to.
+            endpoint_region: Region the call is sent to.
+            
+        Returns:
+            Service scan result. Unexpected errors give a failed result.
+        """
+        try:
+            service_result = self.service_scanner.scan_service(sheet, session, endpoint_region)
+            service_result.region = region
+            
+            if service_result.success:
+                logger.info(
+                    f"Successfully scanned service {sheet.service} with function {sheet.function} in region {region}"
+                )
+            else:
+                logger.warning(
+                    f"Failed to scan service {sheet.service} with function {sheet.function} in region {region}: {service_result.error}"
+                )
+            
+            return service_result
+        
+        except Exception as e:
+            logger.error(
+                f"Error processing service {sheet.service} with function {sheet.function} in region {region}: {str(e)}"
+            )
+            
+            return ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=region,
+                result=None,
+                success=False,
+                error=f"Error processing service: {str(e)}"
+            )
@@ -2,19 +2,109 @@
 Main scanning engine for AWS Auto Inventory.
 """
 import logging
+import functools
+import collections
 import concurrent.futures
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Callable, Deque, Hashable, Iterator, List, Optional, Tuple, Union
 
 import boto3
 
-from ..config.models import Config, Inventory
+from ..config.models import Config, Inventory, Sheet
+from .availability import GLOBAL_REGION, AvailabilityIndex
+from .client_factory import ClientFactory, pool_size_for_workers
+from .fanout import FanOutGroup, FanOutTask, batch_size, dependent_sheets, extract_ids
+from .journal import ScanJournal
 from .organization import OrganizationScanner, AccountResult
+from .rate_limiter import RateLimiter
 from .region import RegionScanner, RegionResult
+from .scheduler import ScanTask, TaskQueue, TaskScheduler
+from .service import ServiceResult
+from .single_flight import SingleFlight, call_key
+from .spill import ResultStore
+from .stats import CallStats, CallTimer, ScanProgress
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 
+def journal_key(task: ScanTask) -> str:
+    """
+    Get the key of a task in a checkpoint journal.
+    
+    Args:
+        task: Scan task.
+        
+    Returns:
+        Key made of the task's inventory, account, region and sheet.
+    """
+    return "/".join([
+        task.inventory_name or "",
+        task.account_id or "",
+        task.region or "",
+        task.sheet.name
+    ])
+
+
+class _SessionTracker:
+    """
+    Counts the unfinished work of each organization account's session.
+    
+    Root tasks and fan-out groups are counted until they complete. Once an
+    account has been fully planned and its count drops to zero, release is
+    called with its session, so its clients do not outlive its scan.
+    """
+    
+    def __init__(self, release: Callable[[boto3.Session], None]):
+        """
+        Initialize session tracker.
+        
+        Args:
+            release: Function called with each session once its account is done.
+        """
+        self.release = release
+        self.counts: Dict[boto3.Session, int] = collections.Counter()
+        self.planning: Optional[boto3.Session] = None
+    
+    def add(self, task: ScanTask) -> None:
+        """
+        Count a task or fan-out group that will run in the session of a task.
+        """
+        if self._tracked(task):
+            self.counts[task.session] += 1
+    
+    def done(self, task: ScanTask) -> None:
+        """
+        Record that a counted task or fan-out group has completed.
+        """
+        if self._tracked(task):
+            self.counts[task.session] -= 1
+            self._release_if_done(task.session)
+    
+    def plan(self, task: Optional[ScanTask]) -> None:
+        """
+        Record the next planned task, or None once planning has ended.
+        
+        Accounts are planned one after another, so a task of another session
+        means the previous account has been fully planned.
+        """
+        session = task.session if task is not None and self._tracked(task) else None
+        if session is self.planning:
+            return
+        
+        previous, self.planning = self.planning, session
+        if previous is not None:
+            self._release_if_done(previous)
+    
+    def _tracked(self, task: ScanTask) -> bool:
+        # The session of a single-account scan is kept for later inventories
+        return task.session is not None and task.account_id is not None
+    
+    def _release_if_done(self, session: boto3.Session) -> None:
+        if session is not self.planning and not self.counts[session]:
+            del self.counts[session]
+            self.release(session)
+
+
 class ScanResult:
     """
     Result of a scan.
@@ -24,7 +114,8 @@ class ScanResult:
         self, 
         inventory_name: str, 
         account_results: Optional[List[AccountResult]] = None,
-        region_results: Optional[List[RegionResult]] = None
+        region_results: Optional[List[RegionResult]] = None,
+        skipped: Optional[List[Dict[str, str]]] = None
     ):
         """
         Initialize scan result.
@@ -33,16 +124,23 @@ class ScanResult:
             inventory_name: Name of the inventory.
             account_results: List of account scan results (for organization scans).
             region_results: List of region scan results (for single account scans).
+            skipped: Sheet and region combinations skipped because the service has
+                     no endpoint in the region.
         """
         self.inventory_name = inventory_name
         self.account_results = account_results or []
         self.region_results = region_results or []
+        self.skipped = skipped or []
         self.is_organization_scan = account_results is not None
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, lazy: bool = False) -> Dict[str, Any]:
         """
         Convert to dictionary.
         
+        Args:
+            lazy: Whether to leave service results as they are, so a writer can
+                  convert them one at a time.
+                  
         Returns:
             Dictionary representation of the scan result.
         """
@@ -52,19 +150,45 @@ class ScanResult:
         
         if self.is_organization_scan:
             result["organization_results"] = [
-                account.to_dict() for account in self.account_results
+                account.to_dict(lazy) for account in self.account_results
             ]
         else:
             result["account_results"] = [
-                region.to_dict() for region in self.region_results
+                region.to_dict(lazy) for region in self.region_results
             ]
         
+        result["skipped"] = self.skipped
+        
         return result
+    
+    def iter_service_results(self) -> Iterator[ServiceResult]:
+        """
+        Iterate over the service results of all accounts and regions.
+        
+        Yields:
+            Service scan results.
+        """
+        if self.is_organization_scan:
+            for account in self.account_results:
+                for region in account.regions:
+                    yield from region.services
+        else:
+            for region in self.region_results:
+                yield from region.services
 
 
 class ScanEngine:
     """
     Main scanning engine for AWS Auto Inventory.
+    
+    Every (account, region, sheet) combination of an inventory is run as one
+    task on a single bounded worker pool, instead of nesting a pool of regions
+    inside a pool of accounts. Calls of dependent sheets are added to the same
+    pool as the pages of their parent sheet arrive. API calls that several
+    sheets or inventories make identically in an account are sent once. The
+    calls of each account start longest expected duration first, going by
+    the durations of earlier runs. With a memory budget, the results scan()
+    holds until it returns are packed and spilled to disk beyond the budget.
     """
     
     def __init__(
@@ -72,7 +196,15 @@ class ScanEngine:
         max_retries: int = 3, 
         retry_delay: int = 2,
         max_workers_regions: Optional[int] = None,
-        max_workers_services: Optional[int] = None
+        max_workers_services: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_workers_per_account: Optional[int] = None,
+        max_workers_accounts: Optional[int] = None,
+        availability: Optional[AvailabilityIndex] = None,
+        check_availability: bool = True,
+        stats_path: Optional[str] = None,
+        memory_budget: Optional[int] = None,
+        spill_dir: Optional[str] = None
     ):
         """
         Initialize scan engine.
@@ -80,64 +212,419 @@ class ScanEngine:
         Args:
             max_retries: Maximum number of retries for API calls.
             retry_delay: Base delay (in seconds) between retries.
-            max_workers_regions: Maximum number of worker threads for concurrent region scanning.
-            max_workers_services: Maximum number of worker threads for concurrent service scanning.
+            max_workers_regions: Maximum number of regions of an account scanned at full
+                                 service concurrency. Together with max_workers_services,
+                                 caps the concurrent tasks per account.
+            max_workers_services: Maximum number of concurrent tasks in one region of an account.
+            max_workers: Global maximum number of concurrent tasks.
+            max_workers_per_account: Maximum number of concurrent tasks in one account.
+                                     Overrides the cap derived from max_workers_regions.
+            max_workers_accounts: Maximum number of accounts scanned at once in organization
+                                  scans, which is also the number of roles assumed concurrently.
+            availability: Service availability index. If None, one is built lazily from
+                          botocore's bundled endpoint data.
+            check_availability: Whether to skip sheets whose service has no endpoint in a region
+                                and make global calls once per account.
+            stats_path: File of call durations from earlier runs, updated when each scan
+                        ends. If None, durations are only kept for the engine's lifetime.
+            memory_budget: Maximum number of bytes of packed results scan() keeps in
+                           memory. Older results are spilled to a temporary file. If
+                           None, results are kept in memory as they are.
+            spill_dir: Directory of the temporary file of spilled results. If None,
+                       the system's temporary directory is used.
         """
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.max_workers_regions = max_workers_regions
         self.max_workers_services = max_workers_services
+        self.max_workers_accounts = max_workers_accounts
+        
+        if max_workers_per_account is None and max_workers_regions and max_workers_services:
+            max_workers_per_account = max_workers_regions * max_workers_services
         
-        self.organization_scanner = OrganizationScanner()
+        self.scheduler = TaskScheduler(
+            max_workers=max_workers,
+            max_per_region=max_workers_services,
+            max_per_account=max_workers_per_account,
+            max_accounts=max_workers_accounts
+        )
+        
+        # Clients are shared across regions, accounts and inventories. Within a
+        # region, up to max_workers_services threads use the same client.
+        self.client_factory = ClientFactory(
+            max_pool_connections=pool_size_for_workers(
+                max_workers_services or self.scheduler.max_workers
+            )
+        )
+        
+        # A single rate limiter paces requests from every scanner thread
+        self.rate_limiter = RateLimiter()
+        
+        # Identical calls of different sheets and inventories share one request
+        self.single_flight = SingleFlight()
+        
+        # Durations of earlier calls put the longest calls of an account first
+        self.stats_path = stats_path
+        self.stats = CallStats.load(stats_path) if stats_path else CallStats()
+        
+        # Results held by scan() until it returns stay within the memory budget
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.result_store: Optional[ResultStore] = None
+        
+        # Combinations without an endpoint are skipped before tasks are planned
+        self.availability = (availability or AvailabilityIndex()) if check_availability else None
+        
+        self.organization_scanner = OrganizationScanner(
+            max_workers=max_workers_accounts,
+            client_factory=self.client_factory
+        )
         self.region_scanner = RegionScanner(
             max_retries=max_retries,
             retry_delay=retry_delay,
-            max_workers=max_workers_services
+            max_workers=max_workers_services,
+            client_factory=self.client_factory,
+            rate_limiter=self.rate_limiter,
+            availability=self.availability,
+            single_flight=self.single_flight
         )
+        self.service_scanner = self.region_scanner.service_scanner
+        
+        # Sheets that fan out over the results of another sheet, by inventory
+        # and parent sheet name, for the inventory being scanned
+        self.dependent_sheets: Dict[Tuple[str, str], List[Sheet]] = {}
+        
+        # Unfinished work of each organization account, for the run in progress
+        self._sessions = _SessionTracker(self._release_session)
     
-    def scan(self, config: Config) -> List[ScanResult]:
+    def scan(self, config: Config, journal: Optional[ScanJournal] = None) -> List[ScanResult]:
         """
         Perform scanning based on configuration.
         
         Args:
             config: Configuration to use for scanning.
-            
+            journal: Checkpoint journal. Tasks it lists are not scanned again; their
+                     stored results are used instead. Newly completed tasks are
+                     recorded in it as their results land.
+                     
         Returns:
             List of scan results, one for each inventory in the configuration.
         """
         results = []
+        self.single_flight.expect(self._call_keys(config))
+        # Each scan gets its own store, which lives as long as its results
+        self.result_store = ResultStore(self.memory_budget, self.spill_dir) \
+            if self.memory_budget is not None else None
+        
+        try:
+            for inventory in config.inventories:
+                logger.info(f"Starting scan for inventory: {inventory.name}")
+                self._apply_rate_limits(inventory)
+                self.dependent_sheets = dependent_sheets(inventory)
+                
+                if inventory.aws.organization:
+                    # Scan across organization
+                    result = self._scan_organization(inventory, journal)
+                else:
+                    # Scan single account
+                    result = self._scan_account(inventory, journal)
+                
+                result.skipped = self._skipped_combinations(inventory)
+                results.append(result)
+                logger.info(f"Completed scan for inventory: {inventory.name}")
+        finally:
+            self._finish_single_flight()
+            self._save_stats()
+            if self.result_store is not None and self.result_store.spilled:
+                logger.info(
+                    f"Spilled {self.result_store.spilled} results "
+                    f"({self.result_store.spilled_bytes} bytes packed) to disk"
+                )
+            self.result_store = None
+        
+        return results
+    
+    def iter_results(
+        self, 
+        config: Config, 
+        journal: Optional[ScanJournal] = None
+    ) -> Iterator[ServiceResult]:
+        """
+        Perform scanning based on configuration, yielding each service result as it completes.
+        
+        Unlike scan, results are neither grouped nor kept, so memory use follows
+        the number of calls in flight rather than the size of the inventory. Each
+        result carries its inventory, account, region and sheet. An account whose
+        role cannot be assumed yields a single failed sts.assume_role result.
         
+        Args:
+            config: Configuration to use for scanning.
+            journal: Checkpoint journal. Tasks it lists are not scanned again; their
+                     stored results are yielded instead. Newly completed tasks are
+                     recorded in it as their results land.
+                     
+        Yields:
+            Service scan results, in completion order.
+        """
+        self.single_flight.expect(self._call_keys(config))
+        
+        try:
+            for inventory in config.inventories:
+                logger.info(f"Starting scan for inventory: {inventory.name}")
+                self._apply_rate_limits(inventory)
+                self.dependent_sheets = dependent_sheets(inventory)
+                self._skipped_combinations(inventory)
+                
+                failed_accounts = []
+                
+                if inventory.aws.organization:
+                    management_session = boto3.Session(profile_name=inventory.aws.profile)
+                    accounts = self.organization_scanner.get_organization_accounts(management_session)
+                    
+                    if not accounts:
+                        logger.warning("No accounts found in the organization")
+                    
+                    tasks = self._plan_organization(
+                        inventory, management_session, accounts, failed_accounts, journal
+                    )
+                else:
+                    session = boto3.Session(profile_name=inventory.aws.profile)
+                    tasks = self._plan_account(inventory, session)
+                
+                reported = 0
+                for _, service_result in self._iter_journaled_results(tasks, journal):
+                    # Accounts are planned lazily, so failures surface between results
+                    for account, error in failed_accounts[reported:]:
+                        yield self._failed_account_result(inventory, account, error)
+                    reported = len(failed_accounts)
+                    
+                    yield service_result
+                
+                for account, error in failed_accounts[reported:]:
+                    yield self._failed_account_result(inventory, account, error)
+                
+                logger.info(f"Completed scan for inventory: {inventory.name}")
+        finally:
+            self._finish_single_flight()
+            self._save_stats()
+    
+    def _call_keys(self, config: Config) -> Iterator[Hashable]:
+        """
+        List the call key of every task planned in each account.
+        
+        Dependent sheets are left out, since their parameters depend on the
+        results of their parent.
+        
+        Args:
+            config: Configuration to scan.
+            
+        Yields:
+            Call keys, once per task of an account.
+        """
         for inventory in config.inventories:
-            logger.info(f"Starting scan for inventory: {inventory.name}")
+            for sheet in inventory.sheets:
+                if sheet.fan_out is not None:
+                    continue
+                
+                for region, _ in self._sheet_regions(inventory, sheet):
+                    yield self._call_key(inventory, sheet, region)
+    
+    def _call_key(self, inventory: Inventory, sheet: Sheet, region: str) -> Hashable:
+        """
+        Get the key of a sheet's API call in a region.
+        
+        Args:
+            inventory: Inventory configuration.
+            sheet: Sheet configuration.
+            region: AWS region.
             
-            if inventory.aws.organization:
-                # Scan across organization
-                result = self._scan_organization(inventory)
-            else:
-                # Scan single account
-                result = self._scan_account(inventory)
+        Returns:
+            Call key, the same for every inventory using the same credentials.
+        """
+        return call_key(
+            inventory.aws.profile,
+            inventory.aws.role_name if inventory.aws.organization else None,
+            region,
+            sheet.service,
+            sheet.function,
+            sheet.parameters,
+            sheet.paginate
+        )
+    
+    def _sheet_regions(self, inventory: Inventory, sheet: Sheet) -> List[Tuple[str, str]]:
+        """
+        List the regions a sheet is scanned in for each account.
+        
+        A global call is made once, stored under the global region and sent to
+        the first configured region of its partition. Regions where the service
+        has no endpoint are skipped.
+        
+        Args:
+            inventory: Inventory configuration.
+            sheet: Sheet configuration.
             
-            results.append(result)
-            logger.info(f"Completed scan for inventory: {inventory.name}")
+        Returns:
+            Tuples of the region the result is stored under and the region the
+            call is sent to.
+        """
+        if self.availability is None:
+            return [(region, region) for region in inventory.aws.region]
         
-        return results
+        endpoint_region = self.availability.global_region(sheet.service, sheet.function, inventory.aws.region)
+        if endpoint_region is not None:
+            return [(GLOBAL_REGION, endpoint_region)]
+        
+        return [
+            (region, region) for region in inventory.aws.region
+            if self.availability.is_available(sheet.service, region)
+        ]
+    
+    def _finish_single_flight(self) -> None:
+        """
+        Log the calls that were shared and drop any pages still held.
+        """
+        if self.single_flight.shared:
+            logger.info(f"Reused the response of an identical call for {self.single_flight.shared} API calls")
+        
+        self.single_flight.clear()
     
-    def _scan_organization(self, inventory: Inventory) -> ScanResult:
+    def _save_stats(self) -> None:
+        """
+        Write the call statistics to the stats file, if there is one.
+        """
+        if not self.stats_path:
+            return
+        
+        try:
+            self.stats.save(self.stats_path)
+        except OSError as e:
+            logger.warning(f"Could not write call statistics to {self.stats_path}: {str(e)}")
+    
+    def _release_session(self, session: boto3.Session) -> None:
+        """
+        Drop the cached clients of an account whose tasks have all completed.
+        
+        Args:
+            session: boto3 Session of the account.
+        """
+        self.client_factory.evict(session)
+    
+    def _stats_key(self, task: ScanTask) -> Tuple[Optional[str], str, str, str]:
+        """
+        Get the key of a task in the call statistics.
+        
+        Args:
+            task: Scan task.
+            
+        Returns:
+            Account ID, region, service and function of the task.
+        """
+        return (task.account_id, task.region, task.sheet.service, task.sheet.function)
+    
+    def _skipped_combinations(self, inventory: Inventory) -> List[Dict[str, str]]:
+        """
+        List and log the sheet and region combinations the planner skips.
+        
+        Args:
+            inventory: Inventory configuration.
+            
+        Returns:
+            Skipped combinations, each with the sheet, service, function and region.
+        """
+        if self.availability is None:
+            return []
+        
+        skipped = [
+            {
+                "sheet": sheet.name,
+                "service": sheet.service,
+                "function": sheet.function,
+                "region": region
+            }
+            for sheet in inventory.sheets
+            if self.availability.global_region(sheet.service, sheet.function, inventory.aws.region) is None
+            for region in inventory.aws.region
+            if not self.availability.is_available(sheet.service, region)
+        ]
+        
+        if skipped:
+            logger.info(
+                f"Skipping {len(skipped)} sheet and region combinations whose service has no endpoint in the region"
+            )
+            for item in skipped:
+                logger.debug(f"Skipping service {item['service']} in region {item['region']}")
+        
+        return skipped
+    
+    def _apply_rate_limits(self, inventory: Inventory) -> None:
+        """
+        Apply the rate limit overrides of an inventory.
+        
+        Inventories run one after another, so each applies its own quota overrides.
+        
+        Args:
+            inventory: Inventory configuration.
+        """
+        self.rate_limiter.update_quotas({
+            key: rate_limit.as_quota()
+            for key, rate_limit in inventory.aws.rate_limits.items()
+        })
+    
+    def _scan_organization(
+        self, 
+        inventory: Inventory, 
+        journal: Optional[ScanJournal] = None
+    ) -> ScanResult:
         """
         Scan across an organization.
         
         Args:
             inventory: Inventory configuration.
+            journal: Checkpoint journal.
             
         Returns:
             Scan result.
         """
         logger.info(f"Starting organization scan for inventory: {inventory.name}")
         
-        account_results = self.organization_scanner.scan_organization(
-            inventory, 
-            self.region_scanner
+        # Get the management account session
+        management_session = boto3.Session(profile_name=inventory.aws.profile)
+        
+        # Get all accounts in the organization
+        accounts = self.organization_scanner.get_organization_accounts(management_session)
+        
+        if not accounts:
+            logger.warning("No accounts found in the organization")
+        
+        failed_accounts = []
+        services_by_account = self._run(
+            self._plan_organization(inventory, management_session, accounts, failed_accounts, journal),
+            journal
         )
+        errors = {account['id']: error for account, error in failed_accounts}
+        
+        account_results = []
+        for account in accounts:
+            if account['id'] in errors:
+                account_results.append(
+                    AccountResult(
+                        account_id=account['id'],
+                        account_name=account['name'],
+                        regions=[],
+                        success=False,
+                        error=errors[account['id']]
+                    )
+                )
+            else:
+                account_results.append(
+                    AccountResult(
+                        account_id=account['id'],
+                        account_name=account['name'],
+                        regions=self._region_results(
+                            inventory, services_by_account.get(account['id'], {})
+                        )
+                    )
+                )
         
         logger.info(f"Completed organization scan for inventory: {inventory.name}")
         
@@ -146,12 +633,17 @@ class ScanEngine:
             account_results=account_results
         )
     
-    def _scan_account(self, inventory: Inventory) -> ScanResult:
+    def _scan_account(
+        self, 
+        inventory: Inventory, 
+        journal: Optional[ScanJournal] = None
+    ) -> ScanResult:
         """
         Scan a single account.
         
         Args:
             inventory: Inventory configuration.
+            journal: Checkpoint journal.
             
         Returns:
             Scan result.
@@ -161,36 +653,571 @@ class ScanEngine:
         # Create session
         session = boto3.Session(profile_name=inventory.aws.profile)
         
-        # Scan regions concurrently
-        region_results = []
-        
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_workers_regions
-        ) as executor:
-            # Create a future for each region
-            future_to_region = {
-                executor.submit(
-                    self.region_scanner.scan_region,
-                    inventory,
-                    session,
-                    region
-                ): region
-                for region in inventory.aws.region
-            }
-            
-            # Process completed futures
-            for future in concurrent.futures.as_completed(future_to_region):
-                region = future_to_region[future]
-                try:
-                    region_result = future.result()
-                    region_results.append(region_result)
-                    logger.info(f"Successfully scanned region {region}")
-                except Exception as e:
-                    logger.error(f"Error scanning region {region}: {str(e)}")
+        services_by_account = self._run(self._plan_account(inventory, session), journal)
         
         logger.info(f"Completed account scan for inventory: {inventory.name}")
         
         return ScanResult(
             inventory_name=inventory.name,
-            region_results=region_results
-        )
\ No newline at end of file
+            region_results=self._region_results(inventory, services_by_account.get(None, {}))
+        )
+    
+    def _plan_organization(
+        self, 
+        inventory: Inventory, 
+        management_session: boto3.Session, 
+        accounts: List[Dict[str, str]], 
+        failed_accounts: List[Tuple[Dict[str, str], str]],
+        journal: Optional[ScanJournal] = None
+    ) -> Iterator[ScanTask]:
+        """
+        Expand an inventory into tasks for every account of an organization.
+        
+        Roles are assumed concurrently, a few accounts ahead of the scheduler.
+        Accounts whose role cannot be assumed are appended to failed_accounts
+        with an error. Accounts whose tasks are all in the journal are planned
+        without assuming a role, since none of their tasks will run.
+        
+        Args:
+            inventory: Inventory configuration.
+            management_session: boto3 Session for the management account.
+            accounts: Organization accounts.
+            failed_accounts: List collecting (account, error) tuples.
+            journal: Checkpoint journal.
+            
+        Yields:
+            Scan tasks.
+        """
+        if journal is not None:
+            completed_accounts = [
+                account for account in accounts
+                if all(
+                    key in journal
+                    for task in self._plan_account(inventory, None, account['id'], account['name'])
+                    for key in self._journal_keys(task)
+                )
+            ]
+            
+            if completed_accounts:
+                logger.info(f"Resuming: {len(completed_accounts)} accounts already completed")
+            
+            for account in completed_accounts:
+                yield from self._plan_account(inventory, None, account['id'], account['name'])
+            
+            completed_ids = {account['id'] for account in completed_accounts}
+            accounts = [account for account in accounts if account['id'] not in completed_ids]
+        
+        assumed_roles = self.organization_scanner.assume_roles(
+            management_session, 
+            accounts, 
+            inventory.aws.role_name
+        )
+        
+        for account, account_session in assumed_roles:
+            logger.info(f"Processing account: {account['name']} ({account['id']})")
+            
+            if account_session is None:
+                failed_accounts.append((account, f"Failed to assume role in account {account['id']}"))
+                continue
+            
+            yield from self._plan_account(inventory, account_session, account['id'], account['name'])
+    
+    def _plan_account(
+        self, 
+        inventory: Inventory, 
+        session: boto3.Session, 
+        account_id: Optional[str] = None, 
+        account_name: Optional[str] = None
+    ) -> Iterator[ScanTask]:
+        """
+        Expand an inventory into tasks for one account.
+        
+        Tasks are ordered longest expected duration first. Tasks without
+        history keep their order, with regions interleaved so that consecutive
+        tasks go to different regions. Global calls are planned once, under
+        the global region. Dependent sheets are not planned; their calls are
+        scheduled as the results of their parent sheet arrive.
+        
+        Args:
+            inventory: Inventory configuration.
+            session: boto3 Session for the account.
+            account_id: AWS account ID (for organization scans).
+            account_name: AWS account name (for organization scans).
+            
+        Yields:
+            Scan tasks.
+        """
+        tasks = [
+            ScanTask(
+                region=region,
+                endpoint_region=endpoint_region,
+                sheet=sheet,
+                session=session,
+                account_id=account_id,
+                account_name=account_name,
+                inventory_name=inventory.name,
+                call_key=(account_id, self._call_key(inventory, sheet, region))
+            )
+            for sheet in inventory.sheets
+            if sheet.fan_out is None
+            for region, endpoint_region in self._sheet_regions(inventory, sheet)
+        ]
+        
+        yield from self.stats.order(tasks, self._stats_key)
+    
+    def _run(
+        self, 
+        tasks: Iterator[ScanTask],
+        journal: Optional[ScanJournal] = None
+    ) -> Dict[Optional[str], Dict[str, List[ServiceResult]]]:
+        """
+        Run tasks on the scheduler and group the results.
+        
+        Results are moved to the scan's result store, if it has one, as they
+        are grouped.
+        
+        Args:
+            tasks: Scan tasks.
+            journal: Checkpoint journal.
+            
+        Returns:
+            Service results grouped by account ID and region.
+        """
+        services_by_account = collections.defaultdict(lambda: collections.defaultdict(list))
+        
+        for task, service_result in self._iter_journaled_results(tasks, journal):
+            if self.result_store is not None:
+                service_result.store(self.result_store)
+            services_by_account[task.account_id][task.region].append(service_result)
+        
+        return services_by_account
+    
+    def _iter_journaled_results(
+        self, 
+        tasks: Iterator[ScanTask], 
+        journal: Optional[ScanJournal] = None
+    ) -> Iterator[Tuple[ScanTask, ServiceResult]]:
+        """
+        Run the tasks missing from the journal, yielding stored results for the others.
+        
+        Calls of dependent sheets are queued as the pages of their parent
+        sheet arrive, or from the stored result of a parent in the journal.
+        The results of a dependent sheet's calls are yielded as one service
+        result once they have all completed.
+        
+        Successful results are recorded in the journal as they complete, with
+        their API response in the journal's results file. Failed results are
+        not, so a resumed scan retries them. Stored results are read back from
+        the results file only when they are used. Progress, with the
+        time left estimated from earlier runs, is logged periodically.
+        
+        Args:
+            tasks: Scan tasks.
+            journal: Checkpoint journal. If None, all tasks run.
+            
+        Yields:
+            Tuples of task and its service result. Stored results are yielded
+            as the scheduler reaches their tasks.
+        """
+        queue = TaskQueue()
+        # Results to yield, each with a flag telling whether to journal it
+        ready = collections.deque()
+        groups_by_task: Dict[ScanTask, List[FanOutGroup]] = {}
+        progress = ScanProgress(self.stats, self.scheduler.max_workers)
+        # Clients of an organization account are dropped once it is done
+        self._sessions = _SessionTracker(self._release_session)
+        
+        def pending_tasks() -> Iterator[ScanTask]:
+            for task in tasks:
+                self._sessions.plan(task)
+                groups = self._fan_out_groups(task, queue, ready, journal)
+                entry = journal.get(journal_key(task)) if journal is not None else None
+                
+                if entry is None:
+                    if groups:
+                        task.on_page = functools.partial(self._add_ids, groups, queue)
+                        groups_by_task[task] = groups
+                    progress.add(self._stats_key(task))
+                    self._sessions.add(task)
+                    yield task
+                else:
+                    # Its API call is not made, so it takes no pages of a shared call
+                    self.single_flight.skip(task.call_key)
+                    service_result = ServiceResult.from_record(entry, journal.get_result(entry))
+                    ready.append((task, service_result, False))
+                    if groups:
+                        self._add_ids(groups, queue, service_result.result)
+                    self._close_groups(groups, None, queue, ready)
+            
+            self._sessions.plan(None)
+        
+        for task, service_result in self._iter_task_results(pending_tasks(), queue):
+            if isinstance(task, FanOutTask):
+                task.group.complete(task, service_result)
+                if task.group.done:
+                    self._finish_group(task.group, queue, ready)
+            else:
+                ready.append((task, service_result, True))
+                self._close_groups(
+                    groups_by_task.pop(task, []),
+                    None if service_result.success else service_result.error,
+                    queue,
+                    ready
+                )
+                
+                progress.complete(self._stats_key(task))
+                message = progress.report()
+                if message:
+                    logger.info(message)
+                
+                self._sessions.done(task)
+            
+            yield from self._drain(ready, journal)
+        
+        yield from self._drain(ready, journal)
+    
+    def _drain(
+        self, 
+        ready: Deque[Tuple[ScanTask, ServiceResult, bool]], 
+        journal: Optional[ScanJournal] = None
+    ) -> Iterator[Tuple[ScanTask, ServiceResult]]:
+        """
+        Yield the results that are ready, journaling the successful new ones.
+        
+        Args:
+            ready: Tuples of task, service result and whether to journal it.
+            journal: Checkpoint journal.
+            
+        Yields:
+            Tuples of task and its service result.
+        """
+        while ready:
+            task, service_result, record = ready.popleft()
+            
+            if record and journal is not None and service_result.success:
+                journal.record_result(
+                    journal_key(task),
+                    service_result.result,
+                    status="stored",
+                    **service_result.to_record(include_result=False)
+                )
+            
+            yield task, service_result
+    
+    def _dependent_tasks(self, task: ScanTask) -> Iterator[ScanTask]:
+        """
+        Create tasks for the sheets that depend on the sheet of a task.
+        
+        Dependent sheets run in the region and account of their parent. Those
+        whose service has no endpoint in the region are skipped.
+        
+        Args:
+            task: Task of the parent sheet.
+            
+        Yields:
+            Tasks of the dependent sheets.
+        """
+        for sheet in self.dependent_sheets.get((task.inventory_name, task.sheet.name), []):
+            if self.availability is not None and \
+                    not self.availability.is_available(sheet.service, task.endpoint_region):
+                continue
+            
+            yield ScanTask(
+                region=task.region,
+                endpoint_region=task.endpoint_region,
+                sheet=sheet,
+                session=task.session,
+                account_id=task.account_id,
+                account_name=task.account_name,
+                inventory_name=task.inventory_name
+            )
+    
+    def _journal_keys(self, task: ScanTask) -> Iterator[str]:
+        """
+        Get the journal keys of a task and of the sheets that depend on it.
+        
+        Args:
+            task: Scan task.
+            
+        Yields:
+            Journal keys.
+        """
+        yield journal_key(task)
+        
+        for dependent in self._dependent_tasks(task):
+            yield from self._journal_keys(dependent)
+    
+    def _fan_out_groups(
+        self, 
+        task: ScanTask, 
+        queue: TaskQueue, 
+        ready: Deque[Tuple[ScanTask, ServiceResult, bool]], 
+        journal: Optional[ScanJournal] = None
+    ) -> List[FanOutGroup]:
+        """
+        Create the fan-out groups of the sheets that depend on the sheet of a task.
+        
+        Dependent sheets found in the journal get no group. Their stored result
+        is queued in ready and feeds the groups of their own dependents.
+        
+        Args:
+            task: Task of the parent sheet.
+            queue: Queue of tasks added during the run.
+            ready: Results to yield.
+            journal: Checkpoint journal.
+            
+        Returns:
+            Groups of the dependent sheets that must run.
+        """
+        groups = []
+        
+        for dependent in self._dependent_tasks(task):
+            dependents = self._fan_out_groups(dependent, queue, ready, journal)
+            entry = journal.get(journal_key(dependent)) if journal is not None else None
+            
+            if entry is not None:
+                service_result = ServiceResult.from_record(entry, journal.get_result(entry))
+                ready.append((dependent, service_result, False))
+                if dependents:
+                    self._add_ids(dependents, queue, service_result.result)
+                self._close_groups(dependents, None, queue, ready)
+                continue
+            
+            self._sessions.add(dependent)
+            groups.append(FanOutGroup(
+                dependent,
+                batch_size=batch_size(dependent.sheet),
+                dependents=dependents,
+                on_page=functools.partial(self._add_ids, dependents, queue) if dependents else None
+            ))
+        
+        return groups
+    
+    def _add_ids(self, groups: List[FanOutGroup], queue: TaskQueue, result: Any) -> None:
+        """
+        Queue the calls of dependent sheets for the IDs in a parent's result.
+        
+        Called from worker threads with each page of a parent's result.
+        
+        Args:
+            groups: Groups of the dependent sheets.
+            queue: Queue of tasks added during the run.
+            result: Extracted result of the parent, or of one of its pages.
+        """
+        for group in groups:
+            for task in group.add_ids(extract_ids(result, group.sheet.fan_out.ids)):
+                queue.put(task)
+    
+    def _close_groups(
+        self, 
+        groups: List[FanOutGroup], 
+        error: Optional[str], 
+        queue: TaskQueue, 
+        ready: Deque[Tuple[ScanTask, ServiceResult, bool]]
+    ) -> None:
+        """
+        Tell fan-out groups that their parent has completed.
+        
+        Args:
+            groups: Groups of the dependent sheets.
+            error: Error of the parent, if it failed.
+            queue: Queue of tasks added during the run.
+            ready: Results to yield.
+        """
+        for group in groups:
+            for task in group.close(error):
+                queue.put(task)
+            
+            if group.done:
+                self._finish_group(group, queue, ready)
+    
+    def _finish_group(
+        self, 
+        group: FanOutGroup, 
+        queue: TaskQueue, 
+        ready: Deque[Tuple[ScanTask, ServiceResult, bool]]
+    ) -> None:
+        """
+        Queue the result of a completed fan-out group and close its dependents.
+        
+        Args:
+            group: Completed group.
+            queue: Queue of tasks added during the run.
+            ready: Results to yield.
+        """
+        service_result = group.result()
+        sheet = group.sheet
+        self._sessions.done(group.task)
+        
+        logger.info(
+            f"Fanned out service {sheet.service} with function {sheet.function} in region {group.task.region} "
+            f"over {group.calls} calls"
+        )
+        
+        ready.append((group.task, service_result, True))
+        self._close_groups(
+            group.dependents,
+            None if service_result.success else service_result.error,
+            queue,
+            ready
+        )
+    
+    def _iter_task_results(
+        self, 
+        tasks: Iterator[ScanTask],
+        queue: Optional[TaskQueue] = None
+    ) -> Iterator[Tuple[ScanTask, ServiceResult]]:
+        """
+        Run tasks on the scheduler, yielding each result as it completes.
+        
+        Args:
+            tasks: Scan tasks.
+            queue: Queue of tasks added while the tasks run.
+            
+        Yields:
+            Tuples of task and its service result, in completion order.
+        """
+        for task, future in self.scheduler.run(tasks, self._scan_task, queue=queue):
+            yield task, self._task_result(task, future)
+    
+    def _scan_task(self, task: ScanTask) -> ServiceResult:
+        """
+        Scan the sheet of a task.
+        
+        Args:
+            task: Scan task.
+            
+        Returns:
+            Service scan result.
+        """
+        timer = CallTimer(task.on_page)
+        
+        service_result = self.service_scanner.scan_service(
+            task.sheet,
+            task.session,
+            task.endpoint_region,
+            parameters=task.parameters,
+            on_page=timer.on_page,
+            call_key=task.call_key
+        )
+        
+        self._observe_call(task, timer, service_result)
+        return service_result
+    
+    def _observe_call(self, task: ScanTask, timer: CallTimer, service_result: ServiceResult) -> None:
+        """
+        Record the duration and pages of a completed call in the call statistics.
+        
+        Failed calls are left out, since they usually end early, and so are
+        the calls of dependent sheets, whose parameters change from run to run.
+        
+        Args:
+            task: Scan task.
+            timer: Timer started when the call started.
+            service_result: Result of the call.
+        """
+        if isinstance(task, FanOutTask) or not service_result.success:
+            return
+        
+        self.stats.observe(*self._stats_key(task), timer.elapsed, timer.pages)
+    
+    def _task_result(self, task: ScanTask, future: concurrent.futures.Future) -> ServiceResult:
+        """
+        Get the service result of a completed task.
+        
+        Args:
+            task: Scan task.
+            future: Completed future of the task.
+            
+        Returns:
+            Service scan result with the task's context, or a failed result if
+            the task raised an exception.
+        """
+        sheet = task.sheet
+        
+        try:
+            service_result = future.result()
+            
+            if service_result.success:
+                logger.info(
+                    f"Successfully scanned service {sheet.service} with function {sheet.function} in region {task.region}"
+                )
+            else:
+                logger.warning(
+                    f"Failed to scan service {sheet.service} with function {sheet.function} in region {task.region}: {service_result.error}"
+                )
+        
+        except Exception as e:
+            logger.error(
+                f"Error processing service {sheet.service} with function {sheet.function} in region {task.region}: {str(e)}"
+            )
+            
+            service_result = ServiceResult(
+                service=sheet.service,
+                function=sheet.function,
+                region=task.region,
+                result=None,
+                success=False,
+                error=f"Error processing service: {str(e)}"
+            )
+        
+        service_result.region = task.region
+        service_result.account_id = task.account_id
+        service_result.account_name = task.account_name
+        service_result.inventory_name = task.inventory_name
+        service_result.sheet_name = sheet.name
+        
+        return service_result
+    
+    def _failed_account_result(
+        self, 
+        inventory: Inventory, 
+        account: Dict[str, str], 
+        error: str
+    ) -> ServiceResult:
+        """
+        Build the result reported for an account whose role could not be assumed.
+        
+        Args:
+            inventory: Inventory configuration.
+            account: Organization account.
+            error: Error message.
+            
+        Returns:
+            Failed service result for sts.assume_role.
+        """
+        return ServiceResult(
+            service="sts",
+            function="assume_role",
+            region=None,
+            result=None,
+            success=False,
+            error=error,
+            account_id=account['id'],
+            account_name=account['name'],
+            inventory_name=inventory.name
+        )
+    
+    def _region_results(
+        self, 
+        inventory: Inventory, 
+        services_by_region: Dict[str, List[ServiceResult]]
+    ) -> List[RegionResult]:
+        """
+        Build region results in configuration order, after the results of global calls.
+        
+        Args:
+            inventory: Inventory configuration.
+            services_by_region: Service results grouped by region.
+            
+        Returns:
+            List of region scan results.
+        """
+        regions = list(inventory.aws.region)
+        if GLOBAL_REGION in services_by_region:
+            regions.insert(0, GLOBAL_REGION)
+        
+        return [
+            RegionResult(region=region, services=services_by_region.get(region, []))
+            for region in regions
+        ]
@@ -0,0 +1,340 @@
+"""
+Task scheduler for AWS Auto Inventory.
+"""
+import logging
+import threading
+import collections
+import concurrent.futures
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default global number of worker threads
+DEFAULT_MAX_WORKERS = 64
+
+# Number of pending tasks per worker that may be held back by a sub-cap while
+# the scheduler looks further ahead for tasks it can start
+LOOKAHEAD_PER_WORKER = 4
+
+
+class ScanTask:
+    """
+    A single API call to make: one sheet in one region of one account.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        sheet: Any,
+        session: Any = None,
+        account_id: Optional[str] = None,
+        account_name: Optional[str] = None,
+        inventory_name: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        on_page: Optional[Callable[[Any], None]] = None,
+        call_key: Optional[Tuple[Hashable, Hashable]] = None,
+        endpoint_region: Optional[str] = None
+    ):
+        """
+        Initialize scan task.
+
+        Args:
+            region: AWS region.
+            sheet: Sheet configuration (or scan file entry) to run.
+            session: boto3 Session for the account.
+            account_id: AWS account ID, if known.
+            account_name: AWS account name, if known.
+            inventory_name: Name of the inventory the task belongs to.
+            parameters: API parameters to call the sheet's function with instead
+                        of the sheet's own parameters.
+            on_page: Function called with the extracted result of each page as it
+                     arrives, e.g. to schedule calls of dependent sheets.
+            call_key: Account and canonical key of the API call, shared by every
+                      task that makes the same call.
+            endpoint_region: Region the API call is sent to. Defaults to region;
+                             global calls are stored under the global region and
+                             sent to a region of their partition.
+        """
+        self.region = region
+        self.sheet = sheet
+        self.session = session
+        self.account_id = account_id
+        self.account_name = account_name
+        self.inventory_name = inventory_name
+        self.parameters = parameters
+        self.on_page = on_page
+        self.call_key = call_key
+        self.endpoint_region = endpoint_region or region
+
+    @property
+    def account(self) -> Hashable:
+        """
+        Key of the account the task runs in, used for per-account caps.
+        """
+        return self.account_id
+
+    def __repr__(self) -> str:
+        return f"ScanTask(account={self.account_id}, region={self.region}, sheet={self.sheet!r})"
+
+
+class TaskQueue:
+    """
+    Tasks added to a scheduler run while it is in progress.
+
+    Running tasks can put new tasks on the queue from any thread, for example
+    dependent calls found in the pages of their results. The run wakes up to
+    start them without waiting for another task to complete.
+    """
+
+    def __init__(self):
+        """
+        Initialize task queue.
+        """
+        self._tasks: Deque[ScanTask] = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = concurrent.futures.Future()
+
+    def put(self, task: ScanTask) -> None:
+        """
+        Add a task to the queue.
+
+        Args:
+            task: Task to run.
+        """
+        with self._lock:
+            self._tasks.append(task)
+            if not self._wakeup.done():
+                self._wakeup.set_result(None)
+
+    def take(self) -> List[ScanTask]:
+        """
+        Remove and return all queued tasks.
+
+        Returns:
+            Queued tasks, in the order they were added.
+        """
+        with self._lock:
+            tasks = list(self._tasks)
+            self._tasks.clear()
+            if self._wakeup.done():
+                self._wakeup = concurrent.futures.Future()
+            return tasks
+
+    @property
+    def wakeup(self) -> concurrent.futures.Future:
+        """
+        Future that completes when a task is put on the queue.
+        """
+        with self._lock:
+            return self._wakeup
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+
+class TaskScheduler:
+    """
+    Runs tasks on a single bounded worker pool.
+
+    All (account, region, sheet) tasks share one pool with a global concurrency
+    cap, so a slow region never holds idle threads of its own. Optional sub-caps
+    limit how many tasks run at once in one region of an account and in one
+    account, and how many accounts have tasks running at once. Tasks are pulled lazily from the iterable they are given, so large
+    organization scans are never expanded in memory all at once.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_per_region: Optional[int] = None,
+        max_per_account: Optional[int] = None,
+        max_accounts: Optional[int] = None
+    ):
+        """
+        Initialize task scheduler.
+
+        Args:
+            max_workers: Global maximum number of concurrent tasks.
+            max_per_region: Maximum number of concurrent tasks in one region of an account.
+            max_per_account: Maximum number of concurrent tasks in one account.
+            max_accounts: Maximum number of accounts with tasks running at once.
+        """
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.max_per_region = max_per_region
+        self.max_per_account = max_per_account
+        self.max_accounts = max_accounts
+
+    def run(
+        self,
+        tasks: Iterable[ScanTask],
+        func: Callable[[ScanTask], Any],
+        executor: Optional[concurrent.futures.Executor] = None,
+        queue: Optional[TaskQueue] = None
+    ) -> Iterator[Tuple[ScanTask, concurrent.futures.Future]]:
+        """
+        Run a function for each task.
+
+        Args:
+            tasks: Tasks to run, consumed lazily.
+            func: Function called with each task by the executor.
+            executor: Executor to submit tasks to. If None, a thread pool with
+                      max_workers threads is created for the run.
+            queue: Queue of tasks added during the run. Queued tasks start ahead
+                   of tasks not yet pulled from tasks, and the run lasts until
+                   the queue is empty and every task has completed.
+
+        Yields:
+            Tuples of task and its completed future, in completion order.
+        """
+        return _SchedulerRun(self, tasks, func, queue).results(executor)
+
+
+class _SchedulerRun:
+    """
+    State of a single TaskScheduler.run call.
+    """
+
+    def __init__(
+        self,
+        scheduler: TaskScheduler,
+        tasks: Iterable[ScanTask],
+        func: Callable[[ScanTask], Any],
+        queue: Optional[TaskQueue] = None
+    ):
+        self.scheduler = scheduler
+        self.tasks = iter(tasks)
+        self.func = func
+        self.queue = queue
+        self.exhausted = False
+        self.running: Dict[concurrent.futures.Future, ScanTask] = {}
+        self.region_counts: Dict[Tuple[Hashable, str], int] = collections.Counter()
+        self.account_counts: Dict[Hashable, int] = collections.Counter()
+        self.active_accounts = 0
+        self.held: Dict[Tuple[Hashable, str], Deque[ScanTask]] = collections.OrderedDict()
+        self.held_count = 0
+        self.lookahead = scheduler.max_workers * LOOKAHEAD_PER_WORKER
+
+    def results(
+        self,
+        executor: Optional[concurrent.futures.Executor] = None
+    ) -> Iterator[Tuple[ScanTask, concurrent.futures.Future]]:
+        """
+        Run all tasks, yielding each one as it completes.
+        """
+        if executor is not None:
+            yield from self._run(executor)
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.scheduler.max_workers
+        ) as executor:
+            yield from self._run(executor)
+
+    def _run(
+        self,
+        executor: concurrent.futures.Executor
+    ) -> Iterator[Tuple[ScanTask, concurrent.futures.Future]]:
+        """
+        Dispatch tasks to an executor until all of them have completed.
+        """
+        self._dispatch(executor)
+
+        while self.running or self.queue:
+            waiting = list(self.running)
+            if self.queue is not None:
+                waiting.append(self.queue.wakeup)
+
+            done, _ = concurrent.futures.wait(
+                waiting, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            completed = []
+            for future in done:
+                if future not in self.running:
+                    continue
+                task = self.running.pop(future)
+                self.region_counts[(task.account, task.region)] -= 1
+                self.account_counts[task.account] -= 1
+                if not self.account_counts[task.account]:
+                    self.active_accounts -= 1
+                completed.append((task, future))
+
+            # Refill the pool before handing results back to the caller
+            self._dispatch(executor)
+
+            yield from completed
+
+    def _can_start(self, task: ScanTask) -> bool:
+        """
+        Check whether a task fits within the sub-caps.
+        """
+        scheduler = self.scheduler
+
+        if scheduler.max_per_region and \
+                self.region_counts[(task.account, task.region)] >= scheduler.max_per_region:
+            return False
+
+        if scheduler.max_per_account and \
+                self.account_counts[task.account] >= scheduler.max_per_account:
+            return False
+
+        if scheduler.max_accounts and not self.account_counts[task.account] and \
+                self.active_accounts >= scheduler.max_accounts:
+            return False
+
+        return True
+
+    def _start(self, executor: concurrent.futures.Executor, task: ScanTask) -> None:
+        """
+        Submit a task to the worker pool.
+        """
+        future = executor.submit(self.func, task)
+        self.running[future] = task
+        self.region_counts[(task.account, task.region)] += 1
+        if not self.account_counts[task.account]:
+            self.active_accounts += 1
+        self.account_counts[task.account] += 1
+
+    def _dispatch(self, executor: concurrent.futures.Executor) -> None:
+        """
+        Start as many tasks as the caps allow.
+        """
+        max_workers = self.scheduler.max_workers
+
+        # Queued tasks were added by running tasks, so they start before new
+        # tasks are pulled. Those that do not fit yet are held.
+        if self.queue is not None:
+            for task in self.queue.take():
+                self.held.setdefault((task.account, task.region), collections.deque()).append(task)
+                self.held_count += 1
+
+        # Held tasks were pulled earlier, so they start first
+        for key in list(self.held):
+            queue = self.held[key]
+
+            while queue and len(self.running) < max_workers and self._can_start(queue[0]):
+                self._start(executor, queue.popleft())
+                self.held_count -= 1
+
+            if not queue:
+                del self.held[key]
+
+            if len(self.running) >= max_workers:
+                return
+
+        while not self.exhausted and len(self.running) < max_workers \
+                and self.held_count < self.lookahead:
+            try:
+                task = next(self.tasks)
+            except StopIteration:
+                self.exhausted = True
+                break
+
+            if self._can_start(task):
+                self._start(executor, task)
+            else:
+                self.held.setdefault((task.account, task.region), collections.deque()).append(task)
+                self.held_count += 1
+
@@ -2,12 +2,16 @@
 Service scanner for AWS Auto Inventory.
 """
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
 
 import boto3
 
 from ..config.models import Sheet
 from .aws_client import AWSClient, AWSClientError
+from .client_factory import ClientFactory
+from .rate_limiter import RateLimiter
+from .single_flight import SingleFlight
+from .spill import ResultStore, StoredResult
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -25,7 +29,11 @@ class ServiceResult:
         region: str, 
         result: Any, 
         success: bool = True, 
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        account_id: Optional[str] = None,
+        account_name: Optional[str] = None,
+        inventory_name: Optional[str] = None,
+        sheet_name: Optional[str] = None
     ):
         """
         Initialize service result.
@@ -37,13 +45,50 @@ class ServiceResult:
             result: API response.
             success: Whether the scan was successful.
             error: Error message if scan failed.
+            account_id: AWS account ID (for organization scans).
+            account_name: AWS account name (for organization scans).
+            inventory_name: Name of the inventory the result belongs to.
+            sheet_name: Name of the sheet the result was scanned for.
         """
         self.service = service
         self.function = function
         self.region = region
+        self._stored: Optional[StoredResult] = None
         self.result = result
         self.success = success
         self.error = error
+        self.account_id = account_id
+        self.account_name = account_name
+        self.inventory_name = inventory_name
+        self.sheet_name = sheet_name
+    
+    @property
+    def result(self) -> Any:
+        """
+        API response, unpacked from its result store if it has been moved to one.
+        """
+        if self._stored is not None:
+            return self._stored.load()
+        return self._result
+    
+    @result.setter
+    def result(self, value: Any) -> None:
+        self._result = value
+        self._stored = None
+    
+    def store(self, store: ResultStore) -> None:
+        """
+        Move the API response into a result store, which may spill it to disk.
+        
+        The response is unpacked again each time result is read, so readers
+        should read it once per use.
+        
+        Args:
+            store: Result store to move the response to.
+        """
+        if self._stored is None and self._result is not None:
+            self._stored = store.put(self._result)
+            self._result = None
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -60,6 +105,59 @@ class ServiceResult:
             "success": self.success,
             "error": self.error
         }
+    
+    def to_record(self, include_result: bool = True) -> Dict[str, Any]:
+        """
+        Convert to a self-contained record that includes the scan context.
+        
+        Args:
+            include_result: Whether to include the API response.
+            
+        Returns:
+            Dictionary representation of the service result with its
+            inventory, account and sheet.
+        """
+        record = {
+            "inventory_name": self.inventory_name,
+            "account_id": self.account_id,
+            "account_name": self.account_name,
+            "sheet_name": self.sheet_name,
+            "service": self.service,
+            "function": self.function,
+            "region": self.region
+        }
+        if include_result:
+            record["result"] = self.result
+        record["success"] = self.success
+        record["error"] = self.error
+        return record
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], stored: Optional[StoredResult] = None) -> "ServiceResult":
+        """
+        Create a service result from a record created by to_record().
+        
+        Args:
+            record: Service result record.
+            stored: Handle of the API response, for records without one.
+            
+        Returns:
+            Service result.
+        """
+        service_result = cls(
+            service=record["service"],
+            function=record["function"],
+            region=record["region"],
+            result=record.get("result"),
+            success=record.get("success", True),
+            error=record.get("error"),
+            account_id=record.get("account_id"),
+            account_name=record.get("account_name"),
+            inventory_name=record.get("inventory_name"),
+            sheet_name=record.get("sheet_name")
+        )
+        service_result._stored = stored
+        return service_result
 
 
 class ServiceScanner:
@@ -67,22 +165,39 @@ class ServiceScanner:
     Scanner for AWS services.
     """
     
-    def __init__(self, max_retries: int = 3, retry_delay: int = 2):
+    def __init__(
+        self, 
+        max_retries: int = 3, 
+        retry_delay: int = 2, 
+        client_factory: Optional[ClientFactory] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
         """
         Initialize service scanner.
         
         Args:
             max_retries: Maximum number of retries for API calls.
             retry_delay: Base delay (in seconds) between retries.
+            client_factory: Shared client cache used for all API calls.
+            rate_limiter: Shared rate limiter. If None, requests are not rate limited.
+            single_flight: Registry of calls made more than once in a scan. If None,
+                           every call is sent.
         """
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.client_factory = client_factory or ClientFactory()
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
     
     def scan_service(
         self, 
         sheet: Sheet, 
         session: boto3.Session, 
-        region: str
+        region: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        on_page: Optional[Callable[[Any], None]] = None,
+        call_key: Optional[Tuple[Hashable, Hashable]] = None
     ) -> ServiceResult:
         """
         Scan a service in a region.
@@ -91,7 +206,11 @@ class ServiceScanner:
             sheet: Sheet configuration.
             session: boto3 Session.
             region: AWS region.
-            
+            parameters: API parameters to use instead of the sheet's parameters.
+            on_page: Function called with the extracted data of each page as it arrives.
+            call_key: Account and call key, so identical calls of other sheets
+                      share one request.
+                      
         Returns:
             Service scan result.
         """
@@ -99,15 +218,25 @@ class ServiceScanner:
             f"Scanning service {sheet.service} with function {sheet.function} in region {region}"
         )
         
-        aws_client = AWSClient(session, self.max_retries, self.retry_delay)
+        aws_client = AWSClient(
+            session, 
+            self.max_retries, 
+            self.retry_delay, 
+            self.client_factory, 
+            self.rate_limiter,
+            self.single_flight
+        )
         
         try:
             result = aws_client.call_api(
                 sheet.service,
                 sheet.function,
                 region,
-                sheet.parameters,
-                sheet.result_key
+                sheet.parameters if parameters is None else parameters,
+                sheet.result_key,
+                sheet.paginate,
+                on_page,
+                call_key
             )
             
             logger.info(
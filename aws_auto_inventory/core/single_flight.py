@@ -0,0 +1,368 @@
+"""
+Single-flight API calls for AWS Auto Inventory.
+"""
+import copy
+import json
+import asyncio
+import logging
+import threading
+import collections
+import concurrent.futures
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def call_key(
+    profile: Optional[str],
+    role_name: Optional[str],
+    region: str,
+    service: str,
+    function: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    paginate: bool = True
+) -> Hashable:
+    """
+    Build the canonical key of an API call.
+
+    Two calls with the same key made in the same account return the same
+    pages, whichever sheet or inventory makes them.
+
+    Args:
+        profile: AWS profile the credentials come from.
+        role_name: Role assumed in each account of an organization, or None
+                   when the profile's own credentials are used.
+        region: AWS region.
+        service: AWS service name.
+        function: API function name.
+        parameters: API parameters.
+        paginate: Whether all pages are fetched.
+
+    Returns:
+        Hashable call key. Parameters are serialized with sorted keys, so their
+        order does not matter.
+    """
+    return (
+        profile,
+        role_name,
+        region,
+        service,
+        function,
+        json.dumps(parameters or {}, sort_keys=True, default=str),
+        paginate
+    )
+
+
+class _SharedCall:
+    """
+    Pages of a shared call fetched so far, and the callers still to read them.
+    """
+
+    def __init__(self, callers: int):
+        self.pages: List[Optional[Dict[str, Any]]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        # Expected callers that have not finished reading, the first one included
+        self.callers = callers
+        # Completed whenever a page is added or the fetch ends
+        self.changed = concurrent.futures.Future()
+
+
+class SingleFlight:
+    """
+    Runs identical API calls once per scan and shares their pages.
+
+    The calls a scan will make are counted up front with expect(), and calls
+    the scan then skips, e.g. because their result is journaled, are taken off
+    with skip(). Calls made more than once are shared: the first caller fetches
+    the pages and stores each one as it arrives, and the other callers read
+    them as they are stored, so every caller works page by page. Callers get
+    their own copy of each page, since extraction and merging modify results
+    in place, except the last caller left, which takes the stored pages
+    themselves and drops them as it goes. Calls made only once stream their
+    pages as usual and are never stored.
+    """
+
+    def __init__(self):
+        """
+        Initialize single-flight call registry.
+        """
+        self._lock = threading.Lock()
+        # Number of callers of each shared call key, per account
+        self._expected: Dict[Hashable, int] = {}
+        # Expected callers that will not make their call, by account and call key
+        self._skipped: Dict[Tuple[Hashable, Hashable], int] = collections.Counter()
+        # Shared calls that have started, by account and call key
+        self._calls: Dict[Tuple[Hashable, Hashable], _SharedCall] = {}
+        self.shared = 0
+
+    def expect(self, keys: Iterable[Hashable]) -> None:
+        """
+        Count the calls of a scan and keep those made more than once.
+
+        Replaces the counts of any previous scan.
+
+        Args:
+            keys: Call keys, one per call made in each account.
+        """
+        counts = collections.Counter(keys)
+
+        with self._lock:
+            self._expected = {key: count for key, count in counts.items() if count > 1}
+            self._skipped.clear()
+            self._calls.clear()
+            self.shared = 0
+
+        if self._expected:
+            logger.info(
+                f"{sum(self._expected.values()) - len(self._expected)} duplicate API calls "
+                f"per account will reuse the response of an identical call"
+            )
+
+    def skip(self, key: Optional[Tuple[Hashable, Hashable]]) -> None:
+        """
+        Record that an expected caller will not make its call.
+
+        Without this, the pages of a shared call would be kept for a caller
+        that never comes.
+
+        Args:
+            key: Account and call key, or None for calls that are never shared.
+        """
+        if key is None:
+            return
+        with self._lock:
+            if key[1] not in self._expected:
+                return
+            if key in self._calls:
+                self._release_locked(key)
+            else:
+                self._skipped[key] += 1
+
+    def is_shared(self, key: Optional[Tuple[Hashable, Hashable]]) -> bool:
+        """
+        Check whether a call is made more than once.
+
+        Args:
+            key: Account and call key, or None for calls that are never shared.
+
+        Returns:
+            Whether the call's pages are shared.
+        """
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._calls or self._callers(key) > 1
+
+    def clear(self) -> None:
+        """
+        Drop stored pages and counts, e.g. at the end of a scan.
+        """
+        with self._lock:
+            self._expected = {}
+            self._skipped.clear()
+            self._calls.clear()
+
+    def pages(
+        self,
+        key: Tuple[Hashable, Hashable],
+        fetch: Callable[[], Iterator[Dict[str, Any]]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the pages of a shared call, fetching them if no other caller has.
+
+        Args:
+            key: Account the call is made in, and call key.
+            fetch: Function returning the call's pages.
+
+        Yields:
+            The caller's pages, as soon as they are fetched.
+
+        Raises:
+            Exception: Whatever fetching the pages raised, for every caller.
+        """
+        call, leader = self._start(key)
+
+        try:
+            if leader:
+                error = None
+                try:
+                    for page in fetch():
+                        yield self._add(call, page)
+                except GeneratorExit:
+                    error = RuntimeError(f"The first caller of a shared call stopped reading it: {key}")
+                    raise
+                except BaseException as fetch_error:
+                    error = fetch_error
+                    raise
+                finally:
+                    self._finish(call, error)
+            else:
+                index = 0
+                while True:
+                    page, changed = self._take(call, index)
+                    if changed is not None:
+                        changed.result()
+                    elif page is None:
+                        return
+                    else:
+                        index += 1
+                        yield page
+        finally:
+            self._release(key)
+
+    async def apages(
+        self,
+        key: Tuple[Hashable, Hashable],
+        fetch: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the pages of a shared call from a coroutine, fetching them if no other caller has.
+
+        Args:
+            key: Account the call is made in, and call key.
+            fetch: Function returning an async iterator over the call's pages.
+
+        Yields:
+            The caller's pages, as soon as they are fetched.
+
+        Raises:
+            Exception: Whatever fetching the pages raised, for every caller.
+        """
+        call, leader = self._start(key)
+
+        try:
+            if leader:
+                error = None
+                try:
+                    async for page in fetch():
+                        yield self._add(call, page)
+                except GeneratorExit:
+                    error = RuntimeError(f"The first caller of a shared call stopped reading it: {key}")
+                    raise
+                except BaseException as fetch_error:
+                    error = fetch_error
+                    raise
+                finally:
+                    self._finish(call, error)
+            else:
+                index = 0
+                while True:
+                    page, changed = self._take(call, index)
+                    if changed is not None:
+                        await asyncio.wrap_future(changed)
+                    elif page is None:
+                        return
+                    else:
+                        index += 1
+                        yield page
+        finally:
+            self._release(key)
+
+    def _callers(self, call: Tuple[Hashable, Hashable]) -> int:
+        """
+        Count the callers expected to make a call. The lock must be held.
+        """
+        return self._expected.get(call[1], 1) - self._skipped.get(call, 0)
+
+    def _start(self, call: Tuple[Hashable, Hashable]) -> Tuple[_SharedCall, bool]:
+        """
+        Get a shared call, creating it for the first caller.
+
+        Returns:
+            The call and whether the caller must fetch the pages.
+        """
+        with self._lock:
+            shared_call = self._calls.get(call)
+            if shared_call is not None:
+                self.shared += 1
+                logger.debug(f"Reusing the response of an identical call: {call}")
+                return shared_call, False
+
+            shared_call = _SharedCall(max(self._callers(call), 1))
+            self._skipped.pop(call, None)
+            self._calls[call] = shared_call
+            return shared_call, True
+
+    def _add(self, call: _SharedCall, page: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a page fetched by the first caller and wake the others.
+
+        Returns:
+            The first caller's page: a copy, unless no other caller is left.
+        """
+        with self._lock:
+            if call.callers <= 1:
+                return page
+            call.pages.append(page)
+            self._notify(call)
+        return copy.deepcopy(page)
+
+    def _finish(self, call: _SharedCall, error: Optional[BaseException]) -> None:
+        """
+        Record that the first caller has fetched every page, or failed.
+        """
+        with self._lock:
+            call.done = True
+            call.error = error
+            self._notify(call)
+
+    def _take(
+        self,
+        call: _SharedCall,
+        index: int
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[concurrent.futures.Future]]:
+        """
+        Get a stored page for a caller that did not fetch it.
+
+        Returns:
+            The caller's page and None; None and a future completed when the
+            page may be ready; or None and None once every page was read.
+
+        Raises:
+            Exception: Whatever fetching the pages raised.
+        """
+        with self._lock:
+            if index == len(call.pages):
+                if not call.done:
+                    return None, call.changed
+                if call.error is not None:
+                    raise call.error
+                return None, None
+
+            page = call.pages[index]
+            if call.callers <= 1:
+                # No other caller will read this page
+                call.pages[index] = None
+                return page, None
+
+        # Stored pages are never modified while another caller may read them
+        return copy.deepcopy(page), None
+
+    @staticmethod
+    def _notify(call: _SharedCall) -> None:
+        """
+        Wake the callers waiting for a call to change. The lock must be held.
+        """
+        changed, call.changed = call.changed, concurrent.futures.Future()
+        changed.set_result(None)
+
+    def _release(self, call: Tuple[Hashable, Hashable]) -> None:
+        """
+        Record that a caller is done with a call, dropping the pages after the last one.
+        """
+        with self._lock:
+            self._release_locked(call)
+
+    def _release_locked(self, call: Tuple[Hashable, Hashable]) -> None:
+        """
+        Release a caller of a call. The lock must be held.
+        """
+        shared_call = self._calls.get(call)
+        if shared_call is None:
+            return
+
+        shared_call.callers -= 1
+        if shared_call.callers <= 0:
+            del self._calls[call]
@@ -0,0 +1,286 @@
+"""
+Bounded memory for completed results in AWS Auto Inventory.
+
+ScanEngine.scan keeps every service result until the scan ends, so the
+output can be grouped by account and region. With a memory budget, each
+result is packed into compressed bytes as it completes, and once the packed
+results held in memory exceed the budget, the oldest are moved to a
+temporary file. Results are unpacked again, one at a time, when an output
+writer reads them.
+
+A ResultFile keeps results in a named file that outlives the process, such
+as the results file of a run's checkpoint journal. Since another process, or
+another user, may have written that file, its results are compressed JSON,
+which cannot run code when it is read back, rather than pickles.
+"""
+import os
+import json
+import zlib
+import pickle
+import logging
+import tempfile
+import threading
+import collections
+from typing import Any, Deque, Optional
+
+from ..output.ndjson import dumps
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Prefix of the temporary file that holds spilled results
+SPILL_PREFIX = "aws-auto-inventory-spill-"
+
+# zlib level of packed results: most of the size reduction at a fraction of the CPU time of level 6
+COMPRESSION_LEVEL = 1
+
+
+def pack(value: Any) -> bytes:
+    """
+    Pack a result into compressed bytes.
+    """
+    return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+
+def unpack(data: bytes) -> Any:
+    """
+    Unpack a result packed by pack().
+    """
+    return pickle.loads(zlib.decompress(data))
+
+
+def pack_json(value: Any) -> bytes:
+    """
+    Pack a result into compressed JSON.
+
+    Datetimes become ISO 8601 strings and bytes base64, as in NDJSON output.
+    """
+    return zlib.compress(dumps(value), COMPRESSION_LEVEL)
+
+
+def unpack_json(data: bytes) -> Any:
+    """
+    Unpack a result packed by pack_json().
+    """
+    return json.loads(zlib.decompress(data))
+
+
+class StoredResult:
+    """
+    Handle to a result packed in a ResultStore or ResultFile, in memory or on disk.
+    """
+
+    __slots__ = ("store", "size", "data", "offset")
+
+    def __init__(self, store: Any, data: Optional[bytes], size: Optional[int] = None, offset: Optional[int] = None):
+        """
+        Initialize a stored result.
+
+        Args:
+            store: ResultStore or ResultFile that holds the result.
+            data: Packed result, or None if it is on disk.
+            size: Size of the packed result on disk, if data is None.
+            offset: Offset of the packed result on disk, if data is None.
+        """
+        # The handle keeps the store, and with it the spill file, alive
+        self.store = store
+        self.size = len(data) if data is not None else size
+        self.data = data
+        self.offset = offset
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Whether the result has been moved to disk.
+        """
+        return self.data is None
+
+    def load(self) -> Any:
+        """
+        Unpack the result.
+
+        Returns:
+            A new copy of the stored result.
+        """
+        return self.store.load(self)
+
+
+class ResultStore:
+    """
+    Holds completed results within a memory budget, spilling the rest to disk.
+
+    Results are pickled and compressed with zlib, which keeps datetimes and
+    bytes in API responses intact and is usually several times smaller than
+    the objects themselves. The budget counts these packed bytes. The spill
+    file is an anonymous temporary file that is removed when the store is
+    closed or when no result refers to it anymore.
+    """
+
+    def __init__(self, budget: int, directory: Optional[str] = None):
+        """
+        Initialize result store.
+
+        Args:
+            budget: Maximum number of packed bytes to keep in memory.
+            directory: Directory of the spill file. If None, the system's
+                       temporary directory is used.
+        """
+        self.budget = max(budget, 0)
+        self.directory = directory
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.spilled = 0
+        self._lock = threading.Lock()
+        # Results held in memory, oldest first
+        self._in_memory: Deque[StoredResult] = collections.deque()
+        self._file = None
+
+    def put(self, value: Any) -> StoredResult:
+        """
+        Pack a result, spilling the oldest results if the budget is exceeded.
+
+        Args:
+            value: Result to store, such as an API response.
+
+        Returns:
+            Handle to read the result back.
+        """
+        stored = StoredResult(self, pack(value))
+
+        with self._lock:
+            self._in_memory.append(stored)
+            self.memory_bytes += stored.size
+            while self.memory_bytes > self.budget and self._in_memory:
+                self._spill(self._in_memory.popleft())
+
+        return stored
+
+    def load(self, stored: StoredResult) -> Any:
+        """
+        Unpack a stored result, reading it from disk if it has been spilled.
+
+        Args:
+            stored: Handle returned by put().
+
+        Returns:
+            A new copy of the stored result.
+        """
+        with self._lock:
+            data = stored.data
+            if data is None:
+                self._file.seek(stored.offset)
+                data = self._file.read(stored.size)
+
+        return unpack(data)
+
+    def close(self) -> None:
+        """
+        Remove the spill file. Spilled results cannot be read afterwards.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _spill(self, stored: StoredResult) -> None:
+        """
+        Move a packed result to the end of the spill file.
+        """
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix=SPILL_PREFIX, dir=self.directory)
+            logger.info(
+                f"Completed results exceed the memory budget of {self.budget} bytes; "
+                f"spilling the oldest to a temporary file in {self.directory or tempfile.gettempdir()}"
+            )
+
+        self._file.seek(0, 2)
+        stored.offset = self._file.tell()
+        self._file.write(stored.data)
+        stored.data = None
+
+        self.memory_bytes -= stored.size
+        self.spilled_bytes += stored.size
+        self.spilled += 1
+
+
+class ResultFile:
+    """
+    Append-only file of packed results, read back by offset.
+
+    Unlike a ResultStore's spill file, the file is named and kept, so the
+    handles of its results can be recreated from their offset and size by a
+    later process. Results are written as soon as they are put, as
+    compressed JSON: reading back a file from a run directory must not be
+    able to run code. Datetimes are therefore read back as ISO 8601 strings.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Initialize result file.
+
+        Args:
+            path: Path of the file.
+            resume: Whether to keep the results of an existing file. If False,
+                    any existing file is replaced.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b" if resume else "w+b")
+
+    def put(self, value: Any) -> StoredResult:
+        """
+        Pack a result and append it to the file.
+
+        Args:
+            value: Result to store, such as an API response.
+
+        Returns:
+            Handle to read the result back.
+        """
+        data = pack_json(value)
+
+        with self._lock:
+            # Bytes left by a write cut short by a crash are never referenced
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+
+        return StoredResult(self, None, size=len(data), offset=offset)
+
+    def get(self, offset: int, size: int) -> StoredResult:
+        """
+        Get the handle of a result put earlier, possibly by another process.
+
+        Args:
+            offset: Offset of the result.
+            size: Size of the packed result.
+
+        Returns:
+            Handle to read the result back.
+        """
+        return StoredResult(self, None, size=size, offset=offset)
+
+    def load(self, stored: StoredResult) -> Any:
+        """
+        Unpack a stored result.
+
+        Args:
+            stored: Handle returned by put() or get().
+
+        Returns:
+            A new copy of the stored result.
+        """
+        with self._lock:
+            self._file.seek(stored.offset)
+            data = self._file.read(stored.size)
+
+        return unpack_json(data)
+
+    def close(self) -> None:
+        """
+        Close the file. Its results cannot be read afterwards.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
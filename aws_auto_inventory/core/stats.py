@@ -0,0 +1,397 @@
+"""
+Historical call statistics for AWS Auto Inventory.
+
+The duration and page count of every (account, region, service, function)
+call are kept in a small JSON file in the output directory. Later scans
+start the calls expected to take longest first, so a slow call that happens
+to be planned last does not set the wall time of the whole scan, and they
+estimate the time left while they run.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import collections
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from .metrics import CallKey, ScanMetrics, _write_atomic
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Name of the statistics file in the output directory
+STATS_FILE = "call_stats.json"
+
+# Version of the statistics file format
+STATS_VERSION = 1
+
+# Weight of the latest run in the smoothed statistics of a call
+SMOOTHING = 0.5
+
+# Seconds between progress reports while a scan runs
+PROGRESS_INTERVAL = 10.0
+
+T = TypeVar("T")
+
+
+class CallStats:
+    """
+    Smoothed duration and page count of each call, from previous runs.
+
+    Calls without history of their own are estimated from the same call in
+    the same region of other accounts, then from the same call anywhere.
+    """
+
+    def __init__(self, calls: Optional[Dict[CallKey, Dict[str, float]]] = None):
+        """
+        Initialize call statistics.
+
+        Args:
+            calls: Statistics keyed by (account, region, service, function), each
+                   with "duration_seconds", "pages" and "runs".
+        """
+        self._lock = threading.Lock()
+        self.calls: Dict[CallKey, Dict[str, float]] = {}
+        # Sums and counts of durations for the fallback estimates
+        self._by_region: Dict[Tuple[str, str, str], List[float]] = collections.defaultdict(lambda: [0.0, 0])
+        self._by_function: Dict[Tuple[str, str], List[float]] = collections.defaultdict(lambda: [0.0, 0])
+
+        for key, entry in (calls or {}).items():
+            self._set(key, entry)
+
+    @classmethod
+    def load(cls, path: str) -> "CallStats":
+        """
+        Load statistics from a file.
+
+        Args:
+            path: Path of the statistics file.
+
+        Returns:
+            The statistics, or empty statistics if the file does not exist or
+            cannot be read.
+        """
+        if not os.path.isfile(path):
+            return cls()
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as error:
+            logger.warning(f"Ignoring call statistics in {path}: {error}")
+            return cls()
+
+        if data.get("version") != STATS_VERSION:
+            logger.warning(f"Ignoring call statistics in {path}: unsupported version {data.get('version')}")
+            return cls()
+
+        return cls({
+            (row["account_id"], row["region"], row["service"], row["function"]): {
+                "duration_seconds": row["duration_seconds"],
+                "pages": row["pages"],
+                "runs": row["runs"],
+            }
+            for row in data.get("calls", [])
+        })
+
+    def save(self, path: str) -> None:
+        """
+        Save the statistics to a file, replacing it atomically.
+
+        Args:
+            path: Path of the statistics file.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "account_id": account_id,
+                    "region": region,
+                    "service": service,
+                    "function": function,
+                    **entry,
+                }
+                for (account_id, region, service, function), entry in self.calls.items()
+            ]
+
+        rows.sort(key=lambda row: row["duration_seconds"], reverse=True)
+        _write_atomic(path, json.dumps({"version": STATS_VERSION, "calls": rows}, indent=2))
+
+    def observe(
+        self,
+        account_id: Optional[str],
+        region: str,
+        service: str,
+        function: str,
+        duration: float,
+        pages: float
+    ) -> None:
+        """
+        Record a completed call.
+
+        Args:
+            account_id: AWS account ID, or None if unknown.
+            region: AWS region.
+            service: AWS service name.
+            function: API function name.
+            duration: Time (in seconds) the call took, including every page and retry.
+            pages: Number of pages the call returned.
+        """
+        key = (account_id, region, service, function)
+
+        with self._lock:
+            entry = self.calls.get(key)
+            if entry is None:
+                entry = {"duration_seconds": duration, "pages": pages, "runs": 0}
+            else:
+                entry = {
+                    "duration_seconds": entry["duration_seconds"] * (1 - SMOOTHING) + duration * SMOOTHING,
+                    "pages": entry["pages"] * (1 - SMOOTHING) + pages * SMOOTHING,
+                    "runs": entry["runs"],
+                }
+            entry["duration_seconds"] = round(entry["duration_seconds"], 6)
+            entry["pages"] = round(entry["pages"], 3)
+            entry["runs"] += 1
+            self._set(key, entry)
+
+    def update(self, metrics: ScanMetrics, account_id: Optional[str] = None) -> None:
+        """
+        Record the calls of a scan from its metrics.
+
+        Failed calls are left out, since they usually end early.
+
+        Args:
+            metrics: Metrics of the scan.
+            account_id: Only record the calls of this account, for metrics
+                        shared by the accounts of an organization scan.
+        """
+        for row in metrics.rows():
+            if not row["calls"] or row["errors"]:
+                continue
+            if account_id is not None and row["account_id"] != account_id:
+                continue
+
+            self.observe(
+                row["account_id"],
+                row["region"],
+                row["service"],
+                row["function"],
+                row["duration_seconds"] / row["calls"],
+                row["pages"] / row["calls"]
+            )
+
+    def expected(self, account_id: Optional[str], region: str, service: str, function: str) -> Optional[float]:
+        """
+        Estimate the duration of a call.
+
+        Args:
+            account_id: AWS account ID, or None if unknown.
+            region: AWS region.
+            service: AWS service name.
+            function: API function name.
+
+        Returns:
+            Expected duration in seconds, or None if the call has never run.
+        """
+        with self._lock:
+            entry = self.calls.get((account_id, region, service, function))
+            if entry is not None:
+                return entry["duration_seconds"]
+
+            for totals in (self._by_region.get((region, service, function)),
+                           self._by_function.get((service, function))):
+                if totals is not None and totals[1]:
+                    return totals[0] / totals[1]
+
+            return None
+
+    def order(self, tasks: Iterable[T], key: Callable[[T], CallKey]) -> List[T]:
+        """
+        Sort tasks longest expected duration first.
+
+        Tasks that have never run come first, since any of them may be the
+        longest, and keep their relative order, as do tasks with equal
+        estimates.
+
+        Args:
+            tasks: Tasks to sort.
+            key: Function giving the (account, region, service, function) of a task.
+
+        Returns:
+            Sorted tasks.
+        """
+        def sort_key(task: T) -> float:
+            expected = self.expected(*key(task))
+            return float("-inf") if expected is None else -expected
+
+        return sorted(tasks, key=sort_key)
+
+    def _set(self, key: CallKey, entry: Dict[str, float]) -> None:
+        """
+        Store the statistics of a call and update the fallback estimates.
+        """
+        _, region, service, function = key
+        previous = self.calls.get(key)
+
+        for totals in (self._by_region[(region, service, function)], self._by_function[(service, function)]):
+            if previous is not None:
+                totals[0] -= previous["duration_seconds"]
+                totals[1] -= 1
+            totals[0] += entry["duration_seconds"]
+            totals[1] += 1
+
+        self.calls[key] = entry
+
+
+class CallTimer:
+    """
+    Measures the duration and page count of one call.
+    """
+
+    def __init__(self, on_page: Optional[Callable[[Any], None]] = None):
+        """
+        Start timing a call.
+
+        Args:
+            on_page: Function to pass each page on to.
+        """
+        self.started = time.perf_counter()
+        self.pages = 0
+        self._on_page = on_page
+
+    def on_page(self, result: Any) -> None:
+        """
+        Count a page of the call's result.
+
+        Args:
+            result: Extracted result of the page.
+        """
+        self.pages += 1
+        if self._on_page is not None:
+            self._on_page(result)
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds since the call started.
+        """
+        return time.perf_counter() - self.started
+
+
+class ScanProgress:
+    """
+    Progress of a scan, with an estimate of the time left.
+
+    Every planned call adds its expected duration to the work left, and
+    completed calls remove it. Calls that have never run count as the average
+    of those that have. The estimate spreads the work left evenly over the
+    workers, and is never shorter than the longest call left.
+    """
+
+    def __init__(self, stats: CallStats, workers: int, interval: float = PROGRESS_INTERVAL):
+        """
+        Initialize scan progress.
+
+        Args:
+            stats: Statistics of earlier runs.
+            workers: Number of calls running at once.
+            interval: Minimum seconds between reports.
+        """
+        self.stats = stats
+        self.workers = max(workers, 1)
+        self.interval = interval
+        self.planned = 0
+        self.completed = 0
+        self._remaining: Dict[CallKey, Tuple[Optional[float], int]] = {}
+        self._last_report = time.monotonic()
+
+    def add(self, key: CallKey) -> None:
+        """
+        Record a planned call.
+
+        Args:
+            key: (account, region, service, function) of the call.
+        """
+        expected, count = self._remaining.get(key, (None, 0))
+        if not count:
+            expected = self.stats.expected(*key)
+        self._remaining[key] = (expected, count + 1)
+        self.planned += 1
+
+    def complete(self, key: CallKey) -> None:
+        """
+        Record a completed call.
+
+        Args:
+            key: (account, region, service, function) of the call.
+        """
+        self.completed += 1
+        expected, count = self._remaining.get(key, (None, 0))
+        if count > 1:
+            self._remaining[key] = (expected, count - 1)
+        else:
+            self._remaining.pop(key, None)
+
+    def eta(self) -> Optional[float]:
+        """
+        Estimate the time left.
+
+        Returns:
+            Seconds until every planned call has completed, or None if none
+            of the calls left has run before.
+        """
+        known = [(expected, count) for expected, count in self._remaining.values() if expected is not None]
+        if not known:
+            return None if self._remaining else 0.0
+
+        calls = sum(count for _, count in known)
+        average = sum(expected * count for expected, count in known) / calls
+        work = sum(
+            (average if expected is None else expected) * count
+            for expected, count in self._remaining.values()
+        )
+
+        return max(work / self.workers, max(expected for expected, _ in known))
+
+    def report(self, force: bool = False) -> Optional[str]:
+        """
+        Describe the progress, at most once per interval.
+
+        Args:
+            force: Whether to describe it even if the interval has not passed.
+
+        Returns:
+            Progress message, or None if the last one was too recent.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return None
+        self._last_report = now
+
+        message = f"Completed {self.completed} of {self.planned} calls"
+        eta = self.eta()
+        if eta is not None:
+            message += f", about {format_duration(eta)} left"
+
+        return message
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration for progress messages.
+
+    Args:
+        seconds: Duration in seconds.
+
+    Returns:
+        Duration such as "1h 02m", "4m 05s" or "12s".
+    """
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
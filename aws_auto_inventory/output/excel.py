@@ -0,0 +1,308 @@
+"""
+Streaming Excel output for AWS Auto Inventory.
+
+Workbooks are written with xlsxwriter's constant_memory mode: each row is
+flushed to a temporary file as soon as the next row starts, so memory does
+not grow with the number of rows. Rows must therefore be written top to
+bottom, which shapes how headers and transposed sheets are handled.
+"""
+import os
+import re
+import json
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+import xlsxwriter
+
+from ..config.models import Config, ExcelConfig
+from ..core.service import ServiceResult
+from .ndjson import json_default
+from .parquet import iter_rows
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Workbook options: constant memory, datetimes written without their time zone, and
+# strings written as text even when they look like formulas or URLs
+WORKBOOK_OPTIONS = {
+    "constant_memory": True,
+    "remove_timezone": True,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+    "default_date_format": "yyyy-mm-dd hh:mm:ss",
+}
+
+# Excel limits
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+MAX_SHEET_NAME_LENGTH = 31
+
+# Characters Excel does not allow in sheet names
+INVALID_SHEET_NAME_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+
+# Header style used when the inventory's formatting has no header_style
+DEFAULT_HEADER_STYLE = {"bold": True}
+
+# Context columns written before the resource fields
+ACCOUNT_COLUMNS = ["Account ID", "Account Name"]
+REGION_COLUMN = "Region"
+
+# Last column of untransposed sheets, holding fields missing from the header as JSON
+OTHER_FIELDS_COLUMN = "Other Fields"
+
+
+def sheet_title(name: str, existing: List[str]) -> str:
+    """
+    Make a valid, unique worksheet name.
+    
+    Args:
+        name: Sheet name from the configuration.
+        existing: Worksheet names already in the workbook.
+    
+    Returns:
+        Name without invalid characters, at most 31 characters long and
+        unique in the workbook regardless of case.
+    """
+    title = INVALID_SHEET_NAME_CHARACTERS.sub("_", name).strip("'")[:MAX_SHEET_NAME_LENGTH] or "Sheet"
+    taken = {sheet.lower() for sheet in existing}
+    
+    candidate = title
+    number = 2
+    while candidate.lower() in taken:
+        suffix = f" ({number})"
+        candidate = f"{title[:MAX_SHEET_NAME_LENGTH - len(suffix)]}{suffix}"
+        number += 1
+    return candidate
+
+
+def _cell_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, bool, int, float, datetime.datetime, datetime.date)):
+        return value
+    return str(json_default(value))
+
+
+class _Sheet:
+    """
+    Write state of one worksheet.
+    """
+    
+    def __init__(self, worksheet: Any, transpose: bool):
+        self.worksheet = worksheet
+        self.transpose = transpose
+        self.columns: Optional[List[str]] = None
+        self.column_index: Dict[str, int] = {}
+        self.row = 0
+        self.dropped = 0
+        # Transposed sheets keep their rows until close; see WorkbookWriter
+        self.rows: List[Dict[str, Any]] = []
+
+
+class WorkbookWriter:
+    """
+    Streams the service results of one inventory into an Excel workbook.
+    
+    Each sheet of the inventory gets a worksheet, and rows are written as
+    results arrive. The header of a worksheet is fixed by its first result,
+    since rows before the current one are already flushed; fields that only
+    appear in later results are kept as JSON in the Other Fields column.
+    
+    Transposed sheets have one column per resource, so no row is complete
+    until every resource is known. They keep their rows once, as the
+    flattened records, and write them field by field on close. Excel's
+    16,384 column limit bounds this buffer.
+    """
+    
+    def __init__(self, path: str, excel: Optional[ExcelConfig] = None, sheet_names: Optional[List[str]] = None):
+        """
+        Initialize workbook writer.
+        
+        Args:
+            path: Path of the workbook.
+            excel: Excel configuration of the inventory.
+            sheet_names: Sheet names in configuration order. Their worksheets
+                         are created up front so the workbook follows the
+                         configuration; other sheets are added as they arrive.
+        """
+        self.path = path
+        self.excel = excel or ExcelConfig()
+        self.workbook = xlsxwriter.Workbook(path, WORKBOOK_OPTIONS)
+        self.header_format = self.workbook.add_format(
+            self.excel.formatting.get("header_style", DEFAULT_HEADER_STYLE)
+        )
+        self.sheets: Dict[str, _Sheet] = {}
+        self.count = 0
+        
+        for name in sheet_names or []:
+            self._sheet(name)
+    
+    def write(self, service_result: ServiceResult, result: Any = None) -> None:
+        """
+        Write the resources of a service result to its sheet.
+        
+        Args:
+            service_result: Service scan result. Failed results are skipped.
+            result: API response of the service result, if the caller has
+                    already read it. If None, it is read from service_result.
+        """
+        if not service_result.success:
+            return
+        if result is None:
+            result = service_result.result
+        
+        name = service_result.sheet_name or f"{service_result.service}-{service_result.function}"
+        sheet = self._sheet(name)
+        
+        context = {REGION_COLUMN: service_result.region}
+        if service_result.account_id is not None:
+            context = {
+                ACCOUNT_COLUMNS[0]: service_result.account_id,
+                ACCOUNT_COLUMNS[1]: service_result.account_name,
+                **context,
+            }
+        
+        rows = (dict(context, **row) for row in iter_rows(result))
+        if sheet.transpose:
+            for row in rows:
+                if len(sheet.rows) < MAX_COLUMNS - 1:
+                    sheet.rows.append(row)
+                else:
+                    sheet.dropped += 1
+        else:
+            self._write_rows(sheet, list(rows))
+        
+        self.count += 1
+    
+    def close(self) -> None:
+        """
+        Write the transposed sheets and close the workbook.
+        """
+        for name, sheet in self.sheets.items():
+            if sheet.transpose:
+                self._write_transposed(sheet)
+            if sheet.dropped:
+                logger.warning(f"Sheet {name} exceeds Excel's size limits; {sheet.dropped} resources were not written")
+        
+        self.workbook.close()
+        logger.info(f"Wrote Excel output to {self.path}")
+    
+    def __enter__(self) -> "WorkbookWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _sheet(self, name: str) -> _Sheet:
+        sheet = self.sheets.get(name)
+        if sheet is None:
+            title = sheet_title(name, [existing.worksheet.name for existing in self.sheets.values()])
+            sheet = _Sheet(self.workbook.add_worksheet(title), self.excel.transpose)
+            self.sheets[name] = sheet
+        return sheet
+    
+    def _write_rows(self, sheet: _Sheet, rows: List[Dict[str, Any]]) -> None:
+        worksheet = sheet.worksheet
+        
+        if sheet.columns is None:
+            if not rows:
+                return
+            columns = list(dict.fromkeys(column for row in rows for column in row))
+            sheet.columns = columns[:MAX_COLUMNS - 1] + [OTHER_FIELDS_COLUMN]
+            sheet.column_index = {column: index for index, column in enumerate(sheet.columns[:-1])}
+            worksheet.write_row(0, 0, sheet.columns, self.header_format)
+            worksheet.freeze_panes(1, 0)
+            sheet.row = 1
+        
+        other_column = len(sheet.columns) - 1
+        for row in rows:
+            if sheet.row >= MAX_ROWS:
+                sheet.dropped += 1
+                continue
+            
+            other = {}
+            for column, value in row.items():
+                index = sheet.column_index.get(column)
+                if index is None:
+                    other[column] = value
+                elif value is not None:
+                    worksheet.write(sheet.row, index, _cell_value(value))
+            if other:
+                worksheet.write_string(sheet.row, other_column, json.dumps(other, default=json_default))
+            sheet.row += 1
+    
+    def _write_transposed(self, sheet: _Sheet) -> None:
+        worksheet = sheet.worksheet
+        rows, sheet.rows = sheet.rows, []
+        
+        fields = list(dict.fromkeys(field for row in rows for field in row))
+        for index, field in enumerate(fields[:MAX_ROWS]):
+            worksheet.write_string(index, 0, field, self.header_format)
+            for column, row in enumerate(rows, start=1):
+                value = row.get(field)
+                if value is not None:
+                    worksheet.write(index, column, _cell_value(value))
+        worksheet.freeze_panes(0, 1)
+
+
+class ExcelWriter:
+    """
+    Streams service results into one workbook per inventory.
+    
+    Workbooks are opened when the first result of their inventory arrives
+    and are named ``<inventory>.xlsx``.
+    """
+    
+    def __init__(self, output_dir: str, config: Optional[Config] = None):
+        """
+        Initialize Excel writer.
+        
+        Args:
+            output_dir: Directory to write the workbooks to.
+            config: Configuration providing the Excel options and sheet
+                    order of each inventory.
+        """
+        self.output_dir = output_dir
+        self.inventories = {inventory.name: inventory for inventory in config.inventories} if config else {}
+        self.workbooks: Dict[str, WorkbookWriter] = {}
+    
+    def write(self, service_result: ServiceResult, result: Any = None) -> None:
+        """
+        Write a service result to the workbook of its inventory.
+        
+        Args:
+            service_result: Service scan result.
+            result: API response of the service result, if the caller has
+                    already read it.
+        """
+        name = service_result.inventory_name or "inventory"
+        workbook = self.workbooks.get(name)
+        if workbook is None:
+            inventory = self.inventories.get(name)
+            os.makedirs(self.output_dir, exist_ok=True)
+            workbook = WorkbookWriter(
+                os.path.join(self.output_dir, f"{name}.xlsx"),
+                inventory.excel if inventory else None,
+                [sheet.name for sheet in inventory.sheets] if inventory else None
+            )
+            self.workbooks[name] = workbook
+        workbook.write(service_result, result)
+    
+    @property
+    def paths(self) -> List[str]:
+        """
+        Paths of the workbooks opened so far.
+        """
+        return [workbook.path for workbook in self.workbooks.values()]
+    
+    def close(self) -> None:
+        """
+        Close all workbooks.
+        """
+        for workbook in self.workbooks.values():
+            workbook.close()
+    
+    def __enter__(self) -> "ExcelWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,331 @@
+"""
+Parquet output for AWS Auto Inventory.
+
+Each service result is flattened into an Arrow table and written to a
+Hive-partitioned Parquet dataset:
+
+    parquet/inventory=<name>/account=<id>/region=<region>/sheet=<name>/part-0.parquet
+
+Single-account scans have no account ID, so their results leave out the
+account level; readers see a null account for them.
+
+pyarrow is an optional dependency installed with
+``pip install aws-auto-inventory[parquet]``.
+"""
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from ..core.service import ServiceResult
+from .ndjson import json_default
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Directory under the output directory that holds the Parquet dataset
+PARQUET_DIR = "parquet"
+
+# Separator between the keys of nested fields in column names
+COLUMN_SEPARATOR = "."
+
+# Column holding results that are not records, such as a list of names
+VALUE_COLUMN = "value"
+
+
+def import_pyarrow() -> Any:
+    """
+    Import pyarrow and its Parquet module.
+    
+    Returns:
+        The pyarrow module.
+    
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            "Parquet output requires pyarrow. "
+            "Install it with: pip install aws-auto-inventory[parquet]"
+        ) from error
+    
+    return pyarrow
+
+
+def flatten_record(record: Dict[Any, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten a record into columns.
+    
+    Nested dictionaries become columns named after their path, such as
+    ``State.Name``. Lists are stored as JSON text, so every column holds
+    scalar values.
+    
+    Args:
+        record: Record to flatten.
+        prefix: Prefix of the column names.
+    
+    Returns:
+        Column values by column name.
+    """
+    columns = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            columns.update(flatten_record(value, f"{name}{COLUMN_SEPARATOR}"))
+        elif isinstance(value, (dict, list, tuple)):
+            columns[name] = json.dumps(value, default=json_default)
+        else:
+            columns[name] = value
+    return columns
+
+
+def iter_rows(result: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of an extracted API result.
+    
+    Args:
+        result: Extracted API result.
+    
+    Yields:
+        One flattened row per resource. Resources that are not records are
+        stored in the value column.
+    """
+    if result is None:
+        return
+    
+    for resource in result if isinstance(result, list) else [result]:
+        if isinstance(resource, dict):
+            yield flatten_record(resource)
+        else:
+            yield flatten_record({VALUE_COLUMN: resource})
+
+
+def _as_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return str(json_default(value))
+
+
+class ParquetWriter:
+    """
+    Writes service results to a Hive-partitioned Parquet dataset.
+    
+    All files of one (service, function) share one schema, so the dataset
+    can be read as a whole. Column types are inferred from the first result
+    that has a value and reused for later results; columns missing from a
+    result are written as nulls. When a later result does not fit the cached
+    type, integers are widened to floats and other conflicts fall back to
+    strings. Each file is written with the schema known when it is written,
+    and close() rewrites the files whose schema has changed since then, so
+    each file is rewritten at most once however often the schema changes.
+    """
+    
+    def __init__(self, root: str, compression: str = "snappy"):
+        """
+        Initialize Parquet writer.
+        
+        Args:
+            root: Root directory of the dataset.
+            compression: Parquet compression codec.
+        """
+        self.pa = import_pyarrow()
+        self.root = root
+        self.compression = compression
+        self.schemas: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Version of each API call's schema, bumped whenever it changes
+        self.versions: Dict[Tuple[str, str], int] = {}
+        # Files written for each API call, with the schema version they were written with
+        self.paths: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.count = 0
+        self._lock = threading.RLock()
+    
+    def partition_dir(self, service_result: ServiceResult) -> str:
+        """
+        Get the partition directory of a service result.
+        
+        Args:
+            service_result: Service scan result.
+        
+        Returns:
+            Directory of the result's inventory, account, region and sheet
+            partition. Levels whose value is unknown are left out.
+        """
+        sheet = service_result.sheet_name or f"{service_result.service}-{service_result.function}"
+        partitions = [
+            ("inventory", service_result.inventory_name),
+            ("account", service_result.account_id),
+            ("region", service_result.region),
+            ("sheet", sheet),
+        ]
+        return os.path.join(self.root, *[
+            f"{name}={quote(value, safe='')}"
+            for name, value in partitions
+            if value
+        ])
+    
+    def build_table(self, service: str, function: str, rows: list) -> Any:
+        """
+        Build an Arrow table from flattened rows.
+        
+        Args:
+            service: AWS service name.
+            function: API function name.
+            rows: Flattened rows.
+        
+        Returns:
+            Arrow table with the cached columns of the API call.
+        """
+        pa = self.pa
+        
+        with self._lock:
+            types = self.schemas.setdefault((service, function), {})
+            
+            arrays = {}
+            for name in dict.fromkeys(name for row in rows for name in row):
+                arrays[name] = self._column(types, name, [row.get(name) for row in rows])
+            
+            return pa.Table.from_arrays(
+                [
+                    arrays[name] if name in arrays else pa.nulls(len(rows), type=data_type)
+                    for name, data_type in types.items()
+                ],
+                names=list(types)
+            )
+    
+    def write(self, service_result: ServiceResult, result: Any = None) -> Optional[str]:
+        """
+        Write a service result to its partition.
+        
+        Args:
+            service_result: Service scan result.
+            result: API response of the service result, if the caller has
+                    already read it. If None, it is read from service_result.
+        
+        Returns:
+            Path of the Parquet file, or None if the result is empty or failed.
+        """
+        if not service_result.success:
+            return None
+        
+        rows = list(iter_rows(service_result.result if result is None else result))
+        if not rows:
+            return None
+        
+        key = (service_result.service, service_result.function)
+        directory = self.partition_dir(service_result)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "part-0.parquet")
+        
+        with self._lock:
+            schema = dict(self.schemas.get(key, {}))
+            table = self.build_table(service_result.service, service_result.function, rows)
+            if self.schemas[key] != schema:
+                self.versions[key] = self.versions.get(key, 0) + 1
+            
+            self.pa.parquet.write_table(table, path, compression=self.compression)
+            self.paths.setdefault(key, {})[path] = self.versions.get(key, 0)
+            self.count += 1
+        
+        logger.debug(f"Wrote {table.num_rows} rows to {path}")
+        return path
+    
+    def close(self) -> None:
+        """
+        Give every file the final schema of its API call.
+        
+        Files written before their call's schema last changed are rewritten
+        once, so the whole dataset can be read with one schema.
+        """
+        with self._lock:
+            rewritten = 0
+            for key, paths in self.paths.items():
+                version = self.versions.get(key, 0)
+                for path, written in paths.items():
+                    if written != version:
+                        self._rewrite(path, self.schemas[key])
+                        paths[path] = version
+                        rewritten += 1
+        
+        if rewritten:
+            logger.info(f"Rewrote {rewritten} Parquet files with the final schema of their API call")
+    
+    def _rewrite(self, path: str, types: Dict[str, Any]) -> None:
+        """
+        Rewrite a file with the current schema of its API call.
+        
+        Args:
+            path: Path of the Parquet file.
+            types: Column types of the API call.
+        """
+        pa = self.pa
+        table = pa.parquet.read_table(path)
+        
+        columns = []
+        for name, data_type in types.items():
+            if name not in table.column_names:
+                columns.append(pa.nulls(table.num_rows, type=data_type))
+                continue
+            
+            column = table.column(name)
+            if column.type == data_type:
+                columns.append(column)
+            elif pa.types.is_string(data_type):
+                # Same text as values converted when they are written
+                columns.append(pa.array([_as_text(value) for value in column.to_pylist()], type=pa.string()))
+            else:
+                columns.append(column.cast(data_type))
+        
+        # Replace the file in one step, so a crash leaves the old or the new
+        # file; readers skip hidden files like the temporary one
+        temporary = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        pa.parquet.write_table(
+            pa.Table.from_arrays(columns, names=list(types)), temporary, compression=self.compression
+        )
+        os.replace(temporary, path)
+        logger.debug(f"Rewrote {path} with {len(types)} columns")
+    
+    def _column(self, types: Dict[str, Any], name: str, values: list) -> Any:
+        """
+        Convert the values of a column to an Arrow array of its cached type.
+        
+        Args:
+            types: Cached column types of the API call, updated in place.
+            name: Column name.
+            values: Column values.
+        
+        Returns:
+            Arrow array.
+        """
+        pa = self.pa
+        
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            array = pa.array([_as_text(value) for value in values], type=pa.string())
+        
+        cached = types.get(name)
+        if cached is None or pa.types.is_null(cached):
+            types[name] = array.type
+            return array
+        
+        if array.type == cached:
+            return array
+        
+        if pa.types.is_null(array.type):
+            return pa.nulls(len(values), type=cached)
+        
+        if pa.types.is_integer(array.type) and pa.types.is_floating(cached):
+            return array.cast(cached)
+        
+        if pa.types.is_floating(array.type) and pa.types.is_integer(cached):
+            types[name] = pa.float64()
+            return array.cast(pa.float64())
+        
+        # Conflicting types are kept as text
+        types[name] = pa.string()
+        return pa.array([_as_text(value) for value in values], type=pa.string())
@@ -0,0 +1,170 @@
+"""
+Output processor for AWS Auto Inventory.
+"""
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config.models import Config
+from ..core.scan_engine import ScanResult
+from ..core.service import ServiceResult
+from .excel import ExcelWriter
+from .ndjson import json_default
+from .parquet import PARQUET_DIR, ParquetWriter
+from .sqlite import DATABASE_FILE, SQLiteWriter
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Output formats the processor can write
+OUTPUT_FORMATS = ("json", "excel", "parquet", "sqlite")
+
+# Output formats that can be written one service result at a time, during the scan
+STREAMING_FORMATS = ("excel", "parquet", "sqlite")
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Convert service results and the values json_default handles.
+    """
+    if isinstance(value, ServiceResult):
+        return value.to_dict()
+    return json_default(value)
+
+
+class OutputProcessor:
+    """
+    Writes scan results to files in the requested formats.
+    """
+    
+    def process(
+        self,
+        results: List[ScanResult],
+        output_dir: str,
+        formats: List[str],
+        config: Optional[Config] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Write scan results.
+        
+        Args:
+            results: Scan results, one for each inventory.
+            output_dir: Directory to write the files to.
+            formats: Output formats: "json", "excel", "parquet" or "sqlite".
+            config: Configuration of the scan, providing the Excel options.
+        
+        Returns:
+            Paths of the written files by format.
+        
+        Raises:
+            ValueError: If a format is not supported.
+        """
+        self._check_formats(formats, OUTPUT_FORMATS)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        written = {}
+        
+        if "json" in formats:
+            written["json"] = [self.write_json(result, output_dir) for result in results]
+        
+        streamed = [output_format for output_format in formats if output_format != "json"]
+        if streamed:
+            written.update(self.stream(
+                (service_result for result in results for service_result in result.iter_service_results()),
+                output_dir,
+                streamed,
+                config
+            ))
+        
+        return written
+    
+    def stream(
+        self,
+        service_results: Iterable[ServiceResult],
+        output_dir: str,
+        formats: List[str],
+        config: Optional[Config] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Write service results as they arrive.
+        
+        Each result is written to every format before the next one is read,
+        so results can come straight from ScanEngine.iter_results.
+        
+        Args:
+            service_results: Service scan results, with their inventory and sheet.
+            output_dir: Directory to write the files to.
+            formats: Output formats: "excel", "parquet" or "sqlite".
+            config: Configuration of the scan, providing the Excel options.
+        
+        Returns:
+            Paths of the written files by format.
+        
+        Raises:
+            ValueError: If a format cannot be streamed.
+        """
+        self._check_formats(formats, STREAMING_FORMATS)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        excel = ExcelWriter(output_dir, config) if "excel" in formats else None
+        parquet = ParquetWriter(os.path.join(output_dir, PARQUET_DIR)) if "parquet" in formats else None
+        sqlite = SQLiteWriter(os.path.join(output_dir, DATABASE_FILE)) if "sqlite" in formats else None
+        parquet_paths = []
+        
+        try:
+            for service_result in service_results:
+                # A stored result is unpacked each time it is read, so every
+                # format gets the one copy read here
+                result = service_result.result if service_result.success else None
+                if excel is not None:
+                    excel.write(service_result, result)
+                if parquet is not None:
+                    path = parquet.write(service_result, result)
+                    if path is not None:
+                        parquet_paths.append(path)
+                if sqlite is not None:
+                    sqlite.write(service_result, result)
+        finally:
+            if excel is not None:
+                excel.close()
+            if parquet is not None:
+                parquet.close()
+            if sqlite is not None:
+                sqlite.close()
+        
+        written = {}
+        if excel is not None:
+            written["excel"] = excel.paths
+            logger.info(f"Wrote {len(excel.paths)} Excel workbooks to {output_dir}")
+        if parquet is not None:
+            written["parquet"] = parquet_paths
+            logger.info(f"Wrote {len(parquet_paths)} Parquet files to {parquet.root}")
+        if sqlite is not None:
+            written["sqlite"] = [sqlite.path]
+        return written
+    
+    def write_json(self, result: ScanResult, output_dir: str) -> str:
+        """
+        Write the result of one inventory as a JSON document.
+        
+        Args:
+            result: Scan result of the inventory.
+            output_dir: Directory to write the file to.
+        
+        Returns:
+            Path of the JSON file.
+        """
+        path = os.path.join(output_dir, f"{result.inventory_name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            # Service results are converted as the encoder reaches them, so
+            # only one is unpacked at a time if they were spilled to disk
+            json.dump(result.to_dict(lazy=True), f, indent=2, default=_json_default)
+        
+        logger.info(f"Wrote JSON output to {path}")
+        return path
+    
+    def _check_formats(self, formats: List[str], supported: Iterable[str]) -> None:
+        for output_format in formats:
+            if output_format not in supported:
+                raise ValueError(f"Unsupported output format: {output_format}")
@@ -0,0 +1,322 @@
+"""
+SQLite inventory index for AWS Auto Inventory.
+
+Every resource of a scan is stored as one row with its inventory, account,
+region, service, function, resource ID, ARN and JSON body. The ID and ARN
+columns are indexed, so finding which account holds a resource is a single
+index lookup instead of a search through result files, and the JSON body can
+be queried with SQLite's JSON functions.
+"""
+import os
+import re
+import json
+import sqlite3
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from .ndjson import dumps
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing it loads boto3 and pydantic
+    from ..core.service import ServiceResult
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Name of the database file in the output directory
+DATABASE_FILE = "inventory.db"
+
+# Number of rows inserted per transaction
+DEFAULT_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE resources (
+    inventory TEXT,
+    account_id TEXT,
+    account_name TEXT,
+    region TEXT,
+    sheet TEXT,
+    service TEXT NOT NULL,
+    function TEXT NOT NULL,
+    resource_id TEXT,
+    arn TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX resources_resource_id ON resources (resource_id);
+CREATE INDEX resources_arn ON resources (arn);
+"""
+
+# Columns returned by InventoryIndex.find, in order
+COLUMNS = (
+    "inventory", "account_id", "account_name", "region", "sheet",
+    "service", "function", "resource_id", "arn", "body",
+)
+
+# Verbs stripped from function names to find the resource noun
+FUNCTION_VERBS = ("describe", "list", "get")
+
+# Suffixes of the keys that identify a resource, in order of preference
+ID_SUFFIXES = ("id", "identifier", "name")
+
+
+def _normalize_key(key: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def _resource_nouns(function: str) -> List[str]:
+    """
+    Get the resource nouns of an API function, most specific first.
+    
+    ``describe_security_groups`` gives ``securitygroup`` and ``group``.
+    
+    Args:
+        function: API function name.
+    
+    Returns:
+        Normalized nouns.
+    """
+    words = function.split("_")
+    if words and words[0] in FUNCTION_VERBS:
+        words = words[1:]
+    if not words:
+        return []
+    
+    last = words[-1]
+    if last.endswith("ies"):
+        last = last[:-3] + "y"
+    elif last.endswith(("sses", "xes", "ches", "shes")):
+        last = last[:-2]
+    elif last.endswith("s") and not last.endswith("ss"):
+        last = last[:-1]
+    words = words[:-1] + [last]
+    
+    return ["".join(words[index:]) for index in range(len(words))]
+
+
+def resource_identifiers(resource: Any, function: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the ID and ARN of a resource.
+    
+    The ID is the first key named after the resource with an Id, Identifier
+    or Name suffix, such as ``InstanceId`` for ``describe_instances`` or
+    ``GroupId`` for ``describe_security_groups``, falling back to a plain
+    ``Id`` or ``Name`` key. The ARN is ``<Resource>Arn``, a plain ``Arn``,
+    or the only key ending in ``Arn``.
+    
+    Args:
+        resource: Resource record.
+        function: API function that returned the resource.
+    
+    Returns:
+        Tuple of the resource ID and ARN, either of which may be None.
+    """
+    if not isinstance(resource, dict):
+        return (resource if isinstance(resource, str) else None), None
+    
+    keys = {}
+    for key, value in resource.items():
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            keys.setdefault(_normalize_key(key), str(value))
+    
+    nouns = _resource_nouns(function)
+    
+    resource_id = None
+    for candidate in [noun + suffix for noun in nouns for suffix in ID_SUFFIXES] + list(ID_SUFFIXES):
+        if candidate in keys:
+            resource_id = keys[candidate]
+            break
+    
+    arn = None
+    for candidate in [noun + "arn" for noun in nouns] + ["arn"]:
+        if candidate in keys:
+            arn = keys[candidate]
+            break
+    if arn is None:
+        arns = [value for key, value in keys.items() if key.endswith("arn")]
+        if len(arns) == 1:
+            arn = arns[0]
+    
+    return resource_id, arn
+
+
+class SQLiteWriter:
+    """
+    Loads service results into a SQLite inventory index.
+    
+    Rows are buffered and inserted in batched transactions while the scan
+    runs. The database is replaced when the writer opens it, since a resumed
+    scan emits its journaled results again.
+    """
+    
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize SQLite writer.
+        
+        Args:
+            path: Path of the database file.
+            batch_size: Number of rows inserted per transaction.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._rows: List[Tuple[Any, ...]] = []
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for stale in (path, f"{path}-journal"):
+            if os.path.exists(stale):
+                os.remove(stale)
+        
+        # The index is rebuilt from scratch on every run, so durability per
+        # transaction is traded for write speed
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.executescript(SCHEMA)
+    
+    def write(self, service_result: "ServiceResult", result: Any = None) -> None:
+        """
+        Add the resources of a service result.
+        
+        Args:
+            service_result: Service scan result. Failed results are skipped.
+            result: API response of the service result, if the caller has
+                    already read it. If None, it is read from service_result.
+        """
+        if not service_result.success:
+            return
+        if result is None:
+            result = service_result.result
+            if result is None:
+                return
+        
+        for resource in result if isinstance(result, list) else [result]:
+            resource_id, arn = resource_identifiers(resource, service_result.function)
+            self._rows.append((
+                service_result.inventory_name,
+                service_result.account_id,
+                service_result.account_name,
+                service_result.region,
+                service_result.sheet_name,
+                service_result.service,
+                service_result.function,
+                resource_id,
+                arn,
+                dumps(resource).decode("utf-8"),
+            ))
+        
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+    
+    def flush(self) -> None:
+        """
+        Insert the buffered rows in one transaction.
+        """
+        if not self._rows:
+            return
+        
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO resources ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self._rows
+            )
+        self.count += len(self._rows)
+        self._rows = []
+    
+    def close(self) -> None:
+        """
+        Insert the remaining rows and close the database.
+        """
+        self.flush()
+        self.connection.close()
+        logger.info(f"Wrote {self.count} resources to {self.path}")
+    
+    def __enter__(self) -> "SQLiteWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class InventoryIndex:
+    """
+    Read-only queries over a SQLite inventory index.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open an inventory index.
+        
+        Args:
+            path: Path of the database file.
+        
+        Raises:
+            FileNotFoundError: If the database does not exist.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Inventory database not found: {path}")
+        
+        self.path = path
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.connection.row_factory = sqlite3.Row
+    
+    def find(self, limit: Optional[int] = None, **filters: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Find resources by column values.
+        
+        Args:
+            limit: Maximum number of resources to return.
+            **filters: Column values to match, such as resource_id or arn.
+                       None values are ignored.
+        
+        Yields:
+            Matching resources, with the JSON body decoded.
+        
+        Raises:
+            ValueError: If a filter does not name a column.
+        """
+        conditions = []
+        parameters = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in COLUMNS or column == "body":
+                raise ValueError(f"Cannot filter on column: {column}")
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+        
+        sql = f"SELECT {', '.join(COLUMNS)} FROM resources"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        
+        for row in self.connection.execute(sql, parameters):
+            yield dict(row, body=json.loads(row["body"]))
+    
+    def execute(self, sql: str, parameters: Tuple[Any, ...] = ()) -> Iterator[Dict[str, Any]]:
+        """
+        Run a SQL query on the read-only database.
+        
+        Args:
+            sql: SQL statement.
+            parameters: Statement parameters.
+        
+        Yields:
+            Result rows by column name.
+        """
+        for row in self.connection.execute(sql, parameters):
+            yield dict(row)
+    
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self.connection.close()
+    
+    def __enter__(self) -> "InventoryIndex":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,1073 @@
+"""
+End-to-end throughput benchmarks for scan.py and ScanEngine.
+
+Each benchmark case scans a number of accounts, regions and sheets against a
+local moto server that delays every request to stand in for AWS, and records
+calls per second, client-side call latency, peak RSS, peak thread count and
+wall time. Cases run one at a time, each in its own process, so memory and
+thread measurements are not shared between them. Reports are JSON files that
+can be compared across commits::
+
+    python -m benchmarks.throughput run --targets scan engine --regions 1 4 \\
+        --sheets 8 32 --latency-ms 20 --output before.json
+    python -m benchmarks.throughput compare before.json after.json
+
+Requires moto with its server extra (``pip install moto[server]``).
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import logging
+import argparse
+import datetime
+import platform
+import tempfile
+import itertools
+import threading
+import contextlib
+import statistics
+import subprocess
+import traceback
+import multiprocessing
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import boto3
+import botocore
+import botocore.endpoint
+import botocore.exceptions
+import requests
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Version of the report file format
+REPORT_VERSION = 1
+
+# Scan implementations that can be benchmarked
+TARGETS = ("scan", "engine", "engine-asyncio")
+
+# Regions of a case with N regions are the first N of this list
+BENCHMARK_REGIONS = [
+    "us-east-1",
+    "us-west-2",
+    "eu-west-1",
+    "eu-central-1",
+    "ap-southeast-1",
+    "ap-northeast-1",
+    "us-east-2",
+    "us-west-1",
+    "eu-west-2",
+    "ap-south-1",
+    "sa-east-1",
+    "ca-central-1",
+    "eu-north-1",
+    "ap-southeast-2",
+    "ap-northeast-2",
+    "eu-west-3",
+]
+
+# Sheets of a case with N sheets cycle through this list. Every operation is
+# served by moto and available in every benchmark region.
+BENCHMARK_SHEETS = [
+    {"service": "ec2", "function": "describe_vpcs", "result_key": "Vpcs"},
+    {"service": "ec2", "function": "describe_subnets", "result_key": "Subnets"},
+    {"service": "ec2", "function": "describe_security_groups", "result_key": "SecurityGroups"},
+    {"service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+    {"service": "iam", "function": "list_users", "result_key": "Users"},
+    {"service": "iam", "function": "list_roles", "result_key": "Roles"},
+    {"service": "sns", "function": "list_topics", "result_key": "Topics"},
+    {"service": "dynamodb", "function": "list_tables", "result_key": "TableNames"},
+    {"service": "lambda", "function": "list_functions", "result_key": "Functions"},
+    {"service": "logs", "function": "describe_log_groups", "result_key": "logGroups"},
+    {"service": "kms", "function": "list_keys", "result_key": "Keys"},
+    {"service": "ecs", "function": "list_clusters", "result_key": "clusterArns"},
+    {"service": "rds", "function": "describe_db_instances", "result_key": "DBInstances"},
+    {"service": "cloudwatch", "function": "describe_alarms", "result_key": "MetricAlarms"},
+]
+
+# Credentials accepted by the stand-in server
+STAND_IN_ENVIRONMENT = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+# Role assumed in member accounts of organization cases
+BENCHMARK_ROLE_NAME = "OrganizationAccountAccessRole"
+
+
+class BenchmarkCase:
+    """
+    One benchmark run: a target scanning accounts x regions x sheets.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        accounts: int = 1,
+        regions: int = 1,
+        sheets: int = 8,
+        run: int = 1,
+        max_workers: Optional[int] = None,
+        concurrent_accounts: int = 1,
+        max_retries: int = 3,
+        log_level: str = "WARNING"
+    ):
+        """
+        Initialize benchmark case.
+
+        Args:
+            target: Scan implementation, one of TARGETS.
+            accounts: Number of accounts. More than one scans an organization.
+            regions: Number of regions per account.
+            sheets: Number of sheets (API calls) per region.
+            run: Repetition number of the case.
+            max_workers: Global maximum number of concurrent API calls.
+            concurrent_accounts: Number of accounts scanned at once.
+            max_retries: Maximum number of retries for API calls.
+            log_level: Log level of the scan.
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown benchmark target: {target}")
+        if regions > len(BENCHMARK_REGIONS):
+            raise ValueError(f"At most {len(BENCHMARK_REGIONS)} regions can be benchmarked")
+
+        self.target = target
+        self.accounts = accounts
+        self.regions = regions
+        self.sheets = sheets
+        self.run = run
+        self.max_workers = max_workers
+        self.concurrent_accounts = concurrent_accounts
+        self.max_retries = max_retries
+        self.log_level = log_level
+
+    @property
+    def key(self) -> Tuple[str, int, int, int]:
+        """
+        Key identifying the case across repetitions and reports.
+        """
+        return self.target, self.accounts, self.regions, self.sheets
+
+    @property
+    def region_names(self) -> List[str]:
+        """
+        Regions scanned by the case.
+        """
+        return BENCHMARK_REGIONS[:self.regions]
+
+    @property
+    def scan_entries(self) -> List[Dict[str, Any]]:
+        """
+        Scan file entries of the case.
+        """
+        return list(itertools.islice(itertools.cycle(BENCHMARK_SHEETS), self.sheets))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to dictionary.
+
+        Returns:
+            Dictionary representation.
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BenchmarkCase":
+        """
+        Create a case from its dictionary representation.
+
+        Args:
+            data: Dictionary created by to_dict().
+
+        Returns:
+            Benchmark case.
+        """
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return (
+            f"BenchmarkCase(target={self.target}, accounts={self.accounts}, "
+            f"regions={self.regions}, sheets={self.sheets}, run={self.run})"
+        )
+
+
+class StandInServer:
+    """
+    Local moto server that delays every request to stand in for AWS.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1"):
+        """
+        Initialize stand-in server.
+
+        Args:
+            latency: Delay (in seconds) added to every request.
+            jitter: Maximum random delay (in seconds) added on top of latency.
+            host: Address to listen on. The port is picked by the system.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.endpoint_url: Optional[str] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread.
+        """
+        from moto.server import DomainDispatcherApplication, create_backend_app
+        from werkzeug.serving import make_server
+
+        # The server would otherwise log every request
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+        app = DomainDispatcherApplication(create_backend_app)
+        self._server = make_server(self.host, 0, self._delayed(app), threaded=True)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="aws-auto-inventory-stand-in", daemon=True
+        )
+        self._thread.start()
+
+        host, port = self._server.server_address[:2]
+        self.endpoint_url = f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._server = None
+
+    def reset(self) -> None:
+        """
+        Remove all resources created on the server.
+        """
+        requests.post(f"{self.endpoint_url}/moto-api/reset").raise_for_status()
+
+    def prepare(self, case: "BenchmarkCase") -> None:
+        """
+        Reset the server and create the resources of a case.
+
+        moto creates the backend of each account, region and service on first
+        use, which takes far longer than serving a request, so every call of
+        the case is made once without latency before the case is measured.
+
+        Args:
+            case: Benchmark case.
+        """
+        self.reset()
+
+        credentials = [self._credentials()]
+        if case.accounts > 1:
+            credentials.extend(self._create_organization(case.accounts))
+
+        operations = {(entry["service"], entry["function"]) for entry in case.scan_entries}
+        latency, jitter = self.latency, self.jitter
+        self.latency = self.jitter = 0.0
+
+        try:
+            for account_credentials in credentials:
+                for region in case.region_names:
+                    for service, function in sorted(operations):
+                        client = self._client(service, region, account_credentials)
+                        try:
+                            getattr(client, function)()
+                        except botocore.exceptions.ClientError as e:
+                            logger.debug(f"Warm-up call {service}.{function} failed: {e}")
+        finally:
+            self.latency, self.jitter = latency, jitter
+
+    def _create_organization(self, accounts: int) -> List[Dict[str, str]]:
+        """
+        Create an organization with the given number of accounts, including the management account.
+
+        Args:
+            accounts: Number of accounts.
+
+        Returns:
+            Credentials of the role assumed in each member account.
+        """
+        organizations = self._client("organizations", "us-east-1")
+        organizations.create_organization(FeatureSet="ALL")
+
+        for index in range(accounts - 1):
+            organizations.create_account(
+                Email=f"benchmark-{index}@example.com",
+                AccountName=f"benchmark-{index}"
+            )
+
+        management_account = organizations.describe_organization()["Organization"]["MasterAccountId"]
+        sts = self._client("sts", "us-east-1")
+        member_credentials = []
+
+        for account in organizations.list_accounts()["Accounts"]:
+            if account["Id"] == management_account:
+                continue
+
+            role = sts.assume_role(
+                RoleArn=f"arn:aws:iam::{account['Id']}:role/{BENCHMARK_ROLE_NAME}",
+                RoleSessionName="benchmark-warm-up"
+            )["Credentials"]
+            member_credentials.append(self._credentials(
+                role["AccessKeyId"], role["SecretAccessKey"], role["SessionToken"]
+            ))
+
+        return member_credentials
+
+    def _credentials(
+        self,
+        access_key: str = STAND_IN_ENVIRONMENT["AWS_ACCESS_KEY_ID"],
+        secret_key: str = STAND_IN_ENVIRONMENT["AWS_SECRET_ACCESS_KEY"],
+        token: Optional[str] = None
+    ) -> Dict[str, str]:
+        return {
+            "aws_access_key_id": access_key,
+            "aws_secret_access_key": secret_key,
+            "aws_session_token": token,
+        }
+
+    def _client(self, service: str, region: str, credentials: Optional[Dict[str, str]] = None) -> Any:
+        """
+        Create a client for the server.
+        """
+        return boto3.client(
+            service,
+            region_name=region,
+            endpoint_url=self.endpoint_url,
+            **(credentials or self._credentials())
+        )
+
+    def _delayed(self, app: Callable) -> Callable:
+        """
+        Wrap a WSGI application so that every request is delayed.
+        """
+        def delayed_app(environ, start_response):
+            delay = self.latency
+            if self.jitter:
+                delay += random.uniform(0, self.jitter)
+            if delay:
+                time.sleep(delay)
+            return app(environ, start_response)
+
+        return delayed_app
+
+    def __enter__(self) -> "StandInServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class CallRecorder:
+    """
+    Records the duration and outcome of every request made by botocore and aiobotocore clients.
+
+    Durations are measured around Endpoint._send_request, so they include
+    botocore's own retries but not rate limiter waits.
+    """
+
+    def __init__(self):
+        """
+        Initialize call recorder.
+        """
+        self.durations: List[float] = []
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._patched: List[Tuple[type, Callable]] = []
+
+    def __enter__(self) -> "CallRecorder":
+        self._patch(botocore.endpoint.Endpoint, self._timed)
+
+        try:
+            from aiobotocore.endpoint import AioEndpoint
+        except ImportError:
+            pass
+        else:
+            self._patch(AioEndpoint, self._timed_async)
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for cls, send_request in reversed(self._patched):
+            cls._send_request = send_request
+        self._patched = []
+
+    def _patch(self, cls: type, wrap: Callable[[Callable], Callable]) -> None:
+        """
+        Replace _send_request of an endpoint class with a timed version.
+        """
+        send_request = cls.__dict__["_send_request"]
+        self._patched.append((cls, send_request))
+        cls._send_request = wrap(send_request)
+
+    def _timed(self, send_request: Callable) -> Callable:
+        """
+        Time a synchronous _send_request.
+        """
+        recorder = self
+
+        def timed_send_request(endpoint, request_dict, operation_model):
+            started = time.perf_counter()
+            response = None
+            try:
+                response = send_request(endpoint, request_dict, operation_model)
+                return response
+            finally:
+                recorder._record(started, response)
+
+        return timed_send_request
+
+    def _timed_async(self, send_request: Callable) -> Callable:
+        """
+        Time a coroutine _send_request.
+        """
+        recorder = self
+
+        async def timed_send_request(endpoint, request_dict, operation_model):
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await send_request(endpoint, request_dict, operation_model)
+                return response
+            finally:
+                recorder._record(started, response)
+
+        return timed_send_request
+
+    def _record(self, started: float, response: Optional[Tuple[Any, Any]]) -> None:
+        """
+        Record one request.
+        """
+        duration = time.perf_counter() - started
+        http_response = response[0] if response else None
+        failed = http_response is None or http_response.status_code >= 400
+
+        with self._lock:
+            self.durations.append(duration)
+            if failed:
+                self.errors += 1
+
+
+class ResourceSampler:
+    """
+    Samples the thread count of the process while a benchmark runs.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Initialize resource sampler.
+
+        Args:
+            interval: Time (in seconds) between samples.
+        """
+        self.interval = interval
+        self.peak_threads = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ResourceSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="benchmark-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        # The sampler's own thread is not part of the measurement
+        threads = threading.active_count() - (1 if self._thread is not None else 0)
+        self.peak_threads = max(self.peak_threads, threads)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        Peak RSS in MiB, or None if the platform does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max_rss / divisor, 1)
+
+
+def percentile(values: Sequence[float], percent: float) -> Optional[float]:
+    """
+    Get a percentile of values using the nearest-rank method.
+
+    Args:
+        values: Values.
+        percent: Percentile, between 0 and 100.
+
+    Returns:
+        Percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextlib.contextmanager
+def stand_in_environment(endpoint_url: str) -> Iterator[None]:
+    """
+    Point boto3 at the stand-in server through the environment.
+
+    Args:
+        endpoint_url: Endpoint URL of the stand-in server.
+    """
+    environment = dict(STAND_IN_ENVIRONMENT, AWS_ENDPOINT_URL=endpoint_url)
+    previous = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _prepare_scan(case: BenchmarkCase, endpoint_url: str, work_dir: str) -> Callable[[], Any]:
+    """
+    Prepare a scan.py run, or an organization_scanner.py run for several accounts.
+    """
+    import scan
+    import organization_scanner
+
+    scan_file = os.path.join(work_dir, "scan.json")
+    with open(scan_file, "w") as f:
+        json.dump(case.scan_entries, f)
+
+    output_dir = os.path.join(work_dir, "output")
+
+    if case.accounts > 1:
+        return lambda: organization_scanner.scan_organization(
+            BENCHMARK_ROLE_NAME,
+            scan_file,
+            case.region_names,
+            output_dir,
+            case.log_level,
+            case.max_retries,
+            2,
+            None,
+            None,
+            max_workers=case.max_workers,
+            concurrent_accounts=case.concurrent_accounts
+        )
+
+    return lambda: scan.main(
+        scan_file,
+        case.region_names,
+        output_dir,
+        case.log_level,
+        case.max_retries,
+        2,
+        None,
+        None,
+        max_workers=case.max_workers
+    )
+
+
+def _make_config(case: BenchmarkCase) -> Any:
+    """
+    Build the package configuration of a case.
+    """
+    from aws_auto_inventory.config.models import Config
+
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "benchmark",
+                "aws": {
+                    "region": case.region_names,
+                    "organization": case.accounts > 1,
+                    "role_name": BENCHMARK_ROLE_NAME
+                },
+                "sheets": [
+                    dict(entry, name=f"{entry['service']}-{entry['function']}-{index}")
+                    for index, entry in enumerate(case.scan_entries)
+                ]
+            }
+        ]
+    })
+
+
+def _prepare_engine(case: BenchmarkCase, endpoint_url: str, work_dir: str) -> Callable[[], Any]:
+    """
+    Prepare a ScanEngine run.
+    """
+    from aws_auto_inventory.core.scan_engine import ScanEngine
+
+    engine = ScanEngine(
+        max_retries=case.max_retries,
+        max_workers=case.max_workers,
+        max_workers_accounts=case.concurrent_accounts
+    )
+    config = _make_config(case)
+    return lambda: engine.scan(config)
+
+
+def _prepare_async_engine(case: BenchmarkCase, endpoint_url: str, work_dir: str) -> Callable[[], Any]:
+    """
+    Prepare an AsyncScanEngine run.
+    """
+    from aws_auto_inventory.core.async_engine import AsyncScanEngine
+
+    engine = AsyncScanEngine(
+        max_retries=case.max_retries,
+        max_workers=case.max_workers,
+        max_workers_accounts=case.concurrent_accounts,
+        endpoint_url=endpoint_url
+    )
+    config = _make_config(case)
+    return lambda: engine.scan(config)
+
+
+# Functions preparing each target; the returned callable is what gets timed
+PREPARE_TARGET = {
+    "scan": _prepare_scan,
+    "engine": _prepare_engine,
+    "engine-asyncio": _prepare_async_engine,
+}
+
+
+def run_case(case: BenchmarkCase, endpoint_url: str) -> Dict[str, Any]:
+    """
+    Run a benchmark case in the current process.
+
+    Peak RSS is the peak of the whole process, so it only describes the case
+    when the case runs in a process of its own (see run_isolated).
+
+    Args:
+        case: Benchmark case.
+        endpoint_url: Endpoint URL of the stand-in server.
+
+    Returns:
+        Benchmark result.
+    """
+    work_dir = tempfile.mkdtemp(prefix="aws-auto-inventory-benchmark-")
+    logging.basicConfig(level=case.log_level)
+
+    try:
+        with stand_in_environment(endpoint_url):
+            run = PREPARE_TARGET[case.target](case, endpoint_url, work_dir)
+
+            with CallRecorder() as recorder, ResourceSampler() as sampler, \
+                    contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                run()
+                wall_time = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    durations_ms = [duration * 1000 for duration in recorder.durations]
+    calls = len(durations_ms)
+
+    return dict(
+        case.to_dict(),
+        calls=calls,
+        errors=recorder.errors,
+        calls_per_second=round(calls / wall_time, 2) if wall_time else None,
+        latency_ms={
+            "p50": _round(percentile(durations_ms, 50)),
+            "p99": _round(percentile(durations_ms, 99)),
+            "max": _round(max(durations_ms, default=None)),
+            "mean": _round(statistics.mean(durations_ms) if durations_ms else None),
+        },
+        wall_time_s=round(wall_time, 3),
+        peak_rss_mb=peak_rss_mb(),
+        peak_threads=sampler.peak_threads
+    )
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def _run_case_process(case_data: Dict[str, Any], endpoint_url: str, connection: Any) -> None:
+    """
+    Entry point of the process running an isolated case.
+    """
+    try:
+        connection.send(("ok", run_case(BenchmarkCase.from_dict(case_data), endpoint_url)))
+    except BaseException:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def run_isolated(case: BenchmarkCase, endpoint_url: str) -> Dict[str, Any]:
+    """
+    Run a benchmark case in a new process.
+
+    Args:
+        case: Benchmark case.
+        endpoint_url: Endpoint URL of the stand-in server.
+
+    Returns:
+        Benchmark result.
+
+    Raises:
+        RuntimeError: If the case fails.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case_process, args=(case.to_dict(), endpoint_url, sender))
+    process.start()
+    sender.close()
+
+    try:
+        status, payload = receiver.recv()
+    except EOFError:
+        status, payload = "error", f"Benchmark process exited with code {process.exitcode}"
+    finally:
+        receiver.close()
+        process.join()
+
+    if status != "ok":
+        raise RuntimeError(f"Benchmark case {case!r} failed:\n{payload}")
+
+    return payload
+
+
+def run_benchmarks(
+    cases: Sequence[BenchmarkCase],
+    latency: float = 0.02,
+    jitter: float = 0.0,
+    isolate: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Run benchmark cases one after another against a fresh stand-in server state.
+
+    Args:
+        cases: Benchmark cases.
+        latency: Delay (in seconds) added to every request.
+        jitter: Maximum random delay (in seconds) added on top of latency.
+        isolate: Whether to run each case in its own process.
+
+    Returns:
+        Benchmark results, in case order.
+    """
+    results = []
+
+    with StandInServer(latency=latency, jitter=jitter) as server:
+        for case in cases:
+            server.prepare(case)
+
+            logger.info(f"Running {case!r}")
+            result = run_isolated(case, server.endpoint_url) if isolate else \
+                run_case(case, server.endpoint_url)
+            logger.info(
+                f"{case!r}: {result['calls']} calls, {result['calls_per_second']} calls/s, "
+                f"p99 {result['latency_ms']['p99']} ms, {result['wall_time_s']} s"
+            )
+            results.append(result)
+
+    return results
+
+
+def build_report(results: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a benchmark report.
+
+    Args:
+        results: Benchmark results.
+        settings: Settings shared by all cases, such as the injected latency.
+
+    Returns:
+        Report with the commit, environment and settings of the run.
+    """
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "boto3": boto3.__version__,
+            "botocore": botocore.__version__,
+        },
+        "settings": settings,
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """
+    Get the commit of the working tree, if it is a git checkout.
+    """
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return completed.stdout.strip()
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 10.0
+) -> List[Dict[str, Any]]:
+    """
+    Compare the cases two reports have in common.
+
+    Repetitions of a case are summarized by their median.
+
+    Args:
+        baseline: Report to compare against.
+        current: Report to compare.
+        threshold: Drop in calls per second (in percent) counted as a regression.
+
+    Returns:
+        One comparison per common case, in the order of the current report.
+    """
+    baseline_cases = _summarize_cases(baseline)
+    comparisons = []
+
+    for key, summary in _summarize_cases(current).items():
+        if key not in baseline_cases:
+            continue
+
+        before = baseline_cases[key]
+        change = None
+        if before["calls_per_second"]:
+            change = (summary["calls_per_second"] / before["calls_per_second"] - 1) * 100
+
+        comparisons.append({
+            "target": key[0],
+            "accounts": key[1],
+            "regions": key[2],
+            "sheets": key[3],
+            "baseline": before,
+            "current": summary,
+            "calls_per_second_change": _round(change),
+            "regression": change is not None and change < -threshold,
+        })
+
+    return comparisons
+
+
+def _summarize_cases(report: Dict[str, Any]) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+    """
+    Summarize the repetitions of each case of a report by their median.
+    """
+    runs: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+    for result in report["results"]:
+        key = (result["target"], result["accounts"], result["regions"], result["sheets"])
+        runs.setdefault(key, []).append(result)
+
+    def median(values):
+        values = [value for value in values if value is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        key: {
+            "calls_per_second": median(result["calls_per_second"] for result in results),
+            "p99_ms": median(result["latency_ms"]["p99"] for result in results),
+            "wall_time_s": median(result["wall_time_s"] for result in results),
+            "peak_rss_mb": median(result["peak_rss_mb"] for result in results),
+            "peak_threads": median(result["peak_threads"] for result in results),
+        }
+        for key, results in runs.items()
+    }
+
+
+def print_comparisons(comparisons: List[Dict[str, Any]]) -> None:
+    """
+    Print comparisons as a table.
+
+    Args:
+        comparisons: Comparisons from compare_reports().
+    """
+    print(
+        f"{'target':<16}{'acct':>5}{'reg':>5}{'sheets':>7}"
+        f"{'calls/s before':>16}{'calls/s after':>15}{'change':>9}"
+        f"{'p99 ms before':>15}{'p99 ms after':>14}{'rss MiB before':>16}{'rss MiB after':>15}"
+    )
+
+    for comparison in comparisons:
+        before = comparison["baseline"]
+        after = comparison["current"]
+        change = comparison["calls_per_second_change"]
+        print(
+            f"{comparison['target']:<16}{comparison['accounts']:>5}{comparison['regions']:>5}"
+            f"{comparison['sheets']:>7}"
+            f"{_format(before['calls_per_second']):>16}{_format(after['calls_per_second']):>15}"
+            f"{_format(change, '{:+.1f}%'):>9}"
+            f"{_format(before['p99_ms']):>15}{_format(after['p99_ms']):>14}"
+            f"{_format(before['peak_rss_mb']):>16}{_format(after['peak_rss_mb']):>15}"
+            f"{'  REGRESSION' if comparison['regression'] else ''}"
+        )
+
+
+def _format(value: Optional[float], template: str = "{:.1f}") -> str:
+    return template.format(value) if value is not None else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run benchmarks or compare benchmark reports.
+
+    Args:
+        argv: Command-line arguments.
+
+    Returns:
+        Exit code. Comparing returns 1 when any case regressed.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput benchmarks for scan.py and ScanEngine against a local stand-in for AWS"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmark cases and write a JSON report")
+    run_parser.add_argument(
+        "--targets", nargs="+", choices=TARGETS, default=["scan", "engine"],
+        help="Scan implementations to benchmark (default: scan engine)"
+    )
+    run_parser.add_argument(
+        "--accounts", nargs="+", type=int, default=[1],
+        help="Numbers of accounts to benchmark; more than one scans an organization (default: 1)"
+    )
+    run_parser.add_argument(
+        "--regions", nargs="+", type=int, default=[1],
+        help=f"Numbers of regions per account to benchmark, at most {len(BENCHMARK_REGIONS)} (default: 1)"
+    )
+    run_parser.add_argument(
+        "--sheets", nargs="+", type=int, default=[8],
+        help="Numbers of sheets (API calls) per region to benchmark (default: 8)"
+    )
+    run_parser.add_argument(
+        "--latency-ms", type=float, default=20.0,
+        help="Latency added to every request by the stand-in server (default: 20)"
+    )
+    run_parser.add_argument(
+        "--jitter-ms", type=float, default=0.0,
+        help="Maximum random latency added on top of --latency-ms (default: 0)"
+    )
+    run_parser.add_argument(
+        "--max-workers", type=int, default=None,
+        help="Global maximum number of concurrent API calls (default: each target's default)"
+    )
+    run_parser.add_argument(
+        "--concurrent-accounts", type=int, default=1,
+        help="Number of accounts scanned at once in organization cases (default: 1)"
+    )
+    run_parser.add_argument(
+        "--max-retries", type=int, default=3,
+        help="Maximum number of retries for API calls (default: 3)"
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=1,
+        help="Number of times to run each case (default: 1)"
+    )
+    run_parser.add_argument(
+        "--log-level", default="WARNING",
+        help="Log level of the scans (default: WARNING)"
+    )
+    run_parser.add_argument(
+        "--no-isolate", action="store_true",
+        help="Run all cases in this process; peak RSS then covers all cases run so far"
+    )
+    run_parser.add_argument(
+        "--output", default="benchmark.json",
+        help="Path of the JSON report to write (default: benchmark.json)"
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two benchmark reports")
+    compare_parser.add_argument("baseline", help="Report to compare against")
+    compare_parser.add_argument("current", help="Report to compare")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Drop in calls per second (in percent) reported as a regression (default: 10)"
+    )
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    if args.command == "compare":
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        with open(args.current, "r") as f:
+            current = json.load(f)
+
+        comparisons = compare_reports(baseline, current, args.threshold)
+        print_comparisons(comparisons)
+        return 1 if any(comparison["regression"] for comparison in comparisons) else 0
+
+    cases = [
+        BenchmarkCase(
+            target,
+            accounts=accounts,
+            regions=regions,
+            sheets=sheets,
+            run=run,
+            max_workers=args.max_workers,
+            concurrent_accounts=args.concurrent_accounts,
+            max_retries=args.max_retries,
+            log_level=args.log_level
+        )
+        for target, accounts, regions, sheets in itertools.product(
+            args.targets, args.accounts, args.regions, args.sheets
+        )
+        for run in range(1, args.repeat + 1)
+    ]
+
+    results = run_benchmarks(
+        cases,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        isolate=not args.no_isolate
+    )
+
+    report = build_report(results, {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "isolated": not args.no_isolate,
+    })
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Wrote {len(results)} benchmark results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
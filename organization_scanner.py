@@ -1,10 +1,27 @@
 # -*- coding: utf-8 -*-
 import boto3
+import glob
 import os
 import json
-from scan import main as scan_account
+import threading
+import weakref
+import concurrent.futures
+from scan import close_logging, setup_logging, main as scan_account
+from aws_auto_inventory.core.availability import AvailabilityIndex
+from aws_auto_inventory.core.client_factory import ClientFactory, pool_size_for_workers
+from aws_auto_inventory.core.journal import ScanJournal
+from aws_auto_inventory.core.metrics import DEFAULT_INTERVAL, METRICS_FILE, TEXTFILE, MetricsWriter, ScanMetrics
+from aws_auto_inventory.core.scheduler import DEFAULT_MAX_WORKERS
+from aws_auto_inventory.core.stats import STATS_FILE, CallStats
 from datetime import datetime
 
+# Region of the STS endpoint used when the management session has no region
+DEFAULT_STS_REGION = "us-east-1"
+
+# STS clients are shared by the account threads; boto3 Sessions are not thread-safe
+_sts_clients = weakref.WeakKeyDictionary()
+_sts_clients_lock = threading.Lock()
+
 def get_organization_accounts(session):
     """Get all active accounts in the AWS Organization.
     
@@ -33,6 +50,25 @@ def get_organization_accounts(session):
     
     return accounts
 
+def get_sts_client(session):
+    """Get a shared STS client on the regional endpoint of the session's region.
+    
+    Role assumptions go to the STS endpoint of one region instead of the global
+    endpoint, which has lower availability and adds latency.
+    
+    Args:
+        session: The boto3 Session for the management account.
+        
+    Returns:
+        A boto3 STS client.
+    """
+    with _sts_clients_lock:
+        sts_client = _sts_clients.get(session)
+        if sts_client is None:
+            sts_client = session.client('sts', region_name=session.region_name or DEFAULT_STS_REGION)
+            _sts_clients[session] = sts_client
+        return sts_client
+
 def assume_role(session, account_id, role_name):
     """Assume a role in the specified account.
     
@@ -44,7 +80,7 @@ def assume_role(session, account_id, role_name):
     Returns:
         A new boto3 Session with the assumed role credentials, or None if the role assumption fails.
     """
-    sts_client = session.client('sts')
+    sts_client = get_sts_client(session)
     
     role_arn = f'arn:aws:iam::{account_id}:role/{role_name}'
     
@@ -65,7 +101,84 @@ def assume_role(session, account_id, role_name):
         print(f"Failed to assume role in account {account_id}: {e}")
         return None
 
-def scan_organization(org_role_name, scan_config, regions, output_dir, log_level, max_retries, retry_delay, concurrent_regions, concurrent_services):
+def find_previous_organization_run(output_dir, current_org_output_dir):
+    """Find the most recent earlier organization run with an incremental manifest.
+    
+    Args:
+        output_dir: The directory containing organization runs.
+        current_org_output_dir: The output directory of the current run, which is ignored.
+        
+    Returns:
+        The path of the organization run directory, or None if there is none.
+    """
+    current = os.path.abspath(current_org_output_dir)
+    for org_output_dir in sorted(glob.glob(os.path.join(output_dir, "organization-*")), reverse=True):
+        if os.path.abspath(org_output_dir) == current:
+            continue
+        if glob.glob(os.path.join(org_output_dir, "*", "*", "manifest.json")):
+            return org_output_dir
+    return None
+
+def scan_organization_account(account, management_session, org_role_name, org_output_dir, scan_kwargs, previous_org_output_dir=None, resume=False):
+    """Assume a role in one account of the organization and scan it.
+    
+    Args:
+        account: The account information (id, name, email).
+        management_session: The boto3 Session for the management account.
+        org_role_name: The IAM role name to assume in the account.
+        org_output_dir: The organization output directory.
+        scan_kwargs: Keyword arguments passed on to the account scan.
+        previous_org_output_dir: The output directory of the previous organization run, for incremental scans.
+        resume: Whether to resume the account's interrupted scan in org_output_dir.
+    """
+    account_id = account['id']
+    account_name = account['name']
+    account_output_dir = os.path.join(org_output_dir, account_id)
+    
+    print(f"\nProcessing account: {account_name} ({account_id})")
+    
+    # Accounts that finished before the interruption are not scanned again,
+    # so their role is not assumed either
+    resume_dir = ScanJournal.find_run(account_output_dir) if resume else None
+    if resume_dir and ScanJournal.is_run_complete(resume_dir):
+        print(f"Skipping account {account_name} ({account_id}): already scanned in {resume_dir}")
+        return
+    
+    # Assume role in the account
+    print(f"Assuming role {org_role_name} in account {account_id}...")
+    account_session = assume_role(management_session, account_id, org_role_name)
+    
+    if account_session:
+        print(f"Successfully assumed role in account {account_id}")
+        
+        # Create account-specific output directory
+        os.makedirs(account_output_dir, exist_ok=True)
+        
+        # Save account metadata
+        with open(os.path.join(account_output_dir, "account_info.json"), "w") as f:
+            json.dump(account, f, indent=2)
+        
+        # Run the scan for this account
+        print(f"Starting scan for account {account_id}...")
+        previous_output_dir = None
+        if previous_org_output_dir:
+            previous_output_dir = os.path.join(previous_org_output_dir, account_id)
+        
+        # Accounts are scanned concurrently, so each one logs to its own file
+        # through its own logger, which is closed once its scan ends
+        log = setup_logging(account_output_dir, scan_kwargs["log_level"], f"scan.{account_id}")
+        try:
+            scan_account(output_dir=account_output_dir, session=account_session, previous_output_dir=previous_output_dir, resume_dir=resume_dir, log=log, **scan_kwargs)
+        finally:
+            close_logging(log)
+            # The account's clients are not needed by any other account
+            if scan_kwargs.get("client_factory") is not None:
+                scan_kwargs["client_factory"].evict(account_session)
+        print(f"Completed scan for account {account_id}")
+    else:
+        print(f"Skipping account {account_name} ({account_id}) due to role assumption failure")
+
+def scan_organization(org_role_name, scan_config, regions, output_dir, log_level, max_retries, retry_delay, concurrent_regions, concurrent_services, rate_limits=None, max_workers=None, concurrent_accounts=1, availability_index=None, check_availability=True, incremental=False, resume_dir=None, output_format="json", compression=None, metrics_textfile=None, metrics_interval=DEFAULT_INTERVAL):
     """Scan resources across all accounts in an organization.
     
     Args:
@@ -78,13 +191,28 @@ def scan_organization(org_role_name, scan_config, regions, output_dir, log_level
         retry_delay: The delay before each retry.
         concurrent_regions: The number of regions to process concurrently.
         concurrent_services: The number of services to process concurrently for each region.
+        rate_limits: Optional path to a JSON file of per-service request quotas.
+        max_workers: The maximum number of API calls to run concurrently, across all accounts.
+        concurrent_accounts: The number of accounts to assume roles in and scan concurrently.
+        availability_index: Optional path to a service availability index file.
+        check_availability: Whether to skip services that have no endpoint in a region.
+        incremental: Whether to only write results that changed since the previous organization run.
+        resume_dir: Optional organization output directory of an interrupted run to resume. Completed accounts are skipped and the others continue their own scan.
+        output_format: The format of the result files, 'json' or 'ndjson'.
+        compression: Optional compression of the result files, 'gzip' or 'zstd'.
+        metrics_textfile: Optional path of the Prometheus text file. Defaults to metrics.prom in the organization output directory.
+        metrics_interval: Seconds between metrics writes while the scan runs. 0 writes them only at the end.
     """
     # Get the management account session
     management_session = boto3.Session()
     
-    # Create organization output directory with timestamp
-    timestamp = datetime.now().isoformat(timespec="minutes").replace(":", "-")
-    org_output_dir = os.path.join(output_dir, f"organization-{timestamp}")
+    # Create organization output directory with timestamp, or continue in the interrupted one
+    if resume_dir:
+        org_output_dir = resume_dir
+        output_dir = os.path.dirname(os.path.normpath(resume_dir))
+    else:
+        timestamp = datetime.now().isoformat(timespec="minutes").replace(":", "-")
+        org_output_dir = os.path.join(output_dir, f"organization-{timestamp}")
     os.makedirs(org_output_dir, exist_ok=True)
     
     # Get all accounts in the organization
@@ -96,43 +224,92 @@ def scan_organization(org_role_name, scan_config, regions, output_dir, log_level
     with open(os.path.join(org_output_dir, "accounts.json"), "w") as f:
         json.dump(accounts, f, indent=2)
     
-    # Scan each account
-    for account in accounts:
-        account_id = account['id']
-        account_name = account['name']
-        
-        print(f"\nProcessing account: {account_name} ({account_id})")
-        
-        # Assume role in the account
-        print(f"Assuming role {org_role_name} in account {account_id}...")
-        account_session = assume_role(management_session, account_id, org_role_name)
+    metrics = ScanMetrics()
+    metrics_writer = MetricsWriter(
+        metrics,
+        os.path.join(org_output_dir, METRICS_FILE),
+        metrics_textfile or os.path.join(org_output_dir, TEXTFILE),
+        metrics_interval,
+    ).start()
+    
+    # Call durations of earlier organization runs order the calls of each account
+    stats_path = os.path.join(output_dir, STATS_FILE)
+    stats = CallStats.load(stats_path)
+    
+    # The accounts scanned at once share one worker pool and one client cache,
+    # so they make max_workers calls together rather than each
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    workers = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    client_factory = ClientFactory(
+        max_pool_connections=pool_size_for_workers(concurrent_services or max_workers)
+    )
+    
+    # Building the index reads every botocore service model, so it is done
+    # once for the organization rather than for each account
+    availability = None
+    if check_availability:
+        availability = AvailabilityIndex.load(availability_index) if availability_index else AvailabilityIndex()
+    
+    scan_kwargs = {
+        "scan": scan_config,
+        "regions": regions,
+        "log_level": log_level,
+        "max_retries": max_retries,
+        "retry_delay": retry_delay,
+        "concurrent_regions": concurrent_regions,
+        "concurrent_services": concurrent_services,
+        "rate_limits": rate_limits,
+        "max_workers": max_workers,
+        "availability_index": availability_index,
+        "check_availability": check_availability,
+        "availability": availability,
+        "incremental": incremental,
+        "output_format": output_format,
+        "compression": compression,
+        # All accounts record into one set of metrics, labelled by account
+        "metrics": metrics,
+        "stats": stats,
+        "executor": workers,
+        "client_factory": client_factory,
+    }
+    
+    # Incremental scans compare each account with its results in the previous run
+    previous_org_output_dir = None
+    if incremental:
+        previous_org_output_dir = find_previous_organization_run(output_dir, org_output_dir)
+        if previous_org_output_dir:
+            print(f"Comparing results with the previous run in {previous_org_output_dir}")
+    
+    # Each account assumes its role just before it is scanned, so credentials
+    # stay fresh no matter how long earlier accounts take
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrent_accounts or 1) as executor:
+        futures = {
+            executor.submit(
+                scan_organization_account,
+                account,
+                management_session,
+                org_role_name,
+                org_output_dir,
+                scan_kwargs,
+                previous_org_output_dir,
+                resume_dir is not None,
+            ): account
+            for account in accounts
+        }
         
-        if account_session:
-            print(f"Successfully assumed role in account {account_id}")
-            
-            # Create account-specific output directory
-            account_output_dir = os.path.join(org_output_dir, account_id)
-            os.makedirs(account_output_dir, exist_ok=True)
-            
-            # Save account metadata
-            with open(os.path.join(account_output_dir, "account_info.json"), "w") as f:
-                json.dump(account, f, indent=2)
-            
-            # Run the scan for this account
-            print(f"Starting scan for account {account_id}...")
-            scan_account(
-                scan_config,
-                regions,
-                account_output_dir,
-                log_level,
-                max_retries,
-                retry_delay,
-                concurrent_regions,
-                concurrent_services,
-                session=account_session
-            )
-            print(f"Completed scan for account {account_id}")
-        else:
-            print(f"Skipping account {account_name} ({account_id}) due to role assumption failure")
-    
-    print(f"\nOrganization scan complete. Results stored in {org_output_dir}")
\ No newline at end of file
+        for future in concurrent.futures.as_completed(futures):
+            account = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error scanning account {account['name']} ({account['id']}): {e}")
+    
+    workers.shutdown()
+    metrics_writer.stop()
+    
+    try:
+        stats.save(stats_path)
+    except OSError as e:
+        print(f"Could not write call statistics to {stats_path}: {e}")
+    
+    print(f"\nOrganization scan complete. Results stored in {org_output_dir}")
@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 # Required modules
 import argparse
-import boto3
-import botocore
-import concurrent.futures
 import datetime
 import json
 import logging
@@ -11,8 +8,24 @@ import os
 import time
 import traceback
 from datetime import datetime
-import requests
-import jq
+
+# boto3, botocore, requests, jq and the modules built on them are imported by
+# the functions that use them, so that --help and argument errors return
+# without loading them
+from aws_auto_inventory.core.incremental import ResultManifest
+from aws_auto_inventory.core.journal import ScanJournal
+from aws_auto_inventory.core.metrics import (
+    DEFAULT_INTERVAL,
+    METRICS_FILE,
+    TEXTFILE,
+    MetricsWriter,
+    ScanMetrics,
+    track_response_sizes,
+)
+from aws_auto_inventory.core.rate_limiter import RateLimiter
+from aws_auto_inventory.core.scheduler import ScanTask, TaskScheduler
+from aws_auto_inventory.core.stats import STATS_FILE, CallStats, ScanProgress
+from aws_auto_inventory.output.ndjson import COMPRESSION_EXTENSIONS, dumps, open_compressed
 
 # accomodate windows and unix path
 # Define the timestamp as a string, which will be the same throughout the execution of the script.
@@ -21,6 +34,8 @@ timestamp = datetime.now().isoformat(timespec="minutes").replace(":", "-")
 
 def get_json_from_url(url):
     """Fetch JSON from a URL."""
+    import requests
+
     try:
         response = requests.get(url)
         response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
@@ -44,14 +59,22 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(o)
 
 
-def setup_logging(log_dir, log_level):
-    """Set up the logging system."""
+def setup_logging(log_dir, log_level, name=__name__):
+    """
+    Set up the logging system.
+
+    Arguments:
+    log_dir -- The directory of the log file.
+    log_level -- The log level.
+    name -- The name of the logger. The concurrent account scans of an organization each use their own, so that each log file only gets the lines of its account.
+    """
     os.makedirs(log_dir, exist_ok=True)
     log_filename = f"aws_resources_{timestamp}.log"
     log_file = os.path.join(log_dir, log_filename)
 
-    # Configure the logger
-    logger = logging.getLogger(__name__)
+    # Configure the logger, replacing the file of an earlier scan
+    logger = logging.getLogger(name)
+    close_logging(logger)
     logger.setLevel(log_level)
     handler = logging.FileHandler(log_file)
     handler.setLevel(log_level)
@@ -61,27 +84,73 @@ def setup_logging(log_dir, log_level):
     handler.setFormatter(formatter)
     logger.addHandler(handler)
     logging.basicConfig(level=log_level)
-    return logging.getLogger(__name__)
+    return logger
+
+
+def close_logging(logger):
+    """
+    Remove and close the log files set up by setup_logging.
+
+    Arguments:
+    logger -- The logger returned by setup_logging.
+    """
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+
+
+def _timed_call(function_to_call, parameters, metrics=None):
+    """Call an API function, recording its latency and response in `metrics`."""
+    started = time.perf_counter()
+    try:
+        if parameters:
+            response = function_to_call(**parameters)
+        else:
+            response = function_to_call()
+    except Exception:
+        if metrics is not None:
+            metrics.observe_request(time.perf_counter() - started)
+        raise
 
+    if metrics is not None:
+        metrics.observe_request(time.perf_counter() - started, response)
+    return response
 
-def api_call_with_retry(client, function_name, parameters, max_retries, retry_delay):
+
+def api_call_with_retry(
+    client, function_name, parameters, max_retries, retry_delay, rate_limiter=None, metrics=None
+):
     """
     Make an API call with exponential backoff.
 
     This function will make an API call with retries. It will exponentially back off
-    with a delay of `retry_delay * 2^attempt` for transient errors.
+    with a delay of `retry_delay * 2^attempt` for transient errors. When a
+    `rate_limiter` is given, every attempt first waits for a token. When
+    `metrics` is given, every request, retry, throttle and rate limiter wait
+    is recorded in it.
     """
+    import botocore.exceptions
 
     def api_call():
         for attempt in range(max_retries):
+            if attempt and metrics is not None:
+                metrics.observe_retry()
             try:
+                if rate_limiter is not None:
+                    waited = rate_limiter.acquire(
+                        client.meta.service_model.service_name,
+                        function_name,
+                        client.meta.region_name,
+                    )
+                    if waited and metrics is not None:
+                        metrics.observe_rate_limit_wait(waited)
                 function_to_call = getattr(client, function_name)
-                if parameters:
-                    return function_to_call(**parameters)
-                else:
-                    return function_to_call()
+                return _timed_call(function_to_call, parameters, metrics)
             except botocore.exceptions.ClientError as error:
                 error_code = error.response["Error"]["Code"]
+                if error_code in ("Throttling", "RequestLimitExceeded") and metrics is not None:
+                    metrics.observe_throttle()
                 if error_code == "Throttling":
                     if attempt < (max_retries - 1):  # no delay on last attempt
                         time.sleep(retry_delay**attempt)
@@ -100,7 +169,57 @@ def api_call_with_retry(client, function_name, parameters, max_retries, retry_de
     return api_call
 
 
-def _get_service_data(session, region_name, service, log, max_retries, retry_delay):
+def paginate_with_retry(
+    client, function_name, parameters, max_retries, retry_delay, rate_limiter=None, metrics=None
+):
+    """
+    Make a paginated API call, retrying each page with exponential backoff.
+
+    Pages are requested one at a time through `api_call_with_retry`, so a
+    transient error on a late page only retries that page instead of restarting
+    from the first one. Operations without a botocore paginator are called once.
+    Either way, a call that still fails after its retries raises RuntimeError
+    rather than yielding an empty page.
+    """
+    from aws_auto_inventory.core.pagination import get_pagination_config, iter_pages
+
+    def call_page(**page_parameters):
+        response = api_call_with_retry(
+            client,
+            function_name,
+            page_parameters,
+            max_retries,
+            retry_delay,
+            rate_limiter,
+            metrics,
+        )()
+        if response is None:
+            raise RuntimeError(
+                f"{function_name} failed after {max_retries} attempts"
+            )
+        return response
+
+    def paginated_call():
+        pagination_config = get_pagination_config(client, function_name)
+        if pagination_config is None:
+            yield call_page(**(parameters or {}))
+        else:
+            yield from iter_pages(call_page, pagination_config, parameters)
+
+    return paginated_call
+
+
+def _get_service_data(
+    session,
+    region_name,
+    service,
+    log,
+    max_retries,
+    retry_delay,
+    client_factory=None,
+    rate_limiter=None,
+    metrics=None,
+):
     """
     Get data for a specific AWS service in a region.
 
@@ -111,10 +230,15 @@ def _get_service_data(session, region_name, service, log, max_retries, retry_del
     log -- The logger object.
     max_retries -- The maximum number of retries for each service.
     retry_delay -- The delay before each retry.
+    client_factory -- Optional ClientFactory shared across threads. If not provided, a new client is created.
+    rate_limiter -- Optional RateLimiter shared across threads.
+    metrics -- Optional CallMetrics of the service, function and region to record the call in.
 
     Returns:
     service_data -- The service data.
     """
+    from aws_auto_inventory.core.extraction import extract_result
+    from aws_auto_inventory.core.pagination import merge_results
 
     function = service["function"]
     result_key = service.get("result_key", None)
@@ -126,9 +250,13 @@ def _get_service_data(session, region_name, service, log, max_retries, retry_del
         function,
         region_name,
     )
+    started = time.perf_counter()
 
     try:
-        client = session.client(service["service"], region_name=region_name)
+        if client_factory is not None:
+            client = client_factory.get_client(session, service["service"], region_name)
+        else:
+            client = session.client(service["service"], region_name=region_name)
         if not hasattr(client, function):
             log.error(
                 "Function %s does not exist for service %s in region %s",
@@ -136,19 +264,26 @@ def _get_service_data(session, region_name, service, log, max_retries, retry_del
                 service["service"],
                 region_name,
             )
+            if metrics is not None:
+                metrics.observe_call(time.perf_counter() - started, failed=True)
             return None
-        api_call = api_call_with_retry(
-            client, function, parameters, max_retries, retry_delay
-        )
-        
-        if result_key and result_key.startswith('.'):
-            response = jq.compile(result_key).input_value(json.loads(json.dumps(api_call(), default=str))).all()
-        elif result_key and not result_key.startswith('.'):
-            response = api_call().get(result_key)
+        if metrics is not None:
+            track_response_sizes(client)
+        if service.get("paginate", True):
+            pages = paginate_with_retry(
+                client, function, parameters, max_retries, retry_delay, rate_limiter, metrics
+            )()
         else:
-            response = api_call()
-            if isinstance(response, dict):
-                response.pop("ResponseMetadata", None)
+            pages = [
+                api_call_with_retry(
+                    client, function, parameters, max_retries, retry_delay, rate_limiter, metrics
+                )()
+            ]
+
+        # Extract per page so only one raw page is held in memory at a time
+        response = merge_results(
+            extract_result(page, result_key) for page in pages
+        )
     except Exception as exception:
         log.error(
             "Error while processing %s, %s.\n%s: %s",
@@ -158,8 +293,12 @@ def _get_service_data(session, region_name, service, log, max_retries, retry_del
             exception,
         )
         log.error(traceback.format_exc())
+        if metrics is not None:
+            metrics.observe_call(time.perf_counter() - started, failed=True)
         return None
 
+    if metrics is not None:
+        metrics.observe_call(time.perf_counter() - started, response)
     log.info("Finished: AWS Get Service Data")
     log.debug(
         "Result for %s, function %s, region %s: %s",
@@ -175,58 +314,89 @@ def _get_service_data(session, region_name, service, log, max_retries, retry_del
         "result": response}
 
 
-def process_region(
-    region, services, session, log, max_retries, retry_delay, concurrent_services
-):
+def load_rate_limits(path):
     """
-    Processes a single AWS region.
-
-    Arguments:
-    region -- The AWS region to process.
-    services -- The AWS services to scan.
-    session -- The boto3 Session.
-    log -- The logger object.
-    max_retries -- The maximum number of retries for each service.
-    retry_delay -- The delay before each retry.
-    concurrent_services -- The number of services to process concurrently for each region.
+    Load request quota overrides from a JSON file.
 
-    Returns:
-    region_results -- The scan results for the region.
+    The file maps a service name, or `service.function`, to an object with a
+    `rate` (requests per second) and an optional `burst`.
     """
+    with open(path, "r") as f:
+        rate_limits = json.load(f)
+
+    return {
+        key: (limit["rate"], limit.get("burst", max(limit["rate"], 1.0)))
+        for key, limit in rate_limits.items()
+    }
+
 
-    log.info("Started processing for region: %s", region)
-
-    region_results = []
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=concurrent_services
-    ) as executor:
-        future_to_service = {
-            executor.submit(
-                _get_service_data,
-                session,
-                region,
-                service,
-                log,
-                max_retries,
-                retry_delay,
-            ): service
-            for service in services
+def result_extension(output_format="json", compression=None):
+    """Return the file extension of service results, such as .json or .ndjson.gz."""
+    return f".{output_format}{COMPRESSION_EXTENSIONS[compression]}"
+
+
+def service_result_key(region, service, function, extension=".json"):
+    """Return the path of a service result relative to the run directory, as used in the manifest."""
+    return f"{region}/{service}-{function}{extension}"
+
+
+def iter_resource_rows(service_result, account_id=None):
+    """Yield one row per resource of a service result, with its account, region, service and function.
+
+    A list result yields one row per item; any other result yields a single row.
+    """
+    result = service_result["result"]
+    for resource in result if isinstance(result, list) else [result]:
+        yield {
+            "account_id": account_id,
+            "region": service_result["region"],
+            "service": service_result["service"],
+            "function": service_result["function"],
+            "resource": resource,
         }
-        for future in concurrent.futures.as_completed(future_to_service):
-            service = future_to_service[future]
-            try:
-                result = future.result()
-                if result is not None and result["result"]:
-                    region_results.append(result)
-                    log.info("Successfully processed service: %s", service["service"])
-                else:
-                    log.info("No data found for service: %s", service["service"])
-            except Exception as exc:
-                log.error("%r generated an exception: %s" % (service["service"], exc))
-                log.error(traceback.format_exc())
 
-    log.info("Finished processing for region: %s", region)
-    return region_results
+
+def write_service_result(run_dir, service_result, log, output_format="json", compression=None, account_id=None):
+    """Write the result of a service to <run_dir>/<region>/<service>-<function>.<output_format>, where run_dir is usually output/<timestamp>.
+
+    The json format writes the result as one document. The ndjson format writes one resource per line,
+    as returned by iter_resource_rows. With compression, .gz or .zst is appended to the file name.
+    """
+    directory = os.path.join(run_dir, service_result["region"])
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except NotADirectoryError:
+        log.error("Invalid directory name: %s", directory)
+    path = os.path.join(
+        directory,
+        f"{service_result['service']}-{service_result['function']}{result_extension(output_format, compression)}",
+    )
+    if output_format == "ndjson":
+        with open_compressed(path, compression) as f:
+            for row in iter_resource_rows(service_result, account_id):
+                f.write(dumps(row))
+                f.write(b"\n")
+    elif compression is not None:
+        with open_compressed(path, compression) as f:
+            f.write(json.dumps(service_result["result"], cls=DateTimeEncoder).encode("utf-8"))
+    else:
+        with open(path, "w") as f:
+            json.dump(service_result["result"], f, cls=DateTimeEncoder)
+
+
+def write_skipped_report(run_dir, skipped, log):
+    """Write the service and region combinations skipped for lack of an endpoint to <run_dir>/skipped.json."""
+    from aws_auto_inventory.core.availability import build_skipped_report
+
+    os.makedirs(run_dir, exist_ok=True)
+    report = build_skipped_report(skipped)
+    with open(os.path.join(run_dir, "skipped.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    log.info(
+        "Skipped %d service and region combinations without an endpoint",
+        report["skipped_count"],
+    )
+    print(f"Skipped {report['skipped_count']} service and region combinations without an endpoint")
 
 
 def display_time(seconds):
@@ -237,16 +407,21 @@ def display_time(seconds):
 
 
 def check_aws_credentials(session):
-    """Check AWS credentials by calling the STS GetCallerIdentity operation."""
+    """Check AWS credentials by calling the STS GetCallerIdentity operation.
+
+    Returns the caller identity, or None if the credentials are invalid.
+    """
+    import botocore.exceptions
+
     try:
         sts = session.client("sts")
         identity = sts.get_caller_identity()
         print(f"Authenticated as: {identity['Arn']}")
     except botocore.exceptions.BotoCoreError as error:
         print(f"Error verifying AWS credentials: {error}")
-        return False
+        return None
 
-    return True
+    return identity
 
 
 def main(
@@ -259,6 +434,23 @@ def main(
     concurrent_regions,
     concurrent_services,
     session=None,
+    rate_limits=None,
+    max_workers=None,
+    availability_index=None,
+    check_availability=True,
+    incremental=False,
+    previous_output_dir=None,
+    resume_dir=None,
+    output_format="json",
+    compression=None,
+    metrics=None,
+    metrics_textfile=None,
+    metrics_interval=DEFAULT_INTERVAL,
+    stats=None,
+    log=None,
+    executor=None,
+    client_factory=None,
+    availability=None,
 ):
     """
     Main function to perform the AWS services scan.
@@ -270,19 +462,41 @@ def main(
     log_level -- The log level for the script.
     max_retries -- The maximum number of retries for each service.
     retry_delay -- The delay before each retry.
-    concurrent_regions -- The number of regions to process concurrently.
+    concurrent_regions -- The number of regions to process at full service concurrency.
     concurrent_services -- The number of services to process concurrently for each region.
     session -- Optional boto3 Session to use. If not provided, a new session will be created.
+    rate_limits -- Optional path to a JSON file of per-service request quotas overriding the defaults.
+    max_workers -- The maximum number of API calls to run concurrently across all regions.
+    availability_index -- Optional path to a service availability index file. If not provided, the index is read from the installed botocore.
+    check_availability -- Whether to skip services that have no endpoint in a region, and call global services once instead of in every region.
+    incremental -- Whether to only write results that changed since the previous run, recorded in a manifest.
+    previous_output_dir -- Optional directory holding the previous run for incremental scans. Defaults to output_dir.
+    resume_dir -- Optional run directory of an interrupted scan to resume. Tasks listed in its journal are skipped and their stored output is kept; new results are written to the same directory.
+    output_format -- 'json' to write each result as one JSON document, or 'ndjson' to write one resource per line with its account, region, service and function.
+    compression -- Optional streaming compression of the result files: 'gzip' or 'zstd'.
+    metrics -- Optional ScanMetrics to record the API calls in, shared by the accounts of an organization scan. If not provided, the scan records and writes its own metrics to the run directory.
+    metrics_textfile -- Optional path of the Prometheus text file, such as a file in node_exporter's textfile directory. Defaults to metrics.prom in the run directory.
+    metrics_interval -- Seconds between metrics writes while the scan runs. 0 writes them only at the end.
+    stats -- Optional CallStats of earlier runs, shared by the accounts of an organization scan. The calls expected to take longest start first. If not provided, the scan loads and updates call_stats.json in output_dir.
+    log -- Optional logger of the scan, owned by the caller. If not provided, a log file is set up in output_dir.
+    executor -- Optional worker pool shared by the accounts of an organization scan, whose size caps their API calls together. If not provided, the scan runs its calls on a pool of max_workers threads.
+    client_factory -- Optional ClientFactory shared by the accounts of an organization scan. If not provided, the scan creates its own.
+    availability -- Optional AvailabilityIndex shared by the accounts of an organization scan. If not provided, it is loaded from availability_index or built from botocore.
     """
+    import boto3
+    from aws_auto_inventory.core.availability import GLOBAL_REGION, AvailabilityIndex
+    from aws_auto_inventory.core.client_factory import ClientFactory, pool_size_for_workers
 
     if session is None:
         session = boto3.Session()
     
-    if not check_aws_credentials(session):
+    identity = check_aws_credentials(session)
+    if not identity:
         print("Invalid AWS credentials. Please configure your credentials.")
         return
 
-    log = setup_logging(output_dir, log_level)
+    if log is None:
+        log = setup_logging(output_dir, log_level)
 
     if scan.startswith("http://") or scan.startswith("https://"):
         services = get_json_from_url(scan)
@@ -303,47 +517,228 @@ def main(
 
     start_time = time.time()
 
-    results = []
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=concurrent_regions
-    ) as executor:
-        future_to_region = {
-            executor.submit(
-                process_region,
-                region,
-                services,
-                session,
-                log,
-                max_retries,
-                retry_delay,
-                concurrent_services,
-            ): region
-            for region in regions
-        }
-        for future in concurrent.futures.as_completed(future_to_region):
-            region = future_to_region[future]
-            try:
-                region_results = future.result()
-                results.extend(region_results)
-                for service_result in region_results:
-                    directory = os.path.join(output_dir, timestamp, region)
-                    try:
-                        os.makedirs(directory, exist_ok=True)
-                    except NotADirectoryError:
-                        log.error("Invalid directory name: %s", directory)
-                    with open(
-                        os.path.join(directory, f"{service_result['service']}-{service_result['function']}.json"),
-                        "w",
-                    ) as f:
-                        json.dump(service_result["result"], f, cls=DateTimeEncoder)
-            except Exception as exc:
-                log.error("%r generated an exception: %s" % (region, exc))
-                log.error(traceback.format_exc())
+    # All (region, service) calls run on one bounded pool; --concurrent-services
+    # caps the calls per region and, with --concurrent-regions, per account.
+    scheduler = TaskScheduler(
+        max_workers=max_workers,
+        max_per_region=concurrent_services,
+        max_per_account=concurrent_regions * concurrent_services
+        if concurrent_regions and concurrent_services
+        else None,
+    )
+
+    # One client per service and region, shared by the threads of that region
+    if client_factory is None:
+        client_factory = ClientFactory(
+            max_pool_connections=pool_size_for_workers(
+                concurrent_services or scheduler.max_workers
+            )
+        )
+
+    # Requests from all threads wait for a token instead of running into throttling
+    rate_limiter = RateLimiter(load_rate_limits(rate_limits) if rate_limits else None)
+
+    # Services without an endpoint in a region would only fail after retries,
+    # so they are skipped before any task is submitted
+    if not check_availability:
+        availability = None
+    elif availability is None:
+        availability = (
+            AvailabilityIndex.load(availability_index)
+            if availability_index
+            else AvailabilityIndex()
+        )
+
+    # A resumed scan continues in the run directory of the interrupted one
+    run_dir = resume_dir or os.path.join(output_dir, timestamp)
+    extension = result_extension(output_format, compression)
+
+    # Every stored result is journaled, so an interrupted scan can be resumed
+    journal = ScanJournal.open(run_dir, resume=resume_dir is not None)
+    if len(journal):
+        log.info("Resuming scan in %s: %d tasks already completed", run_dir, len(journal))
+        print(f"Resuming scan: skipping {len(journal)} completed tasks")
+
+    # Results identical to the previous run are not written again; the manifest
+    # points at the file of the earlier run instead
+    manifest = None
+    if incremental:
+        previous_run = ResultManifest.find_previous_run(
+            previous_output_dir or output_dir, exclude=run_dir
+        )
+        if previous_run:
+            log.info("Comparing results with the previous run in %s", previous_run)
+        manifest = ResultManifest(
+            run_dir, ResultManifest.load(previous_run) if previous_run else None
+        )
+        for key, entry in journal.entries.items():
+            if entry.get("manifest") is not None:
+                manifest.restore(key, entry["manifest"])
+
+    # Per-call metrics are written while the scan runs and once it ends
+    metrics_writer = None
+    if metrics is None:
+        metrics = ScanMetrics()
+        metrics_writer = MetricsWriter(
+            metrics,
+            os.path.join(run_dir, METRICS_FILE),
+            metrics_textfile or os.path.join(run_dir, TEXTFILE),
+            metrics_interval,
+        ).start()
+
+    # Durations of earlier runs put the longest calls first, so that a slow
+    # call planned last does not set the wall time of the scan
+    stats_path = None
+    if stats is None:
+        stats_path = os.path.join(output_dir, STATS_FILE)
+        stats = CallStats.load(stats_path)
+
+    skipped = []
+
+    def plan():
+        # Regions are interleaved so that consecutive tasks go to different regions
+        for service in services:
+            # Global calls return the same data in every region, so they run once
+            # and are stored under the global region
+            global_region = None
+            if availability is not None:
+                global_region = availability.global_region(
+                    service["service"], service["function"], regions
+                )
+            if global_region is not None:
+                if service_result_key(GLOBAL_REGION, service["service"], service["function"], extension) not in journal:
+                    yield ScanTask(GLOBAL_REGION, service, session, endpoint_region=global_region)
+                continue
+            for region in regions:
+                if availability is not None and not availability.is_available(
+                    service["service"], region
+                ):
+                    skipped.append(
+                        {
+                            "service": service["service"],
+                            "function": service["function"],
+                            "region": region,
+                        }
+                    )
+                    continue
+                if service_result_key(region, service["service"], service["function"], extension) in journal:
+                    continue
+                yield ScanTask(region, service, session)
+
+    def call_key(task):
+        return (identity.get("Account"), task.region, task.sheet["service"], task.sheet["function"])
+
+    tasks = stats.order(plan(), call_key)
+
+    progress = ScanProgress(stats, scheduler.max_workers)
+    for task in tasks:
+        progress.add(call_key(task))
+
+    def scan_task(task):
+        service_result = _get_service_data(
+            task.session,
+            task.endpoint_region,
+            task.sheet,
+            log,
+            max_retries,
+            retry_delay,
+            client_factory,
+            rate_limiter,
+            metrics.call(
+                identity.get("Account"),
+                task.region,
+                task.sheet["service"],
+                task.sheet["function"],
+            ),
+        )
+        if service_result is not None:
+            service_result["region"] = task.region
+        return service_result
+
+    # Each result is dropped once it has been written, so memory use follows
+    # the calls in flight rather than the size of the inventory
+    for task, future in scheduler.run(tasks, scan_task, executor):
+        service = task.sheet
+        key = service_result_key(task.region, service["service"], service["function"], extension)
+        try:
+            service_result = future.result()
+            if service_result is not None and service_result["result"]:
+                if manifest is None or manifest.record(key, service_result["result"]):
+                    write_service_result(
+                        run_dir,
+                        service_result,
+                        log,
+                        output_format,
+                        compression,
+                        identity.get("Account"),
+                    )
+                journal.record(
+                    key,
+                    region=task.region,
+                    service=service["service"],
+                    function=service["function"],
+                    status="stored",
+                    manifest=manifest.results[key] if manifest is not None else None,
+                )
+                log.info("Successfully processed service: %s", service["service"])
+            else:
+                if service_result is None:
+                    if manifest is not None:
+                        manifest.record_failure(key)
+                else:
+                    journal.record(
+                        key,
+                        region=task.region,
+                        service=service["service"],
+                        function=service["function"],
+                        status="empty",
+                    )
+                log.info("No data found for service: %s", service["service"])
+        except Exception as exc:
+            if manifest is not None:
+                manifest.record_failure(key)
+            log.error(
+                "%r generated an exception in region %s: %s"
+                % (service["service"], task.region, exc)
+            )
+            log.error(traceback.format_exc())
+
+        progress.complete(call_key(task))
+        message = progress.report()
+        if message:
+            log.info(message)
+            print(message)
+
+    if skipped:
+        write_skipped_report(run_dir, skipped, log)
+
+    if manifest is not None:
+        summary = manifest.save()
+        print(
+            f"Incremental scan: {summary['added']} added, {summary['changed']} changed, "
+            f"{summary['unchanged']} unchanged, {summary['removed']} removed, "
+            f"{summary['failed']} failed"
+        )
+
+    journal.mark_complete()
+    journal.close()
+
+    stats.update(metrics, identity.get("Account"))
+    if stats_path is not None:
+        try:
+            stats.save(stats_path)
+        except OSError as error:
+            log.warning("Could not write call statistics: %s", error)
+
+    if metrics_writer is not None:
+        metrics_writer.stop()
+        log.info("Wrote metrics to %s", metrics_writer.summary_path)
 
     end_time = time.time()
     elapsed_time = end_time - start_time
     print(f"Total elapsed time for scanning: {display_time(elapsed_time)}")
-    print(f"Result stored in  {output_dir}/{timestamp}")
+
+    print(f"Result stored in  {run_dir}")
 
 
 if __name__ == "__main__":
@@ -385,13 +780,68 @@ if __name__ == "__main__":
         "--concurrent-regions",
         type=int,
         default=None,
-        help="Number of regions to process concurrently. Default is None, which means the script will use as many as possible",
+        help="Number of regions to process at full service concurrency. Together with --concurrent-services, caps the concurrent API calls. Default is None, which means no cap besides --max-workers",
     )
     parser.add_argument(
         "--concurrent-services",
         type=int,
         default=None,
-        help="Number of services to process concurrently for each region. Default is None, which means the script will use as many as possible",
+        help="Number of services to process concurrently for each region. Default is None, which means no cap besides --max-workers",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Maximum number of API calls to run concurrently across all regions, and across all accounts of an organization scan. Default is 64",
+    )
+    parser.add_argument(
+        "--rate-limits",
+        default=None,
+        help="Path to a JSON file of per-service request quotas (requests per second) overriding the defaults",
+    )
+    parser.add_argument(
+        "--availability-index",
+        default=None,
+        help="Path to a service availability index built with 'python -m aws_auto_inventory.core.availability'. Default is to read it from the installed botocore",
+    )
+    parser.add_argument(
+        "--no-availability-check",
+        action="store_true",
+        help="Scan every service in every region, even where the service has no endpoint",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="RUN_DIR",
+        help="Resume an interrupted scan in RUN_DIR (output/<timestamp>, or output/organization-<timestamp> with --organization-scan). Tasks listed in its journal.jsonl are skipped and their stored output is reused",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Format of the result files: json writes each result as one document, ndjson writes one resource per line with its account, region, service and function. Default is json",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["gzip", "zstd"],
+        default=None,
+        help="Compress result files as they are written. zstd requires the zstandard package. Default is no compression",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        default=None,
+        help="Path of the Prometheus text file with per-call metrics, for node_exporter's textfile collector. Default is metrics.prom in the run directory",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between metrics writes while the scan runs; 0 writes them only at the end. Default is {DEFAULT_INTERVAL:g}",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write results that changed since the previous run in the output directory. Each run writes a manifest.json that points at unchanged results in earlier runs",
     )
     # Organization scanning arguments
     parser.add_argument(
@@ -404,6 +854,12 @@ if __name__ == "__main__":
         default="OrganizationAccountAccessRole",
         help="The IAM role name to assume in each account (default: OrganizationAccountAccessRole)",
     )
+    parser.add_argument(
+        "--concurrent-accounts",
+        type=int,
+        default=1,
+        help="Number of accounts to assume roles in and scan concurrently during an organization scan. The accounts share one pool of --max-workers API calls. Default is 1",
+    )
     
     args = parser.parse_args()
     
@@ -421,15 +877,37 @@ if __name__ == "__main__":
             args.retry_delay,
             args.concurrent_regions,
             args.concurrent_services,
+            args.rate_limits,
+            args.max_workers,
+            args.concurrent_accounts,
+            availability_index=args.availability_index,
+            check_availability=not args.no_availability_check,
+            incremental=args.incremental,
+            resume_dir=args.resume,
+            output_format=args.output_format,
+            compression=args.compression,
+            metrics_textfile=args.metrics_textfile,
+            metrics_interval=args.metrics_interval,
         )
     else:
         main(
             args.scan,
             args.regions,
-            args.output_dir,
+            # A resumed run keeps its logs and earlier runs next to its run directory
+            os.path.dirname(os.path.normpath(args.resume)) if args.resume else args.output_dir,
             args.log_level,
             args.max_retries,
             args.retry_delay,
             args.concurrent_regions,
             args.concurrent_services,
+            rate_limits=args.rate_limits,
+            max_workers=args.max_workers,
+            availability_index=args.availability_index,
+            check_availability=not args.no_availability_check,
+            incremental=args.incremental,
+            resume_dir=args.resume,
+            output_format=args.output_format,
+            compression=args.compression,
+            metrics_textfile=args.metrics_textfile,
+            metrics_interval=args.metrics_interval,
         )
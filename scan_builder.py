@@ -1,32 +1,170 @@
 # -*- coding: utf-8 -*-
-import boto3
+"""Build a scan file for every AWS service from the botocore service models.
+
+Each entry names a read-only function and records what the scanner needs to
+plan the call: whether it can be paginated, the parameter that sets the page
+size and its maximum, the required parameters, and whether the service has a
+single global endpoint. No client is created and no AWS credentials are needed.
+"""
+import argparse
+import concurrent.futures
 import json
 import os
 
+import botocore.session
+from botocore import xform_name
+from botocore.exceptions import DataNotFoundError
+
+from aws_auto_inventory.core.availability import AvailabilityIndex
+
+# Prefixes of the read-only functions written to the scan files
+READ_ONLY_PREFIXES = ("get_", "describe_", "list_")
+
+DEFAULT_OUTPUT_DIR = os.path.join("scan", "sample", "services")
+
+
+def get_paginator_config(paginator_model, operation_name):
+    """Get the paginator configuration of an operation, or None if it cannot be paginated."""
+    if paginator_model is None:
+        return None
+    try:
+        return paginator_model.get_paginator(operation_name)
+    except ValueError:
+        return None
+
+
+def build_entry(service_name, operation_model, paginator_config, is_global):
+    """
+    Build the scan entry of an operation.
+
+    Arguments:
+    service_name -- The boto3 service name.
+    operation_model -- The botocore OperationModel.
+    paginator_config -- The paginator configuration of the operation, or None.
+    is_global -- Whether the service has a single global endpoint.
+
+    Returns:
+    entry -- The scan entry.
+    """
+    input_shape = operation_model.input_shape
+    members = input_shape.members if input_shape is not None else {}
+
+    page_size_parameter = paginator_config.get("limit_key") if paginator_config else None
+    max_page_size = None
+    if page_size_parameter in members:
+        max_page_size = members[page_size_parameter].metadata.get("max")
+
+    return {
+        "service": service_name,
+        "function": xform_name(operation_model.name),
+        "can_paginate": paginator_config is not None,
+        "page_size_parameter": page_size_parameter,
+        "max_page_size": max_page_size,
+        "required_parameters": list(input_shape.required_members) if input_shape is not None else [],
+        "global": is_global,
+    }
+
+
+def build_service_sheet(session, service_name, availability, include_required=False):
+    """
+    Build the scan entries of a service.
+
+    Arguments:
+    session -- The botocore Session to read the models from.
+    service_name -- The boto3 service name.
+    availability -- The AvailabilityIndex telling global services apart.
+    include_required -- Whether to include functions with required parameters, which fail without them.
+
+    Returns:
+    service_sheet -- The scan entries, sorted by function.
+    """
+    service_model = session.get_service_model(service_name)
+    try:
+        paginator_model = session.get_paginator_model(service_name)
+    except DataNotFoundError:
+        paginator_model = None
+    is_global = availability.is_global(service_name)
+
+    service_sheet = []
+    for operation_name in service_model.operation_names:
+        if not xform_name(operation_name).startswith(READ_ONLY_PREFIXES):
+            continue
+
+        entry = build_entry(
+            service_name,
+            service_model.operation_model(operation_name),
+            get_paginator_config(paginator_model, operation_name),
+            is_global,
+        )
+        if entry["required_parameters"] and not include_required:
+            continue
+        service_sheet.append(entry)
+
+    return sorted(service_sheet, key=lambda entry: entry["function"])
+
+
+def build_service_sheets(
+    output_dir=DEFAULT_OUTPUT_DIR, services=None, max_workers=None, include_required=False
+):
+    """
+    Write a scan file named <service>.json for every service to output_dir.
+
+    Service models are read in parallel.
+
+    Arguments:
+    output_dir -- The directory to write the scan files to.
+    services -- Optional boto3 service names. Default is every service known to botocore.
+    max_workers -- Optional number of threads reading service models.
+    include_required -- Whether to include functions with required parameters.
 
-def build_service_sheet():
-    session = boto3.Session()
+    Returns:
+    counts -- The number of entries written for each service.
+    """
+    session = botocore.session.get_session()
+    availability = AvailabilityIndex(session=session)
+    if services is None:
+        services = session.get_available_services()
 
-    for service_name in session.get_available_services():
-        client = session.client(service_name)
-        methods = [
-            method
-            for method in dir(client)
-            if callable(getattr(client, method))
-            and method.startswith(("get", "describe", "list"))
-        ]
+    os.makedirs(output_dir, exist_ok=True)
 
-        service_sheet = []
+    def write_service_sheet(service_name):
+        service_sheet = build_service_sheet(session, service_name, availability, include_required)
+        with open(os.path.join(output_dir, f"{service_name}.json"), "w") as f:
+            json.dump(service_sheet, f, indent=2)
+        return len(service_sheet)
 
-        for method in methods:
-            service_sheet.append({"service": service_name, "function": method})
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(services, executor.map(write_service_sheet, services)))
 
-        scan_dir = os.path.join("scan", "sample", "services")
-        # Ensure the directory exists
-        os.makedirs(scan_dir, exist_ok=True)
 
-        with open(os.path.join(scan_dir, f"{service_name}.json"), "w") as f:
-            json.dump(service_sheet, f)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a scan file for every AWS service from the botocore service models."
+    )
+    parser.add_argument(
+        "-o",
+        "--output_dir",
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"Directory to write the scan files to (default: {DEFAULT_OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        "--services", nargs="+", help="Services to build scan files for. Default is every service"
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of threads reading service models. Default is the thread pool default",
+    )
+    parser.add_argument(
+        "--include-required-parameters",
+        action="store_true",
+        help="Include functions with required parameters. They fail unless parameters are added to their entries",
+    )
 
+    args = parser.parse_args()
 
-build_service_sheet()
+    counts = build_service_sheets(
+        args.output_dir, args.services, args.max_workers, args.include_required_parameters
+    )
+    print(f"Wrote {sum(counts.values())} functions for {len(counts)} services to {args.output_dir}")
@@ -26,16 +26,22 @@ setup(
     author='AWS Samples',
     author_email='aws-samples@amazon.com',
     url='https://github.com/aws-samples/aws-auto-inventory',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     include_package_data=True,
     install_requires=[
-        'boto3>=1.20.0',
+        # Regional STS endpoints are the default from 1.36 on
+        'boto3>=1.36.0',
         'pydantic>=1.8.0',
         'jq>=1.6.0',
         'pandas>=1.3.0',
         'xlsxwriter>=3.0.0',
         'pyyaml>=6.0',
     ],
+    extras_require={
+        'async': ['aiobotocore>=2.5.0'],
+        'ndjson': ['orjson>=3.6.0', 'zstandard>=0.18.0'],
+        'parquet': ['pyarrow>=10.0.0'],
+    },
     entry_points={
         'console_scripts': [
             'aws-auto-inventory=aws_auto_inventory.cli:main',
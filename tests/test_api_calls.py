@@ -1,5 +1,6 @@
 import pytest
 import botocore
+from aws_auto_inventory.core.metrics import ScanMetrics
 from scan import api_call_with_retry
 
 def test_api_call_success(mocker):
@@ -72,4 +73,25 @@ def test_api_call_non_throttling_error(mocker):
     mock_function.side_effect = error
     
     with pytest.raises(botocore.exceptions.ClientError):
-        api_call_with_retry(mock_client, "some_function", None, 3, 1)()
\ No newline at end of file
+        api_call_with_retry(mock_client, "some_function", None, 3, 1)()
+
+def test_api_call_records_metrics(mocker):
+    """Test that requests, retries, throttles and response bytes are recorded."""
+    mock_client = mocker.MagicMock()
+    mock_function = mocker.MagicMock()
+    mock_client.some_function = mock_function
+    mocker.patch("scan.time.sleep")
+    
+    throttling_error = botocore.exceptions.ClientError(
+        {"Error": {"Code": "Throttling"}}, "operation_name"
+    )
+    response = {"Result": "Success", "ResponseMetadata": {"HTTPHeaders": {"content-length": "42"}}}
+    mock_function.side_effect = [throttling_error, response]
+    metrics = ScanMetrics().call("123456789012", "us-east-1", "ec2", "some_function")
+    
+    result = api_call_with_retry(mock_client, "some_function", None, 3, 1, metrics=metrics)()
+    
+    assert result == response
+    assert (metrics.requests, metrics.pages, metrics.retries, metrics.throttles) == (2, 1, 1, 1)
+    assert metrics.response_bytes == 42
+    assert sum(metrics.latency_counts) == 2
@@ -0,0 +1,73 @@
+"""
+Tests for the throughput benchmark suite.
+"""
+import pytest
+
+pytest.importorskip("moto.server")
+
+from benchmarks.throughput import (
+    BenchmarkCase,
+    build_report,
+    compare_reports,
+    percentile,
+    run_benchmarks,
+)
+
+
+def test_run_benchmarks_reports_metrics(aws_credentials):
+    """Test that scan.py and ScanEngine cases run against the stand-in and report their metrics."""
+    cases = [
+        BenchmarkCase("scan", regions=2, sheets=3, max_workers=4),
+        BenchmarkCase("engine", regions=2, sheets=3, max_workers=4),
+    ]
+
+    results = run_benchmarks(cases, latency=0.005, isolate=False)
+
+    for case, result in zip(cases, results):
+        assert result["target"] == case.target
+        # One call per region and sheet, plus the credential check of scan.py
+        assert result["calls"] >= 2 * 3
+        assert result["errors"] == 0
+        assert result["calls_per_second"] > 0
+        assert 5 <= result["latency_ms"]["p50"] <= result["latency_ms"]["p99"] <= result["latency_ms"]["max"]
+        assert result["wall_time_s"] > 0
+        assert result["peak_threads"] >= 1
+
+    report = build_report(results, {"latency_ms": 5})
+    assert report["environment"]["botocore"]
+    assert report["results"] == results
+
+
+def test_compare_reports_flags_regressions():
+    """Test that a drop in calls per second beyond the threshold is a regression."""
+    def report(*calls_per_second):
+        return {
+            "results": [
+                {
+                    "target": "scan",
+                    "accounts": 1,
+                    "regions": 1,
+                    "sheets": sheets,
+                    "calls_per_second": value,
+                    "latency_ms": {"p99": 100.0},
+                    "wall_time_s": 1.0,
+                    "peak_rss_mb": 100.0,
+                    "peak_threads": 8,
+                }
+                for sheets, value in zip([8, 16], calls_per_second)
+            ]
+        }
+
+    comparisons = compare_reports(report(100.0, 100.0), report(95.0, 50.0), threshold=10.0)
+
+    assert [comparison["regression"] for comparison in comparisons] == [False, True]
+    assert comparisons[1]["calls_per_second_change"] == -50.0
+
+
+def test_percentile_uses_nearest_rank():
+    """Test percentiles of call latencies."""
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
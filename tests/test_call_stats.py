@@ -0,0 +1,36 @@
+import json
+
+import boto3
+from moto import mock_ec2, mock_s3, mock_sts
+
+import scan
+from aws_auto_inventory.core.stats import CallStats
+
+
+@mock_ec2
+@mock_s3
+@mock_sts
+def test_scan_starts_longest_calls_first(tmp_path, aws_credentials, mocker):
+    """Test that a scan starts the calls that took longest before, and records its own durations."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="first-bucket")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([
+        {"service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+        {"service": "ec2", "function": "describe_instances", "result_key": "Reservations"},
+    ]))
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    stats = CallStats()
+    stats.observe("123456789012", "global", "s3", "list_buckets", 1.0, 1)
+    stats.observe("123456789012", "us-east-1", "ec2", "describe_instances", 120.0, 40)
+    stats.save(str(output_dir / "call_stats.json"))
+    scan_task = mocker.spy(scan, "_get_service_data")
+
+    scan.main(str(scan_file), ["us-east-1"], str(output_dir), "INFO", 1, 0, None, None, metrics_interval=0)
+
+    assert [call.args[2]["function"] for call in scan_task.call_args_list] == ["describe_instances", "list_buckets"]
+    saved = json.loads((output_dir / "call_stats.json").read_text())
+    rows = {(row["region"], row["function"]): row for row in saved["calls"]}
+    assert rows[("us-east-1", "describe_instances")]["runs"] == 2
+    assert rows[("us-east-1", "describe_instances")]["duration_seconds"] < 120.0
+    assert rows[("global", "list_buckets")]["runs"] == 2
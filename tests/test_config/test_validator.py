@@ -0,0 +1,156 @@
+"""
+Tests for the configuration validator.
+"""
+import botocore.session
+import pytest
+
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.config.validator import ConfigValidator
+
+
+def make_config(*sheets, **aws):
+    """Build a configuration with one inventory holding the given sheets."""
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": aws,
+                "sheets": [{"name": f"sheet-{index}", **sheet} for index, sheet in enumerate(sheets)]
+            }
+        ]
+    })
+
+
+@pytest.fixture
+def no_clients(mocker):
+    """Fail any attempt to create an AWS client."""
+    return mocker.patch.object(
+        botocore.session.Session, "create_client", side_effect=AssertionError("client created")
+    )
+
+
+def test_valid_config(no_clients):
+    """Test that valid sheets pass without creating clients."""
+    config = make_config(
+        {"service": "ec2", "function": "describe_instances", "parameters": {"MaxResults": 5}},
+        {"service": "s3", "function": "list_buckets"},
+        {"service": "ec2", "function": "describe_image_attribute",
+         "parameters": {"ImageId": "ami-12345678", "Attribute": "description"}},
+    )
+    
+    assert ConfigValidator(offline=True).validate(config) == []
+
+
+def test_unknown_service_and_function(no_clients):
+    """Test that unknown services, unknown functions and client helpers are errors."""
+    config = make_config(
+        {"service": "not-a-service", "function": "describe_things"},
+        {"service": "ec2", "function": "describe_unicorns"},
+        {"service": "ec2", "function": "get_paginator"},
+    )
+    
+    assert ConfigValidator(offline=True).validate(config) == [
+        "Inventory 'test-inventory': Sheet 'sheet-0': Invalid AWS service: not-a-service",
+        "Inventory 'test-inventory': Sheet 'sheet-1': Function 'describe_unicorns' does not exist for service 'ec2'",
+        "Inventory 'test-inventory': Sheet 'sheet-2': Function 'get_paginator' does not exist for service 'ec2'",
+    ]
+
+
+def test_write_operation(no_clients):
+    """Test that functions without a read-only prefix are errors."""
+    config = make_config({"service": "s3", "function": "create_bucket", "parameters": {"Bucket": "name"}})
+    
+    assert ConfigValidator(offline=True).validate(config) == [
+        "Inventory 'test-inventory': Sheet 'sheet-0': Function 'create_bucket' is not a read-only operation",
+    ]
+
+
+def test_parameters_checked_against_input_shape(no_clients):
+    """Test that missing required parameters, unknown parameters and wrong types are errors."""
+    config = make_config(
+        {"service": "ec2", "function": "describe_image_attribute", "parameters": {"ImageId": "ami-12345678"}},
+        {"service": "ec2", "function": "describe_instances", "parameters": {"MaxResults": "five", "Bogus": 1}},
+    )
+    
+    errors = ConfigValidator(offline=True).validate(config)
+    
+    assert errors[0] == (
+        "Inventory 'test-inventory': Sheet 'sheet-0': Invalid parameters: "
+        "Missing required parameter in input: \"Attribute\""
+    )
+    assert len(errors) == 3
+    assert 'Unknown parameter in input: "Bogus"' in errors[1]
+    assert "Invalid type for parameter MaxResults" in errors[2]
+
+
+def test_service_models_loaded_once(no_clients):
+    """Test that each service model is loaded once across sheets and validate calls."""
+    session = botocore.session.get_session()
+    config = make_config(
+        {"service": "ec2", "function": "describe_instances"},
+        {"service": "ec2", "function": "describe_vpcs"},
+        {"service": "s3", "function": "list_buckets"},
+    )
+    calls = []
+    get_service_model = session.get_service_model
+    session.get_service_model = lambda service: calls.append(service) or get_service_model(service)
+    
+    validator = ConfigValidator(offline=True, max_workers=2, session=session)
+    assert validator.validate(config) == []
+    assert validator.validate(config) == []
+    
+    assert sorted(calls) == ["ec2", "s3"]
+
+
+def test_offline_profile_lookup(tmp_path, monkeypatch, no_clients):
+    """Test that offline validation looks profiles up in the local AWS configuration."""
+    config_file = tmp_path / "config"
+    config_file.write_text("[profile inventory]\nregion = us-east-1\n")
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(config_file))
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(tmp_path / "credentials"))
+    sheet = {"service": "s3", "function": "list_buckets"}
+    
+    assert ConfigValidator(offline=True).validate(make_config(sheet, profile="inventory")) == []
+    assert ConfigValidator(offline=True).validate(make_config(sheet, profile="missing")) == [
+        "Inventory 'test-inventory': AWS profile 'missing' is not configured",
+    ]
+
+
+def test_fan_out_sheets(no_clients):
+    """Test that dependent sheets need a parent, a known parameter and a valid ids filter."""
+    buckets = {"service": "s3", "function": "list_buckets", "result_key": "Buckets"}
+    
+    assert ConfigValidator(offline=True).validate(make_config(
+        buckets,
+        {"service": "s3", "function": "get_bucket_encryption",
+         "fan_out": {"sheet": "sheet-0", "ids": ".[].Name", "parameter": "Bucket"}},
+        {"service": "elbv2", "function": "describe_tags",
+         "fan_out": {"sheet": "sheet-0", "ids": "Name", "parameter": "ResourceArns"}},
+    )) == []
+    
+    errors = ConfigValidator(offline=True).validate(make_config(
+        buckets,
+        {"service": "s3", "function": "get_bucket_encryption",
+         "fan_out": {"sheet": "unknown", "ids": ".[", "parameter": "Bucket", "batch_size": 0}},
+        {"service": "s3", "function": "get_bucket_encryption",
+         "fan_out": {"sheet": "sheet-0", "ids": "Name", "parameter": "BucketName"}},
+        {"service": "s3", "function": "get_bucket_policy",
+         "fan_out": {"sheet": "sheet-4", "ids": "Name", "parameter": "Bucket"}},
+        {"service": "s3", "function": "get_bucket_policy",
+         "fan_out": {"sheet": "sheet-3", "ids": "Name", "parameter": "Bucket"}},
+    ))
+    
+    assert errors[:3] == [
+        "Inventory 'test-inventory': Sheet 'sheet-1': Parent sheet 'unknown' does not exist",
+        "Inventory 'test-inventory': Sheet 'sheet-1': Invalid fan-out ids filter '.[': "
+        "jq: error: syntax error, unexpected end of file at <top-level>, line 1, column 2:",
+        "Inventory 'test-inventory': Sheet 'sheet-1': Fan-out batch_size must be at least 1",
+    ]
+    assert errors[3] == (
+        "Inventory 'test-inventory': Sheet 'sheet-2': "
+        "Fan-out parameter 'BucketName' does not exist for function 'get_bucket_encryption'"
+    )
+    assert errors[-2:] == [
+        "Inventory 'test-inventory': Sheet 'sheet-3': Sheet 'sheet-3' depends on itself through its parent sheets",
+        "Inventory 'test-inventory': Sheet 'sheet-4': Sheet 'sheet-4' depends on itself through its parent sheets",
+    ]
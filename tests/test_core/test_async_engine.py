@@ -0,0 +1,192 @@
+"""
+Tests for the asyncio scan engine against a local moto server.
+"""
+import sys
+import asyncio
+import datetime
+import threading
+
+import boto3
+import pytest
+import requests
+
+pytest.importorskip("aiobotocore")
+moto_server = pytest.importorskip("moto.server")
+
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.core import async_client
+from aws_auto_inventory.core.async_engine import AsyncScanEngine, EventLoopExecutor
+
+
+@pytest.fixture
+def moto_endpoint(aws_credentials):
+    """Run a moto server for the duration of a test."""
+    server = moto_server.ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server._server.server_address
+    endpoint = f"http://{host}:{port}"
+    # The server shares its backends with the moto decorators of earlier tests
+    requests.post(f"{endpoint}/moto-api/reset")
+    yield endpoint
+    server.stop()
+
+
+def make_config(regions):
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": regions},
+                "sheets": [
+                    {"name": "S3", "service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+                    {
+                        "name": "Users",
+                        "service": "iam",
+                        "function": "list_users",
+                        "result_key": "Users",
+                        "parameters": {"MaxItems": 2}
+                    },
+                    {"name": "Missing", "service": "ec2", "function": "describe_nothing"}
+                ]
+            }
+        ]
+    })
+
+
+def test_async_engine_scans_account(moto_endpoint):
+    """Test that the asyncio engine produces the same result objects as the thread engine."""
+    s3 = boto3.client("s3", region_name="us-east-1", endpoint_url=moto_endpoint)
+    for name in ["bucket-one", "bucket-two"]:
+        s3.create_bucket(Bucket=name)
+    iam = boto3.client("iam", region_name="us-east-1", endpoint_url=moto_endpoint)
+    for index in range(5):
+        iam.create_user(UserName=f"user-{index}")
+
+    engine = AsyncScanEngine(max_retries=1, retry_delay=0, endpoint_url=moto_endpoint)
+    results = engine.scan(make_config(["us-east-1", "us-west-2"]))
+
+    global_results, *region_results = results[0].region_results
+    assert global_results.region == "global"
+    assert [region.region for region in region_results] == ["us-east-1", "us-west-2"]
+
+    # Global calls are made once for the account
+    services = {service.service: service for service in global_results.services}
+    assert sorted(services) == ["iam", "s3"]
+    assert sorted(bucket["Name"] for bucket in services["s3"].result) == ["bucket-one", "bucket-two"]
+    # MaxItems of 2 means the five users are collected from three pages
+    assert len(services["iam"].result) == 5
+
+    for region in region_results:
+        services = {service.service: service for service in region.services}
+        assert sorted(services) == ["ec2"]
+        assert not services["ec2"].success
+        assert "does not exist" in services["ec2"].error
+
+
+def test_async_clients_refresh_expiring_credentials(moto_endpoint, mocker):
+    """Test that async clients follow refreshable credentials, resolving them off the event loop."""
+    from botocore.credentials import RefreshableCredentials
+
+    keys = []
+
+    def refresh():
+        keys.append(f"key-{len(keys)}")
+        # Always inside the refresh window, so every request refreshes
+        expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=10)
+        return {"access_key": keys[-1], "secret_key": "secret", "token": "token", "expiry_time": expiry.isoformat()}
+
+    session = boto3.Session(region_name="us-east-1")
+    session._session._credentials = RefreshableCredentials.create_from_metadata(refresh(), refresh, "test")
+
+    threads = []
+    get_identity = async_client.ClientFactory.get_identity
+
+    def record_thread(self, session):
+        threads.append(threading.current_thread())
+        return get_identity(self, session)
+
+    mocker.patch.object(async_client.ClientFactory, "get_identity", record_thread)
+
+    async def scan():
+        factory = async_client.AsyncClientFactory(endpoint_url=moto_endpoint)
+        try:
+            client = await factory.get_client(session, "s3", "us-east-1")
+            await client.list_buckets()
+            first = len(keys)
+            await client.list_buckets()
+            assert await factory.get_client(session, "s3", "us-east-1") is client
+            return first, threading.current_thread()
+        finally:
+            await factory.close()
+
+    first, loop_thread = asyncio.run(scan())
+
+    assert len(keys) > first
+    assert threads and loop_thread not in threads
+
+
+def test_refreshable_credentials_without_readable_expiry(mocker):
+    """Test that credentials whose expiry cannot be read are wrapped with a short lifetime and refreshed."""
+    from botocore.credentials import ReadOnlyCredentials
+
+    credentials = mocker.Mock(spec=["get_frozen_credentials", "method"], method="custom")
+    credentials.get_frozen_credentials.side_effect = [
+        ReadOnlyCredentials("first", "secret", "token"),
+        ReadOnlyCredentials("second", "secret", "token"),
+    ]
+
+    async def wrap():
+        wrapped = await async_client.refreshable_credentials(credentials)
+        lifetime = wrapped._expiry_time - datetime.datetime.now(datetime.timezone.utc)
+        first = (await wrapped.get_frozen_credentials()).access_key
+        # Past the refresh window, the wrapper reads the boto3 credentials again
+        wrapped._expiry_time = datetime.datetime.now(datetime.timezone.utc)
+        return lifetime, first, (await wrapped.get_frozen_credentials()).access_key
+
+    lifetime, first, second = asyncio.run(wrap())
+
+    assert datetime.timedelta(minutes=19) < lifetime <= async_client.FALLBACK_CREDENTIALS_LIFETIME
+    assert (first, second) == ("first", "second")
+
+
+def test_async_client_factory_evicts_clients_of_one_session(aws_credentials):
+    """Test that evicting a session closes its clients and keeps those of other sessions."""
+    first = boto3.Session(aws_access_key_id="first", aws_secret_access_key="secret", region_name="us-east-1")
+    second = boto3.Session(aws_access_key_id="second", aws_secret_access_key="secret", region_name="us-east-1")
+
+    async def scan():
+        factory = async_client.AsyncClientFactory()
+        clients = [await factory.get_client(session, "s3", region) for session in (first, second)
+                   for region in ("us-east-1", "eu-west-1")]
+        closed = await factory.evict(first)
+        kept = await factory.get_client(second, "s3", "us-east-1")
+        again = await factory.get_client(first, "s3", "us-east-1")
+        await factory.close()
+        return clients, closed, kept, again
+
+    clients, closed, kept, again = asyncio.run(scan())
+
+    assert closed == 2
+    assert kept is clients[2]
+    assert again is not clients[0]
+
+
+def test_event_loop_executor_runs_coroutines():
+    """Test that submitted coroutine functions resolve to concurrent futures."""
+    async def double(value):
+        return value * 2
+
+    with EventLoopExecutor() as executor:
+        futures = [executor.submit(double, value) for value in range(3)]
+        assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+        assert executor.run(double(5)) == 10
+
+    assert executor.loop.is_closed()
+
+
+def test_missing_aiobotocore_raises_clear_error(monkeypatch):
+    """Test that selecting the asyncio engine without aiobotocore explains how to install it."""
+    monkeypatch.setitem(sys.modules, "aiobotocore.session", None)
+
+    with pytest.raises(ImportError, match=r"aws-auto-inventory\[async\]"):
+        async_client.import_aiobotocore()
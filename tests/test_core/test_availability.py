@@ -0,0 +1,95 @@
+"""
+Tests for the service availability index.
+"""
+from aws_auto_inventory.core.availability import AvailabilityIndex, build_skipped_report
+
+
+def make_index():
+    return AvailabilityIndex(
+        partitions={'aws': ['us-east-1', 'us-west-2', 'eu-west-1'], 'aws-cn': ['cn-north-1']},
+        services={
+            'kendra': {'aws': {'global': False, 'regions': ['us-east-1', 'eu-west-1']}},
+            'iam': {
+                'aws': {'global': True, 'regions': []},
+                'aws-cn': {'global': True, 'regions': []}
+            },
+            'newservice': None
+        }
+    )
+
+
+def test_is_available_regional_and_global_services():
+    """Test that regional services are limited to their regions and global services are not."""
+    index = make_index()
+
+    assert index.is_available('kendra', 'us-east-1')
+    assert not index.is_available('kendra', 'us-west-2')
+    assert not index.is_available('kendra', 'cn-north-1')
+    assert index.is_available('iam', 'us-west-2')
+    assert index.is_available('iam', 'cn-north-1')
+
+
+def test_is_available_treats_unknown_as_available():
+    """Test that services and regions missing from the index are never skipped."""
+    index = make_index()
+
+    assert index.is_available('newservice', 'us-west-2')
+    assert index.is_available('notindexed', 'us-west-2')
+    assert index.is_available('kendra', 'xx-future-1')
+
+
+def test_is_global():
+    """Test that only services without regional endpoints are global."""
+    index = make_index()
+
+    assert index.is_global('iam')
+    assert index.is_global('iam', 'aws-cn')
+    assert not index.is_global('kendra')
+    assert not index.is_global('kendra', 'aws-cn')
+    assert not index.is_global('newservice')
+    assert not index.is_global('notindexed')
+
+
+def test_global_region():
+    """Test that global calls are sent to the first scanned region of a partition that serves them."""
+    index = make_index()
+    index.services['s3'] = {'aws': {'global': False, 'regions': ['us-west-2', 'eu-west-1']}}
+
+    assert index.global_region('iam', 'list_users', ['us-west-2', 'us-east-1']) == 'us-west-2'
+    assert index.global_region('iam', 'list_users', ['xx-future-1', 'cn-north-1']) == 'cn-north-1'
+    assert index.global_region('s3', 'list_buckets', ['us-east-1', 'eu-west-1']) == 'eu-west-1'
+    assert index.global_region('s3', 'list_objects_v2', ['us-west-2']) is None
+    assert index.global_region('kendra', 'list_indices', ['us-east-1']) is None
+    assert index.global_region('iam', 'list_users', ['xx-future-1']) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test that a saved index gives the same answers when loaded."""
+    path = str(tmp_path / 'availability.json')
+    make_index().save(path)
+
+    index = AvailabilityIndex.load(path)
+
+    assert not index.is_available('kendra', 'us-west-2')
+    assert index.is_available('iam', 'eu-west-1')
+
+
+def test_botocore_index_resolves_services_lazily():
+    """Test that the default index reads botocore's bundled endpoint data."""
+    index = AvailabilityIndex()
+
+    assert index.is_available('ec2', 'us-east-1')
+    assert index.is_available('iam', 'eu-west-1')
+    assert index.services['iam']['aws']['global'] is True
+    assert 'us-east-1' in index.services['ec2']['aws']['regions']
+
+
+def test_build_skipped_report_groups_regions_by_service():
+    """Test that the report counts skipped combinations and groups them by service."""
+    report = build_skipped_report([
+        {'service': 'kendra', 'function': 'list_indices', 'region': 'us-west-2'},
+        {'service': 'kendra', 'function': 'list_faqs', 'region': 'us-west-2'}
+    ])
+
+    assert report['skipped_count'] == 2
+    assert report['services'] == {'kendra': ['us-west-2']}
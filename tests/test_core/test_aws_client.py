@@ -0,0 +1,81 @@
+"""
+Tests for the AWS client.
+"""
+import pytest
+import boto3
+from botocore.stub import Stubber
+
+from aws_auto_inventory.core.aws_client import AWSClient, ThrottlingError
+from aws_auto_inventory.core.pagination import merge_results
+
+
+@pytest.fixture
+def stubbed_client(aws_credentials, mocker):
+    """Return an AWSClient whose session hands out a single stubbed EC2 client."""
+    ec2_client = boto3.client('ec2', region_name='us-east-1')
+    session = mocker.MagicMock()
+    session.client.return_value = ec2_client
+    mocker.patch('aws_auto_inventory.core.aws_client.time.sleep')
+    return AWSClient(session, max_retries=3, retry_delay=2), ec2_client
+
+
+def test_call_api_merges_pages(stubbed_client):
+    """Test that call_api follows pagination tokens and merges the result_key of each page."""
+    aws_client, ec2_client = stubbed_client
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        result = aws_client.call_api('ec2', 'describe_instances', 'us-east-1', result_key='Reservations')
+
+    assert [reservation['ReservationId'] for reservation in result] == ['r-1', 'r-2']
+
+
+def test_call_api_without_result_key_drops_tokens(stubbed_client):
+    """Test that merged full responses keep list data and drop stale tokens."""
+    aws_client, ec2_client = stubbed_client
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        result = aws_client.call_api('ec2', 'describe_instances', 'us-east-1')
+
+    assert len(result['Reservations']) == 2
+    assert 'NextToken' not in result
+    assert 'ResponseMetadata' not in result
+
+
+def test_iter_results_retries_failed_page(stubbed_client):
+    """Test that a throttled page is retried without restarting pagination."""
+    aws_client, ec2_client = stubbed_client
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_client_error('describe_instances', service_error_code='Throttling', expected_params={'NextToken': 'page2'})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        pages = list(aws_client.iter_results('ec2', 'describe_instances', 'us-east-1', result_key='Reservations'))
+        stubber.assert_no_pending_responses()
+
+    assert len(pages) == 2
+
+
+def test_call_api_throttling_exhausted(stubbed_client):
+    """Test that ThrottlingError is raised once retries are exhausted."""
+    aws_client, ec2_client = stubbed_client
+
+    with Stubber(ec2_client) as stubber:
+        for _ in range(3):
+            stubber.add_client_error('describe_instances', service_error_code='Throttling')
+
+        with pytest.raises(ThrottlingError):
+            aws_client.call_api('ec2', 'describe_instances', 'us-east-1')
+
+
+def test_merge_results_single_page_unchanged():
+    """Test that a single page is returned unchanged."""
+    page = {'Buckets': [{'Name': 'bucket'}], 'Owner': {'ID': 'owner'}}
+
+    assert merge_results(iter([page])) is page
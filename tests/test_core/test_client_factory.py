@@ -0,0 +1,93 @@
+"""
+Tests for the shared client factory.
+"""
+import threading
+import concurrent.futures
+
+import boto3
+
+from aws_auto_inventory.core.client_factory import ClientFactory, pool_size_for_workers
+
+
+def test_get_client_reuses_client(aws_credentials):
+    """Test that the same client is returned for the same credentials, service and region."""
+    factory = ClientFactory()
+    session = boto3.Session()
+
+    first = factory.get_client(session, 'ec2', 'us-east-1')
+    second = factory.get_client(boto3.Session(), 'ec2', 'us-east-1')
+
+    assert first is second
+    assert factory.get_client(session, 'ec2', 'us-west-2') is not first
+    assert factory.get_client(session, 's3', 'us-east-1') is not first
+
+
+def test_get_client_separates_credentials(aws_credentials):
+    """Test that sessions with different credentials do not share clients."""
+    factory = ClientFactory()
+    other_session = boto3.Session(aws_access_key_id='other', aws_secret_access_key='other')
+
+    assert factory.get_client(boto3.Session(), 'ec2', 'us-east-1') is not factory.get_client(
+        other_session, 'ec2', 'us-east-1'
+    )
+
+
+def test_get_client_thread_safe(aws_credentials):
+    """Test that concurrent callers get a single shared client."""
+    factory = ClientFactory(max_pool_connections=16)
+    session = boto3.Session()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        clients = list(executor.map(lambda _: factory.get_client(session, 'ec2', 'us-east-1'), range(64)))
+
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].meta.config.max_pool_connections == 16
+
+
+def test_get_client_builds_clients_of_other_sessions_concurrently(aws_credentials, mocker):
+    """Test that a slow client build blocks neither other sessions nor cached clients."""
+    factory = ClientFactory()
+    slow_session = boto3.Session(aws_access_key_id='slow', aws_secret_access_key='slow')
+    cached = factory.get_client(slow_session, 's3', 'us-east-1')
+    building = threading.Event()
+    release = threading.Event()
+    build = slow_session.client
+
+    def slow_client(*args, **kwargs):
+        building.set()
+        assert release.wait(5)
+        return build(*args, **kwargs)
+
+    mocker.patch.object(slow_session, 'client', side_effect=slow_client)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        slow = executor.submit(factory.get_client, slow_session, 'ec2', 'us-east-1')
+        assert building.wait(5)
+
+        assert factory.get_client(boto3.Session(), 'ec2', 'us-east-1') is not None
+        assert factory.get_client(slow_session, 's3', 'us-east-1') is cached
+        release.set()
+        assert slow.result() is factory.get_client(slow_session, 'ec2', 'us-east-1')
+
+
+def test_evict_drops_clients_of_one_session(aws_credentials):
+    """Test that evicting a session drops its clients only, and later calls create new ones."""
+    factory = ClientFactory()
+    session = boto3.Session(aws_access_key_id='account', aws_secret_access_key='account')
+    other_session = boto3.Session()
+    client = factory.get_client(session, 'ec2', 'us-east-1')
+    factory.get_client(session, 's3', 'us-east-1')
+    other_client = factory.get_client(other_session, 'ec2', 'us-east-1')
+
+    assert factory.evict(session) == 2
+    assert factory.evict(session) == 0
+
+    assert len(factory._clients) == 1
+    assert factory.get_client(other_session, 'ec2', 'us-east-1') is other_client
+    assert factory.get_client(session, 'ec2', 'us-east-1') is not client
+
+
+def test_pool_size_for_workers():
+    """Test the connection pool size for explicit and default worker counts."""
+    assert pool_size_for_workers(8) == 8
+    assert 1 <= pool_size_for_workers(None) <= 32
@@ -0,0 +1,38 @@
+"""
+Tests for result extraction.
+"""
+import json
+from datetime import datetime, timezone
+
+import jq
+
+from aws_auto_inventory.core.extraction import compile_jq, extract_result
+
+
+def test_jq_result_matches_roundtrip():
+    """Test that jq extraction matches the previous serialize/parse roundtrip."""
+    response = {
+        'Reservations': [
+            {'Instances': [{'InstanceId': 'i-1', 'LaunchTime': datetime(2023, 1, 1, tzinfo=timezone.utc)}]}
+        ],
+        'ResponseMetadata': {'RequestId': 'abc'}
+    }
+    expression = '.Reservations[].Instances[] | {InstanceId, LaunchTime}'
+
+    expected = jq.compile(expression).input_value(json.loads(json.dumps(response, default=str))).all()
+
+    assert extract_result(response, expression) == expected
+    assert expected[0]['LaunchTime'] == '2023-01-01 00:00:00+00:00'
+
+
+def test_compile_jq_is_cached():
+    """Test that a jq expression is compiled once and reused."""
+    assert compile_jq('.Buckets[].Name') is compile_jq('.Buckets[].Name')
+
+
+def test_extract_plain_key_and_full_response():
+    """Test plain key extraction and metadata removal."""
+    response = {'Buckets': [{'Name': 'bucket'}], 'ResponseMetadata': {'RequestId': 'abc'}}
+
+    assert extract_result(response, 'Buckets') == [{'Name': 'bucket'}]
+    assert extract_result(response) == {'Buckets': [{'Name': 'bucket'}]}
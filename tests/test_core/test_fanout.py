@@ -0,0 +1,137 @@
+"""
+Tests for dependent sheet fan-out.
+"""
+import boto3
+from moto import mock_s3
+
+from aws_auto_inventory.config.models import Config, Sheet
+from aws_auto_inventory.core.fanout import DEFAULT_LIST_SIZE, FanOutGroup, batch_size, extract_ids
+from aws_auto_inventory.core.scan_engine import ScanEngine
+from aws_auto_inventory.core.scheduler import ScanTask
+from aws_auto_inventory.core.service import ServiceResult
+
+
+def make_sheet(service, function, parameter, batch=None):
+    return Sheet(
+        name="Dependent",
+        service=service,
+        function=function,
+        fan_out={"sheet": "Parent", "ids": "Id", "parameter": parameter, "batch_size": batch}
+    )
+
+
+def call_result(task, result=None, error=None):
+    return ServiceResult(
+        service=task.sheet.service,
+        function=task.sheet.function,
+        region=task.region,
+        result=result,
+        success=error is None,
+        error=error
+    )
+
+
+def test_extract_ids():
+    """Test that IDs come from a key of each item or from a jq filter, flattened and without gaps."""
+    page = [{"Id": "a", "Arns": ["x", "y"]}, {"Id": "b"}, {"Other": 1}]
+
+    assert extract_ids(page, "Id") == ["a", "b"]
+    assert extract_ids({"Id": "a"}, "Id") == ["a"]
+    assert extract_ids(page, ".[].Arns") == ["x", "y"]
+    assert extract_ids(page, ".[].Id") == ["a", "b"]
+    assert extract_ids(None, "Id") == []
+
+
+def test_batch_size_follows_service_model():
+    """Test that list parameters are batched up to the modelled maximum and scalars take one ID."""
+    assert batch_size(make_sheet("s3", "get_bucket_encryption", "Bucket")) is None
+    assert batch_size(make_sheet("elb", "describe_tags", "LoadBalancerNames")) == 20
+    assert batch_size(make_sheet("elb", "describe_tags", "LoadBalancerNames", batch=50)) == 20
+    assert batch_size(make_sheet("ecs", "describe_services", "services")) == DEFAULT_LIST_SIZE
+    assert batch_size(make_sheet("ec2", "describe_instances", "InstanceIds", batch=500)) == 500
+
+
+def test_group_batches_ids_as_pages_arrive():
+    """Test that full batches are scheduled right away, duplicates skipped and the rest sent on close."""
+    sheet = make_sheet("ecs", "describe_services", "services")
+    sheet.parameters = {"cluster": "main"}
+    group = FanOutGroup(ScanTask("us-east-1", sheet, account_id="111111111111"), batch_size=2)
+
+    first = group.add_ids(["a", "b", "c"])
+    second = group.add_ids(["b", "d", "e"])
+    last = group.close()
+
+    assert [task.parameters for task in first + second + last] == [
+        {"cluster": "main", "services": ["a", "b"]},
+        {"cluster": "main", "services": ["c", "d"]},
+        {"cluster": "main", "services": ["e"]},
+    ]
+    assert all(task.account_id == "111111111111" and task.region == "us-east-1" for task in last)
+
+    for task in first + second:
+        group.complete(task, call_result(task, [{"serviceName": name} for name in task.ids]))
+    assert not group.done
+    group.complete(last[0], call_result(last[0], error="AccessDenied"))
+    assert group.done
+
+    result = group.result()
+    assert result.success and result.sheet_name == "Dependent"
+    assert result.result == [{"serviceName": name} for name in "abcd"]
+    assert result.error == "1 of 3 calls failed: AccessDenied"
+
+
+def test_group_tags_single_id_results():
+    """Test that results of single-ID calls carry the ID they were fetched for."""
+    group = FanOutGroup(ScanTask("us-east-1", make_sheet("s3", "get_bucket_policy", "Bucket")))
+
+    tasks = group.add_ids(["first", "second"]) + group.close()
+    group.complete(tasks[0], call_result(tasks[0], {"Policy": "{}"}))
+    group.complete(tasks[1], call_result(tasks[1], "raw"))
+
+    assert [task.parameters for task in tasks] == [{"Bucket": "first"}, {"Bucket": "second"}]
+    assert group.result().result == [
+        {"Bucket": "first", "Policy": "{}"},
+        {"Bucket": "second", "Value": "raw"},
+    ]
+
+
+def test_group_fails_with_parent():
+    """Test that a dependent sheet fails when its parent fails, without sending the last batch."""
+    group = FanOutGroup(ScanTask("us-east-1", make_sheet("s3", "get_bucket_policy", "Bucket")), batch_size=5)
+    group.add_ids(["first"])
+
+    assert group.close("AccessDenied") == []
+    assert group.done
+
+    result = group.result()
+    assert not result.success
+    assert result.error == "Parent sheet 'Parent' failed: AccessDenied"
+
+
+@mock_s3
+def test_engine_fans_out_over_parent_results(aws_credentials):
+    """Test that a dependent sheet of a global sheet is called once per bucket on the engine's pool."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    for name in ["first", "second", "third"]:
+        s3.create_bucket(Bucket=name)
+    s3.put_bucket_versioning(Bucket="second", VersioningConfiguration={"Status": "Enabled"})
+    config = Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "sheets": [
+                    {"name": "Buckets", "service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+                    {"name": "Versioning", "service": "s3", "function": "get_bucket_versioning",
+                     "fan_out": {"sheet": "Buckets", "ids": ".[].Name", "parameter": "Bucket"}}
+                ]
+            }
+        ]
+    })
+
+    results = {result.sheet_name: result for result in ScanEngine(max_workers=4).iter_results(config)}
+
+    assert sorted(results) == ["Buckets", "Versioning"]
+    versioning = results["Versioning"]
+    assert versioning.success and versioning.region == "global"
+    assert sorted(row["Bucket"] for row in versioning.result) == ["first", "second", "third"]
+    assert [row["Bucket"] for row in versioning.result if row.get("Status") == "Enabled"] == ["second"]
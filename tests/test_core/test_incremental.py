@@ -0,0 +1,54 @@
+"""
+Tests for incremental result manifests.
+"""
+import os
+import datetime
+
+from aws_auto_inventory.core.incremental import ResultManifest, normalize_result, result_digest
+
+
+def test_result_digest_ignores_volatile_fields():
+    """Test that response metadata and request IDs do not change the hash."""
+    created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    first = {"RequestId": "a", "Items": [{"Id": 1, "Created": created, "ResponseMetadata": {"RequestId": "a"}}]}
+    second = {"Items": [{"Created": created, "Id": 1, "ResponseMetadata": {"RequestId": "b"}}], "RequestId": "b"}
+
+    assert result_digest(first) == result_digest(second)
+    assert result_digest(first) != result_digest({"Items": [{"Id": 2, "Created": created}]})
+    # Request IDs of nested resources are data, not metadata
+    assert normalize_result({"Items": [{"RequestId": "r-1"}]}) == {"Items": [{"RequestId": "r-1"}]}
+
+
+def test_manifest_points_unchanged_results_at_previous_run(tmp_path):
+    """Test that only changed results are written and unchanged ones point at the earlier file."""
+    first_run = tmp_path / "2024-01-01T00-00"
+    first = ResultManifest(str(first_run))
+    for key, result in [("us-east-1/s3-list_buckets.json", ["a"]), ("us-east-1/ec2-describe_vpcs.json", ["v"]),
+                        ("us-east-1/iam-list_users.json", ["u"])]:
+        path = first.record(key, result)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("[]")
+    first.save()
+
+    second_run = tmp_path / "2024-01-01T01-00"
+    previous_run = ResultManifest.find_previous_run(str(tmp_path), exclude=str(second_run))
+    second = ResultManifest(str(second_run), ResultManifest.load(previous_run))
+
+    assert second.record("us-east-1/s3-list_buckets.json", ["a"]) is None
+    assert second.record("us-east-1/ec2-describe_vpcs.json", ["v", "w"]) == os.path.join(
+        str(second_run), "us-east-1/ec2-describe_vpcs.json"
+    )
+    assert second.record("eu-west-1/s3-list_buckets.json", ["b"]) is not None
+    second.record_failure("us-east-1/iam-list_users.json")
+
+    assert second.save() == {"added": 1, "changed": 1, "unchanged": 1, "removed": 0, "failed": 1}
+    unchanged = second.results["us-east-1/s3-list_buckets.json"]
+    assert unchanged["path"] == os.path.join("..", "2024-01-01T00-00", "us-east-1", "s3-list_buckets.json")
+    assert os.path.isfile(os.path.join(str(second_run), unchanged["path"]))
+
+    # Unchanged results of the second run still point at the first run
+    third = ResultManifest(str(tmp_path / "2024-01-01T02-00"), ResultManifest.load(str(second_run)))
+    assert third.record("us-east-1/s3-list_buckets.json", ["a"]) is None
+    assert third.results["us-east-1/s3-list_buckets.json"]["path"] == unchanged["path"]
+    assert third.removed == ["eu-west-1/s3-list_buckets.json", "us-east-1/ec2-describe_vpcs.json"]
@@ -0,0 +1,97 @@
+"""
+Tests for the checkpoint journal.
+"""
+import json
+import zlib
+import datetime
+
+from aws_auto_inventory import cli
+from aws_auto_inventory.core.journal import JOURNAL_FILE, RESULTS_FILE, ScanJournal
+from aws_auto_inventory.core.scan_engine import ScanEngine
+from aws_auto_inventory.output.processor import OutputProcessor
+
+
+def test_journal_resume_ignores_truncated_line(tmp_path):
+    """Test that a line cut short by a crash is skipped and later entries start on a new line."""
+    with ScanJournal.open(str(tmp_path)) as journal:
+        journal.record("us-east-1/s3-list_buckets.json", status="stored")
+        journal.record("us-east-1/ec2-describe_vpcs.json", status="stored")
+        # Entries of the current run are only written to the file
+        assert len(journal) == 0
+
+    with open(tmp_path / JOURNAL_FILE, "a") as f:
+        f.write('{"key": "us-east-1/iam-list_us')
+
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert len(journal) == 2
+        assert journal.get("us-east-1/s3-list_buckets.json")["status"] == "stored"
+        assert "us-east-1/iam-list_users.json" not in journal
+        journal.record("us-east-1/iam-list_users.json", status="empty")
+        journal.mark_complete()
+
+    assert ScanJournal.is_run_complete(str(tmp_path))
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert len(journal) == 3
+
+
+def test_find_run_returns_latest_run_with_journal(tmp_path):
+    """Test that the most recent run directory holding a journal is found."""
+    ScanJournal.open(str(tmp_path / "2024-01-01T00-00")).close()
+    ScanJournal.open(str(tmp_path / "2024-01-01T01-00")).close()
+    (tmp_path / "2024-01-01T02-00").mkdir()
+
+    assert ScanJournal.find_run(str(tmp_path)) == str(tmp_path / "2024-01-01T01-00")
+    assert not ScanJournal.is_run_complete(str(tmp_path / "2024-01-01T01-00"))
+    assert ScanJournal.find_run(str(tmp_path / "missing")) is None
+
+
+def test_journal_keeps_results_out_of_its_lines(tmp_path):
+    """Test that results go to the results file, are read back on resume, and are dropped with it."""
+    result = [{"Name": "my-bucket", "CreationDate": datetime.datetime(2024, 1, 1)}]
+    with ScanJournal.open(str(tmp_path)) as journal:
+        journal.record_result("global/s3-list_buckets", result, status="stored")
+        journal.record("us-east-1/ec2-describe_vpcs", status="empty")
+
+    assert "my-bucket" not in (tmp_path / JOURNAL_FILE).read_text()
+    assert (tmp_path / RESULTS_FILE).is_file()
+
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        entry = journal.get("global/s3-list_buckets")
+        # Results are kept as JSON, which reading back cannot execute
+        assert journal.get_result(entry).load() == [{"Name": "my-bucket", "CreationDate": "2024-01-01T00:00:00"}]
+        assert json.loads(zlib.decompress((tmp_path / RESULTS_FILE).read_bytes())) == \
+            journal.get_result(entry).load()
+        assert journal.get_result(journal.get("us-east-1/ec2-describe_vpcs")) is None
+        journal.discard_results()
+
+    assert not (tmp_path / RESULTS_FILE).exists()
+    # Without their results, the tasks are scanned again
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert "global/s3-list_buckets" not in journal
+        assert "us-east-1/ec2-describe_vpcs" in journal
+
+
+def test_run_is_complete_only_once_json_output_is_written(tmp_path, mocker):
+    """Test that a run whose JSON output fails is left incomplete, so it can be resumed."""
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(
+        "inventories:\n"
+        "  - name: test-inventory\n"
+        "    sheets:\n"
+        "      - name: Buckets\n"
+        "        service: s3\n"
+        "        function: list_buckets\n"
+    )
+    output_dir = tmp_path / "output"
+    mocker.patch.object(cli, "check_aws_credentials", return_value=True)
+    mocker.patch.object(ScanEngine, "scan", return_value=[])
+    process = mocker.patch.object(OutputProcessor, "process", side_effect=OSError("No space left on device"))
+    mocker.patch("sys.argv", ["aws-auto-inventory", "-c", str(config_file), "-o", str(output_dir), "-f", "json"])
+
+    assert cli.run(cli.parse_args()) == 1
+    assert not ScanJournal.is_run_complete(str(output_dir))
+
+    process.side_effect = None
+    mocker.patch("sys.argv", ["aws-auto-inventory", "-c", str(config_file), "--resume", str(output_dir), "-f", "json"])
+    assert cli.run(cli.parse_args()) == 0
+    assert ScanJournal.is_run_complete(str(output_dir))
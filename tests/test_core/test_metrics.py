@@ -0,0 +1,133 @@
+"""
+Tests for the scan metrics.
+"""
+import json
+import time
+
+from aws_auto_inventory.core.metrics import (
+    LATENCY_BUCKETS,
+    MetricsWriter,
+    ScanMetrics,
+    count_resources,
+    response_size,
+)
+
+
+def record_calls(metrics):
+    ec2 = metrics.call("123456789012", "us-east-1", "ec2", "describe_instances")
+    ec2.observe_request(0.02, {"ResponseMetadata": {"HTTPHeaders": {"content-length": "100"}}})
+    ec2.observe_retry()
+    ec2.observe_throttle()
+    ec2.observe_request(3.0, {"ResponseMetadata": {"HTTPHeaders": {"content-length": "50"}}})
+    ec2.observe_rate_limit_wait(0.5)
+    ec2.observe_call(4.0, [{"InstanceId": "i-1"}, {"InstanceId": "i-2"}])
+
+    s3 = metrics.call("123456789012", "us-east-1", "s3", "list_buckets")
+    s3.observe_request(100.0)
+    s3.observe_call(1.0, failed=True)
+
+
+def test_response_size_and_resource_count():
+    """Test that sizes come from Content-Length and list results count their items."""
+    assert response_size({"ResponseMetadata": {"HTTPHeaders": {"content-length": "123"}}}) == 123
+    assert response_size({"ResponseMetadata": {}}) == 0
+    assert response_size(None) == 0
+    assert count_resources([1, 2, 3]) == 3
+    assert count_resources({"Account": "1"}) == 1
+    assert count_resources(None) == 0
+
+
+def test_call_returns_same_metrics_per_key():
+    """Test that each (account, region, service, function) has one set of metrics."""
+    metrics = ScanMetrics()
+
+    first = metrics.call("1", "us-east-1", "ec2", "describe_instances")
+
+    assert metrics.call("1", "us-east-1", "ec2", "describe_instances") is first
+    assert metrics.call("1", "us-west-2", "ec2", "describe_instances") is not first
+
+
+def test_summary_rows_and_totals():
+    """Test that the summary lists calls slowest first with cumulative latency buckets."""
+    metrics = ScanMetrics()
+    record_calls(metrics)
+
+    summary = metrics.summary()
+
+    assert [row["service"] for row in summary["calls"]] == ["ec2", "s3"]
+    ec2 = summary["calls"][0]
+    assert ec2["account_id"] == "123456789012"
+    assert (ec2["calls"], ec2["requests"], ec2["pages"], ec2["retries"], ec2["throttles"]) == (1, 2, 2, 1, 1)
+    assert (ec2["resources"], ec2["response_bytes"], ec2["errors"]) == (2, 150, 0)
+    assert ec2["rate_limit_wait_seconds"] == 0.5
+    assert ec2["latency"]["count"] == 2
+    assert ec2["latency"]["buckets"]["0.01"] == 0
+    assert ec2["latency"]["buckets"]["0.025"] == 1
+    assert ec2["latency"]["buckets"]["5.0"] == 2
+    assert ec2["latency"]["buckets"]["+Inf"] == 2
+
+    # A request slower than the last bucket only counts in +Inf
+    s3 = summary["calls"][1]
+    assert s3["latency"]["buckets"][str(LATENCY_BUCKETS[-1])] == 0
+    assert s3["latency"]["buckets"]["+Inf"] == 1
+    assert (s3["errors"], s3["pages"]) == (1, 0)
+
+    assert summary["totals"]["calls"] == 2
+    assert summary["totals"]["requests"] == 3
+    assert summary["totals"]["duration_seconds"] == 5.0
+
+
+def test_prometheus_text_format():
+    """Test the counters, histogram and label escaping of the Prometheus text file."""
+    metrics = ScanMetrics()
+    record_calls(metrics)
+    metrics.call(None, "us-east-1", 'we"ird\\', "get_thing").observe_call(0.1)
+
+    text = metrics.to_prometheus()
+    lines = text.splitlines()
+
+    labels = 'account="123456789012",region="us-east-1",service="ec2",function="describe_instances"'
+    assert "# TYPE aws_auto_inventory_throttles_total counter" in lines
+    assert f"aws_auto_inventory_throttles_total{{{labels}}} 1" in lines
+    assert f"aws_auto_inventory_response_bytes_total{{{labels}}} 150" in lines
+    assert "# TYPE aws_auto_inventory_request_duration_seconds histogram" in lines
+    assert f'aws_auto_inventory_request_duration_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+    assert f'aws_auto_inventory_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"aws_auto_inventory_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert (
+        'aws_auto_inventory_calls_total{account="",region="us-east-1",service="we\\"ird\\\\",function="get_thing"} 1'
+        in lines
+    )
+    assert text.endswith("\n")
+
+
+def test_writer_writes_periodically_and_on_stop(tmp_path):
+    """Test that the writer refreshes both files while running and once more when stopped."""
+    metrics = ScanMetrics()
+    summary_path = tmp_path / "run" / "metrics.json"
+    textfile_path = tmp_path / "textfile" / "inventory.prom"
+
+    with MetricsWriter(metrics, str(summary_path), str(textfile_path), interval=0.01):
+        deadline = time.time() + 5
+        while not summary_path.exists() and time.time() < deadline:
+            time.sleep(0.01)
+        assert json.loads(summary_path.read_text())["calls"] == []
+
+        record_calls(metrics)
+
+    assert json.loads(summary_path.read_text())["totals"]["calls"] == 2
+    assert "aws_auto_inventory_calls_total" in textfile_path.read_text()
+    assert sorted(path.name for path in textfile_path.parent.iterdir()) == ["inventory.prom"]
+
+
+def test_writer_without_interval_writes_once(tmp_path):
+    """Test that an interval of 0 only writes when the writer stops."""
+    summary_path = tmp_path / "metrics.json"
+    writer = MetricsWriter(ScanMetrics(), str(summary_path), interval=0).start()
+
+    assert writer._thread is None
+    assert not summary_path.exists()
+
+    writer.stop()
+
+    assert summary_path.exists()
@@ -0,0 +1,148 @@
+"""
+Tests for the organization scanner.
+"""
+import threading
+import concurrent.futures
+
+import boto3
+
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.core.availability import AvailabilityIndex
+from aws_auto_inventory.core.organization import OrganizationScanner
+from aws_auto_inventory.core.region import RegionScanner
+from aws_auto_inventory.core.scheduler import TaskScheduler
+from aws_auto_inventory.core.service import ServiceResult
+
+
+def make_accounts(count):
+    return [
+        {'id': f'{index:012d}', 'name': f'Account{index}', 'email': f'account{index}@example.com'}
+        for index in range(count)
+    ]
+
+
+def test_assume_roles_runs_concurrently_and_keeps_order(mocker):
+    """Test that roles are assumed in parallel but yielded in account order."""
+    scanner = OrganizationScanner(max_workers=3)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def assume_role(session, account_id, role_name):
+        # Only passes if three role assumptions are in flight at once
+        barrier.wait()
+        return None if account_id.endswith('4') else f'session-{account_id}'
+
+    mocker.patch.object(scanner, 'assume_role', side_effect=assume_role)
+
+    results = list(scanner.assume_roles(mocker.MagicMock(), make_accounts(6), 'TestRole'))
+
+    assert [account['id'] for account, _ in results] == [account['id'] for account in make_accounts(6)]
+    assert [session for _, session in results][4] is None
+    assert results[0][1] == 'session-000000000000'
+
+
+def test_assume_role_uses_regional_sts_endpoint(mocker):
+    """Test that STS clients are created for the configured region and shared."""
+    client_factory = mocker.MagicMock()
+    sts_client = client_factory.get_client.return_value
+    sts_client.assume_role.return_value = {
+        'Credentials': {
+            'AccessKeyId': 'test-access-key',
+            'SecretAccessKey': 'test-secret-key',
+            'SessionToken': 'test-session-token'
+        }
+    }
+    scanner = OrganizationScanner(client_factory=client_factory, sts_region='eu-west-1')
+    session = mocker.MagicMock()
+
+    assert scanner.assume_role(session, '111111111111', 'TestRole') is not None
+    client_factory.get_client.assert_called_once_with(session, 'sts', 'eu-west-1')
+
+
+def test_sts_client_uses_regional_endpoint_in_us_east_1(aws_credentials):
+    """Test that us-east-1, where older botocore used the global endpoint, gets the regional one."""
+    scanner = OrganizationScanner(sts_region='us-east-1')
+
+    sts_client = scanner._get_sts_client(boto3.Session())
+
+    assert sts_client.meta.endpoint_url == 'https://sts.us-east-1.amazonaws.com'
+
+
+def test_scan_organization_runs_global_calls_once(aws_credentials, mocker):
+    """Test that region scans leave global calls to a single scan of the global region."""
+    config = Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": ["eu-west-1", "us-east-1"], "organization": True},
+                "sheets": [
+                    {"name": "EC2", "service": "ec2", "function": "describe_instances"},
+                    {"name": "Users", "service": "iam", "function": "list_users"}
+                ]
+            }
+        ]
+    })
+    region_scanner = RegionScanner(max_workers=2, availability=AvailabilityIndex())
+    scan_service = mocker.patch.object(
+        region_scanner.service_scanner,
+        'scan_service',
+        side_effect=lambda sheet, session, region: ServiceResult(sheet.service, sheet.function, region, [region])
+    )
+    scanner = OrganizationScanner()
+    mocker.patch.object(scanner, 'get_organization_accounts', return_value=make_accounts(1))
+    mocker.patch.object(scanner, 'assume_role', return_value=mocker.MagicMock())
+
+    result, = scanner.scan_organization(config.inventories[0], region_scanner)
+
+    assert scan_service.call_count == 3
+    assert [region.region for region in result.regions] == ['global', 'eu-west-1', 'us-east-1']
+    users, = result.regions[0].services
+    assert (users.service, users.region, users.result) == ('iam', 'global', ['eu-west-1'])
+    assert all([service.service for service in region.services] == ['ec2'] for region in result.regions[1:])
+
+
+def test_scan_organization_runs_every_call_on_one_pool(aws_credentials, mocker):
+    """Test that the calls of all accounts and regions share one scheduler pool, and failed roles are reported."""
+    config = Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": ["eu-west-1", "us-east-1"], "organization": True, "role_name": "Audit"},
+                "sheets": [
+                    {"name": "EC2", "service": "ec2", "function": "describe_instances"},
+                    {"name": "VPCs", "service": "ec2", "function": "describe_vpcs"}
+                ]
+            }
+        ]
+    })
+    region_scanner = RegionScanner(max_workers=2)
+    threads = set()
+
+    def scan_service(sheet, session, region):
+        threads.add(threading.get_ident())
+        return ServiceResult(sheet.service, sheet.function, region, [sheet.function])
+
+    mocker.patch.object(region_scanner.service_scanner, 'scan_service', side_effect=scan_service)
+    scanner = OrganizationScanner(max_workers=2)
+    mocker.patch.object(scanner, 'get_organization_accounts', return_value=make_accounts(3))
+    mocker.patch.object(
+        scanner,
+        'assume_role',
+        side_effect=lambda session, account_id, role_name: None if account_id.endswith('1') else mocker.MagicMock()
+    )
+    run = mocker.spy(TaskScheduler, 'run')
+    pools = mocker.spy(concurrent.futures, 'ThreadPoolExecutor')
+
+    results = scanner.scan_organization(config.inventories[0], region_scanner, max_workers_regions=1)
+
+    assert run.call_count == 1
+    scheduler = run.call_args.args[0]
+    assert (scheduler.max_per_region, scheduler.max_per_account, scheduler.max_accounts) == (2, 2, 2)
+    # One pool for the scheduler and one for the role assumptions
+    assert pools.call_count == 2
+    assert [(result.account_id, result.success) for result in results] == [
+        ('000000000000', True), ('000000000001', False), ('000000000002', True)
+    ]
+    assert results[1].error == 'Failed to assume role in account 000000000001'
+    assert [
+        [service.result for service in region.services] for region in results[2].regions
+    ] == [[['describe_instances'], ['describe_vpcs']]] * 2
@@ -0,0 +1,90 @@
+"""
+Tests for the rate limiter.
+"""
+import time
+import asyncio
+
+import botocore.session
+from botocore import xform_name
+
+from aws_auto_inventory.config.models import AWSConfig
+from aws_auto_inventory.core.quotas import DEFAULT_QUOTAS
+from aws_auto_inventory.core.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_burst_then_wait():
+    """Test that a bucket allows a burst and then paces requests at its rate."""
+    bucket = TokenBucket(rate=50.0, burst=2.0)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+
+    start = time.monotonic()
+    waited = bucket.acquire()
+
+    assert waited > 0
+    assert time.monotonic() - start >= 0.015
+
+
+def test_rate_limiter_operation_override_uses_own_bucket():
+    """Test that operation quotas get their own bucket separate from the service bucket."""
+    limiter = RateLimiter({'ec2': (1.0, 1.0), 'ec2.describe_instances': (1000.0, 1000.0)})
+
+    assert limiter.acquire('ec2', 'describe_vpcs', 'us-east-1') == 0.0
+    for _ in range(10):
+        assert limiter.acquire('ec2', 'describe_instances', 'us-east-1') == 0.0
+
+
+def test_rate_limiter_buckets_per_account_and_region():
+    """Test that buckets are separated by account and region."""
+    limiter = RateLimiter({'s3': (0.001, 1.0)})
+
+    assert limiter.acquire('s3', 'list_buckets', 'us-east-1', 'account-a') == 0.0
+    assert limiter.acquire('s3', 'list_buckets', 'us-west-2', 'account-a') == 0.0
+    assert limiter.acquire('s3', 'list_buckets', 'us-east-1', 'account-b') == 0.0
+
+
+def test_rate_limiter_zero_rate_disables_limiting():
+    """Test that a rate of 0 disables limiting."""
+    limiter = RateLimiter({'default': (0.0, 0.0)})
+
+    for _ in range(100):
+        assert limiter.acquire('amplify', 'list_apps', 'us-east-1') == 0.0
+
+
+def test_rate_limits_from_aws_config():
+    """Test that the YAML aws section converts to quota overrides."""
+    aws_config = AWSConfig(rate_limits={'ec2': {'rate': 5}, 'iam.list_roles': {'rate': 0.5, 'burst': 3}})
+
+    assert aws_config.rate_limits['ec2'].as_quota() == (5, 5)
+    assert aws_config.rate_limits['iam.list_roles'].as_quota() == (0.5, 3)
+
+
+def test_rate_limiter_acquire_async_waits_on_event_loop():
+    """Test that async acquisition paces requests without blocking the loop."""
+    limiter = RateLimiter({'s3': (50.0, 1.0)})
+
+    async def acquire_twice():
+        first = await limiter.acquire_async('s3', 'list_buckets', 'us-east-1')
+        second = await limiter.acquire_async('s3', 'list_buckets', 'us-east-1')
+        return first, second
+
+    first, second = asyncio.run(acquire_twice())
+
+    assert first == 0.0
+    assert second > 0
+
+
+def test_default_quotas_name_botocore_services():
+    """Test that every default quota names a service, and operation, that botocore knows."""
+    session = botocore.session.get_session()
+    services = set(session.get_available_services())
+
+    for key in DEFAULT_QUOTAS:
+        if key == "default":
+            continue
+        service, _, operation = key.partition(".")
+        assert service in services, key
+        if operation:
+            operations = session.get_service_model(service).operation_names
+            assert operation in [xform_name(name) for name in operations], key
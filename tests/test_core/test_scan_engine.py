@@ -0,0 +1,342 @@
+"""
+Tests for the scan engine.
+"""
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.core.availability import AvailabilityIndex
+from aws_auto_inventory.core.journal import ScanJournal
+from aws_auto_inventory.core.scan_engine import ScanEngine
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.core.stats import CallStats
+
+
+def make_config(regions, organization=False):
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": regions, "organization": organization},
+                "sheets": [
+                    {"name": "EC2", "service": "ec2", "function": "describe_instances"},
+                    {"name": "S3", "service": "s3", "function": "list_directory_buckets"}
+                ]
+            }
+        ]
+    })
+
+
+def fake_scan_service(sheet, session, region, parameters=None, on_page=None, call_key=None):
+    return ServiceResult(service=sheet.service, function=sheet.function, region=region, result=[region])
+
+
+def test_scan_account_groups_results_by_region(aws_credentials, mocker):
+    """Test that tasks from one pool are grouped into region results in configuration order."""
+    engine = ScanEngine(max_workers=4, max_workers_services=1)
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+
+    results = engine.scan(make_config(['us-east-1', 'us-west-2', 'eu-west-1']))
+
+    region_results = results[0].region_results
+    assert [region.region for region in region_results] == ['us-east-1', 'us-west-2', 'eu-west-1']
+    for region in region_results:
+        assert sorted(service.service for service in region.services) == ['ec2', 's3']
+        assert all(service.result == [region.region] for service in region.services)
+
+
+def test_scan_organization_records_failed_accounts(aws_credentials, mocker):
+    """Test that organization tasks are grouped per account and failed role assumptions are kept."""
+    engine = ScanEngine(max_workers=4)
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+    mocker.patch.object(
+        engine.organization_scanner,
+        'get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    mocker.patch.object(
+        engine.organization_scanner,
+        'assume_role',
+        side_effect=lambda session, account_id, role_name: mocker.MagicMock() if account_id == '111111111111' else None
+    )
+
+    results = engine.scan(make_config(['us-east-1', 'us-west-2'], organization=True))
+
+    first, second = results[0].account_results
+    assert first.success and len(first.regions) == 2
+    assert all(len(region.services) == 2 for region in first.regions)
+    assert not second.success and second.regions == []
+
+
+def test_iter_results_yields_results_with_context(aws_credentials, mocker):
+    """Test that streamed results carry their account, region and sheet, and failed accounts are reported."""
+    engine = ScanEngine(max_workers=4)
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+    mocker.patch.object(
+        engine.organization_scanner,
+        'get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    mocker.patch.object(
+        engine.organization_scanner,
+        'assume_role',
+        side_effect=lambda session, account_id, role_name: mocker.MagicMock() if account_id == '111111111111' else None
+    )
+
+    results = list(engine.iter_results(make_config(['us-east-1', 'us-west-2'], organization=True)))
+
+    scanned = [result for result in results if result.success]
+    assert len(scanned) == 4
+    assert {(result.account_id, result.region, result.sheet_name) for result in scanned} == {
+        ('111111111111', region, sheet) for region in ['us-east-1', 'us-west-2'] for sheet in ['EC2', 'S3']
+    }
+    assert all(result.inventory_name == 'test-inventory' for result in scanned)
+
+    failed, = [result for result in results if not result.success]
+    assert (failed.account_id, failed.service, failed.function) == ('222222222222', 'sts', 'assume_role')
+
+
+def test_scan_organization_drops_clients_of_finished_accounts(aws_credentials, mocker):
+    """Test that each account's clients are dropped once its tasks are done, before the scan ends."""
+    engine = ScanEngine(max_workers=1)
+    events = []
+    sessions = {'111111111111': mocker.MagicMock(), '222222222222': mocker.MagicMock()}
+    names = {id(session): account_id for account_id, session in sessions.items()}
+
+    def scan_service(sheet, session, region, parameters=None, on_page=None, call_key=None):
+        events.append(('call', names[id(session)]))
+        return fake_scan_service(sheet, session, region)
+
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=scan_service)
+    mocker.patch.object(
+        engine.organization_scanner,
+        'get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    mocker.patch.object(
+        engine.organization_scanner,
+        'assume_role',
+        side_effect=lambda session, account_id, role_name: sessions[account_id]
+    )
+    mocker.patch.object(
+        engine.client_factory, 'evict', side_effect=lambda session: events.append(('evict', names[id(session)]))
+    )
+
+    engine.scan(make_config(['us-east-1', 'us-west-2'], organization=True))
+
+    assert events.count(('evict', '111111111111')) == 1 and events.count(('evict', '222222222222')) == 1
+    first_evicted = events.index(('evict', '111111111111'))
+    assert ('call', '111111111111') not in events[first_evicted:]
+    assert ('call', '222222222222') in events[first_evicted:]
+    assert events[-1] == ('evict', '222222222222')
+
+
+def test_scan_skips_services_without_endpoint(aws_credentials, mocker):
+    """Test that sheets are not planned in regions where their service has no endpoint."""
+    availability = AvailabilityIndex(
+        partitions={'aws': ['us-east-1', 'us-west-2']},
+        services={'s3': {'aws': {'global': False, 'regions': ['us-east-1']}}}
+    )
+    engine = ScanEngine(max_workers=4, availability=availability)
+    scan_service = mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+
+    results = engine.scan(make_config(['us-east-1', 'us-west-2']))
+
+    assert scan_service.call_count == 3
+    assert results[0].skipped == [
+        {'sheet': 'S3', 'service': 's3', 'function': 'list_directory_buckets', 'region': 'us-west-2'}
+    ]
+    us_west_2 = results[0].region_results[1]
+    assert [service.service for service in us_west_2.services] == ['ec2']
+
+
+def make_global_config(regions, organization=False):
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": regions, "organization": organization},
+                "sheets": [
+                    {"name": "EC2", "service": "ec2", "function": "describe_instances"},
+                    {"name": "Users", "service": "iam", "function": "list_users"},
+                    {"name": "Buckets", "service": "s3", "function": "list_buckets"}
+                ]
+            }
+        ]
+    })
+
+
+def test_scan_runs_global_calls_once(tmp_path, aws_credentials, mocker):
+    """Test that global calls run once per account from the first region and are stored under the global region."""
+    engine = ScanEngine(max_workers=4)
+    scan_service = mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+
+    with ScanJournal.open(str(tmp_path)) as journal:
+        results = engine.scan(make_global_config(['us-west-2', 'us-east-1']), journal)
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert 'test-inventory//global/Users' in journal
+
+    assert scan_service.call_count == 4
+    region_results = results[0].region_results
+    assert [region.region for region in region_results] == ['global', 'us-west-2', 'us-east-1']
+    assert sorted(service.sheet_name for service in region_results[0].services) == ['Buckets', 'Users']
+    # The calls go to the first configured region, their results to the global region
+    assert all(service.result == ['us-west-2'] for service in region_results[0].services)
+    assert all(service.region == 'global' for service in region_results[0].services)
+    assert all([service.sheet_name for service in region.services] == ['EC2'] for region in region_results[1:])
+    assert results[0].skipped == []
+
+
+def test_scan_without_availability_check_calls_global_services_in_every_region(aws_credentials, mocker):
+    """Test that turning off the availability check scans every sheet in every region."""
+    engine = ScanEngine(max_workers=4, check_availability=False)
+    scan_service = mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+
+    results = engine.scan(make_global_config(['us-west-2', 'us-east-1']))
+
+    assert scan_service.call_count == 6
+    assert [region.region for region in results[0].region_results] == ['us-west-2', 'us-east-1']
+
+
+def test_scan_starts_longest_calls_first(tmp_path, aws_credentials, mocker):
+    """Test that calls are ordered by the durations of earlier runs, which each scan updates."""
+    stats = CallStats()
+    stats.observe(None, 'us-west-2', 's3', 'list_directory_buckets', 240.0, 20)
+    stats.observe(None, 'us-east-1', 'ec2', 'describe_instances', 30.0, 3)
+    stats.observe(None, 'us-east-1', 's3', 'list_directory_buckets', 10.0, 1)
+    stats_path = str(tmp_path / 'call_stats.json')
+    stats.save(stats_path)
+    engine = ScanEngine(max_workers=1, stats_path=stats_path)
+    scan_service = mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+
+    engine.scan(make_config(['us-east-1', 'us-west-2']))
+
+    assert [(call.args[0].service, call.args[2]) for call in scan_service.call_args_list] == [
+        ('s3', 'us-west-2'), ('ec2', 'us-east-1'), ('ec2', 'us-west-2'), ('s3', 'us-east-1')
+    ]
+    saved = CallStats.load(stats_path)
+    assert saved.calls[(None, 'us-west-2', 's3', 'list_directory_buckets')]['runs'] == 2
+    assert saved.calls[(None, 'us-west-2', 'ec2', 'describe_instances')]['runs'] == 1
+
+
+def test_scan_resumes_from_journal(tmp_path, aws_credentials, mocker):
+    """Test that journaled tasks are not scanned again and their stored results are returned."""
+    engine = ScanEngine(max_workers=4)
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+    config = make_config(['us-east-1', 'us-west-2'])
+
+    with ScanJournal.open(str(tmp_path)) as journal:
+        first = list(engine.iter_results(config, journal))
+
+    scan_service = mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_scan_service)
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert len(journal) == 4
+        # The journal only says where each result is
+        assert all('result' not in entry and entry['status'] == 'stored' for entry in journal.entries.values())
+        results = engine.scan(config, journal)
+
+        # Stored results are read from the journal's results file when used
+        for region in results[0].region_results:
+            assert sorted(service.service for service in region.services) == ['ec2', 's3']
+            assert all(service._result is None for service in region.services)
+            assert all(service.result == [region.region] for service in region.services)
+
+    assert scan_service.call_count == 0
+    assert len(first) == 4
+
+
+def make_fan_out_config(regions):
+    return Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": regions},
+                "sheets": [
+                    {"name": "Groups", "service": "elbv2", "function": "describe_target_groups"},
+                    {"name": "Health", "service": "elbv2", "function": "describe_target_health",
+                     "fan_out": {"sheet": "Groups", "ids": "TargetGroupArn", "parameter": "TargetGroupArn"}},
+                    {"name": "Targets", "service": "ec2", "function": "describe_instances",
+                     "fan_out": {"sheet": "Health", "ids": ".[].Target.Id", "parameter": "InstanceIds"}}
+                ]
+            }
+        ]
+    })
+
+
+def fake_fan_out_scan_service(sheet, session, region, parameters=None, on_page=None, call_key=None):
+    if sheet.name == "Groups":
+        # Two pages of target groups
+        pages = [[{"TargetGroupArn": f"{region}-tg-{index}"}] for index in range(2)]
+    elif sheet.name == "Health":
+        pages = [[{"Target": {"Id": f"i-{parameters['TargetGroupArn']}"}}]]
+    else:
+        pages = [[{"InstanceId": instance_id} for instance_id in parameters["InstanceIds"]]]
+
+    for page in pages:
+        if on_page is not None:
+            on_page(page)
+
+    return ServiceResult(
+        service=sheet.service,
+        function=sheet.function,
+        region=region,
+        result=[item for page in pages for item in page]
+    )
+
+
+def test_scan_fans_out_dependent_sheets(aws_credentials, mocker):
+    """Test that dependent sheets run over the IDs of their parent, in the parent's region."""
+    engine = ScanEngine(max_workers=4)
+    scan_service = mocker.patch.object(
+        engine.service_scanner, 'scan_service', side_effect=fake_fan_out_scan_service
+    )
+
+    results = engine.scan(make_fan_out_config(['us-east-1', 'us-west-2']))
+
+    # One Groups call and two Health calls per region, and one batch of instances
+    assert scan_service.call_count == 8
+    for region in results[0].region_results:
+        services = {service.sheet_name: service for service in region.services}
+        assert sorted(services) == ['Groups', 'Health', 'Targets']
+        assert sorted(row['TargetGroupArn'] for row in services['Health'].result) == [
+            f"{region.region}-tg-0", f"{region.region}-tg-1"
+        ]
+        assert sorted(row['InstanceId'] for row in services['Targets'].result) == [
+            f"i-{region.region}-tg-0", f"i-{region.region}-tg-1"
+        ]
+
+
+def test_scan_resumes_dependent_sheets_from_journal(tmp_path, aws_credentials, mocker):
+    """Test that a dependent sheet missing from the journal runs over its journaled parent's IDs."""
+    engine = ScanEngine(max_workers=4)
+    mocker.patch.object(engine.service_scanner, 'scan_service', side_effect=fake_fan_out_scan_service)
+    config = make_fan_out_config(['us-east-1'])
+
+    with ScanJournal.open(str(tmp_path)) as journal:
+        list(engine.iter_results(config, journal))
+
+    # Forget the last sheet, as if the scan had been interrupted before it completed
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        assert len(journal) == 3
+    journal_file = tmp_path / "journal.jsonl"
+    journal_file.write_text(
+        "".join(line + "\n" for line in journal_file.read_text().splitlines() if "/Targets" not in line)
+    )
+
+    scan_service = mocker.patch.object(
+        engine.service_scanner, 'scan_service', side_effect=fake_fan_out_scan_service
+    )
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        results = {result.sheet_name: result for result in engine.iter_results(config, journal)}
+
+    assert [call.args[0].name for call in scan_service.call_args_list] == ['Targets']
+    assert sorted(results) == ['Groups', 'Health', 'Targets']
+    assert sorted(row['InstanceId'] for row in results['Targets'].result) == [
+        "i-us-east-1-tg-0", "i-us-east-1-tg-1"
+    ]
@@ -0,0 +1,128 @@
+"""
+Tests for the task scheduler.
+"""
+import threading
+import time
+
+from aws_auto_inventory.core.scheduler import ScanTask, TaskQueue, TaskScheduler
+
+
+class ConcurrencyTracker:
+    """Record the peak number of concurrent tasks overall, per region and per account."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.per_region = {}
+        self.peak_region = 0
+        self.per_account = {}
+        self.peak_account = 0
+
+    def __call__(self, task):
+        region_key = (task.account, task.region)
+        with self.lock:
+            self.running += 1
+            self.per_region[region_key] = self.per_region.get(region_key, 0) + 1
+            self.per_account[task.account] = self.per_account.get(task.account, 0) + 1
+            self.peak = max(self.peak, self.running)
+            self.peak_region = max(self.peak_region, self.per_region[region_key])
+            self.peak_account = max(self.peak_account, self.per_account[task.account])
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+            self.per_region[region_key] -= 1
+            self.per_account[task.account] -= 1
+        return task.sheet
+
+
+def make_tasks(accounts, regions, sheets):
+    return [
+        ScanTask(region, f"sheet-{sheet}", account_id=f"account-{account}")
+        for account in range(accounts)
+        for sheet in range(sheets)
+        for region in regions
+    ]
+
+
+def test_run_completes_every_task():
+    """Test that every task runs exactly once."""
+    tasks = make_tasks(2, ['us-east-1', 'us-west-2'], 10)
+    scheduler = TaskScheduler(max_workers=4)
+
+    completed = [task for task, future in scheduler.run(iter(tasks), lambda task: task.sheet)]
+
+    assert sorted(map(id, completed)) == sorted(map(id, tasks))
+
+
+def test_run_respects_caps():
+    """Test that the global, per-region and per-account caps are never exceeded."""
+    tracker = ConcurrencyTracker()
+    tasks = make_tasks(3, ['us-east-1', 'us-west-2', 'eu-west-1'], 8)
+    scheduler = TaskScheduler(max_workers=6, max_per_region=2, max_per_account=3)
+
+    results = [future.result() for task, future in scheduler.run(iter(tasks), tracker)]
+
+    assert len(results) == len(tasks)
+    assert tracker.peak <= 6
+    assert tracker.peak_region <= 2
+    assert tracker.peak_account <= 3
+    # Other accounts fill the pool while one account is at its cap
+    assert tracker.peak == 6
+
+
+def test_run_reports_task_exceptions():
+    """Test that a failing task is reported through its future."""
+    def fail(task):
+        raise ValueError(task.sheet)
+
+    scheduler = TaskScheduler(max_workers=2)
+    futures = [future for task, future in scheduler.run([ScanTask('us-east-1', 'broken')], fail)]
+
+    assert isinstance(futures[0].exception(), ValueError)
+
+
+def test_run_limits_active_accounts():
+    """Test that no more than max_accounts accounts have tasks running at once."""
+    lock = threading.Lock()
+    running = {}
+    peak = [0]
+
+    def func(task):
+        with lock:
+            running[task.account] = running.get(task.account, 0) + 1
+            peak[0] = max(peak[0], sum(1 for count in running.values() if count))
+        time.sleep(0.005)
+        with lock:
+            running[task.account] -= 1
+
+    tasks = make_tasks(6, ['us-east-1', 'us-west-2'], 3)
+    scheduler = TaskScheduler(max_workers=8, max_accounts=2)
+
+    completed = list(scheduler.run(iter(tasks), func))
+
+    assert len(completed) == len(tasks)
+    assert peak[0] == 2
+
+
+def test_run_starts_queued_tasks():
+    """Test that tasks queued by running tasks start on the same pool before the run ends."""
+    queue = TaskQueue()
+
+    def func(task):
+        if task.sheet.startswith('parent'):
+            time.sleep(0.05)
+            queue.put(ScanTask(task.region, f"child-of-{task.sheet}", account_id=task.account_id))
+        return task.sheet
+
+    tasks = make_tasks(1, ['us-east-1'], 3)
+    for task in tasks:
+        task.sheet = f"parent-{task.sheet}"
+    scheduler = TaskScheduler(max_workers=2, max_per_region=2)
+
+    completed = [future.result() for task, future in scheduler.run(iter(tasks), func, queue=queue)]
+
+    assert sorted(completed) == sorted(
+        [task.sheet for task in tasks] + [f"child-of-{task.sheet}" for task in tasks]
+    )
+    assert not len(queue)
@@ -0,0 +1,245 @@
+"""
+Tests for single-flight API calls.
+"""
+import asyncio
+import threading
+import time
+
+import boto3
+import pytest
+from moto import mock_s3
+
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.core.aws_client import AWSClient
+from aws_auto_inventory.core.journal import ScanJournal
+from aws_auto_inventory.core.scan_engine import ScanEngine
+from aws_auto_inventory.core.single_flight import SingleFlight, call_key
+
+
+def key(region="us-east-1", parameters=None):
+    return call_key(None, None, region, "ec2", "describe_instances", parameters)
+
+
+def test_call_key_ignores_parameter_order():
+    """Test that parameters in a different order give the same key, and other values do not."""
+    assert key(parameters={"A": 1, "B": [2]}) == key(parameters={"B": [2], "A": 1})
+    assert key(parameters={}) == key()
+    assert key(parameters={"A": 1}) != key(parameters={"A": 2})
+    assert key("us-west-2") != key()
+
+
+def test_shared_call_is_fetched_once():
+    """Test that concurrent callers of a shared call read one fetch and get their own copy."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key(), key(), key("us-west-2")])
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return iter([{"Reservations": [{"Id": 1}]}, {"Reservations": [{"Id": 2}]}])
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(list(single_flight.pages(("111111111111", key()), fetch))))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+    assert single_flight.shared == 2
+    assert all(pages == [{"Reservations": [{"Id": 1}]}, {"Reservations": [{"Id": 2}]}] for pages in results)
+    assert results[0][0] is not results[1][0] and results[1][0] is not results[2][0]
+    # Pages are dropped once every expected caller has taken them
+    assert single_flight._calls == {}
+
+    assert single_flight.is_shared((None, key()))
+    assert not single_flight.is_shared((None, key("us-west-2")))
+    assert not single_flight.is_shared(None)
+
+
+def test_shared_call_failure_reaches_every_caller():
+    """Test that every caller of a shared call gets the error of its single fetch."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key()])
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        raise ValueError("AccessDenied")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="AccessDenied"):
+            list(single_flight.pages((None, key()), fetch))
+
+    assert len(fetches) == 1
+
+
+def test_shared_call_streams_pages_to_every_caller():
+    """Test that callers read each page of a shared call while the next one is still being fetched."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key()])
+    second_page = threading.Event()
+    read = []
+
+    def fetch():
+        yield {"Reservations": [{"Id": 1}]}
+        assert second_page.wait(5)
+        yield {"Reservations": [{"Id": 2}]}
+
+    def follow():
+        for page in single_flight.pages((None, key()), fetch):
+            read.append(page)
+            second_page.set()
+
+    leader = single_flight.pages((None, key()), fetch)
+    first = next(leader)
+    follower = threading.Thread(target=follow)
+    follower.start()
+    # The follower reads the first page before the second one is fetched
+    assert second_page.wait(5)
+
+    assert [first] + list(leader) == [{"Reservations": [{"Id": 1}]}, {"Reservations": [{"Id": 2}]}]
+    follower.join()
+    assert read == [{"Reservations": [{"Id": 1}]}, {"Reservations": [{"Id": 2}]}]
+    assert single_flight._calls == {}
+
+
+def test_last_caller_takes_the_stored_pages():
+    """Test that the last caller of a shared call gets the stored pages rather than copies."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key()])
+    page = {"Reservations": [{"Id": 1}]}
+
+    first = list(single_flight.pages((None, key()), lambda: iter([page])))
+    stored = single_flight._calls[(None, key())].pages
+    last = list(single_flight.pages((None, key()), lambda: iter([])))
+
+    assert first == last == [page]
+    assert first[0] is not page
+    assert last[0] is page
+    assert stored == [None]
+    assert single_flight._calls == {}
+
+
+def test_skipped_callers_release_shared_pages():
+    """Test that callers skipped by the scan do not keep the pages of a shared call."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key(), key()])
+
+    # Two of three callers in one account skip, so its call is no longer shared
+    single_flight.skip(("111111111111", key()))
+    single_flight.skip(("111111111111", key()))
+    assert not single_flight.is_shared(("111111111111", key()))
+    assert single_flight.is_shared(("222222222222", key()))
+
+    # A caller skipping after the call started releases its pages
+    assert list(single_flight.pages(("222222222222", key()), lambda: iter([{"Reservations": []}]))) == [
+        {"Reservations": []}
+    ]
+    single_flight.skip(("222222222222", key()))
+    assert list(single_flight.pages(("222222222222", key()), lambda: iter([]))) == [{"Reservations": []}]
+    assert single_flight._calls == {}
+
+
+def test_abandoned_shared_call_fails_its_other_callers():
+    """Test that callers waiting on a first caller that stops reading get an error instead of hanging."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key()])
+
+    leader = single_flight.pages((None, key()), lambda: iter([{"Reservations": []}, {"Reservations": []}]))
+    next(leader)
+    leader.close()
+
+    with pytest.raises(RuntimeError, match="stopped reading"):
+        list(single_flight.pages((None, key()), lambda: iter([])))
+    assert single_flight._calls == {}
+
+
+def test_shared_call_from_coroutines():
+    """Test that coroutines share a call the same way as threads."""
+    single_flight = SingleFlight()
+    single_flight.expect([key(), key()])
+    fetches = []
+
+    async def fetch_pages():
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        yield {"Reservations": []}
+
+    async def read():
+        return [page async for page in single_flight.apages((None, key()), fetch_pages)]
+
+    async def scan():
+        return await asyncio.gather(read(), read())
+
+    assert asyncio.run(scan()) == [[{"Reservations": []}], [{"Reservations": []}]]
+    assert len(fetches) == 1
+
+
+@mock_s3
+def test_engine_sends_identical_calls_once(aws_credentials, mocker):
+    """Test that overlapping sheets of two inventories share one request, each with its own result_key."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="shared")
+    config = Config.from_dict({
+        "inventories": [
+            {
+                "name": "team-a",
+                "sheets": [{"name": "Buckets", "service": "s3", "function": "list_buckets", "result_key": "Buckets"}]
+            },
+            {
+                "name": "team-b",
+                "sheets": [
+                    {"name": "S3", "service": "s3", "function": "list_buckets", "result_key": ".Buckets[].Name"},
+                    {"name": "Owner", "service": "s3", "function": "list_buckets", "result_key": "Owner"}
+                ]
+            }
+        ]
+    })
+    engine = ScanEngine(max_workers=4)
+    requests = mocker.spy(AWSClient, "_call_with_retry")
+
+    results = {(result.inventory_name, result.sheet_name): result.result for result in engine.iter_results(config)}
+
+    assert requests.call_count == 1
+    assert [bucket["Name"] for bucket in results[("team-a", "Buckets")]] == ["shared"]
+    assert results[("team-b", "S3")] == ["shared"]
+    assert "ID" in results[("team-b", "Owner")]
+    assert engine.single_flight._calls == {}
+
+
+@mock_s3
+def test_engine_skips_journaled_callers(tmp_path, aws_credentials, mocker):
+    """Test that sheets resumed from the journal are not counted as callers of a shared call."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="shared")
+    config = Config.from_dict({
+        "inventories": [{
+            "name": "team-a",
+            "sheets": [
+                {"name": "Buckets", "service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+                {"name": "Owner", "service": "s3", "function": "list_buckets", "result_key": "Owner"}
+            ]
+        }]
+    })
+    engine = ScanEngine(max_workers=4)
+    with ScanJournal.open(str(tmp_path)) as journal:
+        list(engine.iter_results(config, journal))
+
+    # Forget one sheet, as if the scan had been interrupted before it completed
+    journal_file = tmp_path / "journal.jsonl"
+    journal_file.write_text(
+        "".join(line + "\n" for line in journal_file.read_text().splitlines() if "/Owner" not in line)
+    )
+
+    skip = mocker.spy(engine.single_flight, "skip")
+    shared = mocker.spy(engine.single_flight, "pages")
+    with ScanJournal.open(str(tmp_path), resume=True) as journal:
+        results = {result.sheet_name: result.result for result in engine.iter_results(config, journal)}
+
+    assert skip.call_count == 1
+    # The one sheet left makes its call on its own
+    assert shared.call_count == 0
+    assert "ID" in results["Owner"]
@@ -0,0 +1,102 @@
+"""
+Tests for spilling completed results to disk.
+"""
+import datetime
+
+from aws_auto_inventory.config.models import Config
+from aws_auto_inventory.core.scan_engine import ScanEngine
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.core.spill import ResultStore, StoredResult
+from aws_auto_inventory.output.processor import OutputProcessor
+
+
+def make_response(index):
+    return [{"InstanceId": f"i-{index:04d}-{n}", "LaunchTime": datetime.datetime(2024, 1, 1, n)} for n in range(20)]
+
+
+def test_store_spills_oldest_results_beyond_budget(tmp_path):
+    """Test that the oldest results move to disk once the budget is exceeded and read back unchanged."""
+    store = ResultStore(budget=1, directory=str(tmp_path))
+    first = store.put(make_response(1))
+    assert first.spilled and store.memory_bytes == 0
+
+    store.budget = first.size * 3 + first.size // 2
+    handles = [store.put(make_response(index)) for index in range(2, 6)]
+
+    assert [handle.spilled for handle in handles] == [True, False, False, False]
+    assert store.spilled == 2 and store.spilled_bytes == first.size + handles[0].size
+    assert store.memory_bytes == sum(handle.size for handle in handles[1:])
+    assert first.load() == make_response(1)
+    assert [handle.load() for handle in handles] == [make_response(index) for index in range(2, 6)]
+    # Each read unpacks a new copy
+    assert handles[0].load() is not handles[0].load()
+
+    store.close()
+
+
+def test_service_result_reads_stored_response():
+    """Test that a stored service result reads its response back, and setting one replaces it."""
+    service_result = ServiceResult("ec2", "describe_instances", "us-east-1", make_response(1))
+    store = ResultStore(budget=0)
+
+    service_result.store(store)
+
+    assert service_result._result is None and store.spilled == 1
+    assert service_result.result == make_response(1)
+    assert service_result.to_dict()["result"] == make_response(1)
+
+    service_result.result = []
+    assert service_result.result == [] and service_result._stored is None
+
+    failed = ServiceResult("ec2", "describe_instances", "us-east-1", None, success=False)
+    failed.store(store)
+    assert failed._stored is None and store.spilled == 1
+
+
+def test_streamed_output_unpacks_each_result_once(tmp_path, mocker):
+    """Test that a stored result is unpacked once for every streamed format together."""
+    service_result = ServiceResult(
+        "ec2", "describe_instances", "us-east-1", make_response(1), inventory_name="inventory", sheet_name="Instances"
+    )
+    service_result.store(ResultStore(budget=0, directory=str(tmp_path)))
+    load = mocker.spy(StoredResult, "load")
+
+    written = OutputProcessor().stream([service_result], str(tmp_path / "output"), ["excel", "parquet", "sqlite"])
+
+    assert load.call_count == 1
+    assert all(written[output_format] for output_format in ("excel", "parquet", "sqlite"))
+
+
+def test_engine_spills_results_and_writes_the_same_json(tmp_path, aws_credentials, mocker):
+    """Test that a scan over its memory budget writes the same JSON output as one without a budget."""
+    config = Config.from_dict({
+        "inventories": [
+            {
+                "name": "test-inventory",
+                "aws": {"region": ["us-east-1", "us-west-2"]},
+                "sheets": [
+                    {"name": "EC2", "service": "ec2", "function": "describe_instances"},
+                    {"name": "VPC", "service": "ec2", "function": "describe_vpcs"}
+                ]
+            }
+        ]
+    })
+
+    def fake_scan_service(sheet, session, region, parameters=None, on_page=None, call_key=None):
+        return ServiceResult(sheet.service, sheet.function, region, [{"Region": region, "Function": sheet.function}])
+
+    outputs = []
+    for memory_budget in (None, 0):
+        engine = ScanEngine(max_workers=2, memory_budget=memory_budget, spill_dir=str(tmp_path))
+        mocker.patch.object(engine.service_scanner, "scan_service", side_effect=fake_scan_service)
+        results = engine.scan(config)
+
+        spilled = [service._stored is not None for service in results[0].iter_service_results()]
+        assert spilled == [memory_budget is not None] * 4
+
+        output_dir = tmp_path / str(memory_budget)
+        OutputProcessor().process(results, str(output_dir), ["json"])
+        outputs.append((output_dir / "test-inventory.json").read_text())
+
+    assert outputs[0] == outputs[1]
+    assert '"Function": "describe_vpcs"' in outputs[1]
@@ -0,0 +1,117 @@
+"""
+Tests for historical call statistics.
+"""
+from aws_auto_inventory.core.metrics import ScanMetrics
+from aws_auto_inventory.core.stats import CallStats, ScanProgress, format_duration
+
+
+def make_stats():
+    stats = CallStats()
+    stats.observe("111111111111", "us-east-1", "ec2", "describe_snapshots", 240.0, 30)
+    stats.observe("111111111111", "us-west-2", "ec2", "describe_snapshots", 60.0, 8)
+    stats.observe("111111111111", "us-east-1", "iam", "list_users", 2.0, 1)
+    return stats
+
+
+def test_observe_smooths_runs():
+    """Test that each run moves a call's statistics halfway towards its latest values."""
+    stats = make_stats()
+    stats.observe("111111111111", "us-east-1", "ec2", "describe_snapshots", 120.0, 10)
+
+    entry = stats.calls[("111111111111", "us-east-1", "ec2", "describe_snapshots")]
+    assert entry == {"duration_seconds": 180.0, "pages": 20.0, "runs": 2}
+
+
+def test_expected_falls_back_to_other_accounts_and_regions():
+    """Test that calls without history are estimated from the same call elsewhere."""
+    stats = make_stats()
+
+    assert stats.expected("111111111111", "us-east-1", "ec2", "describe_snapshots") == 240.0
+    assert stats.expected("222222222222", "us-west-2", "ec2", "describe_snapshots") == 60.0
+    assert stats.expected("222222222222", "eu-west-1", "ec2", "describe_snapshots") == 150.0
+    assert stats.expected("111111111111", "us-east-1", "ec2", "describe_volumes") is None
+
+
+def test_order_puts_longest_and_unknown_calls_first():
+    """Test that tasks are sorted longest first, after the unknown ones in their original order."""
+    stats = make_stats()
+    tasks = [
+        ("111111111111", "us-east-1", "iam", "list_users"),
+        ("111111111111", "us-east-1", "ec2", "describe_volumes"),
+        ("111111111111", "us-west-2", "ec2", "describe_snapshots"),
+        ("111111111111", "us-east-1", "s3", "list_buckets"),
+        ("111111111111", "us-east-1", "ec2", "describe_snapshots"),
+    ]
+
+    assert [task[3] for task in stats.order(tasks, lambda task: task)] == [
+        "describe_volumes", "list_buckets", "describe_snapshots", "describe_snapshots", "list_users"
+    ]
+    assert stats.order(tasks, lambda task: task)[2][1] == "us-east-1"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test that saved statistics give the same estimates when loaded, and unreadable files are ignored."""
+    path = str(tmp_path / "call_stats.json")
+    make_stats().save(path)
+
+    stats = CallStats.load(path)
+
+    assert stats.calls == make_stats().calls
+    assert stats.expected("222222222222", "eu-west-1", "ec2", "describe_snapshots") == 150.0
+
+    (tmp_path / "broken.json").write_text("{")
+    assert CallStats.load(str(tmp_path / "broken.json")).calls == {}
+    assert CallStats.load(str(tmp_path / "missing.json")).calls == {}
+
+
+def test_update_records_successful_calls_of_an_account():
+    """Test that metrics rows become per-call averages, leaving out failures and other accounts."""
+    metrics = ScanMetrics()
+    for duration in (10.0, 30.0):
+        call = metrics.call("111111111111", "us-east-1", "ec2", "describe_instances")
+        call.observe_call(duration)
+        call.pages += 3
+    metrics.call("111111111111", "us-east-1", "ec2", "describe_volumes").observe_call(1.0, failed=True)
+    metrics.call("222222222222", "us-east-1", "ec2", "describe_instances").observe_call(5.0)
+
+    stats = CallStats()
+    stats.update(metrics, "111111111111")
+
+    assert stats.calls == {
+        ("111111111111", "us-east-1", "ec2", "describe_instances"): {"duration_seconds": 20.0, "pages": 3.0, "runs": 1}
+    }
+
+
+def test_progress_estimates_time_left():
+    """Test that the estimate spreads the work left over the workers and never undercuts the longest call."""
+    stats = make_stats()
+    progress = ScanProgress(stats, workers=2, interval=0)
+    keys = [
+        ("111111111111", "us-east-1", "ec2", "describe_snapshots"),
+        ("111111111111", "us-west-2", "ec2", "describe_snapshots"),
+        ("111111111111", "us-east-1", "iam", "list_users"),
+        ("111111111111", "us-east-1", "s3", "list_buckets"),
+    ]
+    for key in keys:
+        progress.add(key)
+
+    # The unknown call counts as the average of the known ones
+    assert progress.eta() == 240.0
+    progress.complete(keys[0])
+    assert progress.eta() == 60.0
+    progress.workers = 1
+    assert progress.eta() == 60.0 + 2.0 + 31.0
+    assert progress.report() == "Completed 1 of 4 calls, about 1m 33s left"
+
+    for key in keys[1:3]:
+        progress.complete(key)
+    assert progress.eta() is None
+    progress.complete(keys[3])
+    assert progress.eta() == 0.0
+
+
+def test_format_duration():
+    """Test that durations are shown with their two largest units."""
+    assert format_duration(12.4) == "12s"
+    assert format_duration(245) == "4m 05s"
+    assert format_duration(3720) == "1h 02m"
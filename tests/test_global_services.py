@@ -0,0 +1,35 @@
+import os
+import json
+
+import boto3
+from moto import mock_iam, mock_s3, mock_sts
+
+import scan
+
+
+@mock_iam
+@mock_s3
+@mock_sts
+def test_scan_calls_global_services_once(tmp_path, aws_credentials, mocker):
+    """Test that global services are called once and stored under the global region."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="first-bucket")
+    boto3.client("iam", region_name="us-east-1").create_user(UserName="first-user")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([
+        {"service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+        {"service": "iam", "function": "list_users", "result_key": "Users"},
+        {"service": "sts", "function": "get_caller_identity"},
+    ]))
+    mocker.patch.object(scan, "timestamp", "2024-01-01T00-00")
+    run_dir = tmp_path / "output" / "2024-01-01T00-00"
+
+    get_service_data = mocker.spy(scan, "_get_service_data")
+    scan.main(str(scan_file), ["eu-west-1", "us-east-1"], str(tmp_path / "output"), "INFO", 1, 0, None, None)
+
+    calls = sorted((call.args[2]["service"], call.args[1]) for call in get_service_data.call_args_list)
+    assert calls == [("iam", "eu-west-1"), ("s3", "eu-west-1"), ("sts", "eu-west-1"), ("sts", "us-east-1")]
+    with open(run_dir / "global" / "s3-list_buckets.json") as f:
+        assert [bucket["Name"] for bucket in json.load(f)] == ["first-bucket"]
+    assert os.path.isfile(run_dir / "global" / "iam-list_users.json")
+    assert not os.path.exists(run_dir / "eu-west-1" / "s3-list_buckets.json")
+    assert os.path.isfile(run_dir / "us-east-1" / "sts-get_caller_identity.json")
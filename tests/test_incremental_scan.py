@@ -0,0 +1,43 @@
+import os
+import json
+
+import boto3
+from moto import mock_s3, mock_sts
+
+import scan
+
+
+def run_scan(tmp_path, scan_file, run_timestamp, mocker):
+    mocker.patch.object(scan, "timestamp", run_timestamp)
+    scan.main(str(scan_file), ["us-east-1"], str(tmp_path / "output"), "INFO", 1, 0, None, None,
+              incremental=True)
+    with open(tmp_path / "output" / run_timestamp / "manifest.json") as f:
+        return json.load(f)
+
+
+@mock_s3
+@mock_sts
+def test_incremental_scan_only_writes_changed_results(tmp_path, aws_credentials, mocker):
+    """Test that a second incremental run writes nothing when the results are unchanged."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="first-bucket")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([{"service": "s3", "function": "list_buckets", "result_key": "Buckets"}]))
+    result_file = os.path.join("global", "s3-list_buckets.json")
+
+    first = run_scan(tmp_path, scan_file, "2024-01-01T00-00", mocker)
+    assert first["summary"]["added"] == 1
+    assert os.path.isfile(tmp_path / "output" / "2024-01-01T00-00" / result_file)
+
+    second = run_scan(tmp_path, scan_file, "2024-01-01T01-00", mocker)
+    assert second["summary"]["unchanged"] == 1
+    assert not os.path.exists(tmp_path / "output" / "2024-01-01T01-00" / result_file)
+    assert second["results"]["global/s3-list_buckets.json"]["path"] == os.path.join(
+        "..", "2024-01-01T00-00", result_file
+    )
+
+    s3.create_bucket(Bucket="second-bucket")
+    third = run_scan(tmp_path, scan_file, "2024-01-01T02-00", mocker)
+    assert third["summary"]["changed"] == 1
+    with open(tmp_path / "output" / "2024-01-01T02-00" / result_file) as f:
+        assert sorted(bucket["Name"] for bucket in json.load(f)) == ["first-bucket", "second-bucket"]
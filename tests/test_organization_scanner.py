@@ -1,6 +1,8 @@
 import pytest
 import os
-from organization_scanner import scan_organization
+import threading
+import boto3
+from organization_scanner import get_sts_client, scan_organization
 
 def test_scan_organization(mocker, tmp_path):
     """Test scanning across an organization."""
@@ -123,4 +125,137 @@ def test_scan_organization_role_assumption_failure(mocker, tmp_path):
     assert not os.path.exists(os.path.join(org_output_dir, '222222222222'))
     
     # Verify error was printed for the second account
-    assert any("Skipping account" in str(call_args) for call_args in mock_print.call_args_list)
\ No newline at end of file
+    assert any("Skipping account" in str(call_args) for call_args in mock_print.call_args_list)
+def test_scan_organization_concurrent_accounts(mocker, tmp_path):
+    """Test that accounts are scanned concurrently with --concurrent-accounts."""
+    mocker.patch(
+        'organization_scanner.get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    mocker.patch('organization_scanner.assume_role', side_effect=lambda *args: mocker.MagicMock())
+    mocker.patch('boto3.Session')
+    mocker.patch('builtins.print')
+    
+    # Both account scans must be running at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    passed = []
+    
+    def scan_account(**kwargs):
+        barrier.wait()
+        passed.append(kwargs['output_dir'])
+    
+    mock_scan_account = mocker.patch('organization_scanner.scan_account', side_effect=scan_account)
+    
+    scan_organization(
+        'OrganizationAccountAccessRole',
+        'scan_config.json',
+        ['us-east-1'],
+        str(tmp_path),
+        'INFO',
+        3,
+        1,
+        2,
+        2,
+        concurrent_accounts=2
+    )
+    
+    assert mock_scan_account.call_count == 2
+    assert len(passed) == 2
+    output_dirs = sorted(call.kwargs['output_dir'] for call in mock_scan_account.call_args_list)
+    assert output_dirs[0].endswith('111111111111') and output_dirs[1].endswith('222222222222')
+
+def test_scan_organization_logs_each_account_to_its_own_file(mocker, tmp_path):
+    """Test that concurrent account scans do not write to each other's log file, and close it when done."""
+    mocker.patch(
+        'organization_scanner.get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    mocker.patch('organization_scanner.assume_role', side_effect=lambda *args: mocker.MagicMock())
+    mocker.patch('boto3.Session')
+    mocker.patch('builtins.print')
+    
+    barrier = threading.Barrier(2, timeout=5)
+    loggers = []
+    
+    def scan_account(output_dir, log, **kwargs):
+        barrier.wait()
+        log.info("scanning %s", os.path.basename(output_dir))
+        barrier.wait()
+        loggers.append(log)
+    
+    mocker.patch('organization_scanner.scan_account', side_effect=scan_account)
+    
+    scan_organization(
+        'OrganizationAccountAccessRole',
+        'scan_config.json',
+        ['us-east-1'],
+        str(tmp_path),
+        'INFO',
+        3,
+        1,
+        2,
+        2,
+        concurrent_accounts=2
+    )
+    
+    for account_id in ['111111111111', '222222222222']:
+        log_files = list(tmp_path.glob(f'organization-*/{account_id}/aws_resources_*.log'))
+        assert len(log_files) == 1
+        lines = log_files[0].read_text().splitlines()
+        assert len(lines) == 1 and lines[0].endswith(f"scanning {account_id}")
+    assert len(loggers) == 2 and not any(log.handlers for log in loggers)
+
+def test_scan_organization_shares_one_worker_pool(mocker, tmp_path):
+    """Test that concurrent accounts share one bounded worker pool, client cache and availability index."""
+    mocker.patch(
+        'organization_scanner.get_organization_accounts',
+        return_value=[
+            {'id': '111111111111', 'name': 'Account1', 'email': 'account1@example.com'},
+            {'id': '222222222222', 'name': 'Account2', 'email': 'account2@example.com'}
+        ]
+    )
+    sessions = [mocker.MagicMock(), mocker.MagicMock()]
+    mocker.patch('organization_scanner.assume_role', side_effect=sessions)
+    mocker.patch('boto3.Session')
+    mocker.patch('builtins.print')
+    evict = mocker.patch('organization_scanner.ClientFactory.evict')
+    availability_index = mocker.patch('organization_scanner.AvailabilityIndex')
+    mock_scan_account = mocker.patch('organization_scanner.scan_account')
+    
+    scan_organization(
+        'OrganizationAccountAccessRole',
+        'scan_config.json',
+        ['us-east-1'],
+        str(tmp_path),
+        'INFO',
+        3,
+        1,
+        2,
+        2,
+        max_workers=8,
+        concurrent_accounts=2
+    )
+    
+    executors = {id(call.kwargs['executor']) for call in mock_scan_account.call_args_list}
+    factories = {id(call.kwargs['client_factory']) for call in mock_scan_account.call_args_list}
+    assert len(executors) == 1 and len(factories) == 1
+    assert mock_scan_account.call_args_list[0].kwargs['executor']._max_workers == 8
+    # The availability index is built once, for all accounts
+    availability_index.assert_called_once_with()
+    assert all(
+        call.kwargs['availability'] is availability_index.return_value for call in mock_scan_account.call_args_list
+    )
+    # Each account's clients are dropped once its scan returns
+    assert sorted(id(call.args[0]) for call in evict.call_args_list) == sorted(id(session) for session in sessions)
+
+def test_get_sts_client_uses_regional_endpoint(aws_credentials):
+    """Test that role assumptions in us-east-1 go to the regional STS endpoint, not the global one."""
+    sts_client = get_sts_client(boto3.Session(region_name='us-east-1'))
+    
+    assert sts_client.meta.endpoint_url == 'https://sts.us-east-1.amazonaws.com'
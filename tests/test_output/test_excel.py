@@ -0,0 +1,101 @@
+"""
+Tests for streaming Excel output.
+"""
+import re
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+from aws_auto_inventory.config.models import Config, ExcelConfig
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.output.excel import ExcelWriter, WorkbookWriter, sheet_title
+
+NAMESPACE = {'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def read_sheet(path, number=1):
+    """Read the cells of a worksheet as rows of values; constant_memory workbooks use inline strings."""
+    with zipfile.ZipFile(path) as workbook:
+        root = ElementTree.fromstring(workbook.read(f'xl/worksheets/sheet{number}.xml'))
+
+    rows = []
+    for row in root.iterfind('.//main:sheetData/main:row', NAMESPACE):
+        cells = {}
+        for cell in row.iterfind('main:c', NAMESPACE):
+            column = re.match(r'[A-Z]+', cell.get('r')).group()
+            text = cell.find('main:is/main:t', NAMESPACE)
+            value = cell.find('main:v', NAMESPACE)
+            cells[column] = text.text if text is not None else value.text
+        rows.append(cells)
+    return rows
+
+
+def make_result(region, result, sheet_name='EC2'):
+    return ServiceResult(
+        service='ec2',
+        function='describe_instances',
+        region=region,
+        result=result,
+        account_id='111111111111',
+        account_name='Account1',
+        inventory_name='prod',
+        sheet_name=sheet_name
+    )
+
+
+def test_workbook_writer_streams_rows_under_first_header(tmp_path):
+    """Test that rows follow the first result's header and later fields go to the Other Fields column."""
+    path = str(tmp_path / 'prod.xlsx')
+
+    with WorkbookWriter(path, sheet_names=['EC2', 'S3']) as writer:
+        writer.write(make_result('us-east-1', [{'InstanceId': 'i-1', 'State': {'Name': 'running'}}]))
+        writer.write(make_result('us-west-2', [{'InstanceId': 'i-2', 'Tags': [{'Key': 'a'}]}]))
+        writer.write(make_result('us-west-2', [{'InstanceId': '=cmd()'}]))
+        writer.write(ServiceResult('s3', 'list_buckets', 'us-east-1', None, success=False, sheet_name='S3'))
+
+    header, first, second, third = read_sheet(path)
+    assert list(header.values()) == ['Account ID', 'Account Name', 'Region', 'InstanceId', 'State.Name', 'Other Fields']
+    assert first == {'A': '111111111111', 'B': 'Account1', 'C': 'us-east-1', 'D': 'i-1', 'E': 'running'}
+    assert second['D'] == 'i-2' and 'E' not in second
+    assert second['F'] == '{"Tags": "[{\\"Key\\": \\"a\\"}]"}'
+    # Strings are never written as formulas
+    assert third['D'] == '=cmd()'
+    # The S3 worksheet exists in configuration order, without rows
+    assert read_sheet(path, 2) == []
+
+
+def test_workbook_writer_transposes_sheets(tmp_path):
+    """Test that transposed sheets have one row per field and one column per resource."""
+    path = str(tmp_path / 'prod.xlsx')
+
+    with WorkbookWriter(path, ExcelConfig(transpose=True)) as writer:
+        writer.write(make_result('us-east-1', [{'InstanceId': 'i-1'}]))
+        writer.write(make_result('us-west-2', [{'InstanceId': 'i-2', 'Type': 't3.micro'}]))
+
+    rows = read_sheet(path)
+    assert [row['A'] for row in rows] == ['Account ID', 'Account Name', 'Region', 'InstanceId', 'Type']
+    assert rows[3] == {'A': 'InstanceId', 'B': 'i-1', 'C': 'i-2'}
+    assert rows[4] == {'A': 'Type', 'C': 't3.micro'}
+
+
+def test_excel_writer_opens_one_workbook_per_inventory(tmp_path):
+    """Test that results are routed to the workbook of their inventory with its Excel options."""
+    config = Config.from_dict({
+        'inventories': [
+            {'name': 'prod', 'excel': {'transpose': True}, 'sheets': [
+                {'name': 'EC2', 'service': 'ec2', 'function': 'describe_instances'}
+            ]}
+        ]
+    })
+
+    with ExcelWriter(str(tmp_path), config) as writer:
+        writer.write(make_result('us-east-1', [{'InstanceId': 'i-1'}]))
+
+    assert writer.paths == [str(tmp_path / 'prod.xlsx')]
+    assert read_sheet(writer.paths[0])[3] == {'A': 'InstanceId', 'B': 'i-1'}
+
+
+def test_sheet_title_is_valid_and_unique():
+    """Test that sheet names are cleaned, shortened to 31 characters and deduplicated."""
+    assert sheet_title('EC2/Instances: [prod]', []) == 'EC2_Instances_ _prod_'
+    assert sheet_title('x' * 40, ['x' * 31]) == 'x' * 27 + ' (2)'
+    assert sheet_title('ec2', ['EC2']) == 'ec2 (2)'
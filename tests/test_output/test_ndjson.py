@@ -0,0 +1,92 @@
+"""
+Tests for streaming NDJSON output.
+"""
+import io
+import gzip
+import json
+import datetime
+
+import pytest
+
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.output import ndjson
+from aws_auto_inventory.output.ndjson import NDJSONWriter, dumps
+
+
+def test_ndjson_writer_writes_one_record_per_line():
+    """Test that each result is written as a self-contained JSON line."""
+    stream = io.StringIO()
+    writer = NDJSONWriter(stream)
+
+    writer.write(ServiceResult(
+        service='ec2',
+        function='describe_instances',
+        region='us-east-1',
+        result=[{'LaunchTime': datetime.datetime(2024, 1, 1)}],
+        account_id='111111111111',
+        inventory_name='test-inventory',
+        sheet_name='EC2'
+    ))
+    writer.write(ServiceResult(
+        service='s3', function='list_buckets', region='us-east-1', result=None, success=False, error='denied'
+    ))
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first['account_id'] == '111111111111'
+    assert first['sheet_name'] == 'EC2'
+    assert first['result'] == [{'LaunchTime': '2024-01-01T00:00:00'}]
+    assert second['success'] is False and second['error'] == 'denied'
+    assert writer.count == 2
+
+
+def test_ndjson_writer_open_file(tmp_path):
+    """Test that a writer opened for a path closes its file."""
+    path = tmp_path / 'results.ndjson'
+
+    with NDJSONWriter.open(str(path)) as writer:
+        writer.write(ServiceResult(service='s3', function='list_buckets', region='us-east-1', result=[]))
+
+    assert writer.stream.closed
+    assert json.loads(path.read_text())['service'] == 's3'
+
+
+def test_dumps_matches_json_fallback(mocker):
+    """Test that orjson and the json module serialize datetimes, bytes and other values alike."""
+    pytest.importorskip('orjson')
+    value = {
+        'Created': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        'Day': datetime.date(2024, 1, 2),
+        'Blob': b'key',
+        'Size': 1,
+        1: 'non-string key',
+    }
+
+    fast = dumps(value)
+    mocker.patch.object(ndjson, 'orjson', None)
+    fallback = dumps(value)
+
+    assert json.loads(fast) == json.loads(fallback) == {
+        'Created': '2024-01-01T00:00:00+00:00',
+        'Day': '2024-01-02',
+        'Blob': 'a2V5',
+        'Size': 1,
+        '1': 'non-string key',
+    }
+
+
+def test_ndjson_writer_open_gzip(tmp_path):
+    """Test that a compressed stream file holds one line per result."""
+    path = tmp_path / 'results.ndjson.gz'
+
+    with NDJSONWriter.open(str(path), 'gzip') as writer:
+        for region in ['us-east-1', 'us-west-2']:
+            writer.write(ServiceResult(service='s3', function='list_buckets', region=region, result=[]))
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line)['region'] for line in f] == ['us-east-1', 'us-west-2']
+
+
+def test_open_compressed_rejects_unknown_format(tmp_path):
+    """Test that unsupported compression formats are rejected."""
+    with pytest.raises(ValueError):
+        ndjson.open_compressed(str(tmp_path / 'results.ndjson.bz2'), 'bz2')
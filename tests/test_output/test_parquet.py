@@ -0,0 +1,143 @@
+"""
+Tests for Parquet output.
+"""
+import os
+import datetime
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.dataset
+
+from aws_auto_inventory.core.organization import AccountResult
+from aws_auto_inventory.core.region import RegionResult
+from aws_auto_inventory.core.scan_engine import ScanResult
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.output.parquet import ParquetWriter, flatten_record
+from aws_auto_inventory.output.processor import OutputProcessor
+
+
+def make_result(region, result, account_id='111111111111', sheet_name='EC2 Instances'):
+    return ServiceResult(
+        service='ec2',
+        function='describe_instances',
+        region=region,
+        result=result,
+        account_id=account_id,
+        inventory_name='prod',
+        sheet_name=sheet_name
+    )
+
+
+def test_flatten_record_uses_column_paths():
+    """Test that nested dictionaries become dotted columns and lists become JSON text."""
+    assert flatten_record({'State': {'Name': 'running', 'Code': 16}, 'Tags': [{'Key': 'a'}], 'Empty': {}}) == {
+        'State.Name': 'running',
+        'State.Code': 16,
+        'Tags': '[{"Key": "a"}]',
+        'Empty': '{}',
+    }
+
+
+def test_parquet_writer_partitions_and_reuses_schema(tmp_path):
+    """Test that results land in Hive partitions and share the schema of their API call."""
+    launched = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    writer = ParquetWriter(str(tmp_path))
+
+    first = writer.write(make_result('us-east-1', [
+        {'InstanceId': 'i-1', 'CpuCount': 2, 'LaunchTime': launched, 'State': {'Name': 'running'}}
+    ]))
+    second = writer.write(make_result('us-west-2', [
+        {'InstanceId': 'i-2', 'CpuCount': 2.5, 'State': {'Name': 'stopped'}},
+        {'InstanceId': 'i-3', 'CpuCount': 'many'},
+    ]))
+
+    assert first == str(
+        tmp_path / 'inventory=prod' / 'account=111111111111' / 'region=us-east-1' / 'sheet=EC2%20Instances'
+        / 'part-0.parquet'
+    )
+    assert writer.write(make_result('eu-west-1', [])) is None
+    assert writer.write(make_result('eu-west-1', None)) is None
+
+    table = pa.parquet.read_table(second)
+    # Columns of earlier results are kept, and conflicting types fall back to strings
+    assert table.column_names == ['InstanceId', 'CpuCount', 'LaunchTime', 'State.Name']
+    assert table.column('CpuCount').to_pylist() == ['2.5', 'many']
+    assert table.column('LaunchTime').to_pylist() == [None, None]
+
+    dataset = pa.dataset.dataset(str(tmp_path), format='parquet', partitioning='hive')
+    rows = dataset.to_table(columns=['InstanceId', 'region', 'sheet']).to_pylist()
+    assert {(row['InstanceId'], row['region'], row['sheet']) for row in rows} == {
+        ('i-1', 'us-east-1', 'EC2 Instances'),
+        ('i-2', 'us-west-2', 'EC2 Instances'),
+        ('i-3', 'us-west-2', 'EC2 Instances'),
+    }
+
+
+def test_parquet_dataset_reads_whole_after_schema_changes(tmp_path, mocker):
+    """Test that files written before a later result widens a type or adds a column are rewritten once at close."""
+    writer = ParquetWriter(str(tmp_path))
+    rewrite = mocker.spy(writer, '_rewrite')
+
+    writer.write(make_result('eu-west-1', [{'InstanceId': 'i-1', 'Size': 1}]))
+    writer.write(make_result('us-west-2', [{'InstanceId': 'i-2', 'Size': 2, 'Zone': 'b'}]))
+    writer.write(make_result('us-east-1', [{'InstanceId': 'i-3', 'Size': 'big'}]))
+    writer.write(make_result('us-east-2', [{'InstanceId': 'i-4', 'Size': 'small'}]))
+    assert rewrite.call_count == 0
+
+    writer.close()
+    writer.close()
+
+    # The last two files already have the final schema
+    assert sorted(call.args[0].split(os.sep)[-3] for call in rewrite.call_args_list) == [
+        'region=eu-west-1', 'region=us-west-2'
+    ]
+
+    for table in (
+        pa.dataset.dataset(str(tmp_path), format='parquet', partitioning='hive').to_table(),
+        pa.parquet.read_table(str(tmp_path)),
+    ):
+        rows = {row['InstanceId']: row for row in table.to_pylist()}
+        assert [(rows[key]['Size'], rows[key]['Zone'], rows[key]['region']) for key in sorted(rows)] == [
+            ('1', None, 'eu-west-1'),
+            ('2', 'b', 'us-west-2'),
+            ('big', None, 'us-east-1'),
+            ('small', None, 'us-east-2'),
+        ]
+
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+def test_parquet_single_account_scan_leaves_out_account(tmp_path):
+    """Test that results without an account ID are readable with Hive partitioning."""
+    writer = ParquetWriter(str(tmp_path))
+
+    path = writer.write(make_result('us-east-1', [{'InstanceId': 'i-1'}], account_id=None))
+
+    assert path == str(tmp_path / 'inventory=prod' / 'region=us-east-1' / 'sheet=EC2%20Instances' / 'part-0.parquet')
+    rows = pa.dataset.dataset(str(tmp_path), format='parquet', partitioning='hive').to_table().to_pylist()
+    assert rows == [{'InstanceId': 'i-1', 'inventory': 'prod', 'region': 'us-east-1', 'sheet': 'EC2 Instances'}]
+
+
+def test_output_processor_writes_json_and_parquet(tmp_path):
+    """Test that the processor writes one JSON document per inventory and a Parquet dataset."""
+    results = [
+        ScanResult('prod', account_results=[
+            AccountResult('111111111111', 'Account1', [
+                RegionResult('us-east-1', [make_result('us-east-1', [{'InstanceId': 'i-1'}])])
+            ]),
+            AccountResult('222222222222', 'Account2', [], success=False, error='denied'),
+        ])
+    ]
+
+    written = OutputProcessor().process(results, str(tmp_path), ['json', 'parquet'])
+
+    assert written['json'] == [str(tmp_path / 'prod.json')]
+    assert len(written['parquet']) == 1
+    assert 'account=111111111111' in written['parquet'][0]
+
+
+def test_output_processor_rejects_unknown_format(tmp_path):
+    """Test that unsupported formats are rejected before anything is written."""
+    with pytest.raises(ValueError):
+        OutputProcessor().process([], str(tmp_path), ['csv'])
@@ -0,0 +1,105 @@
+"""
+Tests for the SQLite inventory index.
+"""
+import io
+import json
+
+import pytest
+
+from aws_auto_inventory.cli import parse_query_args, run_query
+from aws_auto_inventory.core.service import ServiceResult
+from aws_auto_inventory.output.sqlite import InventoryIndex, SQLiteWriter, resource_identifiers
+
+
+def make_result(service, function, result, account_id='111111111111', region='us-east-1'):
+    return ServiceResult(
+        service=service,
+        function=function,
+        region=region,
+        result=result,
+        account_id=account_id,
+        account_name='Account1',
+        inventory_name='prod',
+        sheet_name=function
+    )
+
+
+def write_index(path):
+    with SQLiteWriter(str(path), batch_size=2) as writer:
+        writer.write(make_result('ec2', 'describe_instances', [
+            {'ImageId': 'ami-1', 'InstanceId': 'i-abc'},
+            {'ImageId': 'ami-1', 'InstanceId': 'i-def'},
+        ]))
+        writer.write(make_result('s3', 'list_buckets', [{'Name': 'logs'}, {'Name': 'data'}], account_id='222222222222'))
+        writer.write(make_result('iam', 'list_roles', [
+            {'RoleName': 'admin', 'RoleId': 'AROA1', 'Arn': 'arn:aws:iam::111111111111:role/admin'}
+        ]))
+        writer.write(make_result('ec2', 'describe_vpcs', None, region='us-west-2'))
+    return writer
+
+
+def test_resource_identifiers_follow_the_resource_name():
+    """Test that IDs and ARNs are taken from keys named after the resource, not other IDs."""
+    assert resource_identifiers({'OwnerId': '1', 'GroupId': 'sg-1'}, 'describe_security_groups') == ('sg-1', None)
+    assert resource_identifiers(
+        {'FunctionName': 'f', 'FunctionArn': 'arn:f', 'KMSKeyArn': 'arn:k'}, 'list_functions'
+    ) == ('f', 'arn:f')
+    assert resource_identifiers({'DBInstanceIdentifier': 'db', 'DBInstanceArn': 'arn:db'}, 'describe_db_instances') == (
+        'db', 'arn:db'
+    )
+    assert resource_identifiers('bucket-name', 'list_bucket_names') == ('bucket-name', None)
+
+
+def test_sqlite_writer_indexes_every_resource(tmp_path):
+    """Test that each resource becomes a row that can be found by ID, ARN and columns."""
+    path = tmp_path / 'inventory.db'
+    writer = write_index(path)
+    assert writer.count == 5
+
+    with InventoryIndex(str(path)) as index:
+        instance, = index.find(resource_id='i-abc')
+        assert (instance['account_id'], instance['service'], instance['body']['ImageId']) == (
+            '111111111111', 'ec2', 'ami-1'
+        )
+        role, = index.find(arn='arn:aws:iam::111111111111:role/admin')
+        assert role['resource_id'] == 'AROA1'
+        assert sorted(row['resource_id'] for row in index.find(account_id='222222222222')) == ['data', 'logs']
+        assert len(list(index.find(limit=1))) == 1
+        assert list(index.execute(
+            "SELECT resource_id FROM resources WHERE json_extract(body, '$.Name') = ?", ('logs',)
+        )) == [{'resource_id': 'logs'}]
+        plan = ' '.join(row['detail'] for row in index.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM resources WHERE resource_id = 'i-abc'"
+        ))
+        assert 'resources_resource_id' in plan
+        with pytest.raises(ValueError):
+            list(index.find(body='x'))
+
+    # A new run replaces the index instead of adding duplicates
+    write_index(path)
+    with InventoryIndex(str(path)) as index:
+        assert len(list(index.find())) == 5
+
+
+def test_query_subcommand_prints_matches(tmp_path):
+    """Test that the query subcommand prints matching resources as a table or JSON lines."""
+    path = tmp_path / 'inventory.db'
+    write_index(path)
+
+    table = io.StringIO()
+    assert run_query(parse_query_args(['--database', str(path), '--id', 'i-abc']), table) == 0
+    assert table.getvalue().splitlines() == [
+        'account_id\tregion\tservice\tfunction\tresource_id\tarn',
+        '111111111111\tus-east-1\tec2\tdescribe_instances\ti-abc\t',
+    ]
+
+    lines = io.StringIO()
+    assert run_query(parse_query_args([
+        '--database', str(path), '--output', 'ndjson', '--sql', 'SELECT account_id, COUNT(*) AS n FROM resources GROUP BY 1'
+    ]), lines) == 0
+    assert [json.loads(line) for line in lines.getvalue().splitlines()] == [
+        {'account_id': '111111111111', 'n': 3}, {'account_id': '222222222222', 'n': 2}
+    ]
+
+    assert run_query(parse_query_args(['--database', str(tmp_path / 'missing.db')]), io.StringIO()) == 1
+    assert run_query(parse_query_args(['--database', str(path), '--sql', 'DELETE FROM resources']), io.StringIO()) == 1
@@ -0,0 +1,33 @@
+import gzip
+import json
+
+import boto3
+from moto import mock_s3, mock_sts
+
+import scan
+
+
+@mock_s3
+@mock_sts
+def test_ndjson_output_writes_one_resource_per_line(tmp_path, aws_credentials, mocker):
+    """Test that the ndjson format writes each bucket as a compressed line with its context columns."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="first-bucket")
+    s3.create_bucket(Bucket="second-bucket")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([{"service": "s3", "function": "list_buckets", "result_key": "Buckets"}]))
+    mocker.patch.object(scan, "timestamp", "2024-01-01T00-00")
+
+    scan.main(str(scan_file), ["us-east-1"], str(tmp_path / "output"), "INFO", 1, 0, None, None,
+              output_format="ndjson", compression="gzip")
+
+    path = tmp_path / "output" / "2024-01-01T00-00" / "global" / "s3-list_buckets.ndjson.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+
+    assert sorted(row["resource"]["Name"] for row in rows) == ["first-bucket", "second-bucket"]
+    assert {(row["account_id"], row["region"], row["service"], row["function"]) for row in rows} == {
+        ("123456789012", "global", "s3", "list_buckets")
+    }
+    # Datetimes are written as ISO 8601 strings
+    assert "T" in rows[0]["resource"]["CreationDate"]
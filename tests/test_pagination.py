@@ -0,0 +1,77 @@
+import pytest
+import boto3
+from botocore.stub import Stubber
+from scan import paginate_with_retry, _get_service_data
+
+
+@pytest.fixture
+def ec2_client(aws_credentials):
+    """Return a real EC2 client for stubbing."""
+    return boto3.client('ec2', region_name='us-east-1')
+
+
+def test_paginate_with_retry_all_pages(ec2_client):
+    """Test that every page of a paginated operation is returned."""
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        pages = list(paginate_with_retry(ec2_client, 'describe_instances', None, 3, 1)())
+
+    assert [page['Reservations'][0]['ReservationId'] for page in pages] == ['r-1', 'r-2']
+
+
+def test_paginate_with_retry_retries_only_failed_page(ec2_client, mocker):
+    """Test that a throttle on a later page does not restart from the first page."""
+    mocker.patch('scan.time.sleep')
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_client_error('describe_instances', service_error_code='Throttling', expected_params={'NextToken': 'page2'})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        pages = list(paginate_with_retry(ec2_client, 'describe_instances', None, 3, 1)())
+        stubber.assert_no_pending_responses()
+
+    assert len(pages) == 2
+
+
+def test_paginate_with_retry_raises_when_unpaginated_call_fails(ec2_client, mocker):
+    """Test that an operation without a paginator raises, rather than yielding None, once its retries run out."""
+    mocker.patch('scan.time.sleep')
+
+    with Stubber(ec2_client) as stubber:
+        for _ in range(3):
+            stubber.add_client_error('describe_account_attributes', service_error_code='Throttling')
+
+        with pytest.raises(RuntimeError, match='describe_account_attributes failed after 3 attempts'):
+            list(paginate_with_retry(ec2_client, 'describe_account_attributes', None, 3, 1)())
+
+
+def test_get_service_data_merges_pages(ec2_client, mock_log, mocker):
+    """Test that result_key is applied per page and the pages are merged."""
+    session = mocker.MagicMock()
+    session.client.return_value = ec2_client
+    service = {"service": "ec2", "function": "describe_instances", "result_key": "Reservations"}
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-2'}]}, {'NextToken': 'page2'})
+
+        result = _get_service_data(session, 'us-east-1', service, mock_log, 3, 1)
+
+    assert [reservation['ReservationId'] for reservation in result['result']] == ['r-1', 'r-2']
+
+
+def test_get_service_data_pagination_disabled(ec2_client, mock_log, mocker):
+    """Test that only the first page is fetched when pagination is disabled."""
+    session = mocker.MagicMock()
+    session.client.return_value = ec2_client
+    service = {"service": "ec2", "function": "describe_instances", "result_key": "Reservations", "paginate": False}
+
+    with Stubber(ec2_client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'ReservationId': 'r-1'}], 'NextToken': 'page2'}, {})
+
+        result = _get_service_data(session, 'us-east-1', service, mock_log, 3, 1)
+
+    assert len(result['result']) == 1
@@ -0,0 +1,38 @@
+import os
+import json
+
+import boto3
+from moto import mock_s3, mock_sts
+
+import scan
+from aws_auto_inventory.core.journal import ScanJournal
+
+
+@mock_s3
+@mock_sts
+def test_resume_skips_journaled_tasks(tmp_path, aws_credentials, mocker):
+    """Test that a resumed scan only runs the tasks missing from the journal of the interrupted run."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="first-bucket")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([
+        {"service": "s3", "function": "list_buckets", "result_key": "Buckets"},
+        {"service": "sts", "function": "get_caller_identity"},
+    ]))
+    mocker.patch.object(scan, "timestamp", "2024-01-01T00-00")
+    run_dir = tmp_path / "output" / "2024-01-01T00-00"
+
+    # An interrupted run that only completed the S3 task
+    with ScanJournal.open(str(run_dir)) as journal:
+        journal.record("global/s3-list_buckets.json", region="global", service="s3",
+                       function="list_buckets", status="stored")
+
+    get_service_data = mocker.spy(scan, "_get_service_data")
+    scan.main(str(scan_file), ["us-east-1"], str(tmp_path / "output"), "INFO", 1, 0, None, None,
+              resume_dir=str(run_dir))
+
+    assert [call.args[2]["service"] for call in get_service_data.call_args_list] == ["sts"]
+    assert os.path.isfile(run_dir / "us-east-1" / "sts-get_caller_identity.json")
+    assert ScanJournal.is_run_complete(str(run_dir))
+    with ScanJournal.open(str(run_dir), resume=True) as journal:
+        assert "us-east-1/sts-get_caller_identity.json" in journal
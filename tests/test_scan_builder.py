@@ -0,0 +1,61 @@
+import json
+
+import botocore.session
+import pytest
+
+import scan_builder
+
+
+@pytest.fixture
+def no_clients(mocker):
+    """Fail any attempt to create an AWS client."""
+    return mocker.patch.object(
+        botocore.session.Session, "create_client", side_effect=AssertionError("client created")
+    )
+
+
+def read_sheet(path):
+    return {entry["function"]: entry for entry in json.loads(path.read_text())}
+
+
+def test_build_service_sheets_from_models(tmp_path, no_clients):
+    """Test that scan files carry pagination, parameter and endpoint metadata without creating clients."""
+    counts = scan_builder.build_service_sheets(str(tmp_path), ["ec2", "iam"], max_workers=2)
+
+    ec2 = read_sheet(tmp_path / "ec2.json")
+    iam = read_sheet(tmp_path / "iam.json")
+    assert counts == {"ec2": len(ec2), "iam": len(iam)}
+
+    assert ec2["describe_instances"] == {
+        "service": "ec2",
+        "function": "describe_instances",
+        "can_paginate": True,
+        "page_size_parameter": "MaxResults",
+        "max_page_size": None,
+        "required_parameters": [],
+        "global": False,
+    }
+    assert ec2["describe_regions"]["can_paginate"] is False
+    assert ec2["describe_regions"]["page_size_parameter"] is None
+    assert iam["list_users"]["page_size_parameter"] == "MaxItems"
+    assert iam["list_users"]["max_page_size"] == 1000
+    assert iam["list_users"]["global"] is True
+
+    # Only read-only operations, and no client helpers such as get_paginator
+    assert all(function.startswith(("get_", "describe_", "list_")) for function in ec2)
+    assert "get_paginator" not in ec2
+    assert "run_instances" not in ec2
+
+
+def test_required_parameters_excluded_by_default(tmp_path, no_clients):
+    """Test that functions with required parameters are only written on request."""
+    scan_builder.build_service_sheets(str(tmp_path / "default"), ["ec2"])
+    scan_builder.build_service_sheets(str(tmp_path / "all"), ["ec2"], include_required=True)
+
+    default = read_sheet(tmp_path / "default" / "ec2.json")
+    everything = read_sheet(tmp_path / "all" / "ec2.json")
+
+    assert "describe_image_attribute" not in default
+    assert sorted(everything["describe_image_attribute"]["required_parameters"]) == ["Attribute", "ImageId"]
+    assert all(not entry["required_parameters"] for entry in default.values())
+    assert set(default) < set(everything)
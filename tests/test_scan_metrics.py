@@ -0,0 +1,34 @@
+import json
+
+import boto3
+from moto import mock_s3, mock_sts
+
+import scan
+
+
+@mock_s3
+@mock_sts
+def test_scan_writes_metrics(tmp_path, aws_credentials, mocker):
+    """Test that a scan writes a run summary and a Prometheus text file with one row per call."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="first-bucket")
+    s3.create_bucket(Bucket="second-bucket")
+    scan_file = tmp_path / "scan.json"
+    scan_file.write_text(json.dumps([{"service": "s3", "function": "list_buckets", "result_key": "Buckets"}]))
+    mocker.patch.object(scan, "timestamp", "2024-01-01T00-00")
+    textfile = tmp_path / "textfile" / "inventory.prom"
+
+    scan.main(str(scan_file), ["us-east-1"], str(tmp_path / "output"), "INFO", 1, 0, None, None,
+              metrics_textfile=str(textfile), metrics_interval=0)
+
+    summary = json.loads((tmp_path / "output" / "2024-01-01T00-00" / "metrics.json").read_text())
+    assert len(summary["calls"]) == 1
+    row = summary["calls"][0]
+    assert (row["account_id"], row["region"], row["service"], row["function"]) == (
+        "123456789012", "global", "s3", "list_buckets"
+    )
+    assert (row["calls"], row["requests"], row["pages"], row["errors"], row["resources"]) == (1, 1, 1, 0, 2)
+    assert row["response_bytes"] > 0
+    assert row["latency"]["count"] == 1
+
+    assert 'service="s3",function="list_buckets"} 2' in textfile.read_text()
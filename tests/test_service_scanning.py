@@ -3,7 +3,8 @@ import os
 import json
 import boto3
 from moto import mock_s3, mock_ec2
-from scan import process_region
+from aws_auto_inventory.core.metrics import ScanMetrics
+from scan import _get_service_data
 
 @pytest.fixture
 def setup_aws_resources(mock_boto):
@@ -15,51 +16,56 @@ def setup_aws_resources(mock_boto):
     
     # Create EC2 instances
     ec2_client = mock_boto.client('ec2', region_name='us-east-1')
-    ec2_client.run_instances(ImageId='ami-12345678', MinCount=1, MaxCount=2)
+    ec2_client.run_instances(ImageId='ami-12345678', MinCount=2, MaxCount=2)
     
     return mock_boto
 
-def test_process_region_s3(setup_aws_resources, aws_credentials, mock_log):
-    """Test processing a region for S3 resources."""
+def test_get_service_data_s3(setup_aws_resources, aws_credentials, mock_log):
+    """Test scanning S3 resources in a region."""
     session = setup_aws_resources.Session()
     
-    # Define services to scan
-    services = [{"service": "s3", "function": "list_buckets"}]
+    # Define the service to scan
+    service = {"service": "s3", "function": "list_buckets", "result_key": "Buckets"}
     
-    # Process the region
-    results = process_region('us-east-1', services, session, mock_log, 3, 1, None)
+    # Scan the service
+    result = _get_service_data(session, 'us-east-1', service, mock_log, 3, 1)
     
-    # Verify results
-    assert len(results) == 1
-    assert results[0]['region'] == 'us-east-1'
-    assert results[0]['service'] == 's3'
-    assert results[0]['function'] == 'list_buckets'
-    assert len(results[0]['result']) >= 2  # At least our 2 test buckets
+    # Verify the result
+    assert result['region'] == 'us-east-1'
+    assert result['service'] == 's3'
+    assert result['function'] == 'list_buckets'
+    assert len(result['result']) >= 2  # At least our 2 test buckets
     
     # Verify bucket names
-    bucket_names = [bucket['Name'] for bucket in results[0]['result']]
+    bucket_names = [bucket['Name'] for bucket in result['result']]
     assert 'test-bucket-1' in bucket_names
     assert 'test-bucket-2' in bucket_names
 
-def test_process_region_ec2(setup_aws_resources, aws_credentials, mock_log):
-    """Test processing a region for EC2 resources."""
+def test_get_service_data_ec2(setup_aws_resources, aws_credentials, mock_log):
+    """Test scanning EC2 resources in a region, recording the call in the scan metrics."""
     session = setup_aws_resources.Session()
+    metrics = ScanMetrics()
     
-    # Define services to scan
-    services = [{"service": "ec2", "function": "describe_instances", "result_key": "Reservations"}]
+    # Define the service to scan
+    service = {"service": "ec2", "function": "describe_instances", "result_key": "Reservations"}
     
-    # Process the region
-    results = process_region('us-east-1', services, session, mock_log, 3, 1, None)
+    # Scan the service
+    result = _get_service_data(
+        session, 'us-east-1', service, mock_log, 3, 1,
+        metrics=metrics.call(None, 'us-east-1', 'ec2', 'describe_instances')
+    )
     
-    # Verify results
-    assert len(results) == 1
-    assert results[0]['region'] == 'us-east-1'
-    assert results[0]['service'] == 'ec2'
-    assert results[0]['function'] == 'describe_instances'
-    assert len(results[0]['result']) >= 1  # At least one reservation
+    # Verify the result
+    assert result['region'] == 'us-east-1'
+    assert result['service'] == 'ec2'
+    assert result['function'] == 'describe_instances'
+    assert len(result['result']) >= 1  # At least one reservation
     
     # Verify instances
     instances = []
-    for reservation in results[0]['result']:
+    for reservation in result['result']:
         instances.extend(reservation['Instances'])
-    assert len(instances) >= 2  # We created 2 instances
\ No newline at end of file
+    assert len(instances) >= 2  # We created 2 instances
+    
+    row = metrics.rows()[0]
+    assert (row['calls'], row['pages'], row['errors']) == (1, 1, 0)
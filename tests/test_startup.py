@@ -0,0 +1,66 @@
+"""
+Tests for the start-up cost of the command-line entry points.
+
+Each check runs in a fresh interpreter, since the test session has already
+imported everything.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load once a command needs them
+HEAVY_MODULES = ("boto3", "botocore", "jq", "jmespath", "pydantic", "requests", "yaml", "pyarrow", "xlsxwriter")
+
+# Cumulative import time allowed for each entry point, in microseconds. Loading
+# boto3 alone takes well over this.
+IMPORT_TIME_BUDGET_US = 150000
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=60, check=True
+    )
+
+
+def import_time(module):
+    """Get the cumulative import time of a module in a fresh interpreter, in microseconds."""
+    stderr = run_python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise AssertionError(f"No import time reported for {module}")
+
+
+@pytest.mark.parametrize("module", ["aws_auto_inventory.cli", "scan"])
+def test_entry_point_does_not_import_heavy_modules(module):
+    """Test that importing an entry point leaves boto3, pydantic and the other heavy modules unloaded."""
+    code = f"import sys, {module}; print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+
+    assert run_python("-c", code).stdout.split() == []
+
+
+@pytest.mark.parametrize("module", ["aws_auto_inventory.cli", "scan"])
+def test_entry_point_import_time_within_budget(module):
+    """Test that an entry point imports within the start-up budget."""
+    # The best of a few runs keeps a busy machine from failing the test
+    elapsed = min(import_time(module) for _ in range(3))
+
+    assert elapsed < IMPORT_TIME_BUDGET_US, f"Importing {module} took {elapsed / 1000:.0f} ms"
+
+
+@pytest.mark.parametrize("command", [
+    ["-m", "aws_auto_inventory.cli", "--help"],
+    ["-m", "aws_auto_inventory.cli", "query", "--help"],
+    ["scan.py", "--help"],
+])
+def test_help_does_not_import_heavy_modules(command):
+    """Test that --help prints without loading boto3, pydantic and the other heavy modules."""
+    stderr = run_python("-X", "importtime", *command).stderr
+    imported = {line.split("|")[2].strip() for line in stderr.splitlines() if line.count("|") == 2}
+
+    assert imported.isdisjoint(HEAVY_MODULES)